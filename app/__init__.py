@@ -75,11 +75,25 @@ def create_app():
     # Use environment SECRET_KEY if available, otherwise fallback to dev key
     app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev-secret-key-change-this-in-prod')
 
+    # 표지 이미지 저장소: 'db'(cover_blob 테이블, 기본) | 'fs'(static/book_covers 아래 내용 해시 파일)
+    app.config['COVER_STORAGE'] = os.environ.get('COVER_STORAGE', 'db')
+    app.config['COVER_STORAGE_PATH'] = covers_path
+    # 표지 사진 분석기: 'gemini'(기본) | 'stub'(오프라인 가짜 응답, app/cover_ingest.py)
+    app.config['COVER_ANALYZER'] = os.environ.get('COVER_ANALYZER', 'gemini')
+    # 워커가 가져가지 않는 작업을 /admin/jobs 요청에서 대신 처리할지 (워커 없는 배포의 대체 경로, app/jobs.py)
+    app.config['JOB_INLINE_FALLBACK'] = os.environ.get('JOB_INLINE_FALLBACK', '1').lower() not in ('0', 'false', 'no')
+
     db.init_app(app)
 
     # Import and register routes
     from app.routes import main
     app.register_blueprint(main)
+
+    # flush 시점 리스너(평점 요약, 카탈로그 변경 로그, 비슷한 도서 목록, 동시 구매 횟수) 등록 + flask CLI 관리 명령
+    from app import ratings, catalog_changes, similarity, text_similarity, co_purchase  # noqa: F401
+    from app import tasks  # noqa: F401  백그라운드 작업 처리 함수 등록 (app/jobs.py)
+    from app.commands import register_commands
+    register_commands(app)
     
     # Create DB tables if they don't exist
     with app.app_context():
@@ -110,6 +124,43 @@ def create_app():
                             conn.commit()
                         print("Migration complete: 'genre' column added.")
 
+                    book_new_columns = {
+                        'rating_count': "INTEGER NOT NULL DEFAULT 0",
+                        'rating_avg':   "FLOAT NOT NULL DEFAULT 0",
+                        'rating_hist':  "VARCHAR(64) NOT NULL DEFAULT '0,0,0,0,0,0'",
+                        'genre_mask':   "INTEGER NOT NULL DEFAULT 0",
+                        'image_hash':   "VARCHAR(16)",
+                        'cover_widths': "VARCHAR(32)",
+                        'note_truncated': "BOOLEAN NOT NULL DEFAULT TRUE",
+                        'isbn':         "VARCHAR(13)",
+                    }
+                    added_book_columns = []
+                    for col_name, col_def in book_new_columns.items():
+                        if col_name not in columns:
+                            print(f"Migrating: Adding '{col_name}' column to 'book' table...")
+                            with db.engine.connect() as conn:
+                                conn.execute(db.text(f'ALTER TABLE book ADD COLUMN {col_name} {col_def}'))
+                                conn.commit()
+                            added_book_columns.append(col_name)
+                            print(f"Migration complete: '{col_name}' column added.")
+                    if 'rating_count' in added_book_columns:
+                        from app.ratings import backfill_all
+                        print(f"Backfilled rating summaries for {backfill_all()} books.")
+                    if 'image_hash' in added_book_columns:
+                        from app.covers import backfill_hashes
+                        print(f"Backfilled cover hashes for {backfill_hashes()} books.")
+                    if 'note_truncated' in added_book_columns:
+                        from app.inventory import backfill_note_flags
+                        print(f"Backfilled curator-note flags for {backfill_note_flags()} books.")
+
+                    # cover_blob.hash: 반응형 변형 키("<해시>-<너비>.<확장자>")를 담도록 16 → 40자
+                    blob_hash = next(col for col in inspector.get_columns('cover_blob') if col['name'] == 'hash')
+                    if db.engine.dialect.name == 'postgresql' and getattr(blob_hash['type'], 'length', 40) < 40:
+                        print("Migrating: Widening 'cover_blob.hash' to VARCHAR(40)...")
+                        with db.engine.connect() as conn:
+                            conn.execute(db.text("ALTER TABLE cover_blob ALTER COLUMN hash TYPE VARCHAR(40)"))
+                            conn.commit()
+
                     user_columns = [col['name'] for col in inspector.get_columns('user')]
                     if 'preferred_genres' not in user_columns:
                         print("Migrating: Adding 'preferred_genres' column to 'user' table...")
@@ -118,6 +169,16 @@ def create_app():
                             conn.commit()
                         print("Migration complete: 'preferred_genres' column added.")
 
+                    if 'preferred_genre_mask' not in user_columns:
+                        print("Migrating: Adding 'preferred_genre_mask' column to 'user' table...")
+                        with db.engine.connect() as conn:
+                            conn.execute(db.text("ALTER TABLE \"user\" ADD COLUMN preferred_genre_mask INTEGER NOT NULL DEFAULT 0"))
+                            conn.commit()
+                        print("Migration complete: 'preferred_genre_mask' column added.")
+                    if 'genre_mask' in added_book_columns or 'preferred_genre_mask' not in user_columns:
+                        from app.genres import backfill_masks
+                        print("Backfilled genre masks for %d books, %d members." % backfill_masks())
+
                     if 'order' in inspector.get_table_names():
                         order_columns = [col['name'] for col in inspector.get_columns('order')]
                         order_new_columns = {
@@ -137,9 +198,24 @@ def create_app():
                                     conn.execute(db.text(f'ALTER TABLE "order" ADD COLUMN {col_name} {col_def}'))
                                     conn.commit()
                                 print(f"Migration complete: '{col_name}' column added.")
+
+                    # create_all()은 이미 존재하는 테이블에 새로 정의된 인덱스를 추가하지 않으므로 직접 생성
+                    for index in Book.__table__.indexes:
+                        index.create(bind=db.engine, checkfirst=True)
+                    from app.models import Order
+                    for index in Order.__table__.indexes:
+                        index.create(bind=db.engine, checkfirst=True)
+
+                    # 비슷한 도서·소개글 유사도·함께 산 책 목록의 전체 계산은 무거워서(O(N²)) 시작 시 돌리지 않는다.
+                    # 테이블을 처음 만든 뒤 한 번 `flask catalog rebuild-similarity` / `rebuild-text-similarity` /
+                    # `rebuild-co-purchases`를 실행하고, 이후는 도서 저장·주문 시 갱신된다.
                 except Exception as e:
                     print(f"Migration check failed (safe to ignore if app works): {e}")
                 # --------------------------------------------------------
+
+                # 스토어 검색용 전문 검색 인덱스 (SQLite FTS5 / PostgreSQL tsvector + GIN)
+                from app.search import ensure_search_index
+                app.config['FULLTEXT_SEARCH'] = ensure_search_index(db.engine)
                 
                 print("Database initialization successful.")
                 break # Success! Break out of the retry loop
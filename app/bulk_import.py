@@ -0,0 +1,316 @@
+"""
+CSV/XLSX 일괄 입고 (관리자 업로드 /admin/import, `flask catalog import-books`).
+
+유품 정리·컬렉션 인수로 수천 권이 한꺼번에 들어올 때 admin_add(권마다 Gemini 호출)나 검색 등록으로
+한 권씩 넣으면 몇 시간이 걸린다. 파일을 한 행씩 읽어(csv.reader / openpyxl read_only) 검증하고,
+BATCH_SIZE행마다 한 번에 반영한다. 메모리에는 한 배치만 올라간다.
+
+- 열: COLUMNS (영문/한글 머리글 모두 인식, HEADER_ALIASES). title·author·year·price는 필수.
+- 일치 기준: ISBN(ISBN-10은 ISBN-13으로 바꿔 저장)이 있으면 ISBN, 없으면 (제목, 저자, 연도, 판본).
+  이미 있는 도서는 파일에 값이 있는 열만 덮어쓰고(재고 포함), 없는 도서는 새로 만든다.
+  같은 파일 안에서 같은 도서가 다시 나오면 뒤의 행이 앞의 행을 덮어쓴다.
+- 반영: 배치마다 기존 도서를 ISBN/자연키 IN 조회 두 번으로 찾고, INSERT와 UPDATE를 각각
+  executemany 한 번으로 보낸 뒤 커밋한다. 같은 배치 안에서 두 도서가 같은 ISBN을 가지려 하면
+  (자연키로 찾은 기존 도서에 ISBN을 넣는 행 + 같은 ISBN의 신규 행 등) 뒤의 행만 오류로 뺀다.
+  ISBN 유니크 인덱스에 걸리면(동시 입고) 그 배치를 다시 조회해 한 번 더 시도하고, 그래도 걸리면
+  행마다 SAVEPOINT를 걸어 하나씩 반영해 실제로 걸린 행만 오류로 남긴다.
+- ORM을 거치지 않으므로 @validates가 채우던 genre_mask / note_truncated를 직접 계산하고,
+  카탈로그 변경 로그(record_changes)에 남긴다. 비슷한 도서 목록은 들어온 도서가
+  SIMILARITY_REFRESH_LIMIT권 이하일 때만 바로 갱신하고(소개글 유사도는 작업 큐로 넘긴다), 그보다
+  많으면 rebuild 명령을 안내한다.
+- 잘못된 행은 건너뛰고 (행 번호, 사유)를 모아 돌려준다.
+"""
+import csv
+import io
+from dataclasses import dataclass, field
+
+from sqlalchemy import select, tuple_
+from sqlalchemy.exc import IntegrityError
+
+from app import db, similarity, text_similarity
+from app.catalog_changes import record_changes
+from app.facets import CONDITIONS
+from app.genres import GENRE_TAXONOMY, genre_mask, split_genres
+from app.models import Book, looks_truncated
+
+BATCH_SIZE = 500
+SIMILARITY_REFRESH_LIMIT = 500
+MAX_REPORTED_ERRORS = 200
+
+COLUMNS = ('isbn', 'title', 'author', 'year', 'edition', 'condition', 'price', 'stock_quantity', 'genre', 'description')
+REQUIRED = ('title', 'author', 'year', 'price')
+HEADER_ALIASES = {
+    'isbn': 'isbn', 'title': 'title', '제목': 'title', '도서명': 'title',
+    'author': 'author', '저자': 'author', 'year': 'year', '연도': 'year', '출간연도': 'year',
+    'edition': 'edition', '판본': 'edition', 'condition': 'condition', '상태': 'condition', '컨디션': 'condition',
+    'price': 'price', '가격': 'price', 'stock': 'stock_quantity', 'stock_quantity': 'stock_quantity',
+    '재고': 'stock_quantity', '수량': 'stock_quantity', 'genre': 'genre', '장르': 'genre',
+    'description': 'description', '소개': 'description', '큐레이터 노트': 'description',
+}
+MAX_LENGTHS = {'title': 100, 'author': 100, 'edition': 50}
+
+_book = Book.__table__
+_UPDATE_COLUMNS = ('isbn', 'title', 'author', 'year', 'edition', 'condition', 'price', 'stock_quantity',
+                   'genre', 'genre_mask', 'description', 'note_truncated')
+
+
+class ImportFileError(ValueError):
+    """파일 자체를 읽을 수 없다 (형식/머리글 오류)."""
+
+
+@dataclass
+class ImportResult:
+    inserted: int = 0
+    updated: int = 0
+    errors: list = field(default_factory=list)   # [(행 번호, 사유)] — 최대 MAX_REPORTED_ERRORS개
+    error_count: int = 0
+    similarity_refreshed: bool = True
+
+    def error(self, line, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line, message))
+
+
+def normalize_isbn(value):
+    """ISBN-10/13 → 체크섬을 확인한 ISBN-13 문자열. 형식이 틀리면 ValueError"""
+    digits = ''.join(ch for ch in str(value).upper() if ch.isdigit() or ch == 'X')
+    if len(digits) == 10:
+        if 'X' in digits[:-1] or sum((10 - i) * (10 if c == 'X' else int(c)) for i, c in enumerate(digits)) % 11:
+            raise ValueError('ISBN-10 체크섬 오류')
+        digits = '978' + digits[:9]
+        digits += str((10 - sum((1 if i % 2 == 0 else 3) * int(c) for i, c in enumerate(digits)) % 10) % 10)
+        return digits
+    if len(digits) == 13 and 'X' not in digits:
+        if sum((1 if i % 2 == 0 else 3) * int(c) for i, c in enumerate(digits)) % 10:
+            raise ValueError('ISBN-13 체크섬 오류')
+        return digits
+    raise ValueError('ISBN은 10자리 또는 13자리여야 합니다')
+
+
+def _text(value):
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)  # 엑셀 숫자 칸 (연도 1984.0, ISBN 9788937460449.0)
+    return str(value).strip()
+
+
+def parse_row(raw):
+    """{열 이름: 셀 값} → (파일에 값이 있는 열만 담은 dict). 잘못되면 ValueError(사유)"""
+    row = {key: _text(raw.get(key)) for key in COLUMNS}
+    missing = [key for key in REQUIRED if not row[key]]
+    if missing:
+        raise ValueError(f"필수 값 누락: {', '.join(missing)}")
+    values = {key: value for key, value in row.items() if value}
+
+    for key, limit in MAX_LENGTHS.items():
+        if len(values.get(key, '')) > limit:
+            raise ValueError(f'{key}가 너무 깁니다 (최대 {limit}자)')
+    try:
+        values['year'] = int(values['year'])
+    except ValueError:
+        raise ValueError(f"연도가 숫자가 아닙니다: {row['year']}")
+    try:
+        values['price'] = float(values['price'].replace(',', ''))
+    except ValueError:
+        raise ValueError(f"가격이 숫자가 아닙니다: {row['price']}")
+    if values['price'] < 0:
+        raise ValueError('가격은 0 이상이어야 합니다')
+    if 'stock_quantity' in values:
+        try:
+            values['stock_quantity'] = int(float(values['stock_quantity']))
+        except ValueError:
+            raise ValueError(f"재고가 숫자가 아닙니다: {row['stock_quantity']}")
+        if values['stock_quantity'] < 0:
+            raise ValueError('재고는 0 이상이어야 합니다')
+    if 'condition' in values and values['condition'] not in CONDITIONS:
+        raise ValueError(f"알 수 없는 상태: {values['condition']} ({', '.join(CONDITIONS)})")
+    if 'isbn' in values:
+        values['isbn'] = normalize_isbn(values['isbn'])
+    if 'genre' in values:
+        genres = ','.join(g for g in split_genres(values['genre']) if g in GENRE_TAXONOMY)
+        if genres:
+            values['genre'] = genres
+        else:
+            del values['genre']  # 분류표에 없는 장르뿐이면 기존 값을 지우지 않는다
+    return values
+
+
+def _natural_key(values):
+    return values['title'], values['author'], values['year'], values.get('edition') or ''
+
+
+def _header_map(header):
+    columns = [HEADER_ALIASES.get(_text(h).lower()) for h in header]
+    missing = [key for key in REQUIRED if key not in columns]
+    if missing:
+        raise ImportFileError(f"머리글에 필수 열이 없습니다: {', '.join(missing)}")
+    return columns
+
+
+def iter_rows(stream, filename):
+    """업로드 파일을 한 행씩 (행 번호, {열 이름: 값})으로 읽는다. 머리글은 첫 행."""
+    if filename.lower().endswith('.xlsx'):
+        try:
+            import openpyxl
+        except ImportError:
+            raise ImportFileError('XLSX를 읽으려면 openpyxl 패키지가 필요합니다. CSV로 저장해 올려주세요.')
+        try:
+            workbook = openpyxl.load_workbook(stream, read_only=True, data_only=True)
+        except Exception as e:
+            raise ImportFileError(f'XLSX 파일을 열 수 없습니다: {e}')
+        rows = workbook.active.iter_rows(values_only=True)
+    elif filename.lower().endswith('.csv'):
+        rows = csv.reader(io.TextIOWrapper(stream, encoding='utf-8-sig', newline=''))
+    else:
+        raise ImportFileError('CSV 또는 XLSX 파일만 올릴 수 있습니다.')
+
+    try:
+        columns = _header_map(next(rows, None) or [])
+        for line, cells in enumerate(rows, start=2):
+            if not any(_text(c) for c in cells):
+                continue
+            yield line, {col: cell for col, cell in zip(columns, cells) if col}
+    except UnicodeDecodeError:
+        raise ImportFileError('CSV는 UTF-8로 저장해 주세요.')
+    finally:
+        if filename.lower().endswith('.xlsx'):
+            workbook.close()
+
+
+def _find_existing(connection, batch):
+    """배치 행들과 일치하는 기존 도서 → ({isbn: 행}, {자연키: 행})"""
+    columns = [_book.c[name] for name in ('id',) + _UPDATE_COLUMNS]
+    by_isbn, by_key = {}, {}
+    isbns = sorted({values['isbn'] for _, values in batch if 'isbn' in values})
+    if isbns:
+        for row in connection.execute(select(*columns).where(_book.c.isbn.in_(isbns))):
+            by_isbn[row.isbn] = row._asdict()
+    keys = sorted({_natural_key(values)[:3] for _, values in batch})
+    for row in connection.execute(
+            select(*columns).where(tuple_(_book.c.title, _book.c.author, _book.c.year).in_(keys)).order_by(_book.c.id)):
+        by_key.setdefault((row.title, row.author, row.year, row.edition or ''), row._asdict())
+    return by_isbn, by_key
+
+
+def _apply_batch(connection, batch, result, rejected):
+    """검증된 행 배치를 반영한다. 같은 배치의 다른 도서가 이미 쓴 ISBN을 가진 행은 반영하지 않고
+    rejected에 (행 번호, 사유)로 담는다. 반환: 바뀐 book id 목록"""
+    by_isbn, by_key = _find_existing(connection, batch)
+    updates = {}                              # book id → 갱신할 전체 값
+    new_books, new_by_isbn, new_by_key = [], {}, {}  # 같은 파일 안 중복은 같은 dict를 갱신한다
+    isbn_owners = {}                          # ISBN → 이 배치에서 그 ISBN을 갖게 될 도서 ('book', id) / ('new', id(dict))
+    for line, values in batch:
+        isbn = values.get('isbn')
+        existing = by_isbn.get(isbn) or by_key.get(_natural_key(values))
+        target = None
+        if existing is None:
+            target = new_by_isbn.get(isbn) or new_by_key.get(_natural_key(values))
+        owner = ('book', existing['id']) if existing is not None else ('new', id(target)) if target is not None else None
+        if isbn and isbn in isbn_owners and isbn_owners[isbn] != owner:
+            rejected.append((line, f'ISBN {isbn}은 같은 파일의 다른 도서가 이미 쓰고 있습니다'))
+            continue
+        if existing is not None:
+            merged = {**updates.get(existing['id'], existing), **values}
+            merged['genre_mask'] = genre_mask(merged['genre'])
+            merged['note_truncated'] = looks_truncated(merged['description'])
+            updates[existing['id']] = merged
+            if isbn:
+                isbn_owners[isbn] = owner
+            continue
+        if target is None:
+            target = {}
+            new_books.append(target)
+        target.update(values)
+        if 'isbn' in target:
+            new_by_isbn[target['isbn']] = target
+            isbn_owners[target['isbn']] = ('new', id(target))
+        new_by_key[_natural_key(target)] = target
+
+    changed = []
+    if new_books:
+        params = [dict(isbn=v.get('isbn'), title=v['title'], author=v['author'], year=v['year'],
+                       edition=v.get('edition'), condition=v.get('condition', 'Good'), price=v['price'],
+                       stock_quantity=v.get('stock_quantity', 1), genre=v.get('genre'),
+                       genre_mask=genre_mask(v.get('genre')), description=v.get('description'),
+                       note_truncated=looks_truncated(v.get('description'))) for v in new_books]
+        changed += connection.execute(_book.insert().returning(_book.c.id), params).scalars().all()
+    if updates:
+        connection.execute(
+            _book.update().where(_book.c.id == db.bindparam('b_id'))
+            .values({name: db.bindparam(f'v_{name}') for name in _UPDATE_COLUMNS}),
+            [{'b_id': book_id, **{f'v_{name}': values[name] for name in _UPDATE_COLUMNS}}
+             for book_id, values in updates.items()])
+        changed += list(updates)
+    result.inserted += len(new_books)
+    result.updated += len(updates)
+    return changed
+
+
+def _apply_rows(batch, result):
+    """배치를 통째로 반영하지 못했을 때 — 행마다 SAVEPOINT를 걸고 하나씩 반영해 걸린 행만 오류로 남긴다."""
+    changed = []
+    for line, values in batch:
+        rejected = []
+        try:
+            with db.session.begin_nested():
+                ids = _apply_batch(db.session.connection(), [(line, values)], result, rejected)
+        except IntegrityError:
+            result.error(line, 'ISBN 중복으로 저장하지 못했습니다')
+            continue
+        changed += ids
+    record_changes(db.session.connection(), changed)
+    db.session.commit()
+    return changed
+
+
+def run(rows):
+    """(행 번호, {열: 값}) 이터러블을 BATCH_SIZE행씩 반영한다. 반환: ImportResult"""
+    result = ImportResult()
+    changed = []
+    batch = []
+
+    def flush_batch():
+        for _attempt in (1, 2):
+            counts = (result.inserted, result.updated)
+            rejected = []
+            try:
+                ids = _apply_batch(db.session.connection(), batch, result, rejected)
+                record_changes(db.session.connection(), ids)
+                db.session.commit()
+                changed.extend(ids)
+                for line, message in rejected:
+                    result.error(line, message)
+                break
+            except IntegrityError:
+                # 다른 입고가 같은 ISBN을 먼저 넣었다 — 다시 조회하면 갱신으로 처리된다
+                db.session.rollback()
+                result.inserted, result.updated = counts
+        else:
+            changed.extend(_apply_rows(batch, result))
+        batch.clear()
+
+    for line, raw in rows:
+        try:
+            batch.append((line, parse_row(raw)))
+        except ValueError as e:
+            result.error(line, str(e))
+        if len(batch) >= BATCH_SIZE:
+            flush_batch()
+    if batch:
+        flush_batch()
+
+    if len(changed) <= SIMILARITY_REFRESH_LIMIT:
+        connection = db.session.connection()
+        similarity.refresh(connection, changed)
+        text_similarity.enqueue_refresh(connection, changed)
+        db.session.commit()
+    else:
+        result.similarity_refreshed = False
+    return result
+
+
+def import_file(stream, filename):
+    """업로드 스트림을 읽어 반영한다. 파일 자체가 잘못되면 ImportFileError"""
+    return run(iter_rows(stream, filename))
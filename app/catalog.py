@@ -0,0 +1,207 @@
+"""
+스토어프론트 카탈로그 조회 헬퍼: 검색/필터 조건 해석 + 커서(keyset) 페이지네이션.
+
+OFFSET 페이지네이션은 뒤 페이지로 갈수록 앞의 행을 모두 건너뛰어야 해서 카탈로그가
+커질수록 느려진다. 대신 "마지막으로 보여준 행의 (정렬 키, id)"를 커서로 넘겨
+`(정렬 키, id) > (커서 값)` 조건으로 다음 페이지를 바로 찾는다 — (price, id) / (year, id)
+복합 인덱스로 처리되므로 몇 번째 페이지든 조회 비용이 일정하다.
+
+커서는 [정렬 키 값, id]를 JSON → URL-safe Base64로 인코딩한 불투명 문자열이다.
+정렬 모드가 바뀌면 커서 의미도 달라지므로 정렬 이름을 함께 담아 불일치 시 무효 처리한다.
+
+검색어(q)가 있으면 전문 검색 인덱스(app/search.py)와 조인하고, 정렬을 따로 고르지 않은 경우
+관련도순(relevance)으로 정렬한다 — 관련도 점수도 (rank, id) 키셋 커서로 이어서 페이지를 넘긴다.
+"""
+import base64
+import binascii
+import json
+
+from sqlalchemy import cast, String, tuple_
+
+from app import db, search
+from app.genres import GENRE_BITS, matches_any
+from app.loading import BOOK_CARD
+from app.models import Book
+
+PAGE_SIZE = 24
+
+# 판본 필터 (자유 텍스트 필드라 키워드 매칭)
+EDITION_KEYWORDS = {
+    'first':   ['초판', '1st', 'first'],
+    'reprint': ['재판', 'reprint'],
+    'limited': ['한정판', 'limited'],
+}
+
+# 정렬 이름 → (정렬 컬럼, 방향). 동률은 항상 같은 방향의 id로 끊어 순서를 완전히 고정한다.
+# (키셋 페이지네이션은 순서가 결정적이어야 페이지 경계에서 중복/누락이 생기지 않는다)
+SORTS = {
+    'price_asc':  (Book.price, 'asc'),
+    'price_desc': (Book.price, 'desc'),
+    'year_desc':  (Book.year, 'desc'),
+    'year_asc':   (Book.year, 'asc'),
+    'rating_desc': (Book.rating_avg, 'desc'),  # Book에 저장된 평점 요약 + (rating_avg, id) 인덱스
+    '':           (None, 'desc'),  # 기본: 신상품순(id 내림차순)
+}
+RELEVANCE = 'relevance'  # 검색어가 있고 정렬을 고르지 않았을 때의 내부 정렬 (사용자 선택지는 아님)
+
+FILTER_KEYS = ('q', 'condition', 'price', 'avail', 'year', 'edition', 'genre', 'sort')
+FACET_KEYS = ('condition', 'price', 'avail', 'year', 'edition', 'genre')  # 검색어/정렬 외의 선택형 필터
+
+
+class InvalidCursor(ValueError):
+    """변조되었거나 현재 정렬 모드와 맞지 않는 커서"""
+
+
+def read_filters(args):
+    """request.args에서 카탈로그 필터 값을 읽어 공백을 정리한 dict로 반환한다."""
+    filters = {key: (args.get(key, '') or '').strip() for key in FILTER_KEYS}
+    if filters['sort'] not in SORTS:
+        filters['sort'] = ''
+    return filters
+
+
+def apply_filters(books_q, filters, fts=None):
+    """검색어/컨디션/가격/재고/연도/판본/장르 조건을 쿼리에 적용한다 (정렬은 별도).
+    fts는 search.rank_subquery() 결과 — 주어지면 ilike 대신 전문 검색 인덱스와 조인한다."""
+    books_q = apply_search(books_q, filters.get('q'), fts)
+    for key in FACET_KEYS:
+        cond = filter_condition(key, filters.get(key))
+        if cond is not None:
+            books_q = books_q.filter(cond)
+    return books_q
+
+
+def apply_search(books_q, query, fts=None):
+    """검색어 조건만 적용한다 (전문 검색 인덱스 조인, 없으면 ilike)."""
+    if query and fts is not None:
+        books_q = books_q.join(fts, fts.c.book_id == Book.id)
+    elif query:
+        search_filter = f"%{query}%"
+        books_q = books_q.filter(
+            (Book.title.ilike(search_filter)) |
+            (Book.author.ilike(search_filter)) |
+            (Book.description.ilike(search_filter)) |
+            (Book.condition.ilike(search_filter)) |
+            (cast(Book.year, String).ilike(search_filter))
+        )
+    return books_q
+
+
+def filter_condition(key, value):
+    """필터 하나(key=value)의 WHERE 조건식. 값이 비었거나 알 수 없는 값이면 None (필터 없음).
+    목록 조회와 패싯 개수 집계(app/facets.py)가 같은 조건을 쓰도록 한 곳에 둔다."""
+    if not value:
+        return None
+
+    if key == 'condition':
+        return Book.condition == value
+
+    if key == 'price':
+        parts = value.split('-')
+        if len(parts) != 2:
+            return None
+        low, high = parts
+        try:
+            conds = []
+            if low:
+                conds.append(Book.price >= float(low))
+            if high and high != '0':
+                conds.append(Book.price <= float(high))
+        except ValueError:
+            return None  # 조작된 가격 파라미터는 무시
+        return db.and_(*conds) if conds else None
+
+    # sold_out 선택 시 전체 표시 (품절 포함)
+    if key == 'avail':
+        return Book.stock_quantity > 0 if value == 'in_stock' else None
+
+    if key == 'year':
+        return {
+            'pre1900':   Book.year < 1900,
+            '1900-1950': db.and_(Book.year >= 1900, Book.year <= 1950),
+            '1951-2000': db.and_(Book.year >= 1951, Book.year <= 2000),
+            '2001-now':  Book.year >= 2001,
+        }.get(value)
+
+    if key == 'edition':
+        if value not in EDITION_KEYWORDS:
+            return None
+        return db.or_(*[Book.edition.ilike(f'%{kw}%') for kw in EDITION_KEYWORDS[value]])
+
+    if key == 'genre':
+        return matches_any(Book.genre_mask, GENRE_BITS[value]) if value in GENRE_BITS else None
+
+    return None
+
+
+def encode_cursor(sort, book, value=None):
+    """book 행 다음부터 이어지는 커서. 관련도순처럼 Book 밖의 정렬 키는 value로 넘긴다."""
+    column = SORTS[sort][0] if sort in SORTS else None
+    if column is not None:
+        value = getattr(book, column.key)
+    raw = json.dumps([sort, value, book.id], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(sort, cursor):
+    """커서 문자열을 (정렬 키 값, id)로 복원한다. 형식이 틀리면 InvalidCursor."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        cursor_sort, value, last_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, TypeError, binascii.Error, UnicodeError):
+        raise InvalidCursor(cursor)
+    if cursor_sort != sort or not isinstance(last_id, int):
+        raise InvalidCursor(cursor)
+    keyed = sort == RELEVANCE or SORTS[sort][0] is not None
+    if keyed and not isinstance(value, (int, float)):
+        raise InvalidCursor(cursor)
+    return value, last_id
+
+
+def apply_sort(books_q, sort, cursor=None, fts=None):
+    """정렬 + (커서가 있으면) 커서 이후 행만 남기는 키셋 조건을 적용한다."""
+    if sort == RELEVANCE:
+        column, direction = fts.c.rank, 'asc'  # rank가 작을수록 관련도 높음
+    else:
+        column, direction = SORTS[sort]
+    keys = [column, Book.id] if column is not None else [Book.id]
+
+    if cursor:
+        value, last_id = decode_cursor(sort, cursor)
+        values = [value, last_id] if column is not None else [last_id]
+        if len(keys) == 1:
+            cond = keys[0] > values[0] if direction == 'asc' else keys[0] < values[0]
+        else:
+            # 행 값 비교 (price, id) > (:price, :id) — SQLite 3.15+/PostgreSQL 모두 지원하고
+            # 복합 인덱스 범위 스캔으로 바로 이어진다.
+            row, bound = tuple_(*keys), tuple_(*values)
+            cond = row > bound if direction == 'asc' else row < bound
+        books_q = books_q.filter(cond)
+
+    order = [k.asc() if direction == 'asc' else k.desc() for k in keys]
+    return books_q.order_by(*order)
+
+
+def fetch_page(filters, cursor=None, page_size=None):
+    """필터/정렬이 적용된 한 페이지와 다음 페이지 커서(마지막 페이지면 None)를 반환한다.
+    다음 페이지 존재 여부는 COUNT 없이 page_size + 1행을 읽어 판단한다."""
+    page_size = page_size or PAGE_SIZE
+    fts = search.rank_subquery(filters['q']) if filters.get('q') and search.available() else None
+    sort = RELEVANCE if fts is not None and not filters['sort'] else filters['sort']
+
+    books_q = apply_filters(Book.query.options(BOOK_CARD), filters, fts)
+    books_q = apply_sort(books_q, sort, cursor, fts)
+    if sort == RELEVANCE:
+        books_q = books_q.add_columns(fts.c.rank)
+    rows = books_q.limit(page_size + 1).all()
+
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        if sort == RELEVANCE:
+            last_book, last_rank = rows[-1]
+            next_cursor = encode_cursor(sort, last_book, last_rank)
+        else:
+            next_cursor = encode_cursor(sort, rows[-1])
+    books = [row[0] for row in rows] if sort == RELEVANCE else rows
+    return books, next_cursor
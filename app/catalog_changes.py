@@ -0,0 +1,109 @@
+"""
+카탈로그 버전(변경 로그) 관리.
+
+gunicorn 워커마다 따로 들고 있는 인메모리 인덱스·캐시는 다른 워커에서 일어난 관리자 수정을
+알 수 없다. 도서 행이 바뀔 때마다 CatalogChange에 (버전, book_id)를 남겨 두면, 각 워커는
+요청마다 최신 버전 한 번(PK MAX 조회)만 확인하고 뒤처졌을 때 바뀐 도서만 다시 읽으면 된다.
+
+- ORM으로 Book을 추가/수정/삭제하면 after_flush 리스너가 같은 트랜잭션 안에서 자동 기록한다.
+- 주문/취소처럼 raw SQL로 재고를 바꾸는 곳은 record_changes()를 직접 호출한다.
+- 로그는 최근 RETAIN개만 남긴다. 그보다 오래 뒤처진 소비자는 Tracker.poll()이 None을
+  돌려주므로 전체를 다시 읽는다.
+- id는 커밋 순서가 아니라 INSERT 순서로 붙는다 (PostgreSQL 시퀀스). id 42를 읽은 뒤에 41이
+  커밋될 수 있으므로 "MAX(id) 이후"만 읽으면 41을 영영 놓친다. 소비자마다 Tracker를 두고, 읽은
+  범위 안에서 비어 있던 id(아직 커밋 전이거나 롤백됨)를 기억해 다음 poll에서 함께 다시 확인한다.
+  GAP_SECONDS가 지나도 채워지지 않은 빈 자리는 롤백된 것으로 보고 잊는다. (SQLite는 쓰기
+  트랜잭션이 하나씩만 돌아 이런 역전이 없다.)
+"""
+import threading
+import time
+
+from sqlalchemy import event, select, func, delete, or_
+
+from app import db
+from app.models import Book, CatalogChange
+
+RETAIN = 5000
+GAP_SECONDS = 300    # 빈 id를 커밋 전으로 보고 다시 확인하는 시간 (그 뒤엔 롤백으로 본다)
+GAP_WINDOW = 1000    # 처음 읽을 때 빈 자리를 살펴볼 최근 id 범위, 기억하는 빈 자리 수 상한
+
+
+def record_changes(connection, book_ids):
+    book_ids = sorted(set(i for i in book_ids if i is not None))
+    if not book_ids:
+        return
+    connection.execute(CatalogChange.__table__.insert(), [{'book_id': i} for i in book_ids])
+    latest = connection.execute(select(func.max(CatalogChange.id))).scalar() or 0
+    if latest % 500 < len(book_ids):  # 대략 500건마다 한 번씩 오래된 로그 정리
+        connection.execute(delete(CatalogChange).where(CatalogChange.id <= latest - RETAIN))
+
+
+def current_version():
+    return db.session.execute(select(func.coalesce(func.max(CatalogChange.id), 0))).scalar()
+
+
+class Tracker:
+    """소비자 하나(워커의 인메모리 인덱스·캐시)가 변경 로그를 어디까지 읽었는지.
+    generation은 새 변경을 볼 때마다 올라가므로 캐시 키로 쓸 수 있다."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.generation = 0
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.version = None   # 읽은 가장 큰 id
+            self.gaps = {}        # 그보다 작은데 아직 못 본 id → 처음 빈 자리로 본 시각(monotonic)
+
+    def poll(self):
+        """지난 poll 이후 바뀐 book_id 집합. 처음이거나 로그가 정리돼 이어 받을 수 없으면 None
+        (호출부는 전체를 다시 읽는다)."""
+        with self._lock:
+            now = time.monotonic()
+            if self.version is not None:
+                cond = CatalogChange.id > self.version
+                if self.gaps:
+                    cond = or_(cond, CatalogChange.id.in_(sorted(self.gaps)))
+                rows = db.session.execute(select(CatalogChange.id, CatalogChange.book_id).where(cond)).all()
+                if not rows:
+                    self._expire_gaps(now)
+                    return set()
+                oldest = db.session.execute(select(func.min(CatalogChange.id))).scalar()
+                if oldest is None or self.version + 1 >= oldest:
+                    self._advance({row.id for row in rows}, now)
+                    self.generation += 1
+                    return {row.book_id for row in rows}
+            # 처음이거나 너무 뒤처졌다 — 지금 버전부터 다시, 최근 범위의 빈 자리는 커밋 전일 수 있으니 기억
+            latest = current_version()
+            recent = set(db.session.execute(
+                select(CatalogChange.id).where(CatalogChange.id > latest - GAP_WINDOW)).scalars())
+            self.version = latest
+            self.gaps = {i: now for i in range(max(latest - GAP_WINDOW, 0) + 1, latest + 1) if i not in recent}
+            self.generation += 1
+            return None
+
+    def _advance(self, seen, now):
+        for i in seen:
+            self.gaps.pop(i, None)
+        top = max(max(seen), self.version)
+        for i in range(self.version + 1, top):
+            if i not in seen:
+                self.gaps[i] = now
+        self.version = top
+        self._expire_gaps(now)
+
+    def _expire_gaps(self, now):
+        if self.gaps:
+            live = sorted(i for i, seen_at in self.gaps.items() if now - seen_at < GAP_SECONDS)[-GAP_WINDOW:]
+            self.gaps = {i: self.gaps[i] for i in live}
+
+
+@event.listens_for(db.session, 'after_flush')
+def _record_book_writes(session, flush_context):
+    changed = [obj.id for obj in session.new if isinstance(obj, Book)]
+    changed += [obj.id for obj in session.deleted if isinstance(obj, Book)]
+    changed += [obj.id for obj in session.dirty
+                if isinstance(obj, Book) and session.is_modified(obj, include_collections=False)]
+    if changed:
+        record_changes(session.connection(), changed)
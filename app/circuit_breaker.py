@@ -0,0 +1,155 @@
+"""
+외부 제공자별 서킷 브레이커.
+
+제공자가 죽어 있으면 요청마다 8~20초 타임아웃을 꼬박 기다렸다. 연속 실패가
+CIRCUIT_FAILURE_THRESHOLD번 쌓이면 브레이커를 열고(open), 그 동안의 호출은 기다리지 않고
+즉시 ProviderUnavailable을 던진다. CIRCUIT_OPEN_SECONDS가 지나면 한 요청만 시험 호출을
+보내고(half_open) 성공하면 닫고, 실패하면 다시 연다.
+
+상태는 provider_health 테이블에 두어 모든 워커가 공유한다. 호출부 세션과 섞이지 않도록
+엔진 커넥션으로 짧은 트랜잭션을 따로 열어 읽고 쓰며, 시험 호출 권한은 조건부 UPDATE로
+한 워커만 가져간다.
+
+- HTTP 제공자: app/http_client.py가 제공자 이름이 BREAKER_PROVIDERS에 있으면 자동으로 감싼다
+  (연결 오류/타임아웃/5xx/429를 실패로 센다).
+- Gemini: 호출부에서 `with circuit_breaker.guard('gemini'):`로 감싼다.
+- 요청 예산이 모자라 보내지 않았거나 줄인 타임아웃에 걸린 호출(BudgetExhausted), 호출 한도 토큰을
+  기다리다 포기한 호출(RateLimited)은 실패로 세지 않는다. 단 줄인 타임아웃이라도
+  CIRCUIT_MIN_PROBE_SECONDS(기본 1초) 넘게 기다렸는데 응답이 없으면 http_client가 그대로 실패로
+  던진다 — 스토어 예산(1.5초)에서 모든 타임아웃이 예산 탓이 되면 멈춘 제공자에 브레이커가 열리지 않는다. Gemini 호출부는 브레이커를 먼저 들어가
+  (`guard` 안에서 `rate_limit.limited`) 차단 중일 때 토큰을 쓰지 않는다.
+- 상태는 관리자 /admin/providers에서 보고 수동으로 닫을 수 있다.
+"""
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+import requests
+from flask import current_app, has_app_context
+from sqlalchemy import case, select, update
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.rate_limit import RateLimited
+from app.request_budget import BudgetExhausted
+from app.models import ProviderHealth
+
+BREAKER_PROVIDERS = ('openlibrary', 'googlebooks', 'kakao', 'naver', 'gemini')
+DEFAULT_FAILURE_THRESHOLD = 3
+DEFAULT_OPEN_SECONDS = 60
+DEFAULT_MIN_PROBE_SECONDS = 1.0  # 예산에 줄어든 타임아웃이 이 이상이면 응답 없음을 제공자 실패로 센다
+SUCCESS_TOUCH_INTERVAL = timedelta(minutes=1)  # 정상 상태에서 last_success_at은 이 간격으로만 갱신
+
+_table = ProviderHealth.__table__
+
+
+class ProviderUnavailable(requests.exceptions.RequestException):
+    """브레이커가 열려 있어 호출하지 않았다. 기존 RequestException 처리 경로를 그대로 탄다."""
+
+    def __init__(self, provider):
+        super().__init__(f'{provider} 서킷 브레이커 열림 — 호출 생략')
+        self.provider = provider
+
+
+def _now():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _config(name, default):
+    return current_app.config.get(name, default)
+
+
+def enabled(provider):
+    return provider in BREAKER_PROVIDERS and has_app_context()
+
+
+def min_probe_seconds():
+    """예산에 줄어든 타임아웃에 걸렸어도 제공자 실패로 셀 최소 대기(초)"""
+    if not has_app_context():
+        return DEFAULT_MIN_PROBE_SECONDS
+    return _config('CIRCUIT_MIN_PROBE_SECONDS', DEFAULT_MIN_PROBE_SECONDS)
+
+
+def _read(conn, provider):
+    return conn.execute(select(_table).where(_table.c.provider == provider)).first()
+
+
+def allow(provider):
+    """호출해도 되는지. 차단 중이면 False, 쿨다운이 지났으면 한 워커에게만 시험 호출을 허락한다.
+    반환: (허용 여부, 호출 전에 읽은 상태 행)"""
+    with db.engine.begin() as conn:
+        row = _read(conn, provider)
+        if row is None or row.state == 'closed':
+            return True, row
+        now = _now()
+        if row.opened_at and now - row.opened_at < timedelta(seconds=_config('CIRCUIT_OPEN_SECONDS', DEFAULT_OPEN_SECONDS)):
+            return False, row
+        # 쿨다운이 지났다 (시험 호출이 멈춘 채 오래된 half_open 포함) — 먼저 바꾼 워커가 시험 호출을 맡는다
+        claimed = conn.execute(
+            update(_table)
+            .where(_table.c.provider == provider, _table.c.state == row.state, _table.c.opened_at == row.opened_at)
+            .values(state='half_open', opened_at=now)
+        ).rowcount
+        return claimed == 1, row
+
+
+def record_success(provider, row=None):
+    if row is not None and row.state == 'closed' and not row.consecutive_failures and row.last_success_at \
+            and _now() - row.last_success_at < SUCCESS_TOUCH_INTERVAL:
+        return  # 정상 상태에서는 매 호출마다 쓰지 않는다
+    _upsert(provider, dict(state='closed', consecutive_failures=0, opened_at=None, last_success_at=_now()))
+
+
+def record_failure(provider, error):
+    now = _now()
+    threshold = _config('CIRCUIT_FAILURE_THRESHOLD', DEFAULT_FAILURE_THRESHOLD)
+    trips = (_table.c.state == 'half_open') | (_table.c.consecutive_failures + 1 >= threshold)
+    _upsert(provider, dict(
+        consecutive_failures=_table.c.consecutive_failures + 1,
+        state=case((trips, 'open'), else_=_table.c.state),
+        opened_at=case((trips, now), else_=_table.c.opened_at),
+        last_failure_at=now,
+        last_error=str(error)[:255],
+    ), insert=dict(consecutive_failures=1, state='open' if threshold <= 1 else 'closed',
+                   opened_at=now if threshold <= 1 else None, last_failure_at=now, last_error=str(error)[:255]))
+
+
+def _upsert(provider, values, insert=None):
+    with db.engine.begin() as conn:
+        if conn.execute(update(_table).where(_table.c.provider == provider).values(**values)).rowcount:
+            return
+        try:
+            with conn.begin_nested():
+                conn.execute(_table.insert().values(provider=provider, **(insert or values)))
+        except IntegrityError:
+            # 다른 워커가 방금 행을 만들었다 — 그 행에 반영
+            conn.execute(update(_table).where(_table.c.provider == provider).values(**values))
+
+
+def reset(provider):
+    _upsert(provider, dict(state='closed', consecutive_failures=0, opened_at=None))
+
+
+@contextmanager
+def guard(provider):
+    """블록 안의 외부 호출을 브레이커로 감싼다. 차단 중이면 ProviderUnavailable을 즉시 던지고,
+    블록에서 예외가 나면 실패로 기록한 뒤 그대로 다시 던진다."""
+    if not enabled(provider):
+        yield
+        return
+    allowed, row = allow(provider)
+    if not allowed:
+        raise ProviderUnavailable(provider)
+    try:
+        yield
+    except (BudgetExhausted, RateLimited):
+        raise  # 우리 쪽 마감·호출 한도 때문이다 — 제공자 상태는 모른다
+    except Exception as e:
+        record_failure(provider, e)
+        raise
+    record_success(provider, row)
+
+
+def statuses():
+    """관리자 상태 페이지용 — 아직 호출된 적 없는 제공자도 '정상'으로 채워 돌려준다."""
+    rows = {h.provider: h for h in ProviderHealth.query.all()}
+    return [rows.get(p) or ProviderHealth(provider=p, state='closed', consecutive_failures=0) for p in BREAKER_PROVIDERS]
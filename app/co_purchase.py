@@ -0,0 +1,118 @@
+"""
+"이 책을 구매한 분들이 함께 산 책" — 주문 그룹 기반 동시 구매 횟수.
+
+장바구니 결제 한 번에 나온 Order 행들은 같은 order_group_id를 갖는다. 한 그룹에 함께 들어 있던
+서로 다른 두 도서 쌍마다 book_co_purchase(book_id, other_id) 횟수를 1 올린다. 상세 페이지는
+(book_id, count) 인덱스로 횟수가 많은 순서대로 몇 행만 읽는다. 양방향으로 두 행을 저장한다.
+
+- 갱신: Order가 추가되거나 상태가 바뀌어 flush되면(after_flush) 같은 트랜잭션 안에서 그 그룹의
+  "취소되지 않은 도서 쌍"을 flush 전과 후로 비교해 생긴 쌍은 1 더하고 사라진 쌍은 1 뺀다.
+  체크아웃과 주문 취소는 재고 UPDATE마다 autoflush가 일어나 한 그룹이 여러 번에 나뉘어 flush되는데,
+  전후 비교라 몇 번에 나뉘든 그룹당 한 번만 센다. 그룹 ID가 없는 옛 단건 주문은 세지 않는다.
+- 도서가 삭제되면 FK CASCADE로 그 도서의 행이 함께 지워진다.
+- 전체 재계산: `flask catalog rebuild-co-purchases` — 주문 테이블을 그룹 순서로 BATCH_SIZE행씩
+  스트리밍해 센다 (주문 이력 전체를 메모리에 올리지 않는다).
+"""
+from collections import Counter
+from itertools import combinations, groupby
+
+from sqlalchemy import delete, event, select, update
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.models import Book, BookCoPurchase, Order
+
+MIN_COUNT = 2       # 이보다 적게 함께 팔린 쌍은 보여 주지 않는다 (한 사람의 주문이 그대로 드러나지 않게)
+BATCH_SIZE = 1000
+CANCELLED = 'cancelled'
+
+_table = BookCoPurchase.__table__
+_order = Order.__table__
+
+
+def _pairs(book_ids):
+    """그룹의 도서 id들 → 서로 다른 두 도서의 양방향 쌍"""
+    books = sorted({b for b in book_ids if b is not None})
+    for a, b in combinations(books, 2):
+        yield a, b
+        yield b, a
+
+
+def _add(connection, pairs, delta):
+    """쌍마다 count += delta. 없는 쌍은 만들고, 0 이하가 된 쌍은 지운다."""
+    for (book_id, other_id), n in Counter(pairs).items():
+        where = (_table.c.book_id == book_id) & (_table.c.other_id == other_id)
+        if connection.execute(update(_table).where(where).values(count=_table.c.count + n * delta)).rowcount:
+            if delta < 0:
+                connection.execute(delete(_table).where(where & (_table.c.count <= 0)))
+            continue
+        if delta < 0:
+            continue
+        try:
+            with connection.begin_nested():
+                connection.execute(_table.insert().values(book_id=book_id, other_id=other_id, count=n))
+        except IntegrityError:
+            # 다른 워커가 방금 같은 쌍을 만들었다 — 그 행에 더한다
+            connection.execute(update(_table).where(where).values(count=_table.c.count + n))
+
+
+def rebuild(connection=None):
+    """주문 이력 전체에서 횟수를 다시 센다. 반환: 센 주문 그룹 수"""
+    connection = connection or db.session.connection()
+    connection.execute(delete(_table))
+    result = connection.execution_options(stream_results=True, yield_per=BATCH_SIZE).execute(
+        select(_order.c.order_group_id, _order.c.book_id)
+        .where(_order.c.order_group_id.isnot(None), _order.c.book_id.isnot(None), _order.c.status != CANCELLED)
+        .order_by(_order.c.order_group_id))
+    counts, groups = Counter(), 0
+    for _, rows in groupby(result, key=lambda row: row.order_group_id):
+        counts.update(_pairs(row.book_id for row in rows))
+        groups += 1
+    params = [{'book_id': a, 'other_id': b, 'count': n} for (a, b), n in counts.items()]
+    for start in range(0, len(params), BATCH_SIZE):
+        connection.execute(_table.insert(), params[start:start + BATCH_SIZE])
+    return groups
+
+
+def also_bought(book_id, limit=4, options=(), exclude=()):
+    """상세 페이지용 — 이 책과 함께 많이 팔린 순서대로 도서 limit권"""
+    query = (Book.query.options(*options)
+             .join(BookCoPurchase, BookCoPurchase.other_id == Book.id)
+             .filter(BookCoPurchase.book_id == book_id, BookCoPurchase.count >= MIN_COUNT))
+    if exclude:
+        query = query.filter(Book.id.notin_(list(exclude)))
+    return query.order_by(BookCoPurchase.count.desc(), Book.id).limit(limit).all()
+
+
+_NEW = object()
+
+
+@event.listens_for(db.session, 'after_flush')
+def _count_order_groups(session, flush_context):
+    touched = {}  # 주문 그룹 -> {order id: 이번 flush 전 상태 (새 행이면 _NEW)}
+    for obj in session.new:
+        if isinstance(obj, Order) and obj.order_group_id:
+            touched.setdefault(obj.order_group_id, {})[obj.id] = _NEW
+    for obj in session.dirty:
+        if isinstance(obj, Order) and obj.order_group_id:
+            history = db.inspect(obj).attrs.status.history
+            if history.deleted:
+                touched.setdefault(obj.order_group_id, {})[obj.id] = history.deleted[0]
+    if not touched:
+        return
+
+    connection = session.connection()
+    rows = connection.execute(
+        select(_order.c.id, _order.c.order_group_id, _order.c.book_id, _order.c.status)
+        .where(_order.c.order_group_id.in_(list(touched))))
+    before, after = {}, {}  # 그룹 -> 취소되지 않은 도서 id (이번 flush 전 / 후)
+    for order_id, group_id, book_id, status in rows:
+        previous = touched[group_id].get(order_id, status)
+        if status != CANCELLED:
+            after.setdefault(group_id, set()).add(book_id)
+        if previous is not _NEW and previous != CANCELLED:
+            before.setdefault(group_id, set()).add(book_id)
+    for group_id in touched:
+        old, new = set(_pairs(before.get(group_id, ()))), set(_pairs(after.get(group_id, ())))
+        _add(connection, new - old, 1)
+        _add(connection, old - new, -1)
@@ -0,0 +1,175 @@
+"""
+`flask` CLI 관리 명령.
+
+    flask catalog backfill-ratings   # 모든 도서의 평점 요약(개수/평균/분포)을 리뷰에서 다시 계산
+    flask catalog rebuild-search     # 스토어 검색용 전문 검색 인덱스를 처음부터 다시 구축
+    flask catalog migrate-covers     # Base64 image_data 표지를 표지 저장소(COVER_STORAGE)로 이관
+    flask catalog regenerate-cover-variants  # 모든 표지의 반응형 WebP/JPEG 변형을 다시 생성
+    flask catalog rebuild-similarity # 모든 도서의 비슷한 도서 상위 K권 목록을 다시 계산
+    flask catalog rebuild-text-similarity  # 소개글 TF-IDF 유사도 목록을 다시 계산 (IDF 재산정)
+    flask catalog rebuild-co-purchases     # 주문 이력 전체에서 "함께 산 책" 횟수를 다시 계산
+    flask catalog import-books FILE        # CSV/XLSX 일괄 입고 (ISBN 또는 제목·저자·연도·판본으로 upsert)
+    flask catalog ingest-covers PATH...    # 표지 사진/ZIP/폴더를 Gemini로 분석해 검토용 초안 배치로 만든다
+
+    flask jobs worker                # 백그라운드 작업 큐(app/jobs.py)를 처리하는 워커 (--burst: 비면 종료)
+"""
+import click
+from flask.cli import AppGroup
+
+catalog_cli = AppGroup('catalog', help='카탈로그 데이터 유지보수 명령')
+
+
+@catalog_cli.command('backfill-ratings')
+@click.option('--batch-size', default=500, show_default=True, help='한 번에 재집계할 도서 수')
+def backfill_ratings(batch_size):
+    """리뷰 테이블을 기준으로 Book.rating_* 요약 컬럼을 다시 계산한다."""
+    from app.ratings import backfill_all
+    done = backfill_all(batch_size=batch_size)
+    click.echo(f"{done}권의 평점 요약을 다시 계산했습니다.")
+
+
+@catalog_cli.command('rebuild-search')
+def rebuild_search():
+    """전문 검색 인덱스(SQLite FTS5 / PostgreSQL tsvector)를 다시 구축한다."""
+    from flask import current_app
+    from app import db
+    from app.search import rebuild
+    engine_name = rebuild(db.engine)
+    current_app.config['FULLTEXT_SEARCH'] = engine_name
+    if engine_name:
+        click.echo(f"전문 검색 인덱스를 다시 구축했습니다 ({engine_name}).")
+    else:
+        click.echo("이 데이터베이스에서는 전문 검색을 사용할 수 없어 ilike 검색으로 동작합니다.", err=True)
+
+
+@catalog_cli.command('migrate-covers')
+@click.option('--batch-size', default=100, show_default=True, help='한 번에 옮길 도서 수 (배치마다 커밋)')
+@click.option('--storage', type=click.Choice(['db', 'fs']), default=None,
+              help='대상 저장소 (기본: COVER_STORAGE 설정)')
+def migrate_covers(batch_size, storage):
+    """book.image_data(Base64)에 남은 표지를 표지 저장소로 옮기고 컬럼을 비운다."""
+    from app.cover_store import get_store, migrate_base64_covers
+    store = get_store(storage)
+    done = migrate_base64_covers(batch_size=batch_size, store=store)
+    click.echo(f"{done}권의 표지를 '{store.name}' 저장소로 옮겼습니다.")
+
+
+@catalog_cli.command('regenerate-cover-variants')
+@click.option('--workers', default=None, type=int, help='이미지 처리 프로세스 수 (기본: CPU 코어 수)')
+@click.option('--batch-size', default=50, show_default=True, help='한 번에 처리할 도서 수 (배치마다 커밋)')
+def regenerate_cover_variants(workers, batch_size):
+    """표지 저장소의 원본으로 너비별 WebP/JPEG 변형을 다시 만든다 (migrate-covers 이후 실행)."""
+    from app.cover_store import regenerate_variants
+    done = regenerate_variants(workers=workers, batch_size=batch_size)
+    click.echo(f"표지 {done}개의 반응형 변형을 만들었습니다.")
+
+
+@catalog_cli.command('rebuild-similarity')
+def rebuild_similarity():
+    """도서별 비슷한 도서 목록(book_similarity)을 처음부터 다시 계산한다 (가중치를 바꾼 뒤 등)."""
+    from app import db
+    from app.similarity import rebuild
+    done = rebuild()
+    db.session.commit()
+    click.echo(f"{done}권의 비슷한 도서 목록을 다시 계산했습니다.")
+
+
+@catalog_cli.command('rebuild-text-similarity')
+def rebuild_text_similarity():
+    """소개글 유사도 목록(book_text_similarity)을 처음부터 다시 계산한다. 증분 갱신은 바뀌지 않은
+    도서 쌍의 점수를 옛 IDF 그대로 두므로, 소개글을 대량으로 추가·재작성한 뒤에 실행한다."""
+    from app import db
+    from app.text_similarity import rebuild
+    done = rebuild()
+    db.session.commit()
+    click.echo(f"소개글이 있는 {done}권의 유사 도서 목록을 다시 계산했습니다.")
+
+
+@catalog_cli.command('rebuild-co-purchases')
+def rebuild_co_purchases():
+    """동시 구매 횟수(book_co_purchase)를 주문 이력 전체에서 다시 센다 (주문을 직접 고친 뒤 등)."""
+    from app import db
+    from app.co_purchase import rebuild
+    groups = rebuild()
+    db.session.commit()
+    click.echo(f"주문 그룹 {groups}개에서 함께 산 책 횟수를 다시 셌습니다.")
+
+
+@catalog_cli.command('import-books')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+def import_books(path):
+    """CSV/XLSX 파일을 일괄 입고한다. 웹 업로드와 같은 처리이며 요청 시간 제한이 없다."""
+    from app import bulk_import
+    with open(path, 'rb') as f:
+        try:
+            result = bulk_import.import_file(f, path)
+        except bulk_import.ImportFileError as e:
+            raise click.ClickException(str(e))
+    click.echo(f"신규 {result.inserted}권, 갱신 {result.updated}권, 오류 {result.error_count}행")
+    for line, message in result.errors:
+        click.echo(f"  {line}행: {message}")
+    if not result.similarity_refreshed:
+        click.echo("도서가 많아 비슷한 도서 목록은 갱신하지 않았습니다. "
+                   "flask catalog rebuild-similarity / rebuild-text-similarity를 실행하세요.")
+
+
+@catalog_cli.command('ingest-covers')
+@click.argument('paths', nargs=-1, required=True, type=click.Path(exists=True))
+@click.option('--processes', default=None, type=int, help='리사이즈 프로세스 수 (기본: CPU 코어 수, 0이면 이 프로세스)')
+@click.option('--concurrency', default=None, type=int, help='동시에 보낼 분석 요청 수')
+def ingest_covers(paths, processes, concurrency):
+    """표지 사진(또는 ZIP, 사진이 든 폴더)을 배치로 분석한다. 결과 초안은 /admin/covers/<배치>에서 검토해 등록한다."""
+    import os
+    from contextlib import ExitStack
+    from app import cover_ingest
+
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files += sorted(os.path.join(root, name) for root, _, names in os.walk(path) for name in names)
+        else:
+            files.append(path)
+    with ExitStack() as stack:
+        uploads = [(os.path.basename(f), stack.enter_context(open(f, 'rb'))) for f in files
+                   if f.lower().endswith('.zip') or cover_ingest.is_image(f)]
+        try:
+            batch = cover_ingest.create_batch(uploads)
+        except cover_ingest.IngestError as e:
+            raise click.ClickException(str(e))
+    click.echo(f"배치 #{batch.id}: 사진 {batch.total}장 처리 중...")
+    progress = cover_ingest.run(batch.id, processes=processes, concurrency=concurrency)
+    click.echo(f"검토 대기 {progress.counts.get('ready', 0)}장, 실패 {progress.counts.get('failed', 0)}장 "
+               f"— 분당 {progress.per_minute}권 ({progress.seconds:.1f}초)")
+
+
+jobs_cli = AppGroup('jobs', help='백그라운드 작업 큐 명령')
+
+
+@jobs_cli.command('worker')
+@click.option('--burst', is_flag=True, help='대기 중인 작업을 모두 처리하면 종료')
+@click.option('--poll', default=None, type=float, help='대기열이 비었을 때 다시 확인하는 간격(초)')
+@click.option('--max-jobs', default=None, type=int, help='이만큼 처리하고 종료 (메모리 누수 대비 재시작용)')
+def jobs_worker(burst, poll, max_jobs):
+    """작업을 하나씩 가져와 처리한다. SIGTERM/SIGINT를 받으면 지금 작업을 마치고 종료한다."""
+    import signal
+    import threading
+    from app import jobs
+
+    stop = threading.Event()
+
+    def _graceful(signum, frame):
+        click.echo("종료 신호를 받았습니다. 지금 작업을 마치고 종료합니다.")
+        stop.set()
+
+    previous = {sig: signal.signal(sig, _graceful) for sig in (signal.SIGTERM, signal.SIGINT)}
+    try:
+        done = jobs.work(burst=burst, poll=poll, max_jobs=max_jobs, stop=stop)
+    finally:
+        for sig, handler in previous.items():
+            signal.signal(sig, handler)
+    click.echo(f"작업 {done}건을 처리했습니다.")
+
+
+def register_commands(app):
+    app.cli.add_command(catalog_cli)
+    app.cli.add_command(jobs_cli)
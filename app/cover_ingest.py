@@ -0,0 +1,417 @@
+"""
+표지 사진 일괄 입고 + Gemini 표지 분석.
+
+/admin/add는 요청마다 사진 한 장을 받아 gunicorn 요청 안에서 Gemini를 타임아웃 없이 동기
+호출했다. 유품 정리처럼 수십~수백 권을 한꺼번에 들이면 사진마다 폼을 다시 채워야 했다.
+여기서는 여러 장의 사진이나 ZIP을 한 번에 받아 배치(CoverBatch)와 사진별 초안(CoverDraft)을
+만들고, 요청은 바로 진행 페이지로 넘긴다. 처리는 작업 큐(app/jobs.py)의 cover_batch 작업으로
+`flask jobs worker`가 맡는다.
+
+- 리사이즈: 원본은 임시 디렉터리(COVER_INGEST_PATH)에 받아 두고, 800px JPEG 변환은 CPU 작업이라
+  프로세스 풀(COVER_INGEST_PROCESSES, 기본 CPU 코어 수, 0이면 이 프로세스)에서 돌린다.
+- 분석: 리사이즈가 끝난 사진부터 스레드 풀에 넘겨 최대 COVER_ANALYSIS_CONCURRENCY개를 동시에
+  보낸다. 호출 간격은 다른 Gemini 호출과 함께 쓰는 모델별 토큰 버킷(app/rate_limit.py)이 맞추고,
+  호출마다 COVER_ANALYSIS_TIMEOUT초 타임아웃과 Gemini 서킷 브레이커(app/circuit_breaker.py)를 건다.
+- 결과는 초안으로 남고, 관리자가 /admin/covers/<배치>에서 확인·수정하고 가격/재고를 넣어
+  등록(accept)해야 도서가 된다. 진행 페이지는 분당 분석 권수(처리량)를 함께 보여 준다.
+- 처리권은 배치 행의 조건부 UPDATE로 한 곳만 가져간다. 워커가 재시작돼 멈춘 배치는 하트비트가
+  STALE_SECONDS 넘게 끊기면 '재처리'로 이어서 돌릴 수 있다. 워커 없는 배포에서 /admin/jobs가 대신
+  돌릴 때는 사진 몇 장만 처리하고(jobs.take) 배치를 queued로 돌려 다음 요청이 이어서 한다.
+- COVER_ANALYZER='stub'이면 Gemini 대신 StubModel이 고정 응답을 돌려준다 (오프라인 테스트·처리량 측정).
+"""
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from flask import current_app
+from PIL import Image
+from sqlalchemy import func, or_, select
+
+from app import circuit_breaker, db, jobs, rate_limit
+from app.cover_store import save_cover
+from app.models import Book, CoverBatch, CoverDraft
+
+MODEL_NAME = 'gemini-flash-latest'
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp')
+MAX_FILES = 500
+MAX_IMAGE_BYTES = 20 * 1024 * 1024
+COVER_MAX_SIZE = (800, 800)
+DEFAULT_CONCURRENCY = 4
+DEFAULT_TIMEOUT = 60
+STALE_SECONDS = 300
+
+PROMPT = """
+Analyze this book cover image.
+1. Identify the Title and Author of the book from the text on the cover.
+2. Using your internal knowledge about this specific book (based on the identified Title/Author), generate a "description" that serves as a curatorial note.
+
+IMPORTANT: The 'description' field MUST be written in Korean (한국어).
+The description should NOT just describe the cover art.
+Instead, explain the book's plot, themes, literary significance, and why it is worth collecting.
+Make it engaging and professional, like a museum curator introducing a masterpiece.
+
+Return strictly valid JSON:
+{
+    "title": "Book Title (Identified from cover)",
+    "author": "Author Name (Identified from cover)",
+    "year": 1900 (Use an estimated year if not visible, as integer),
+    "edition": "First Edition (or 'Unknown')",
+    "condition": "Good (Estimate based on visual wear)",
+    "description": "A rich, engaging curation note about the book's content and literary value. WRITE THIS IN KOREAN."
+}
+"""
+
+_drafts = CoverDraft.__table__
+_batches = CoverBatch.__table__
+
+
+class IngestError(ValueError):
+    """업로드 전체를 받을 수 없다 (이미지 없음, 장수 초과, 깨진 ZIP 등). 메시지는 관리자에게 그대로 보여 준다."""
+
+
+def _now():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+# --- 이미지 준비 (프로세스 풀) ---
+
+def prepare_cover(data):
+    """사진 바이트 → 최대 800px RGB JPEG 바이트. 이미지가 아니면 None.
+    프로세스 풀에서 돌 수 있게 모듈 최상위 함수로 두고 앱/DB에 의존하지 않는다."""
+    try:
+        img = Image.open(io.BytesIO(data))
+        img.load()
+    except Exception:
+        return None
+    if img.mode not in ('RGB', 'L'):
+        img = img.convert('RGB')
+    img.thumbnail(COVER_MAX_SIZE, Image.Resampling.LANCZOS)
+    out = io.BytesIO()
+    img.save(out, format='JPEG', quality=90)
+    return out.getvalue() or None
+
+
+def prepare_cover_file(path):
+    with open(path, 'rb') as f:
+        return prepare_cover(f.read())
+
+
+def _resize(items, processes):
+    """[(초안 id, 원본 경로)] → 끝나는 순서대로 (초안 id, JPEG 또는 None)."""
+    if not items:
+        return
+    if processes == 0:
+        for draft_id, path in items:
+            yield draft_id, prepare_cover_file(path)
+        return
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        futures = {pool.submit(prepare_cover_file, path): draft_id for draft_id, path in items}
+        for future in as_completed(futures):
+            try:
+                jpeg = future.result()
+            except Exception:
+                jpeg = None
+            yield futures[future], jpeg
+
+
+# --- 표지 분석 (Gemini) ---
+
+class StubModel:
+    """오프라인용 가짜 Gemini 모델 (COVER_ANALYZER='stub'). 이미지 해시로 만든 고정 JSON을
+    COVER_STUB_LATENCY초 뒤 돌려준다 — 실제 모델과 같은 generate_content 인터페이스."""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+
+    def generate_content(self, contents, request_options=None):
+        digest = hashlib.sha1(contents[-1]['data']).hexdigest()[:8]
+        if self.latency:
+            time.sleep(self.latency)
+        data = {
+            'title': f'표지 {digest}',
+            'author': '미상',
+            'year': 1950,
+            'edition': 'Unknown',
+            'condition': 'Good',
+            'description': f'표지 {digest}의 분석 결과입니다.',
+        }
+        return SimpleNamespace(text='```json\n' + json.dumps(data, ensure_ascii=False) + '\n```')
+
+
+def analyzer_configured():
+    return current_app.config.get('COVER_ANALYZER') == 'stub' or bool(os.environ.get('GOOGLE_API_KEY'))
+
+
+def _model():
+    if current_app.config.get('COVER_ANALYZER') == 'stub':
+        return StubModel(current_app.config.get('COVER_STUB_LATENCY', 0.0))
+    api_key = os.environ.get('GOOGLE_API_KEY')
+    if not api_key:
+        raise IngestError('Google API Key를 찾을 수 없습니다. 자동 분석을 수행할 수 없습니다.')
+    import google.generativeai as genai
+    genai.configure(api_key=api_key)
+    return genai.GenerativeModel(MODEL_NAME)
+
+
+def parse_analysis(text):
+    """모델 응답 텍스트 → 도서 필드 dict. JSON이 아니면 json.JSONDecodeError."""
+    data = json.loads(text.replace('```json', '').replace('```', '').strip())
+    if not isinstance(data, dict):
+        raise json.JSONDecodeError('JSON 객체가 아닙니다', text, 0)
+    try:
+        year = int(data.get('year') or 0)
+    except (TypeError, ValueError):
+        year = 0
+    return {
+        'title': str(data.get('title') or 'Unknown Title')[:100],
+        'author': str(data.get('author') or 'Unknown Author')[:100],
+        'year': year,
+        'edition': str(data.get('edition') or '')[:50],
+        'condition': str(data.get('condition') or 'Good')[:50],
+        'description': str(data.get('description') or ''),
+    }
+
+
+def analyze(jpeg, timeout=None):
+    """표지 JPEG 한 장 → 도서 필드 dict (title/author/year/edition/condition/description)."""
+    model = _model()
+    timeout = timeout or current_app.config.get('COVER_ANALYSIS_TIMEOUT', DEFAULT_TIMEOUT)
+    with circuit_breaker.guard('gemini'), rate_limit.limited(MODEL_NAME):
+        response = model.generate_content([PROMPT, {'mime_type': 'image/jpeg', 'data': jpeg}],
+                                          request_options={'timeout': timeout})
+    return parse_analysis(response.text)
+
+
+def _analyze_in_thread(app, jpeg):
+    with app.app_context():
+        return analyze(jpeg)
+
+
+# --- 배치 생성/처리 ---
+
+def _spool_dir(batch_id):
+    root = current_app.config.get('COVER_INGEST_PATH') or os.path.join(tempfile.gettempdir(), 'cover_ingest')
+    return os.path.join(root, str(batch_id))
+
+
+def is_image(name):
+    return os.path.splitext(name.lower())[1] in IMAGE_EXTENSIONS
+
+
+def _entries(uploads):
+    """[(파일명, 바이너리 스트림)] → 이미지 항목 (파일명, 스트림). ZIP은 펼치고 이미지가 아닌 항목은 건너뛴다."""
+    for name, stream in uploads:
+        if name.lower().endswith('.zip'):
+            try:
+                archive = zipfile.ZipFile(stream)
+            except zipfile.BadZipFile:
+                raise IngestError(f'ZIP 파일을 열 수 없습니다: {name}')
+            with archive:
+                for info in archive.infolist():
+                    base = os.path.basename(info.filename)
+                    if info.is_dir() or info.filename.startswith('__MACOSX/') or base.startswith('.') or not is_image(base):
+                        continue
+                    with archive.open(info) as member:
+                        yield base, member
+        elif is_image(name):
+            yield name, stream
+
+
+def _copy_limited(stream, path):
+    """스트림을 MAX_IMAGE_BYTES + 1바이트까지만 파일로 옮긴다. 반환: 옮긴 바이트 수"""
+    size = 0
+    with open(path, 'wb') as out:
+        while size <= MAX_IMAGE_BYTES:
+            chunk = stream.read(min(1024 * 1024, MAX_IMAGE_BYTES + 1 - size))
+            if not chunk:
+                break
+            out.write(chunk)
+            size += len(chunk)
+    return size
+
+
+def create_batch(uploads):
+    """업로드된 사진/ZIP으로 배치와 초안을 만든다 (원본은 임시 디렉터리에 보관, 처리는 start/run).
+    반환: CoverBatch. 받을 사진이 없거나 MAX_FILES를 넘으면 IngestError."""
+    batch = CoverBatch(status='queued')
+    db.session.add(batch)
+    db.session.flush()
+    directory = _spool_dir(batch.id)
+    os.makedirs(directory, exist_ok=True)
+    try:
+        drafts = []
+        for n, (name, stream) in enumerate(_entries(uploads)):
+            if n >= MAX_FILES:
+                raise IngestError(f'한 번에 최대 {MAX_FILES}장까지 올릴 수 있습니다.')
+            path = os.path.join(directory, f'{n:05d}{os.path.splitext(name.lower())[1]}')
+            if _copy_limited(stream, path) > MAX_IMAGE_BYTES:
+                os.remove(path)
+                drafts.append(CoverDraft(filename=name[:255], status='failed',
+                                         error=f'{MAX_IMAGE_BYTES // (1024 * 1024)}MB를 넘는 파일입니다.'))
+            else:
+                drafts.append(CoverDraft(filename=name[:255], source_path=path))
+        if not drafts:
+            raise IngestError('이미지 파일(JPG/PNG/WEBP 또는 이를 담은 ZIP)이 없습니다.')
+        batch.total = len(drafts)
+        batch.drafts.extend(drafts)
+        db.session.commit()
+    except BaseException:
+        db.session.rollback()
+        shutil.rmtree(directory, ignore_errors=True)
+        raise
+    return batch
+
+
+def claim(batch_id):
+    """배치 처리권을 가져온다. 처리 중이 아니거나 하트비트가 STALE_SECONDS 넘게 멈춘 배치만
+    조건부 UPDATE로 한 곳이 가져간다. 처리량은 이번 실행 기준으로 다시 센다."""
+    now = _now()
+    result = db.session.execute(
+        _batches.update()
+        .where(_batches.c.id == batch_id,
+               or_(_batches.c.status != 'running',
+                   _batches.c.heartbeat_at < now - timedelta(seconds=STALE_SECONDS)))
+        .values(status='running', started_at=now, heartbeat_at=now, finished_at=None)
+    )
+    db.session.commit()
+    return result.rowcount == 1
+
+
+def requeue_failed(batch_id):
+    """분석에 실패한(리사이즈는 된) 초안을 다시 분석 대기로 돌린다. 반환: 돌린 초안 수"""
+    result = db.session.execute(
+        _drafts.update()
+        .where(_drafts.c.batch_id == batch_id, _drafts.c.status == 'failed', _drafts.c.image.isnot(None))
+        .values(status='analyzing', error=None)
+    )
+    db.session.commit()
+    return result.rowcount
+
+
+def _save(batch_id, draft_id, **values):
+    db.session.execute(_drafts.update().where(_drafts.c.id == draft_id).values(**values))
+    db.session.execute(_batches.update().where(_batches.c.id == batch_id).values(heartbeat_at=_now()))
+    db.session.commit()
+
+
+def run(batch_id, processes=None, concurrency=None):
+    """배치의 남은 초안을 처리한다: 리사이즈(프로세스 풀) → 분석(스레드 풀, 호출 한도는 rate_limit).
+    DB 쓰기는 이 스레드에서만 하고 초안 하나마다 커밋한다. 반환: Progress (처리권을 못 얻으면 None)"""
+    if not claim(batch_id):
+        return None
+    app = current_app._get_current_object()
+    config = app.config
+    if processes is None:
+        processes = config.get('COVER_INGEST_PROCESSES')
+    concurrency = concurrency or config.get('COVER_ANALYSIS_CONCURRENCY', DEFAULT_CONCURRENCY)
+
+    rows = db.session.execute(
+        select(_drafts.c.id, _drafts.c.status, _drafts.c.source_path)
+        .where(_drafts.c.batch_id == batch_id, _drafts.c.status.in_(('pending', 'analyzing')))
+        .order_by(_drafts.c.id)
+    ).all()
+    total, rows = len(rows), jobs.take(rows)  # 요청 안 대체 경로(jobs.run_stuck)에서는 앞의 몇 장만
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as analysts:
+            futures = {}
+            for draft_id, status, _ in rows:
+                if status == 'analyzing':  # 이전 실행에서 리사이즈까지 끝났거나 재시도 대상
+                    jpeg = db.session.execute(select(_drafts.c.image).where(_drafts.c.id == draft_id)).scalar()
+                    futures[analysts.submit(_analyze_in_thread, app, jpeg)] = draft_id
+
+            pending = [(draft_id, path) for draft_id, status, path in rows if status == 'pending']
+            for draft_id, jpeg in _resize(pending, processes):
+                if jpeg is None:
+                    _save(batch_id, draft_id, status='failed', source_path=None, error='이미지를 읽을 수 없습니다.')
+                    continue
+                _save(batch_id, draft_id, status='analyzing', source_path=None, image=jpeg)
+                futures[analysts.submit(_analyze_in_thread, app, jpeg)] = draft_id
+            if len(rows) == total:  # 남은 원본은 다음 실행이 리사이즈한다
+                shutil.rmtree(_spool_dir(batch_id), ignore_errors=True)
+
+            for future in as_completed(futures):
+                try:
+                    values = dict(future.result(), status='ready', error=None)
+                except Exception as e:
+                    values = {'status': 'failed', 'error': f'{type(e).__name__}: {e}'[:255]}
+                _save(batch_id, futures[future], analyzed_at=_now(), **values)
+    finally:
+        db.session.rollback()
+        values = {'status': 'done', 'finished_at': _now()} if len(rows) == total else {'status': 'queued'}
+        db.session.execute(_batches.update().where(_batches.c.id == batch_id).values(**values))
+        db.session.commit()
+    return progress(db.session.get(CoverBatch, batch_id))
+
+
+def start(batch_id):
+    """배치 처리를 작업 큐에 넣는다 (cover_batch 작업, app/tasks.py). 반환: Job"""
+    job = jobs.enqueue('cover_batch', {'batch_id': batch_id}, unique=True)
+    db.session.commit()
+    return job
+
+
+# --- 진행률 / 검토 ---
+
+@dataclass
+class Progress:
+    batch: CoverBatch
+    counts: dict = field(default_factory=dict)  # 초안 상태 → 개수
+    analysed: int = 0                            # 이번 실행에서 분석에 성공한 초안 수
+    seconds: float = 0.0                         # 이번 실행 경과 시간
+
+    @property
+    def remaining(self):
+        return self.counts.get('pending', 0) + self.counts.get('analyzing', 0)
+
+    @property
+    def running(self):
+        batch = self.batch
+        return batch.status == 'running' and batch.heartbeat_at is not None and \
+            batch.heartbeat_at >= _now() - timedelta(seconds=STALE_SECONDS)
+
+    @property
+    def percent(self):
+        total = self.batch.total or 0
+        return 100 if not total else round(100 * (total - self.remaining) / total)
+
+    @property
+    def per_minute(self):
+        """분당 분석 권수 — 리사이즈와 분석 대기까지 포함한 실제 처리량."""
+        return round(self.analysed * 60 / self.seconds, 1) if self.seconds > 0 else 0.0
+
+
+def progress(batch):
+    counts = dict(db.session.execute(
+        select(CoverDraft.status, func.count()).where(CoverDraft.batch_id == batch.id).group_by(CoverDraft.status)
+    ).all())
+    analysed, seconds = 0, 0.0
+    if batch.started_at is not None:
+        analysed = db.session.execute(
+            select(func.count()).select_from(CoverDraft)
+            .where(CoverDraft.batch_id == batch.id, CoverDraft.analyzed_at >= batch.started_at,
+                   CoverDraft.status.in_(('ready', 'accepted')))
+        ).scalar()
+        seconds = ((batch.finished_at or _now()) - batch.started_at).total_seconds()
+    return Progress(batch, counts, analysed, seconds)
+
+
+def accept(draft, title, author, year, edition, condition, description, price, stock_quantity):
+    """검토를 마친 초안을 도서로 등록한다 (커밋은 호출부). 반환: 새 Book"""
+    book = Book(title=title, author=author, year=year, edition=edition, condition=condition,
+                description=description, price=price, stock_quantity=stock_quantity)
+    save_cover(book, draft.image)
+    db.session.add(book)
+    db.session.flush()
+    draft.status = 'accepted'
+    draft.book_id = book.id
+    draft.image = None
+    return book
@@ -0,0 +1,195 @@
+"""
+표지 이미지 저장소 (Base64 Text 컬럼 대체).
+
+Book.image_data에 Base64로 넣어 두면 원본보다 33% 크고, 전송할 때마다 디코딩해야 하며,
+컬럼을 지연 로딩하지 않은 모든 Book 조회에 끌려 나온다. 표지 바이트는 내용 해시
+(Book.image_hash)를 키로 하는 별도 저장소에 두고, book 행에는 해시만 남긴다.
+
+COVER_STORAGE 설정(환경변수)으로 백엔드를 고른다.
+
+- 'db' (기본): cover_blob 테이블(PostgreSQL bytea / SQLite BLOB). 읽기 전용 파일시스템인
+  서버리스 배포에서도 동작한다.
+- 'fs': app/static/book_covers/<해시 앞 2자>/<해시> 파일. send_file로 내보내므로
+  WSGI 서버의 file_wrapper(sendfile)나 USE_X_SENDFILE을 그대로 탄다.
+
+원본 외에 너비별 WebP/JPEG 변형(app/cover_variants.py)도 `<해시>-<너비>.<확장자>` 키로
+같은 저장소에 들어간다. 같은 내용은 같은 키라서 중복 저장되지 않는다. 표지를 교체해도
+옛 바이트는 지우지 않는다 (다른 도서가 같은 이미지를 쓰고 있을 수 있음).
+"""
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+from flask import current_app, make_response, send_file
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+from app import cover_variants, db
+from app.covers import content_hash, decode, guess_mimetype
+from app.models import Book, CoverBlob
+
+_blobs = CoverBlob.__table__
+
+
+class DatabaseCoverStore:
+    name = 'db'
+
+    def save(self, data, key=None):
+        key = key or content_hash(data)
+        connection = db.session.connection()
+        # 있는지만 본다 — session.get은 이미 저장된 바이트(data)까지 읽어 온다
+        if connection.execute(select(_blobs.c.hash).where(_blobs.c.hash == key)).first() is None:
+            try:
+                with connection.begin_nested():
+                    connection.execute(_blobs.insert().values(hash=key, data=data))
+            except IntegrityError:
+                pass  # 다른 요청이 같은 이미지를 방금 저장했다 — 내용이 같으니 그 행을 쓴다
+        return key
+
+    def read(self, key):
+        return db.session.execute(select(CoverBlob.data).where(CoverBlob.hash == key)).scalar()
+
+    def response(self, key):
+        data = self.read(key)
+        if data is None:
+            return None
+        resp = make_response(bytes(data))
+        resp.mimetype = guess_mimetype(data)
+        return resp
+
+
+class FilesystemCoverStore:
+    name = 'fs'
+
+    def __init__(self, root):
+        self.root = root
+
+    def path(self, key):
+        return os.path.join(self.root, key[:2], key)
+
+    def save(self, data, key=None):
+        key = key or content_hash(data)
+        path = self.path(key)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # 임시 파일에 다 쓴 뒤 rename — 동시에 읽는 요청이 반쯤 쓰인 파일을 보지 않게 한다
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        return key
+
+    def read(self, key):
+        try:
+            with open(self.path(key), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def response(self, key):
+        path = self.path(key)
+        try:
+            with open(path, 'rb') as f:
+                head = f.read(16)
+        except FileNotFoundError:
+            return None
+        # ETag/캐시 헤더는 호출부(/covers 라우트)가 붙인다
+        return send_file(path, mimetype=guess_mimetype(head), etag=False, conditional=False, max_age=None)
+
+
+def get_store(name=None):
+    name = name or current_app.config.get('COVER_STORAGE', 'db')
+    if name == 'fs':
+        return FilesystemCoverStore(current_app.config['COVER_STORAGE_PATH'])
+    return DatabaseCoverStore()
+
+
+def save_cover(book, data):
+    """표지 바이트와 반응형 변형을 저장소에 넣고 book이 그 해시를 가리키게 한다 (커밋은 호출부)."""
+    store = get_store()
+    key = store.save(data)
+    book.image_data = None
+    book.image_hash = key
+    book.image_file = 'stored_in_db'
+    book.cover_widths = cover_variants.store_variants(store, key, cover_variants.generate(data))
+    return key
+
+
+def cover_response(image_hash, image_data=None):
+    """표지 응답(헤더 제외). 아직 이관되지 않은 Base64 행은 그 값을 직접 디코딩한다."""
+    if image_data:
+        data = decode(image_data)
+        if data is None:
+            return None
+        resp = make_response(data)
+        resp.mimetype = guess_mimetype(data)
+        return resp
+    return get_store().response(image_hash)
+
+
+def migrate_base64_covers(batch_size=100, store=None):
+    """image_data(Base64)가 남은 도서의 표지를 저장소로 옮기고 컬럼을 비운다.
+    배치마다 커밋하므로 중간에 멈춰도 다시 실행하면 이어서 처리한다. 반환: 옮긴 도서 수"""
+    store = store or get_store()
+    table = Book.__table__
+    done, last_id = 0, 0
+    while True:
+        rows = db.session.execute(
+            select(table.c.id, table.c.image_data)
+            .where(table.c.id > last_id, table.c.image_data.isnot(None))
+            .order_by(table.c.id).limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        params = []
+        for book_id, image_data in rows:
+            data = decode(image_data)
+            params.append({'b_id': book_id, 'h': store.save(data) if data else None})
+        db.session.execute(
+            table.update().where(table.c.id == db.bindparam('b_id'))
+            .values(image_hash=db.bindparam('h'), image_data=None),
+            params,
+        )
+        db.session.commit()
+        db.session.expire_all()  # 배치 간에 이미 디코딩한 Base64 문자열을 붙잡고 있지 않도록
+        done += len(rows)
+        last_id = rows[-1][0]
+    return done
+
+
+def regenerate_variants(workers=None, batch_size=50, store=None):
+    """표지 저장소에 원본이 있는 모든 도서의 반응형 변형을 다시 만든다.
+    이미지 리사이즈/인코딩은 CPU 작업이라 프로세스 풀에서 돌리고, 저장소 쓰기와 DB 갱신은
+    이 프로세스에서 배치마다 커밋한다. 반환: 변형을 만든 고유 표지 수"""
+    store = store or get_store()
+    table = Book.__table__
+    done, last_id, seen = 0, 0, set()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        while True:
+            rows = db.session.execute(
+                select(table.c.id, table.c.image_hash)
+                .where(table.c.id > last_id, table.c.image_hash.isnot(None), table.c.image_data.is_(None))
+                .order_by(table.c.id).limit(batch_size)
+            ).all()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+
+            # 같은 표지를 쓰는 도서는 해시 기준 UPDATE 한 번에 모두 갱신되므로 표지당 한 번만 처리
+            hashes = sorted({image_hash for _, image_hash in rows} - seen)
+            seen.update(hashes)
+            originals = {h: store.read(h) for h in hashes}
+            hashes = [h for h in hashes if originals[h]]
+            params = []
+            for image_hash, variants in zip(hashes, pool.map(cover_variants.generate, [originals[h] for h in hashes])):
+                params.append({'h': image_hash, 'w': cover_variants.store_variants(store, image_hash, variants)})
+            if params:
+                db.session.execute(
+                    table.update().where(table.c.image_hash == db.bindparam('h'))
+                    .values(cover_widths=db.bindparam('w')),
+                    params,
+                )
+            db.session.commit()
+            db.session.expire_all()
+            done += len(params)
+    return done
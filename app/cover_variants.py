@@ -0,0 +1,57 @@
+"""
+표지 반응형 변형(variant) 생성.
+
+업로드 경로는 최대 800~1000px JPEG 한 장만 만들어서, 장바구니의 56px 썸네일이나 상세 페이지
+하단 4칸 추천 목록에도 원본이 그대로 내려갔다. 표지를 저장할 때 너비별(WIDTHS) WebP/JPEG
+변형을 함께 만들어 같은 표지 저장소에 넣고, 템플릿은 <picture> + srcset으로 브라우저가
+화면 크기에 맞는 파일을 고르게 한다.
+
+변형 키는 `<원본 해시>-<너비>.<확장자>`이고, 어떤 너비가 있는지는 Book.cover_widths에 기록한다
+(원본보다 큰 너비는 만들지 않는다). 기존 카탈로그는 `flask catalog regenerate-cover-variants`로
+프로세스 풀에서 한꺼번에 만든다.
+"""
+import io
+
+from PIL import Image
+
+WIDTHS = (160, 320, 640, 1000)
+FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpg':  ('JPEG', {'quality': 85, 'optimize': True, 'progressive': True}),
+}
+
+
+def variant_key(image_hash, width, ext):
+    return f'{image_hash}-{width}.{ext}'
+
+
+def generate(data):
+    """원본 바이트 → {(너비, 확장자): 바이트}. 이미지가 아니면 빈 dict.
+    프로세스 풀에서도 돌 수 있게 모듈 최상위 함수로 두고 앱/DB에 의존하지 않는다."""
+    try:
+        img = Image.open(io.BytesIO(data))
+        img.load()
+    except Exception:
+        return {}
+    if img.mode not in ('RGB', 'L'):
+        img = img.convert('RGB')
+
+    variants = {}
+    for width in WIDTHS:
+        if width > img.width:
+            break
+        height = max(1, round(img.height * width / img.width))
+        resized = img if width == img.width else img.resize((width, height), Image.Resampling.LANCZOS)
+        for ext, (fmt, options) in FORMATS.items():
+            buf = io.BytesIO()
+            resized.save(buf, format=fmt, **options)
+            variants[(width, ext)] = buf.getvalue()
+    return variants
+
+
+def store_variants(store, image_hash, variants):
+    """generate() 결과를 저장소에 넣고 Book.cover_widths에 쓸 문자열을 돌려준다 (없으면 None)."""
+    for (width, ext), blob in variants.items():
+        store.save(blob, key=variant_key(image_hash, width, ext))
+    widths = sorted({width for width, _ in variants})
+    return ','.join(str(w) for w in widths) or None
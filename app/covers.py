@@ -0,0 +1,80 @@
+"""
+표지 이미지 전송.
+
+예전에는 템플릿이 Book.image_data(Base64)를 `data:` URI로 HTML 본문에 그대로 박아 넣어서
+목록 한 페이지가 표지 수만큼 수 MB가 되었고, 브라우저/Cloudflare 어디에서도 캐시되지 않았다.
+이제 표지는 `/covers/<book_id>?v=<image_hash>` 주소로 따로 내려준다.
+
+- image_hash: 디코딩한 이미지 바이트의 SHA-256 앞 16자. image_data가 바뀔 때 모델의
+  @validates가 다시 계산한다. 템플릿은 이 값을 URL의 v 파라미터로 붙이므로 표지가 바뀌면
+  URL 자체가 바뀐다 → v가 붙은 응답은 `immutable`로 1년 캐시해도 안전하다.
+- ETag도 같은 해시라서, v 없이 요청하거나 캐시를 재검증하는 경우에도 If-None-Match로 304를 준다.
+"""
+import base64
+import binascii
+import hashlib
+
+from sqlalchemy import select
+
+HASH_LENGTH = 16
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+# 파일 시그니처 → MIME (업로드 경로는 모두 JPEG로 저장하지만 예전 데이터 대비)
+_SIGNATURES = (
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'GIF8', 'image/gif'),
+    (b'RIFF', 'image/webp'),
+)
+
+
+def decode(image_data):
+    """Base64 문자열 → 바이트 (깨진 값이면 None)"""
+    if not image_data:
+        return None
+    try:
+        return base64.b64decode(image_data)
+    except (binascii.Error, ValueError):
+        return None
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+
+
+def hash_image_data(image_data):
+    """Book.image_data(Base64) → image_hash. 표지가 없거나 깨졌으면 None."""
+    data = decode(image_data)
+    return content_hash(data) if data else None
+
+
+def guess_mimetype(data):
+    for signature, mimetype in _SIGNATURES:
+        if data.startswith(signature):
+            return mimetype
+    return 'image/jpeg'
+
+
+def backfill_hashes(batch_size=200):
+    """image_hash 컬럼 추가 직후 기존 표지의 해시를 배치로 채운다. 반환: 처리한 도서 수"""
+    from app import db
+    from app.models import Book
+
+    table = Book.__table__
+    done, last_id = 0, 0
+    while True:
+        rows = db.session.execute(
+            select(table.c.id, table.c.image_data)
+            .where(table.c.id > last_id, table.c.image_data.isnot(None))
+            .order_by(table.c.id).limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        db.session.execute(
+            table.update().where(table.c.id == db.bindparam('b_id')).values(image_hash=db.bindparam('h')),
+            [{'b_id': book_id, 'h': hash_image_data(data)} for book_id, data in rows],
+        )
+        db.session.commit()
+        done += len(rows)
+        last_id = rows[-1][0]
+    return done
@@ -0,0 +1,158 @@
+"""
+외부 API 응답 캐시 (DB 저장, 워커/재시작 간 공유).
+
+상세 페이지는 같은 저자의 다른 작품을 오픈라이브러리 → 구글 북스 순서로 조회하는데, 각각
+최대 10초짜리 동기 HTTP 호출이라 외부 서비스가 느리면 상세 페이지도 그만큼 느려졌다.
+결과는 저자에만 달라지므로(현재 도서 제목은 받아 온 목록에서 걸러낼 뿐) "<제공자>:<정규화된 저자>"
+키로 응답을 external_cache_entry 테이블에 저장해 둔다.
+
+- TTL: 결과가 있으면 EXTERNAL_CACHE_TTL, 빈 결과는 EXTERNAL_CACHE_NEGATIVE_TTL(짧게) 동안 재사용.
+  네트워크 오류(loader가 None 반환)는 저장하지 않는다.
+- stale-while-revalidate: 만료 후 EXTERNAL_CACHE_STALE_TTL 안이면 옛 값을 바로 돌려주고
+  백그라운드 스레드에서 새로 받아 온다. 그보다 오래된 항목은 미스로 취급한다.
+- LRU: 항목이 EXTERNAL_CACHE_MAX_ENTRIES를 넘으면 last_used_at이 가장 오래된 것부터 지운다.
+  조회할 때마다 쓰기가 일어나지 않도록 last_used_at은 TOUCH_INTERVAL마다 한 번만 갱신하고,
+  정리(COUNT + 삭제)는 저장 EXTERNAL_CACHE_EVICT_EVERY번마다 한 번만 한다.
+- 캐시 읽기·쓰기는 엔진 커넥션의 짧은 트랜잭션으로 따로 한다 — 호출부(요청) 세션을 커밋하지 않는다.
+- 미스는 single-flight로 채운다: 같은 키를 동시에 찾는 스레드는 한 번의 호출 결과를 함께 받고,
+  다른 워커는 잠금 파일로 기다렸다가 채워진 값을 읽는다 (app/single_flight.py).
+"""
+import itertools
+import json
+import threading
+import unicodedata
+from datetime import datetime, timedelta, timezone
+
+from flask import current_app
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.exc import IntegrityError
+
+from app import db, single_flight
+from app.models import ExternalCacheEntry
+
+DEFAULT_TTL = 24 * 3600
+DEFAULT_NEGATIVE_TTL = 3600
+DEFAULT_STALE_TTL = 7 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 5000
+TOUCH_INTERVAL = timedelta(minutes=5)
+EVICT_EVERY = 100  # 이 프로세스에서 이만큼 저장할 때마다 한 번 정리한다
+
+_table = ExternalCacheEntry.__table__
+_writes = itertools.count(1)
+
+_refreshing = {}  # key -> 백그라운드 갱신 스레드 (같은 키를 동시에 두 번 갱신하지 않도록)
+_refreshing_lock = threading.Lock()
+
+
+def _now():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _seconds(name, default):
+    return current_app.config.get(name, default)
+
+
+def normalize_author(author):
+    """' Han  Kang ' / 'han kang' / 전각 문자 등을 같은 키로 모은다."""
+    return ' '.join(unicodedata.normalize('NFKC', author or '').lower().split())
+
+
+def cache_key(provider, author):
+    return f'{provider}:{normalize_author(author)}'
+
+
+def cached(key, loader):
+    """key의 캐시 값을 돌려주고, 없거나 오래됐으면 loader()로 채운다.
+    loader는 리스트/딕셔너리 등 JSON으로 저장할 값을 돌려주고, 실패하면 None을 돌려준다.
+    미스에서 loader가 실패하면 빈 리스트를 돌려준다."""
+    now = _now()
+    with db.engine.connect() as conn:
+        entry = conn.execute(select(_table.c.value, _table.c.expires_at, _table.c.last_used_at)
+                             .where(_table.c.key == key)).first()
+    if entry is not None:
+        value = json.loads(entry.value)
+        if now < entry.expires_at:
+            if now - entry.last_used_at >= TOUCH_INTERVAL:
+                with db.engine.begin() as conn:
+                    conn.execute(update(_table).where(_table.c.key == key).values(last_used_at=now))
+            return value
+        if now < entry.expires_at + timedelta(seconds=_seconds('EXTERNAL_CACHE_STALE_TTL', DEFAULT_STALE_TTL)):
+            _refresh_in_background(key, loader)
+            return value
+
+    # 미스: 같은 키를 받는 중인 스레드/워커가 있으면 그 결과를 기다려 함께 쓴다 (dogpile 방지)
+    return single_flight.do(('external-cache', key), lambda: _fill(key, loader))
+
+
+def _fill(key, loader):
+    with single_flight.file_lock(('external-cache', key)):
+        # 잠금을 기다리는 동안 다른 워커가 채웠을 수 있다 — DB에서 다시 읽는다
+        with db.engine.connect() as conn:
+            row = conn.execute(select(_table.c.value, _table.c.expires_at).where(_table.c.key == key)).first()
+        if row is not None and _now() < row.expires_at:
+            return json.loads(row.value)
+        value = loader()
+        if value is None:
+            return []
+        store(key, value)
+        return value
+
+
+def store(key, value):
+    now = _now()
+    ttl = _seconds('EXTERNAL_CACHE_TTL', DEFAULT_TTL) if value else _seconds('EXTERNAL_CACHE_NEGATIVE_TTL', DEFAULT_NEGATIVE_TTL)
+    fields = dict(value=json.dumps(value, ensure_ascii=False), fetched_at=now,
+                  expires_at=now + timedelta(seconds=ttl), last_used_at=now)
+    with db.engine.begin() as conn:
+        if not conn.execute(update(_table).where(_table.c.key == key).values(**fields)).rowcount:
+            try:
+                with conn.begin_nested():
+                    conn.execute(_table.insert().values(key=key, **fields))
+            except IntegrityError:
+                return  # 다른 워커가 같은 키를 먼저 넣었다 — 그쪽 값도 방금 받아 온 것이니 그대로 둔다
+    if next(_writes) % current_app.config.get('EXTERNAL_CACHE_EVICT_EVERY', EVICT_EVERY) == 0:
+        evict()
+
+
+def evict(max_entries=None):
+    """stale 기간까지 지난 항목을 지우고, 그래도 많으면 가장 오래 안 쓴 항목부터 지운다."""
+    max_entries = max_entries or _seconds('EXTERNAL_CACHE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES)
+    stale_limit = _now() - timedelta(seconds=_seconds('EXTERNAL_CACHE_STALE_TTL', DEFAULT_STALE_TTL))
+    with db.engine.begin() as conn:
+        conn.execute(delete(_table).where(_table.c.expires_at < stale_limit))
+        excess = conn.execute(select(func.count()).select_from(_table)).scalar() - max_entries
+        if excess > 0:
+            oldest = (select(_table.c.key).order_by(_table.c.last_used_at, _table.c.key)
+                      .limit(excess).scalar_subquery())
+            conn.execute(delete(_table).where(_table.c.key.in_(oldest)))
+
+
+def _refresh_in_background(key, loader):
+    app = current_app._get_current_object()
+
+    def run():
+        try:
+            with app.app_context():
+                value = loader()
+                if value is not None:
+                    store(key, value)
+        except Exception as e:
+            print(f"외부 캐시 갱신 실패 ({key}): {e}")
+        finally:
+            with _refreshing_lock:
+                _refreshing.pop(key, None)
+
+    with _refreshing_lock:
+        if key in _refreshing:
+            return
+        thread = threading.Thread(target=run, name=f'external-cache-refresh:{key}', daemon=True)
+        _refreshing[key] = thread
+    thread.start()
+
+
+def wait_for_refreshes(timeout=5):
+    """진행 중인 백그라운드 갱신이 끝날 때까지 기다린다 (테스트/종료 처리용)."""
+    with _refreshing_lock:
+        threads = list(_refreshing.values())
+    for thread in threads:
+        thread.join(timeout)
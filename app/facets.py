@@ -0,0 +1,96 @@
+"""
+스토어 필터 바의 패싯 개수("Fine (12)") 계산.
+
+값마다 COUNT 쿼리를 따로 날리면 패싯 값 수(30개 남짓)만큼 쿼리가 늘어난다. 대신 검색어로만
+좁힌 도서 집합 위에서 `SUM(CASE WHEN ... THEN 1 ELSE 0 END)` 열을 패싯 값마다 하나씩 두어
+한 번의 집계 쿼리로 모두 센다.
+
+각 패싯의 개수는 "그 패싯만 바꿔 골랐을 때 나올 결과 수"다 — 다른 패싯의 선택은 반영하고
+자기 자신의 선택은 빼고 센다. 그래야 컨디션을 Fine으로 골라도 다른 컨디션 개수가 0으로
+사라지지 않고, 가격대를 고르면 컨디션별 개수가 그 가격대 기준으로 바뀐다.
+
+결과는 (카탈로그 세대, 필터 조합) 키로 워커 메모리에 보관한다. 도서 추가/수정/삭제와 재고
+변동은 카탈로그 변경 로그(app/catalog_changes.py)에 남고, 이 워커의 Tracker가 새 변경(늦게
+커밋된 것 포함)을 볼 때마다 세대가 올라가므로 오래된 개수가 남지 않는다.
+"""
+import threading
+from collections import OrderedDict
+
+from sqlalchemy import case, func, select
+
+from app import catalog, catalog_changes, db, search
+from app.genres import GENRE_TAXONOMY
+from app.models import Book
+
+# 필터 바에 노출하는 패싯 값 (템플릿의 드롭다운 선택지와 같은 순서)
+CONDITIONS = ['Mint', 'Fine', 'Very Good', 'Good', 'Fair', 'Poor']
+FACET_VALUES = {
+    'condition': CONDITIONS,
+    'price':     ['0-50000', '50000-100000', '100000-300000', '300000-0'],
+    'avail':     ['in_stock'],
+    'year':      ['pre1900', '1900-1950', '1951-2000', '2001-now'],
+    'edition':   list(catalog.EDITION_KEYWORDS),
+    'genre':     GENRE_TAXONOMY,
+}
+
+CACHE_SIZE = 256
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+_changes = catalog_changes.Tracker()
+
+
+def facet_counts(filters):
+    """{'condition': {'Fine': 12, ...}, ..., 'total': 현재 결과 수}.
+    같은 카탈로그 버전·필터 조합이면 DB를 다시 읽지 않는다."""
+    _changes.poll()
+    key = (_changes.generation,) + tuple(filters.get(k, '') for k in ('q',) + catalog.FACET_KEYS)
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+
+    counts = _compute(filters)
+
+    with _cache_lock:
+        _cache[key] = counts
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return counts
+
+
+def _compute(filters):
+    selected = {key: catalog.filter_condition(key, filters.get(key)) for key in catalog.FACET_KEYS}
+
+    def count_where(*conds):
+        conds = [c for c in conds if c is not None]
+        if not conds:
+            return func.count()
+        return func.coalesce(func.sum(case((db.and_(*conds), 1), else_=0)), 0)
+
+    columns, labels = [], []
+    for key, values in FACET_VALUES.items():
+        others = [cond for other, cond in selected.items() if other != key]
+        for value in values:
+            columns.append(count_where(*others, catalog.filter_condition(key, value)))
+            labels.append((key, value))
+    columns.append(count_where(*selected.values()))
+    labels.append(('total', None))
+
+    fts = search.rank_subquery(filters['q']) if filters.get('q') and search.available() else None
+    stmt = catalog.apply_search(select(*columns).select_from(Book), filters.get('q'), fts)
+    row = db.session.execute(stmt).one()
+
+    counts = {key: {} for key in FACET_VALUES}
+    for (key, value), n in zip(labels, row):
+        if key == 'total':
+            counts['total'] = int(n)
+        else:
+            counts[key][value] = int(n)
+    return counts
+
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
+    _changes.reset()
@@ -0,0 +1,88 @@
+"""
+장르 태그 비트마스크.
+
+장르는 고정된 분류표(GENRE_TAXONOMY) 안에서만 고르므로, 분류표의 위치를 비트 번호로 삼아
+한 정수 컬럼(Book.genre_mask / User.preferred_genre_mask)에 담는다. 쉼표 문자열에
+`ilike '%장르%'`를 장르 수만큼 OR로 거는 대신 `genre_mask & 선호마스크 != 0` 한 번으로 비교하고,
+부분 문자열 오탐(예: "소설" 항목이 생기면 "현대소설"·"장르소설"까지 걸리는 문제)도 생기지 않는다.
+
+화면 표시는 기존 쉼표 문자열 컬럼을 그대로 쓰고, 마스크는 모델의 @validates가 문자열이
+바뀔 때마다 같이 맞춘다. 비트 번호가 곧 저장 값이므로 분류표에는 끝에 추가만 해야 한다
+(순서를 바꾸거나 중간 항목을 지우면 저장된 마스크의 의미가 바뀐다).
+"""
+from sqlalchemy import select
+
+# 도서 장르 자동 태깅용 분류 체계
+# 국내 주요 서점(알라딘) 1depth 카테고리와 아마존 Books 카테고리를 참고해 보강함.
+# - 자기계발: 알라딘 "자기계발"에 대응. 기존엔 경제/경영·에세이/철학에 억지로 끼워 넣던
+#   자기계발서(시크릿, Atomic Habits 등)를 위한 별도 카테고리.
+# - 장르소설: 알라딘 "장르소설"/아마존 "Mystery, Thriller & Suspense", "Science Fiction & Fantasy"에
+#   대응. 추리·스릴러·SF·디스토피아 풍자소설(1984, 동물농장 등) 전용.
+GENRE_TAXONOMY = [
+    "고전문학", "현대소설", "장르소설", "인문/교양", "과학/대중과학",
+    "역사", "에세이/철학", "예술/디자인", "경제/경영", "자기계발", "기타"
+]
+
+GENRE_BITS = {genre: 1 << i for i, genre in enumerate(GENRE_TAXONOMY)}
+
+
+def split_genres(value):
+    """쉼표 문자열 → 장르 리스트 (빈 항목/공백 제거)"""
+    return [g.strip() for g in (value or '').split(',') if g.strip()]
+
+
+def genre_mask(genres):
+    """장르 리스트(또는 쉼표 문자열) → 비트마스크. 분류표에 없는 값은 무시한다."""
+    if isinstance(genres, str) or genres is None:
+        genres = split_genres(genres)
+    mask = 0
+    for genre in genres:
+        mask |= GENRE_BITS.get(genre, 0)
+    return mask
+
+
+def mask_genres(mask):
+    """비트마스크 → 분류표 순서의 장르 리스트"""
+    return [genre for genre, bit in GENRE_BITS.items() if (mask or 0) & bit]
+
+
+def matches_any(column, mask):
+    """column(마스크 컬럼)이 mask의 장르 중 하나라도 가진 행 조건"""
+    return column.op('&')(mask) != 0
+
+
+def untagged(column):
+    """column(마스크 컬럼)에 분류표 장르가 하나도 없는 행 조건 — 비었거나 분류표 밖 값만 있는 경우.
+    관리자 목록의 '미태깅' 필터와 자동 태깅 대상이 이 조건 하나를 같이 쓴다."""
+    return column == 0
+
+
+def backfill_masks(batch_size=500):
+    """기존 쉼표 문자열 장르를 마스크 컬럼으로 옮긴다 (컬럼 추가 마이그레이션 직후 1회).
+    반환: (도서 수, 회원 수)"""
+    from app import db
+    from app.models import Book, User
+
+    counts = []
+    for model, text_col, mask_col in ((Book, 'genre', 'genre_mask'),
+                                      (User, 'preferred_genres', 'preferred_genre_mask')):
+        table = model.__table__
+        done, last_id = 0, 0
+        while True:
+            rows = db.session.execute(
+                select(table.c.id, table.c[text_col])
+                .where(table.c.id > last_id, table.c[text_col].isnot(None))
+                .order_by(table.c.id).limit(batch_size)
+            ).all()
+            if not rows:
+                break
+            db.session.execute(
+                table.update().where(table.c.id == db.bindparam('row_id'))
+                .values({mask_col: db.bindparam('mask')}),
+                [{'row_id': row_id, 'mask': genre_mask(value)} for row_id, value in rows],
+            )
+            db.session.commit()
+            done += len(rows)
+            last_id = rows[-1][0]
+        counts.append(done)
+    return tuple(counts)
@@ -0,0 +1,166 @@
+"""
+제목/저자용 한국어 인메모리 검색 인덱스 (음절 바이그램 + 초성).
+
+띄어쓰기 단위 토크나이저(FTS5 unicode61 등)는 "호밀밭의파수꾼"처럼 붙여 쓴 복합어 안쪽
+("파수꾼")이나 초성 입력("ㅎㅁㅂ")을 찾지 못한다. 제목·저자는 짧으므로 워커 프로세스 메모리에
+역색인을 두고 다음 두 종류의 n-gram을 색인한다.
+
+- 음절 n-gram: 공백·문장부호를 뺀 소문자 문자열의 1-gram과 2-gram
+- 초성 n-gram: 한글 음절을 초성(ㅎ, ㅁ, ㅂ ...)으로 바꾼 문자열의 1-gram과 2-gram
+  ("호밀밭의 파수꾼" → "ㅎㅁㅂㅇㅍㅅㄲ")
+
+검색은 질의의 n-gram 포스팅 집합을 작은 것부터 교집합한 뒤 실제 부분 문자열 포함 여부로
+후보를 검증한다 — 수천~수만 권 규모에서 1ms 미만으로 끝난다.
+
+인덱스는 워커마다 처음 쓸 때 한 번 전체를 읽어 만들고, 이후에는 카탈로그 변경 로그
+(app/catalog_changes.py)에서 바뀐 도서만 다시 읽어 갱신한다. 관리자 추가/수정/삭제는
+변경 로그에 자동으로 남으므로 어느 워커에서 일어났든 다음 요청에서 반영된다.
+"""
+import threading
+from collections import defaultdict
+
+from sqlalchemy import select
+
+from app import catalog_changes, db
+from app.models import Book
+
+CHOSUNG = 'ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ'
+_CHOSUNG_SET = frozenset(CHOSUNG)
+_HANGUL_FIRST, _HANGUL_LAST = 0xAC00, 0xD7A3
+
+
+def normalize(text):
+    """소문자화 + 공백/문장부호 제거 ("호밀밭의 파수꾼" → "호밀밭의파수꾼")"""
+    return ''.join(ch for ch in (text or '').lower() if ch.isalnum())
+
+
+def to_chosung(text):
+    """한글 음절은 초성으로, 나머지 글자는 그대로 둔 정규화 문자열"""
+    out = []
+    for ch in normalize(text):
+        code = ord(ch)
+        if _HANGUL_FIRST <= code <= _HANGUL_LAST:
+            out.append(CHOSUNG[(code - _HANGUL_FIRST) // 588])
+        else:
+            out.append(ch)
+    return ''.join(out)
+
+
+def is_chosung_query(q):
+    """초성만으로 이루어진 질의인지 ("ㅎㅁㅂ", "ㅎㅁㅂ ㅍㅅㄲ")"""
+    letters = normalize(q)
+    return bool(letters) and all(ch in _CHOSUNG_SET for ch in letters)
+
+
+def _grams(s):
+    return set(s) | {s[i:i + 2] for i in range(len(s) - 1)}
+
+
+class HangulIndex:
+    def __init__(self):
+        self.changes = catalog_changes.Tracker()  # 변경 로그를 어디까지 반영했는지
+        self._lock = threading.RLock()
+        self._docs = {}                      # book_id -> (title, author, title 초성, author 초성)
+        self._text_postings = defaultdict(set)
+        self._chosung_postings = defaultdict(set)
+
+    def __len__(self):
+        return len(self._docs)
+
+    def upsert(self, book_id, title, author):
+        with self._lock:
+            self.remove(book_id)
+            doc = (normalize(title), normalize(author), to_chosung(title), to_chosung(author))
+            self._docs[book_id] = doc
+            for gram in _grams(doc[0]) | _grams(doc[1]):
+                self._text_postings[gram].add(book_id)
+            for gram in _grams(doc[2]) | _grams(doc[3]):
+                self._chosung_postings[gram].add(book_id)
+
+    def remove(self, book_id):
+        with self._lock:
+            doc = self._docs.pop(book_id, None)
+            if doc is None:
+                return
+            for postings, fields in ((self._text_postings, doc[:2]), (self._chosung_postings, doc[2:])):
+                for gram in _grams(fields[0]) | _grams(fields[1]):
+                    ids = postings.get(gram)
+                    if ids is not None:
+                        ids.discard(book_id)
+                        if not ids:
+                            del postings[gram]
+
+    def clear(self):
+        with self._lock:
+            self._docs.clear()
+            self._text_postings.clear()
+            self._chosung_postings.clear()
+
+    def search(self, q, limit=None):
+        """제목/저자에 질의가 포함된 도서 id를 관련도순으로 반환한다.
+        순서: 제목 접두 일치 > 제목 포함 > 저자 포함, 같은 순위는 짧은 제목 → 최신 등록순."""
+        chosung_mode = is_chosung_query(q)
+        needle = normalize(q)
+        if not needle:
+            return []
+        postings, offset = (self._chosung_postings, 2) if chosung_mode else (self._text_postings, 0)
+
+        with self._lock:
+            grams = {needle} if len(needle) == 1 else {needle[i:i + 2] for i in range(len(needle) - 1)}
+            posting_sets = sorted((postings.get(g, ()) for g in grams), key=len)
+            if not posting_sets or not posting_sets[0]:
+                return []
+            candidates = set(posting_sets[0]).intersection(*posting_sets[1:])
+
+            scored = []
+            for book_id in candidates:
+                doc = self._docs[book_id]
+                title, author = doc[offset], doc[offset + 1]
+                if title.startswith(needle):
+                    tier = 0
+                elif needle in title:
+                    tier = 1
+                elif needle in author:
+                    tier = 2
+                else:
+                    continue  # 바이그램은 모두 있지만 연속 부분 문자열은 아닌 경우
+                scored.append((tier, len(title), -book_id, book_id))
+
+        scored.sort()
+        ids = [row[-1] for row in scored]
+        return ids[:limit] if limit else ids
+
+
+_index = HangulIndex()
+
+# ORM 객체가 아닌 컬럼 행으로 읽는다 — 세션에 이미 올라온 Book의 옛 값(identity map)을 피하기 위해
+_COLUMNS = select(Book.id, Book.title, Book.author)
+
+
+def get_index():
+    """현재 카탈로그 버전까지 따라잡은 프로세스 공용 인덱스를 반환한다."""
+    with _index._lock:
+        changed = _index.changes.poll()
+        if changed is None:
+            _index.clear()
+            for book_id, title, author in db.session.execute(_COLUMNS.execution_options(yield_per=1000)):
+                _index.upsert(book_id, title, author)
+        elif changed:
+            found = set()
+            for book_id, title, author in db.session.execute(_COLUMNS.where(Book.id.in_(changed))):
+                _index.upsert(book_id, title, author)
+                found.add(book_id)
+            for book_id in changed - found:
+                _index.remove(book_id)
+    return _index
+
+
+def search(q, limit=None):
+    return get_index().search(q, limit)
+
+
+def reset():
+    """프로세스 인덱스를 비운다 — 다음 get_index() 호출 때 전체를 다시 읽는다."""
+    with _index._lock:
+        _index.clear()
+        _index.changes.reset()
@@ -0,0 +1,139 @@
+"""
+외부 HTTP 호출 공용 클라이언트 (카카오/네이버/구글/오픈라이브러리/OAuth/표지 다운로드).
+
+requests.get/post를 그때그때 부르면 호출마다 새 TCP+TLS 연결을 맺는다. 여기서는 프로세스당
+requests.Session 하나를 두고 호스트별 커넥션 풀(keep-alive)을 재사용한다.
+
+- gunicorn 워커: fork 이후 부모의 소켓을 물려 쓰지 않도록 PID가 바뀌면 세션을 새로 만든다.
+- 스레드: urllib3 커넥션 풀은 스레드 안전하다. 세션의 쿠키 저장은 막아 두어, 한 요청의 응답
+  쿠키가 다른 사용자의 요청에 실려 나가지 않게 한다 (모든 호출은 무상태 API 호출이다).
+- 재시도: 연결 실패와 502/503/504는 GET에 한해 짧은 지수 백오프로 최대 2번 다시 보낸다.
+  읽기 타임아웃은 재시도하지 않는다 (이미 느린 제공자를 두 배로 기다리게 되므로).
+  POST(OAuth 토큰 교환)는 인가 코드가 일회용이라 재시도하지 않는다. 응답의 Retry-After는 따르지
+  않는다 (서버가 정한 수 초를 그대로 자게 된다). 요청 예산이 걸린 호출은 아예 재시도하지 않는다 —
+  재시도마다 줄인 타임아웃을 통째로 다시 써서 예산을 넘기 때문이다 (_BudgetAwareAdapter).
+- 타임아웃: 제공자별 (연결, 읽기) 초. 호출부가 timeout=을 넘기면 그 값을 쓴다. 어느 쪽이든
+  요청 예산(app/request_budget.py)의 남은 시간을 넘지 않게 줄인다. 예산 때문에 아주 짧게 줄인
+  타임아웃에 걸린 것은 제공자 장애가 아니므로 BudgetExhausted로 바꿔 던지고 브레이커 실패로 세지
+  않는다. 줄였어도 circuit_breaker.min_probe_seconds()(기본 1초) 넘게 기다린 타임아웃은 그대로 던져
+  실패로 센다.
+- 서킷 브레이커: 검색/추천 제공자 호출은 app/circuit_breaker.py가 감싼다 (차단 중이면 즉시 실패).
+"""
+import os
+import threading
+from http.cookiejar import DefaultCookiePolicy
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import MaxRetryError, TimeoutError as Urllib3Timeout
+from urllib3.util.retry import Retry
+
+from app import circuit_breaker, request_budget
+
+USER_AGENT = "RareBookStore/1.0 (Flask-based rare book inventory app)"
+
+# 제공자별 (연결, 읽기) 타임아웃(초) — 읽기 값은 기존 호출부의 고정 타임아웃과 같다
+TIMEOUTS = {
+    'kakao':       (3.05, 8),
+    'naver':       (3.05, 8),
+    'googlebooks': (3.05, 10),
+    'openlibrary': (3.05, 10),
+    'oauth':       (3.05, 10),
+    'cover':       (3.05, 8),
+}
+DEFAULT_TIMEOUT = (3.05, 10)
+
+POOL_CONNECTIONS = 16   # 풀을 유지할 호스트 수
+POOL_MAXSIZE = 32       # 호스트당 유지할 연결 수 (워커 스레드 + 추천 조회 스레드 풀보다 크게)
+
+NO_RETRY = Retry(0, read=False)  # requests 기본값과 같다 — 실패하면 바로 예외
+
+_session = None
+_session_pid = None
+_lock = threading.Lock()
+
+
+class _BudgetAwareAdapter(HTTPAdapter):
+    """요청 예산이 걸린 호출(같은 contextvar)에는 재시도 정책 대신 NO_RETRY를 쓰는 어댑터."""
+
+    @property
+    def max_retries(self):
+        return self._retry if request_budget.remaining() is None else NO_RETRY
+
+    @max_retries.setter
+    def max_retries(self, value):
+        self._retry = value
+
+
+def _build_session():
+    retry = Retry(
+        total=2, connect=2, read=0, status=2,
+        backoff_factor=0.2,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset({'GET', 'HEAD'}),
+        respect_retry_after_header=False,
+        raise_on_status=False,  # 마지막 응답을 그대로 돌려주고 raise_for_status()는 호출부가 판단
+    )
+    adapter = _BudgetAwareAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE, max_retries=retry)
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers['User-Agent'] = USER_AGENT
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))  # 어떤 응답 쿠키도 저장하지 않음
+    return session
+
+
+def session():
+    """현재 프로세스의 공유 세션 (fork된 워커에서는 새로 만든다)."""
+    global _session, _session_pid
+    pid = os.getpid()
+    if _session is None or _session_pid != pid:
+        with _lock:
+            if _session is None or _session_pid != pid:
+                _session, _session_pid = _build_session(), pid
+    return _session
+
+
+def _timed_out(error):
+    """읽기/연결 타임아웃인지 — 재시도 설정 때문에 ConnectionError(MaxRetryError(ReadTimeoutError))로 감싸져 올 수 있다"""
+    if isinstance(error, requests.exceptions.Timeout):
+        return True
+    reason = error.args[0] if error.args else None
+    return isinstance(reason, MaxRetryError) and isinstance(reason.reason, Urllib3Timeout)
+
+
+def _shortened(timeout, normal):
+    if isinstance(normal, tuple):
+        return any(t < n for t, n in zip(timeout, normal))
+    return timeout < normal
+
+
+def _longest(timeout):
+    return max(timeout) if isinstance(timeout, tuple) else timeout
+
+
+def request(method, url, provider=None, **kwargs):
+    # 요청 예산이 있으면 남은 시간으로 줄인다 (소진됐으면 BudgetExhausted — 브레이커 실패로는 세지 않음)
+    normal = kwargs.get('timeout') or TIMEOUTS.get(provider, DEFAULT_TIMEOUT)
+    kwargs['timeout'] = request_budget.timeout(normal)
+    # 예산에 줄었어도 min_probe_seconds() 넘게 기다렸다면 응답 없음은 제공자 탓으로 센다
+    cut_by_budget = _shortened(kwargs['timeout'], normal) and \
+        _longest(kwargs['timeout']) < circuit_breaker.min_probe_seconds()
+    with circuit_breaker.guard(provider):
+        try:
+            resp = session().request(method, url, **kwargs)
+        except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+            if cut_by_budget and _timed_out(e):  # 평소 타임아웃이었다면 기다렸을 응답 — 제공자 탓이 아니다
+                raise request_budget.BudgetExhausted(f'요청 예산 안에 {provider or url} 응답 없음: {e}') from e
+            raise
+        if circuit_breaker.enabled(provider) and (resp.status_code >= 500 or resp.status_code == 429):
+            resp.raise_for_status()  # 브레이커 실패로 센다 (호출부도 raise_for_status()로 같은 예외를 본다)
+    return resp
+
+
+def get(url, provider=None, **kwargs):
+    return request('GET', url, provider=provider, **kwargs)
+
+
+def post(url, provider=None, **kwargs):
+    return request('POST', url, provider=provider, **kwargs)
@@ -0,0 +1,108 @@
+"""
+관리자 재고 목록(/admin) 조회 헬퍼: 정렬·필터 해석 + 페이지 번호 페이지네이션.
+
+예전에는 Book.query.all()로 전 재고를 한 화면에 그려, 재고가 수천 권이면 응답이 수 초·수백 MB가
+됐다. 한 페이지에 PAGE_SIZE행만 BOOK_ADMIN_ROW 프로젝션으로 읽고, 전체 건수는 COUNT 한 번으로
+구한다. 스토어 목록(app/catalog.py)과 달리 관리자는 임의 페이지로 바로 이동하고 전체 건수를
+봐야 하므로 키셋 커서 대신 OFFSET을 쓴다 (관리자 혼자 쓰는 화면이라 깊은 페이지 비용은 감수).
+
+정렬은 SORT_COLUMNS의 컬럼 하나 + 방향이고, 동률은 같은 방향의 id로 끊어 페이지 경계에서
+중복/누락이 없게 한다. 필터:
+- stock: in_stock / sold_out / low (LOW_STOCK권 이하)
+- genre: 분류표 장르(genre_mask 비트) 또는 untagged (장르 미태깅)
+- condition: 상태 값 일치
+- note: truncated (큐레이터 노트가 비었거나 끊김 — Book.note_truncated)
+"""
+from sqlalchemy import func, select
+
+from app import db
+from app.genres import GENRE_BITS, matches_any, untagged
+from app.loading import BOOK_ADMIN_ROW
+from app.models import Book, looks_truncated
+
+PAGE_SIZE = 50
+LOW_STOCK = 1
+
+SORT_COLUMNS = {
+    'id': Book.id,
+    'title': Book.title,
+    'author': Book.author,
+    'year': Book.year,
+    'condition': Book.condition,
+    'genre': Book.genre,
+    'price': Book.price,
+    'stock': Book.stock_quantity,
+}
+FILTER_KEYS = ('stock', 'genre', 'condition', 'note')
+UNTAGGED = 'untagged'
+
+
+def read_filters(args):
+    """request.args → 정렬/필터/페이지 dict. 알 수 없는 값은 기본값으로 되돌린다."""
+    filters = {key: (args.get(key, '') or '').strip() for key in FILTER_KEYS}
+    sort = (args.get('sort', '') or '').strip()
+    filters['sort'] = sort if sort in SORT_COLUMNS else 'id'
+    filters['dir'] = 'asc' if args.get('dir') == 'asc' else 'desc'
+    try:
+        filters['page'] = max(int(args.get('page', 1)), 1)
+    except (TypeError, ValueError):
+        filters['page'] = 1
+    return filters
+
+
+def filter_condition(key, value):
+    """필터 하나의 WHERE 조건식. 값이 비었거나 알 수 없으면 None (필터 없음)."""
+    if key == 'stock':
+        return {'in_stock': Book.stock_quantity > 0,
+                'sold_out': Book.stock_quantity <= 0,
+                'low': Book.stock_quantity.between(1, LOW_STOCK)}.get(value)
+    if key == 'genre':
+        if value == UNTAGGED:
+            return untagged(Book.genre_mask)
+        return matches_any(Book.genre_mask, GENRE_BITS[value]) if value in GENRE_BITS else None
+    if key == 'condition':
+        return Book.condition == value if value else None
+    if key == 'note':
+        return Book.note_truncated.is_(True) if value == 'truncated' else None
+    return None
+
+
+def fetch_page(filters, page_size=None):
+    """반환: (이 페이지 도서들, 전체 건수, 전체 페이지 수, 실제 페이지 번호).
+    페이지 번호가 끝을 넘으면 마지막 페이지를 보여 준다."""
+    page_size = page_size or PAGE_SIZE
+    conds = [c for c in (filter_condition(key, filters.get(key)) for key in FILTER_KEYS) if c is not None]
+    total = db.session.execute(select(func.count(Book.id)).where(*conds)).scalar()
+    pages = max((total + page_size - 1) // page_size, 1)
+    page = min(filters.get('page', 1), pages)
+
+    column = SORT_COLUMNS[filters.get('sort', 'id')]
+    if filters.get('dir') == 'asc':
+        order = (column.asc(), Book.id.asc())
+    else:
+        order = (column.desc(), Book.id.desc())
+    books = (Book.query.options(BOOK_ADMIN_ROW).filter(*conds).order_by(*order)
+             .offset((page - 1) * page_size).limit(page_size).all())
+    return books, total, pages, page
+
+
+def backfill_note_flags(batch_size=500):
+    """note_truncated 컬럼 추가 직후 1회 — 기존 description으로 값을 채운다. 반환: 처리한 도서 수"""
+    table = Book.__table__
+    done, last_id = 0, 0
+    while True:
+        rows = db.session.execute(
+            select(table.c.id, table.c.description)
+            .where(table.c.id > last_id).order_by(table.c.id).limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        db.session.execute(
+            table.update().where(table.c.id == db.bindparam('row_id'))
+            .values(note_truncated=db.bindparam('flag')),
+            [{'row_id': row_id, 'flag': looks_truncated(description)} for row_id, description in rows],
+        )
+        db.session.commit()
+        done += len(rows)
+        last_id = rows[-1][0]
+    return done
@@ -0,0 +1,282 @@
+"""
+DB 기반 백그라운드 작업 큐.
+
+장르 자동 태깅·노트 재작성은 HTTP 요청 하나 안에서 대상 도서마다 Gemini를 부르고 13초씩 쉬어
+워커를 수 분씩 붙잡았고, render.yaml의 `--timeout 300`에 기대고 있었다. 이제 요청은 작업을
+job 테이블에 넣고(enqueue) 바로 진행 화면(/admin/jobs)으로 넘어가며, 별도 프로세스
+`flask jobs worker`가 작업을 꺼내 처리한다. 처리 함수는 app/tasks.py에 @handler로 등록한다.
+
+- 가져가기(claim): `SELECT ... FOR UPDATE SKIP LOCKED`로 후보 한 건을 잠그고(PostgreSQL — 다른
+  워커는 잠긴 행을 건너뛴다), 같은 조건을 건 UPDATE로 running으로 바꾼다. SQLite는 FOR UPDATE를
+  무시하므로 이 조건부 UPDATE가 원자적인 가져가기가 된다 (영향 행 수가 1인 워커만 성공).
+- 임대(lease): 처리 중에는 하트비트 스레드가 locked_at을 갱신한다. 워커가 죽어 JOB_LEASE_SECONDS
+  넘게 갱신이 끊긴 작업은 다른 워커가 다시 가져간다.
+- 재시도: 처리 함수가 예외를 던지면 max_attempts까지 지수 백오프(BACKOFF_BASE × 2^(시도-1),
+  최대 BACKOFF_MAX초) 뒤에 다시 대기열로 돌리고, 다 쓰면 failed. 처리 함수는 중간에 실패해도
+  다시 돌릴 수 있게(멱등) 작성한다.
+- enqueue는 세션에 추가만 하므로 호출부의 트랜잭션과 함께 커밋된다.
+- 멈춘 작업: 가져갈 수 있는데 JOB_STUCK_SECONDS 넘게 아무 워커도 가져가지 않은 작업 (stuck). 워커를
+  띄울 수 없는 배포(Vercel)나 워커가 죽은 경우 /admin/jobs가 경고하고, 그 페이지 요청 안에서
+  run_stuck()이 한 건씩 대신 처리한다 (JOB_INLINE_FALLBACK=False로 끔). 요청 하나가 작업 전체를 붙잡지
+  않도록 그때는 대상(도서·표지 사진)을 JOB_INLINE_STEPS개만 처리하고(take), 남은 대상이 있으면 시도 횟수를
+  쓰지 않고 대기열로 돌려 다음 페이지 요청이 이어서 한다.
+"""
+import json
+import os
+import socket
+import threading
+from contextvars import ContextVar
+from datetime import datetime, timedelta, timezone
+
+from flask import current_app
+from sqlalchemy import and_, or_, select, update
+
+from app import db, rate_limit
+from app.models import Job
+
+DEFAULT_MAX_ATTEMPTS = 5
+BACKOFF_BASE = 30
+BACKOFF_MAX = 3600
+JOB_LEASE_SECONDS = 300
+POLL_SECONDS = 2.0
+STUCK_SECONDS = 60  # 쉬는 워커는 POLL_SECONDS마다 가져가므로, 이만큼 남아 있으면 가져갈 워커가 없다
+INLINE_STEPS = 1    # 요청 안에서 대신 처리할 때 작업 하나가 처리하는 대상 수
+
+HANDLERS = {}
+LABELS = {}
+_inline = ContextVar('job_inline', default=False)
+_slice = ContextVar('job_slice', default=None)
+
+
+def _now():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _config(name, default):
+    return current_app.config.get(name, default)
+
+
+def handler(kind, label=None):
+    """작업 처리 함수 등록: fn(job, payload dict). 반환값은 쓰지 않는다 (결과는 report로 남긴다)."""
+    def register(fn):
+        HANDLERS[kind] = fn
+        LABELS[kind] = label or kind
+        return fn
+    return register
+
+
+def enqueue(kind, payload=None, delay=0, max_attempts=DEFAULT_MAX_ATTEMPTS, unique=False):
+    """작업을 대기열에 넣는다 (커밋은 호출부). unique면 같은 종류·인자의 작업이 대기/처리 중일 때
+    새로 넣지 않고 그 작업을 돌려준다 (버튼 연타 방지). 반환: Job"""
+    if kind not in HANDLERS:
+        raise LookupError(f'등록되지 않은 작업 종류: {kind}')
+    payload = json.dumps(payload or {}, ensure_ascii=False, sort_keys=True)
+    if unique:
+        existing = Job.query.filter(Job.kind == kind, Job.payload == payload,
+                                    Job.status.in_(('queued', 'running'))).order_by(Job.id).first()
+        if existing is not None:
+            return existing
+    job = Job(kind=kind, payload=payload, max_attempts=max_attempts, run_at=_now() + timedelta(seconds=delay))
+    db.session.add(job)
+    db.session.flush()
+    return job
+
+
+def enqueue_on(connection, kind, payload=None, max_attempts=DEFAULT_MAX_ATTEMPTS):
+    """세션에 객체를 더할 수 없는 곳(flush 리스너)용 — connection의 트랜잭션에 작업 행을 바로 넣는다."""
+    connection.execute(Job.__table__.insert().values(
+        kind=kind, payload=json.dumps(payload or {}, ensure_ascii=False, sort_keys=True),
+        status='queued', attempts=0, max_attempts=max_attempts, run_at=_now()))
+
+
+def absorb(job):
+    """같은 종류로 대기 중인 다른 작업을 이 작업이 맡는다 — 그 작업들은 done(merged_into)으로 끝낸다.
+    커밋은 호출부 (합친 인자를 이 작업의 payload에 같이 남겨, 실패해 재시도해도 잃지 않게 한다).
+    반환: 맡은 작업들의 payload dict 목록"""
+    rows = db.session.execute(
+        select(Job.id, Job.payload).where(Job.kind == job.kind, Job.status == 'queued', Job.id != job.id)
+        .order_by(Job.id)
+    ).all()
+    taken = []
+    for job_id, payload in rows:
+        result = db.session.execute(
+            update(Job).where(Job.id == job_id, Job.status == 'queued')
+            .values(status='done', finished_at=_now(), progress=json.dumps({'merged_into': job.id}))
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 1:
+            taken.append(json.loads(payload or '{}'))
+    return taken
+
+
+def backoff(attempts):
+    """attempts번째 시도가 실패한 뒤 다음 시도까지 기다릴 초"""
+    base = _config('JOB_BACKOFF_BASE', BACKOFF_BASE)
+    return min(base * 2 ** max(attempts - 1, 0), _config('JOB_BACKOFF_MAX', BACKOFF_MAX))
+
+
+def _claimable(now):
+    lease = timedelta(seconds=_config('JOB_LEASE_SECONDS', JOB_LEASE_SECONDS))
+    return or_(and_(Job.status == 'queued', Job.run_at <= now),
+               and_(Job.status == 'running', Job.locked_at < now - lease))
+
+
+def _stuck(now):
+    lease = timedelta(seconds=_config('JOB_LEASE_SECONDS', JOB_LEASE_SECONDS))
+    waited = now - timedelta(seconds=_config('JOB_STUCK_SECONDS', STUCK_SECONDS))
+    return or_(and_(Job.status == 'queued', Job.run_at <= waited),
+               and_(Job.status == 'running', Job.locked_at < now - lease))
+
+
+def stuck():
+    """워커가 가져가지 않은 채 JOB_STUCK_SECONDS 넘게 기다린 작업과 임대가 끊긴 작업 (오래된 순)"""
+    return Job.query.filter(_stuck(_now())).order_by(Job.run_at, Job.id).all()
+
+
+def run_stuck(max_jobs=1):
+    """멈춘 작업이 있으면 이 프로세스(요청)에서 max_jobs건 처리한다 — 워커 없는 배포의 대체 경로.
+    JOB_INLINE_FALLBACK이 False면 하지 않는다. 반환: 처리한 작업 수"""
+    if not _config('JOB_INLINE_FALLBACK', True):
+        return 0
+    if not db.session.query(Job.query.filter(_stuck(_now())).exists()).scalar():
+        return 0
+    token = _inline.set(True)
+    try:
+        return work(worker_id=f'inline:{socket.gethostname()}:{os.getpid()}', burst=True, max_jobs=max_jobs)
+    finally:
+        _inline.reset(token)
+
+
+def take(targets):
+    """처리 함수가 이번 실행에서 처리할 대상을 고른다. run_stuck() 안에서는 앞의 JOB_INLINE_STEPS개만
+    돌려주고, 남은 대상이 있으면 작업이 끝난 뒤 done 대신 대기열로 돌린다 (시도 횟수는 쓰지 않는다).
+    그 밖에서는 targets 그대로."""
+    state = _slice.get()
+    if state is None or len(targets) <= state['steps']:
+        return targets
+    state['paused'] = True
+    return targets[:state['steps']]
+
+
+def claim(worker_id, attempts=3):
+    """실행할 작업 한 건을 가져간다. 반환: Job (없으면 None)"""
+    for _ in range(attempts):
+        now = _now()
+        job_id = db.session.execute(
+            select(Job.id).where(_claimable(now)).order_by(Job.run_at, Job.id).limit(1)
+            .with_for_update(skip_locked=True)
+        ).scalar()
+        if job_id is None:
+            db.session.commit()
+            return None
+        result = db.session.execute(
+            update(Job).where(Job.id == job_id, _claimable(now))
+            .values(status='running', locked_by=worker_id, locked_at=now, attempts=Job.attempts + 1)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        if result.rowcount == 1:
+            return db.session.get(Job, job_id, populate_existing=True)
+    return None  # 매번 다른 워커가 먼저 가져감 — 다음 폴링에서 다시
+
+
+def report(job, **values):
+    """처리 중인 작업의 진행률/결과를 남기고 커밋한다 (진행 화면이 이 값을 보여 준다)."""
+    job.progress = json.dumps(dict(job.progress_data, **values), ensure_ascii=False)
+    db.session.commit()
+
+
+def _owned(job_id, worker_id):
+    return update(Job).where(Job.id == job_id, Job.locked_by == worker_id, Job.status == 'running') \
+        .execution_options(synchronize_session=False)
+
+
+def _heartbeat(app, job_id, worker_id, stop):
+    """처리하는 동안 임대를 연장한다. 처리 함수의 세션과 섞이지 않게 엔진 커넥션을 따로 쓴다."""
+    with app.app_context():
+        interval = max(app.config.get('JOB_LEASE_SECONDS', JOB_LEASE_SECONDS) / 3, 0.01)
+        while not stop.wait(interval):
+            try:
+                with db.engine.begin() as conn:
+                    conn.execute(_owned(job_id, worker_id).values(locked_at=_now()))
+            except Exception as e:
+                print(f"작업 {job_id} 하트비트 실패: {e}")
+
+
+def run_one(worker_id):
+    """작업 한 건을 가져와 처리한다. 반환: 처리한 Job (대기 작업이 없으면 None)"""
+    job = claim(worker_id)
+    if job is None:
+        return None
+    job_id, kind, attempts, max_attempts = job.id, job.kind, job.attempts, job.max_attempts
+    state = {'steps': _config('JOB_INLINE_STEPS', INLINE_STEPS), 'paused': False} if _inline.get() else None
+    token = _slice.set(state)
+    stop = threading.Event()
+    beat = threading.Thread(target=_heartbeat, args=(current_app._get_current_object(), job_id, worker_id, stop),
+                            name=f'job-heartbeat-{job_id}', daemon=True)
+    beat.start()
+    try:
+        fn = HANDLERS.get(kind)
+        if fn is None:
+            raise LookupError(f'등록되지 않은 작업 종류: {kind}')
+        if attempts > max_attempts:  # 임대 만료로 여러 번 다시 잡힌 작업
+            raise RuntimeError('처리 중 워커가 반복해서 중단됐습니다.')
+        with rate_limit.unbounded():  # 요청 안(run_stuck)에서 돌아도 Gemini 차례는 작업답게 기다린다
+            fn(job, job.payload_data)
+    except Exception as e:
+        db.session.rollback()
+        error = f'{type(e).__name__}: {e}'[:255]
+        print(f"작업 {job_id}({kind}) {attempts}차 시도 실패: {error}")
+        if attempts < max_attempts:
+            values = {'status': 'queued', 'locked_by': None, 'locked_at': None, 'last_error': error,
+                      'run_at': _now() + timedelta(seconds=backoff(attempts))}
+        else:
+            values = {'status': 'failed', 'locked_by': None, 'last_error': error, 'finished_at': _now()}
+    else:
+        db.session.commit()
+        if state is not None and state['paused']:
+            # 남은 대상은 다음 실행이 이어서 — run_at은 그대로 두어 다음 페이지 요청에서도 멈춘 작업으로 잡힌다
+            values = {'status': 'queued', 'locked_by': None, 'locked_at': None, 'attempts': Job.attempts - 1}
+        else:
+            values = {'status': 'done', 'locked_by': None, 'finished_at': _now()}
+    finally:
+        _slice.reset(token)
+        stop.set()
+        beat.join()
+    db.session.execute(_owned(job_id, worker_id).values(**values))
+    db.session.commit()
+    return db.session.get(Job, job_id, populate_existing=True)
+
+
+def work(worker_id=None, burst=False, poll=None, max_jobs=None, stop=None):
+    """대기열을 계속 처리한다. burst면 가져갈 작업이 없을 때 끝낸다. stop(Event)이 set되면
+    지금 작업을 마치고 끝낸다. 반환: 처리한 작업 수"""
+    worker_id = worker_id or f'{socket.gethostname()}:{os.getpid()}'
+    poll = _config('JOB_POLL_SECONDS', POLL_SECONDS) if poll is None else poll
+    stop = stop or threading.Event()
+    done = 0
+    while not stop.is_set() and (max_jobs is None or done < max_jobs):
+        job = run_one(worker_id)
+        if job is not None:
+            done += 1
+            continue
+        if burst:
+            break
+        stop.wait(poll)
+    return done
+
+
+def retry(job_id):
+    """실패한 작업을 처음부터 다시 대기열에 넣는다. 반환: 넣었으면 True"""
+    result = db.session.execute(
+        update(Job).where(Job.id == job_id, Job.status == 'failed')
+        .values(status='queued', attempts=0, run_at=_now(), finished_at=None)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return result.rowcount == 1
+
+
+def recent(limit=30):
+    return Job.query.order_by(Job.id.desc()).limit(limit).all()
+
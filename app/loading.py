@@ -0,0 +1,36 @@
+"""
+Book 조회 시 읽어 올 컬럼 정책.
+
+Book.description(긴 큐레이터 노트)과 Book.image_data(옛 Base64 표지)는 모델에서 deferred로
+선언되어 있어 평소 조회에서는 아예 SELECT되지 않고, 실제로 접근할 때만 따로 읽는다.
+목록 화면은 여기에 더해 아래 load_only 프로젝션으로 화면에 필요한 컬럼만 읽는다.
+
+상세/수정 화면처럼 description을 반드시 쓰는 곳은 `undefer(Book.description)`로 한 번에 읽는다.
+목록 화면이 이 두 컬럼을 읽지 않는지는 tests/test_loading.py가 SQL을 잡아 확인한다.
+"""
+from sqlalchemy.orm import load_only
+
+from app.models import Book
+
+# 스토어 카드(_book_cards.html, 추천 줄, 장바구니) — 표지 <picture>와 평점 배지까지
+CARD_COLUMNS = (
+    Book.id, Book.title, Book.author, Book.year, Book.edition, Book.condition,
+    Book.price, Book.stock_quantity, Book.image_file, Book.image_hash, Book.cover_widths,
+    Book.rating_count, Book.rating_avg,
+)
+BOOK_CARD = load_only(*CARD_COLUMNS)
+
+# 관리자 도서 목록(admin.html)
+BOOK_ADMIN_ROW = load_only(
+    Book.id, Book.title, Book.author, Book.year, Book.condition, Book.genre,
+    Book.price, Book.stock_quantity, Book.note_truncated,
+)
+
+# GET /books JSON 목록
+BOOK_API = load_only(
+    Book.id, Book.title, Book.author, Book.year, Book.edition, Book.condition,
+    Book.price, Book.stock_quantity,
+)
+
+# 입고 알림 메일 / 알림 관리 화면 — 제목만 필요
+BOOK_TITLE = load_only(Book.id, Book.title, Book.stock_quantity)
@@ -1,4 +1,18 @@
+import json
+
+from sqlalchemy.orm import validates
+
 from app import db
+from app.covers import hash_image_data
+from app.genres import genre_mask
+
+def looks_truncated(description):
+    """검색 API 미리보기 스니펫이 문장 중간에서 끊긴 것으로 보이는지 휴리스틱 판단"""
+    text = (description or '').strip()
+    if not text:
+        return True
+    return text[-1] not in '.!?」』”’"\''
+
 
 class Book(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -6,13 +20,59 @@ class Book(db.Model):
     author = db.Column(db.String(100), nullable=False)
     year = db.Column(db.Integer, nullable=False)
     edition = db.Column(db.String(50), nullable=True)
+    isbn = db.Column(db.String(13), nullable=True, unique=True, index=True)  # ISBN-13 (일괄 입고 일치 기준, app/bulk_import.py)
     condition = db.Column(db.String(50), nullable=False)
     price = db.Column(db.Float, nullable=False)
     stock_quantity = db.Column(db.Integer, default=0, nullable=False)
-    description = db.Column(db.Text, nullable=True)
+    # description / image_data는 크기가 커서 기본 조회에서 제외(deferred) — 접근할 때 따로 읽는다 (app/loading.py)
+    description = db.deferred(db.Column(db.Text, nullable=True))
     image_file = db.Column(db.String(255), nullable=True)
-    image_data = db.Column(db.Text, nullable=True)  # Base64 encoded image data (PostgreSQL-compatible)
+    image_data = db.deferred(db.Column(db.Text, nullable=True))  # Base64 encoded image data (옛 표지, app/cover_store.py로 이관)
+    image_hash = db.Column(db.String(16), nullable=True)  # 표지 바이트 해시 — /covers URL 버전·ETag (app/covers.py)
+    cover_widths = db.Column(db.String(32), nullable=True)  # 만들어 둔 반응형 변형 너비, 예: "160,320,640"
     genre = db.Column(db.String(255), nullable=True)  # 쉼표로 구분된 장르 태그, 예: "고전문학,인문/교양"
+    # genre를 분류표 비트로 옮긴 값 — 장르 필터/추천은 이 컬럼의 비트 AND로 비교한다 (app/genres.py)
+    genre_mask = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # description이 비었거나 문장 중간에서 끊겼는지 — 관리자 목록 필터/노트 재작성 대상 (looks_truncated)
+    note_truncated = db.Column(db.Boolean, nullable=False, default=True, server_default=db.true())
+
+    # 평점 요약 (리뷰 저장 시 app/ratings.py가 재집계해 유지하는 비정규화 값)
+    rating_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_avg = db.Column(db.Float, nullable=False, default=0.0, server_default='0')
+    rating_hist = db.Column(db.String(64), nullable=False, default='0,0,0,0,0,0',
+                            server_default='0,0,0,0,0,0')  # 0점~5점 리뷰 개수
+
+    # 스토어 정렬별 키셋 페이지네이션용 복합 인덱스 (정렬 키 + id 동률 처리)
+    __table_args__ = (
+        db.Index('ix_book_price_id', 'price', 'id'),
+        db.Index('ix_book_year_id', 'year', 'id'),
+        db.Index('ix_book_rating_avg_id', 'rating_avg', 'id'),
+        db.Index('ix_book_stock_id', 'stock_quantity', 'id'),  # 관리자 목록 재고순 정렬/품절 필터
+    )
+
+    @validates('image_data')
+    def _sync_image_hash(self, key, value):
+        self.image_hash = hash_image_data(value)
+        return value
+
+    @validates('genre')
+    def _sync_genre_mask(self, key, value):
+        self.genre_mask = genre_mask(value)
+        return value
+
+    @validates('description')
+    def _sync_note_truncated(self, key, value):
+        self.note_truncated = looks_truncated(value)
+        return value
+
+    @property
+    def cover_variant_widths(self):
+        return [int(w) for w in self.cover_widths.split(',')] if self.cover_widths else []
+
+    @property
+    def rating_histogram(self):
+        """[0점 개수, 1점 개수, ..., 5점 개수]"""
+        return [int(n) for n in (self.rating_hist or '0,0,0,0,0,0').split(',')]
 
     def __repr__(self):
         return f'<Book {self.title}>'
@@ -26,12 +86,18 @@ class User(db.Model):
     email = db.Column(db.String(255), nullable=True)
     name = db.Column(db.String(100), nullable=True)
     preferred_genres = db.Column(db.String(255), nullable=True)  # 쉼표로 구분된 선호 장르, 예: "고전문학,인문/교양"
+    preferred_genre_mask = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     created_at = db.Column(db.DateTime, server_default=db.func.now())
 
     __table_args__ = (
         db.UniqueConstraint('provider', 'provider_id', name='uq_user_provider_identity'),
     )
 
+    @validates('preferred_genres')
+    def _sync_preferred_genre_mask(self, key, value):
+        self.preferred_genre_mask = genre_mask(value)
+        return value
+
     def __repr__(self):
         return f'<User {self.provider}:{self.provider_id}>'
 
@@ -68,7 +134,7 @@ class Order(db.Model):
     book_title = db.Column(db.String(100), nullable=False)  # 주문 시점 제목 스냅샷
     price = db.Column(db.Float, nullable=False)             # 주문 시점 단가 스냅샷
     quantity = db.Column(db.Integer, nullable=False, default=1)
-    order_group_id = db.Column(db.String(32), nullable=True)  # 같은 결제(체크아웃)에서 나온 항목들을 묶는 식별자
+    order_group_id = db.Column(db.String(32), nullable=True, index=True)  # 같은 결제(체크아웃)에서 나온 항목들을 묶는 식별자
     status = db.Column(db.String(20), nullable=False, default='received')
 
     # 배송지 (체크아웃 시점 입력값 스냅샷)
@@ -145,3 +211,187 @@ class CartItem(db.Model):
 
     def __repr__(self):
         return f'<CartItem user={self.user_id} book={self.book_id} qty={self.quantity}>'
+
+
+class CatalogChange(db.Model):
+    """도서 변경 로그. 도서 행이 추가·수정·삭제될 때마다 한 행씩 쌓이고, 자동 증가 id가 곧
+    '카탈로그 버전'이다. 워커별 인메모리 인덱스/캐시는 자신이 본 마지막 버전 이후의 변경분과
+    아직 비어 있던 id만 읽어 따라잡는다 (app/catalog_changes.Tracker)."""
+    id = db.Column(db.Integer, primary_key=True)
+    book_id = db.Column(db.Integer, nullable=False)  # 삭제된 도서도 기록해야 하므로 FK를 걸지 않는다
+    changed_at = db.Column(db.DateTime, server_default=db.func.now())
+
+    def __repr__(self):
+        return f'<CatalogChange v={self.id} book={self.book_id}>'
+
+
+class CoverBlob(db.Model):
+    """표지 이미지 바이트 (COVER_STORAGE='db' 백엔드). 키는 내용 해시 = Book.image_hash (app/cover_store.py)"""
+    hash = db.Column(db.String(40), primary_key=True)  # 원본: 해시 / 변형: "<해시>-<너비>.<확장자>"
+    data = db.Column(db.LargeBinary, nullable=False)
+    created_at = db.Column(db.DateTime, server_default=db.func.now())
+
+    def __repr__(self):
+        return f'<CoverBlob {self.hash} {len(self.data or b"")}B>'
+
+
+class ExternalCacheEntry(db.Model):
+    """외부 API(오픈라이브러리/구글 북스 등) 응답 캐시 (app/external_cache.py).
+    키는 "<제공자>:<정규화된 저자명>", 값은 JSON. 재시작/워커 간에 공유되도록 DB에 둔다."""
+    key = db.Column(db.String(255), primary_key=True)
+    value = db.Column(db.Text, nullable=False)
+    fetched_at = db.Column(db.DateTime, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+    last_used_at = db.Column(db.DateTime, nullable=False, index=True)  # LRU 정리 기준
+
+    def __repr__(self):
+        return f'<ExternalCacheEntry {self.key} expires={self.expires_at}>'
+
+
+class ProviderHealth(db.Model):
+    """외부 제공자(오픈라이브러리/구글 북스/카카오/네이버/Gemini)별 서킷 브레이커 상태 (app/circuit_breaker.py).
+    gunicorn 워커들이 같은 상태를 보도록 DB에 둔다."""
+    provider = db.Column(db.String(32), primary_key=True)
+    state = db.Column(db.String(10), nullable=False, default='closed')  # closed | open | half_open
+    consecutive_failures = db.Column(db.Integer, nullable=False, default=0)
+    opened_at = db.Column(db.DateTime, nullable=True)        # open: 열린 시각 / half_open: 시험 호출 시작 시각
+    last_failure_at = db.Column(db.DateTime, nullable=True)
+    last_error = db.Column(db.String(255), nullable=True)
+    last_success_at = db.Column(db.DateTime, nullable=True)
+
+    STATE_LABELS = {'closed': '정상', 'open': '차단', 'half_open': '시험 호출 중'}
+
+    @property
+    def state_label(self):
+        return self.STATE_LABELS.get(self.state, self.state)
+
+    def __repr__(self):
+        return f'<ProviderHealth {self.provider} {self.state} failures={self.consecutive_failures}>'
+
+
+class RateBucket(db.Model):
+    """Gemini 모델별 호출 토큰 버킷 (app/rate_limit.py). 웹 워커·작업 워커가 같은 한도를 나눠 쓰도록 DB에 둔다."""
+    model = db.Column(db.String(64), primary_key=True)
+    tokens = db.Column(db.Float, nullable=False)              # refilled_at 시점에 남아 있던 토큰
+    refilled_at = db.Column(db.DateTime, nullable=False)
+    paused_until = db.Column(db.DateTime, nullable=True)      # 429를 받으면 이 시각까지 아무도 호출하지 않는다
+    throttled = db.Column(db.Integer, nullable=False, default=0)  # 지금까지 받은 429 횟수
+    last_throttled_at = db.Column(db.DateTime, nullable=True)
+    version = db.Column(db.Integer, nullable=False, default=0)    # 조건부 UPDATE(CAS)용
+
+    def __repr__(self):
+        return f'<RateBucket {self.model} tokens={self.tokens:.2f}>'
+
+
+class BookSimilarity(db.Model):
+    """도서별로 미리 계산해 둔 비슷한 도서 상위 K권 (app/similarity.py). 상세 페이지는
+    book_id로 rank 순 몇 행만 읽는다."""
+    book_id = db.Column(db.Integer, db.ForeignKey('book.id', ondelete='CASCADE'), primary_key=True)
+    rank = db.Column(db.Integer, primary_key=True)  # 0부터, 점수 내림차순
+    similar_id = db.Column(db.Integer, db.ForeignKey('book.id', ondelete='CASCADE'), nullable=False, index=True)
+    score = db.Column(db.Float, nullable=False)
+
+    def __repr__(self):
+        return f'<BookSimilarity {self.book_id}#{self.rank} → {self.similar_id} ({self.score:.2f})>'
+
+
+class BookTextSimilarity(db.Model):
+    """소개글(description) TF-IDF 코사인 유사도로 미리 계산해 둔 도서별 상위 K권
+    (app/text_similarity.py). 구조는 BookSimilarity와 같다."""
+    book_id = db.Column(db.Integer, db.ForeignKey('book.id', ondelete='CASCADE'), primary_key=True)
+    rank = db.Column(db.Integer, primary_key=True)  # 0부터, 코사인 유사도 내림차순
+    similar_id = db.Column(db.Integer, db.ForeignKey('book.id', ondelete='CASCADE'), nullable=False, index=True)
+    score = db.Column(db.Float, nullable=False)
+
+    def __repr__(self):
+        return f'<BookTextSimilarity {self.book_id}#{self.rank} → {self.similar_id} ({self.score:.3f})>'
+
+
+class BookCoPurchase(db.Model):
+    """같은 주문 그룹에서 함께 팔린 횟수 (app/co_purchase.py). 양방향으로 두 행을 저장하고,
+    상세 페이지는 (book_id, count) 인덱스로 횟수가 많은 순서대로 읽는다."""
+    book_id = db.Column(db.Integer, db.ForeignKey('book.id', ondelete='CASCADE'), primary_key=True)
+    other_id = db.Column(db.Integer, db.ForeignKey('book.id', ondelete='CASCADE'), primary_key=True, index=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (db.Index('ix_book_co_purchase_rank', 'book_id', 'count'),)
+
+    def __repr__(self):
+        return f'<BookCoPurchase {self.book_id} + {self.other_id} × {self.count}>'
+
+
+class CoverBatch(db.Model):
+    """표지 사진 일괄 입고 한 번 (app/cover_ingest.py). 진행률은 초안 상태별 개수로 센다."""
+    id = db.Column(db.Integer, primary_key=True)
+    status = db.Column(db.String(10), nullable=False, default='queued')  # queued | running | done
+    total = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, server_default=db.func.now())
+    started_at = db.Column(db.DateTime, nullable=True)    # 처리 시작 (분당 처리량 기준, UTC)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    heartbeat_at = db.Column(db.DateTime, nullable=True)  # 처리 중 초안 하나 끝날 때마다 갱신 — 멈춘 배치 판별
+
+    drafts = db.relationship('CoverDraft', backref='batch', lazy=True, cascade='all, delete-orphan',
+                             passive_deletes=True, order_by='CoverDraft.id')
+
+    def __repr__(self):
+        return f'<CoverBatch {self.id} {self.status} total={self.total}>'
+
+
+class CoverDraft(db.Model):
+    """일괄 입고된 표지 사진 한 장과 AI 분석 결과. 관리자가 확인하고 가격/재고를 넣어 등록하면 Book이 된다."""
+    id = db.Column(db.Integer, primary_key=True)
+    batch_id = db.Column(db.Integer, db.ForeignKey('cover_batch.id', ondelete='CASCADE'), nullable=False, index=True)
+    filename = db.Column(db.String(255), nullable=False)
+    source_path = db.Column(db.String(500), nullable=True)  # 리사이즈 전 원본 임시 파일 (리사이즈 후 삭제)
+    # pending(리사이즈 대기) → analyzing(분석 대기/중) → ready(검토 대기) | failed → accepted(등록됨)
+    status = db.Column(db.String(10), nullable=False, default='pending', index=True)
+    image = db.deferred(db.Column(db.LargeBinary, nullable=True))  # 리사이즈한 JPEG
+    title = db.Column(db.String(100), nullable=True)
+    author = db.Column(db.String(100), nullable=True)
+    year = db.Column(db.Integer, nullable=True)
+    edition = db.Column(db.String(50), nullable=True)
+    condition = db.Column(db.String(50), nullable=True)
+    description = db.deferred(db.Column(db.Text, nullable=True))
+    error = db.Column(db.String(255), nullable=True)
+    analyzed_at = db.Column(db.DateTime, nullable=True)
+    book_id = db.Column(db.Integer, db.ForeignKey('book.id', ondelete='SET NULL'), nullable=True)
+
+    def __repr__(self):
+        return f'<CoverDraft {self.id} batch={self.batch_id} {self.status}>'
+
+
+class Job(db.Model):
+    """DB 큐에 쌓인 백그라운드 작업 한 건 (app/jobs.py). `flask jobs worker`가 가져가 처리한다."""
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)       # 처리 함수 이름 (app/tasks.py)
+    payload = db.Column(db.Text, nullable=False, default='{}')  # JSON 인자
+    # queued(대기/재시도 대기) → running → done | failed(재시도 소진)
+    status = db.Column(db.String(10), nullable=False, default='queued')
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=5)
+    run_at = db.Column(db.DateTime, nullable=False)       # 이 시각 이후에 가져갈 수 있다 (재시도 백오프, UTC)
+    locked_by = db.Column(db.String(64), nullable=True)   # 처리 중인 워커
+    locked_at = db.Column(db.DateTime, nullable=True)     # 워커 하트비트 — 임대 시간이 지나면 다른 워커가 가져간다
+    progress = db.Column(db.Text, nullable=True)          # 진행률/결과 JSON (처리 함수가 report로 갱신)
+    last_error = db.Column(db.String(255), nullable=True)
+    created_at = db.Column(db.DateTime, server_default=db.func.now())
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (db.Index('ix_job_claim', 'status', 'run_at'),)
+
+    STATUS_LABELS = {'queued': '대기', 'running': '처리 중', 'done': '완료', 'failed': '실패'}
+
+    @property
+    def status_label(self):
+        return self.STATUS_LABELS.get(self.status, self.status)
+
+    @property
+    def payload_data(self):
+        return json.loads(self.payload or '{}')
+
+    @property
+    def progress_data(self):
+        return json.loads(self.progress) if self.progress else {}
+
+    def __repr__(self):
+        return f'<Job {self.id} {self.kind} {self.status} attempts={self.attempts}>'
@@ -8,6 +8,8 @@
 import os
 import requests
 
+from app import http_client
+
 PROVIDERS = {
     'kakao': {
         'authorize_url': 'https://kauth.kakao.com/oauth/authorize',
@@ -78,9 +80,9 @@ def exchange_code_for_profile(provider: str, code: str) -> dict:
     if client_secret:
         token_data['client_secret'] = client_secret
 
-    token_resp = requests.post(
-        cfg['token_url'], data=token_data,
-        headers={'Accept': 'application/json'}, timeout=10
+    token_resp = http_client.post(
+        cfg['token_url'], 'oauth', data=token_data,
+        headers={'Accept': 'application/json'},
     )
     if not token_resp.ok:
         print(f"{provider} 토큰 교환 실패: status={token_resp.status_code} body={token_resp.text}")
@@ -90,7 +92,7 @@ def exchange_code_for_profile(provider: str, code: str) -> dict:
         raise ValueError(f"{provider}: 토큰 응답에 access_token이 없습니다.")
 
     headers = {'Authorization': f'Bearer {access_token}'}
-    info_resp = requests.get(cfg['userinfo_url'], headers=headers, timeout=10)
+    info_resp = http_client.get(cfg['userinfo_url'], 'oauth', headers=headers)
     info_resp.raise_for_status()
     data = info_resp.json()
 
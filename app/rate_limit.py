@@ -0,0 +1,207 @@
+"""
+Gemini 호출 한도 — 모델별 토큰 버킷.
+
+장르 태깅·노트 재작성·표지 일괄 입고는 작업마다 만든 프로세스 안 Throttle로 간격을 뒀고(그 전에는
+고정 13초 sleep), /admin/add는 간격 없이 불렀다. 각자 자기 호출만 셌기 때문에 작업 워커 여러 개와
+gunicorn 워커가 동시에 부르면 합쳐서 한도를 넘었고, 429를 받아도 그대로 다음 호출을 보냈다.
+
+- 모델마다 rate_bucket 행 하나에 남은 토큰과 마지막 충전 시각을 두고 모든 프로세스가 같이 쓴다.
+  토큰은 분당 per_minute개씩 차고 burst개까지 쌓인다 (GEMINI_RATE_LIMITS로 모델별 설정).
+- acquire()는 토큰이 생길 때까지 잔다. 토큰을 꺼낼 때는 version을 조건으로 건 UPDATE로 한 곳만
+  성공한다 (PostgreSQL은 SELECT ... FOR UPDATE로 먼저 행을 잠근다).
+- 호출이 429(한도 초과)로 실패하면 버킷을 비우고 응답의 재시도 시각(없으면 GEMINI_RATE_PAUSE초)까지
+  모든 프로세스의 호출을 멈춘다.
+- 요청 안에서(/admin/add)는 GEMINI_RATE_MAX_WAIT초(기본 5초, 요청 예산이 있으면 그 안)까지만 기다리고
+  RateLimited를 던진다 — gunicorn 워커 타임아웃(30초)에 닿기 전에 관리자에게 다시 시도하라고 알린다.
+  작업 처리 함수는 차례가 올 때까지 기다린다 — jobs.run_one이 unbounded() 안에서 부르므로 요청 안의
+  대체 경로(/admin/jobs의 run_stuck)로 돌 때도 같다.
+- 다른 프로세스와 동시에 토큰을 꺼내려다 진 경우(version 조건 불일치)는 짧게 무작위로 쉬고 다시
+  시도하며, CAS_RETRIES번 넘게 지면 RateLimited를 던진다.
+- 호출부: `with circuit_breaker.guard('gemini'), rate_limit.limited(모델명):` — 브레이커가 열려 있으면
+  토큰을 쓰지 않고, RateLimited는 브레이커 실패로 세지 않는다.
+"""
+import random
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timedelta, timezone
+
+import requests
+from flask import current_app, has_request_context
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+
+from app import db, request_budget
+from app.models import RateBucket
+
+DEFAULT_LIMIT = (5, 1)  # (분당 호출 수, 최대 연속 호출 수) — Gemini 무료 등급 분당 5회
+RATE_LIMITS = {'gemini-flash-latest': DEFAULT_LIMIT}
+DEFAULT_PAUSE = 60       # 429에 재시도 시각이 없을 때 멈추는 초 (분 단위 한도가 다시 찰 때까지)
+DEFAULT_MAX_WAIT = 5     # 요청 안에서 토큰을 기다리는 최대 초
+CAS_RETRIES = 20         # 토큰을 꺼내다 다른 프로세스에 연달아 진 횟수 한도
+CAS_BACKOFF = 0.05       # 진 뒤 다시 시도하기 전 최대 대기 초 (0~이 값 사이 무작위)
+
+_table = RateBucket.__table__
+_unbounded = ContextVar('rate_limit_unbounded', default=False)
+_RETRY_PATTERNS = (re.compile(r'retry in ([\d.]+)\s*s', re.I), re.compile(r'retry_delay\s*\{\s*seconds:\s*(\d+)'))
+
+
+class RateLimited(requests.exceptions.RequestException):
+    """기다릴 수 있는 시간 안에 토큰이 생기지 않아 호출하지 않았다."""
+
+    def __init__(self, model, wait):
+        super().__init__(f'{model} 호출 한도 — {wait:.0f}초 뒤에 다시 시도하세요')
+        self.model = model
+        self.wait = wait
+
+
+def _now():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def limits(model):
+    """모델의 (분당 호출 수, burst). 분당 호출 수가 0 이하면 제한 없음."""
+    per_minute, burst = current_app.config.get('GEMINI_RATE_LIMITS', RATE_LIMITS).get(model, DEFAULT_LIMIT)
+    return per_minute, max(int(burst), 1)
+
+
+def _refilled(row, now, interval, burst):
+    return min(burst, row.tokens + max((now - row.refilled_at).total_seconds(), 0) / interval)
+
+
+def _take(model, interval, burst):
+    """토큰 하나를 꺼내 본다. 반환: 기다려야 할 초 (0이면 꺼냈음, None이면 다른 곳과 겹쳐 바로 다시)"""
+    with db.engine.begin() as conn:
+        now = _now()
+        row = conn.execute(select(_table).where(_table.c.model == model).with_for_update()).first()
+        if row is None:
+            try:
+                with conn.begin_nested():
+                    conn.execute(_table.insert().values(model=model, tokens=burst - 1, refilled_at=now,
+                                                        throttled=0, version=0))
+                return 0.0
+            except IntegrityError:
+                return None  # 다른 워커가 방금 행을 만들었다
+        if row.paused_until and now < row.paused_until:
+            return (row.paused_until - now).total_seconds()
+        tokens = _refilled(row, now, interval, burst)
+        if tokens < 1:
+            return (1 - tokens) * interval
+        taken = conn.execute(
+            update(_table).where(_table.c.model == model, _table.c.version == row.version)
+            .values(tokens=tokens - 1, refilled_at=now, version=row.version + 1)
+        ).rowcount
+        return 0.0 if taken else None
+
+
+@contextmanager
+def unbounded():
+    """블록 안의 호출은 요청 안이어도 차례가 올 때까지 기다린다 (작업 처리용)."""
+    token = _unbounded.set(True)
+    try:
+        yield
+    finally:
+        _unbounded.reset(token)
+
+
+def _max_wait():
+    if _unbounded.get() or not has_request_context():
+        return None
+    wait = current_app.config.get('GEMINI_RATE_MAX_WAIT', DEFAULT_MAX_WAIT)
+    left = request_budget.remaining()
+    return wait if left is None else min(wait, left)
+
+
+def acquire(model, max_wait=None):
+    """호출 차례가 올 때까지 기다린다. max_wait(초, 기본: 요청 안이면 GEMINI_RATE_MAX_WAIT, 밖이거나
+    unbounded() 안이면 무제한)
+    안에 차례가 오지 않으면 RateLimited. 반환: 기다린 초"""
+    per_minute, burst = limits(model)
+    if not per_minute or per_minute <= 0:
+        return 0.0
+    interval = 60.0 / per_minute
+    max_wait = _max_wait() if max_wait is None else max_wait
+    waited, conflicts = 0.0, 0
+    while True:
+        wait = _take(model, interval, burst)
+        if wait is None:
+            # 다른 프로세스가 같은 행을 먼저 고쳤다 — 동시에 다시 부딪치지 않게 조금 물러선다
+            conflicts += 1
+            if conflicts > CAS_RETRIES:
+                raise RateLimited(model, 0.0)
+            wait = random.uniform(0, CAS_BACKOFF)
+            time.sleep(wait)
+            waited += wait
+            continue
+        conflicts = 0
+        if not wait:
+            return waited
+        if max_wait is not None and waited + wait > max_wait:
+            raise RateLimited(model, wait)
+        time.sleep(wait)
+        waited += wait
+
+
+def is_throttled(error):
+    """한도 초과(429) 오류인지 — google.api_core.exceptions.ResourceExhausted 또는 HTTP 429"""
+    if getattr(error, 'code', None) == 429:
+        return True
+    response = getattr(error, 'response', None)
+    return getattr(response, 'status_code', None) == 429
+
+
+def retry_after(error):
+    """429 오류 메시지에 적힌 재시도까지의 초. 없으면 None"""
+    for pattern in _RETRY_PATTERNS:
+        match = pattern.search(str(error))
+        if match:
+            return float(match.group(1))
+    return None
+
+
+def throttled(model, seconds=None):
+    """429를 받았다 — 버킷을 비우고 seconds(기본 GEMINI_RATE_PAUSE)초 동안 모든 호출을 멈춘다."""
+    now = _now()
+    until = now + timedelta(seconds=seconds or current_app.config.get('GEMINI_RATE_PAUSE', DEFAULT_PAUSE))
+    values = dict(tokens=0.0, refilled_at=now, paused_until=until, last_throttled_at=now)
+    with db.engine.begin() as conn:
+        if conn.execute(update(_table).where(_table.c.model == model)
+                        .values(throttled=_table.c.throttled + 1, version=_table.c.version + 1, **values)).rowcount:
+            return
+        try:
+            with conn.begin_nested():
+                conn.execute(_table.insert().values(model=model, throttled=1, version=0, **values))
+        except IntegrityError:
+            conn.execute(update(_table).where(_table.c.model == model)
+                         .values(throttled=_table.c.throttled + 1, version=_table.c.version + 1, **values))
+
+
+@contextmanager
+def limited(model, max_wait=None):
+    """블록 안의 Gemini 호출 하나에 토큰을 쓴다. 블록이 429로 실패하면 throttled()로 알린 뒤 다시 던진다."""
+    acquire(model, max_wait)
+    try:
+        yield
+    except Exception as e:
+        if is_throttled(e):
+            throttled(model, retry_after(e))
+        raise
+
+
+def statuses():
+    """관리자 상태 페이지용 — 설정된 모델마다
+    (모델, 분당 호출 수, burst, 지금 남은 토큰, 멈춘 경우 재개 시각 또는 None, RateBucket 또는 None)"""
+    rows = {b.model: b for b in RateBucket.query.all()}
+    now = _now()
+    result = []
+    for model in sorted(set(current_app.config.get('GEMINI_RATE_LIMITS', RATE_LIMITS)) | set(rows)):
+        per_minute, burst = limits(model)
+        row = rows.get(model)
+        if row is None or not per_minute or per_minute <= 0:
+            tokens = float(burst)
+        else:
+            tokens = _refilled(row, now, 60.0 / per_minute, burst)
+        paused_until = row.paused_until if row is not None and row.paused_until and row.paused_until > now else None
+        result.append((model, per_minute, burst, tokens, paused_until, row))
+    return result
@@ -0,0 +1,91 @@
+"""
+도서별 평점 요약(개수/평균/0~5점 분포)의 비정규화 유지.
+
+목록/상세 화면이 매번 book.reviews를 순회해 평균을 계산하면 도서 1권당 리뷰 조회가
+1번씩 추가된다(N+1). 대신 Book.rating_count / rating_avg / rating_hist에 요약을 저장하고,
+Review가 추가·수정·삭제되어 flush되는 시점(after_flush)에 같은 트랜잭션 안에서
+해당 도서들의 요약을 리뷰 테이블 기준으로 다시 집계한다 — 증감 연산이 아니라 재집계라
+동시 수정이나 cascade 삭제가 섞여도 항상 정확하다.
+"""
+from sqlalchemy import event, select, func
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app import db
+from app.models import Book, Review
+
+RATING_VALUES = range(0, 6)
+
+
+def summarize(histogram):
+    """[0점 개수, ..., 5점 개수] → (개수, 평균)"""
+    count = sum(histogram)
+    avg = sum(score * n for score, n in zip(RATING_VALUES, histogram)) / count if count else 0.0
+    return count, avg
+
+
+def refresh_rating_summaries(connection, book_ids):
+    """주어진 도서들의 평점 요약을 review 테이블에서 재집계해 book 행에 기록한다.
+    반환: {book_id: (count, avg, hist_str)}"""
+    book_ids = sorted(set(i for i in book_ids if i is not None))
+    if not book_ids:
+        return {}
+
+    histograms = {book_id: [0] * len(RATING_VALUES) for book_id in book_ids}
+    rows = connection.execute(
+        select(Review.book_id, Review.rating, func.count())
+        .where(Review.book_id.in_(book_ids))
+        .group_by(Review.book_id, Review.rating)
+    )
+    for book_id, rating, n in rows:
+        if rating in RATING_VALUES:
+            histograms[book_id][rating] = n
+
+    summaries, params = {}, []
+    for book_id, histogram in histograms.items():
+        count, avg = summarize(histogram)
+        hist_str = ','.join(str(n) for n in histogram)
+        summaries[book_id] = (count, avg, hist_str)
+        params.append({'b_id': book_id, 'count': count, 'avg': avg, 'hist': hist_str})
+
+    connection.execute(
+        Book.__table__.update()
+        .where(Book.__table__.c.id == db.bindparam('b_id'))
+        .values(rating_count=db.bindparam('count'), rating_avg=db.bindparam('avg'),
+                rating_hist=db.bindparam('hist')),
+        params,
+    )
+    return summaries
+
+
+@event.listens_for(db.session, 'after_flush')
+def _refresh_after_review_writes(session, flush_context):
+    touched = [obj.book_id for obj in list(session.new) + list(session.dirty) + list(session.deleted)
+               if isinstance(obj, Review)]
+    if not touched:
+        return
+
+    summaries = refresh_rating_summaries(session.connection(), touched)
+
+    # 세션에 올라와 있는 Book 객체에도 새 값을 반영해 같은 요청 안에서 바로 읽을 수 있게 한다
+    for book_id, (count, avg, hist_str) in summaries.items():
+        book = session.identity_map.get(session.identity_key(Book, book_id))
+        if book is not None:
+            set_committed_value(book, 'rating_count', count)
+            set_committed_value(book, 'rating_avg', avg)
+            set_committed_value(book, 'rating_hist', hist_str)
+
+
+def backfill_all(batch_size=500):
+    """기존 데이터 전체의 평점 요약을 배치 단위로 다시 계산한다. 반환: 처리한 도서 수"""
+    done, last_id = 0, 0
+    while True:
+        ids = db.session.execute(
+            select(Book.id).where(Book.id > last_id).order_by(Book.id).limit(batch_size)
+        ).scalars().all()
+        if not ids:
+            break
+        refresh_rating_summaries(db.session.connection(), ids)
+        db.session.commit()
+        done += len(ids)
+        last_id = ids[-1]
+    return done
@@ -0,0 +1,75 @@
+"""
+요청 단위 지연 예산(deadline).
+
+상세 추천이나 관리자 검색은 외부 호출을 여러 번 잇달아 하고, 호출마다 8초·10초 같은 고정
+타임아웃을 따로 가지고 있어 최악의 경우 요청 시간이 그 합이 됐다. 요청이 시작될 때 엔드포인트별
+예산을 contextvar에 마감 시각으로 넣어 두면, 외부 호출은 남은 예산으로 자기 타임아웃을 줄이고
+남은 예산이 MIN_CALL_SECONDS보다 적으면 아예 보내지 않는다 (BudgetExhausted).
+
+- 스토어 화면 중 외부 호출이 있는 엔드포인트(STOREFRONT_ENDPOINTS): STOREFRONT_REQUEST_BUDGET (기본 1.5초)
+- REQUEST_BUDGETS에 적힌 엔드포인트: 그 값 (관리자 검색 등)
+- 그 밖(소셜 로그인 콜백, 일괄 작업 등)은 예산 없이 제공자별 기존 타임아웃 — OAuth 토큰 교환처럼
+  느려도 끝까지 기다려야 하는 호출을 1.5초로 자르지 않는다
+- 스레드 풀로 넘기는 작업은 contextvars.copy_context()로 같은 마감 시각을 물려받는다.
+  캐시 백그라운드 갱신처럼 요청과 무관한 작업은 예산 없이 돈다.
+"""
+import time
+from contextvars import ContextVar
+
+import requests
+from flask import current_app
+
+DEFAULT_STOREFRONT_BUDGET = 1.5
+REQUEST_BUDGETS = {
+    'main.admin_search_books': 10.0,
+    'main.admin_add_from_search': 8.0,
+}
+# 예산을 거는 스토어 화면 — 외부 추천을 부르는 곳만 (그 밖의 엔드포인트는 예산 없음)
+STOREFRONT_ENDPOINTS = ('main.index', 'main.book_detail', 'main.book_web_recommendations')
+MIN_CALL_SECONDS = 0.05
+
+_deadline = ContextVar('request_deadline', default=None)
+
+
+class BudgetExhausted(requests.exceptions.Timeout):
+    """남은 예산이 없어 외부 호출을 보내지 않았다 (기존 Timeout 처리 경로를 그대로 탄다)."""
+
+
+def budget_for(endpoint):
+    budgets = current_app.config.get('REQUEST_BUDGETS', REQUEST_BUDGETS)
+    if endpoint in budgets:
+        return budgets[endpoint]
+    if endpoint in current_app.config.get('STOREFRONT_BUDGET_ENDPOINTS', STOREFRONT_ENDPOINTS):
+        return current_app.config.get('STOREFRONT_REQUEST_BUDGET', DEFAULT_STOREFRONT_BUDGET)
+    return None
+
+
+def start(seconds):
+    """지금부터 seconds초 뒤를 마감으로 잡는다. None이면 예산 없음. 반환: clear()에 넘길 토큰"""
+    return _deadline.set(time.monotonic() + seconds if seconds is not None else None)
+
+
+def clear(token=None):
+    if token is not None:
+        _deadline.reset(token)
+    else:
+        _deadline.set(None)
+
+
+def remaining():
+    """남은 예산(초). 예산이 없으면 None."""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def timeout(default):
+    """외부 호출 타임아웃을 남은 예산에 맞춘다. default는 초 또는 (연결, 읽기) 튜플.
+    남은 예산이 MIN_CALL_SECONDS 미만이면 BudgetExhausted."""
+    left = remaining()
+    if left is None:
+        return default
+    if left < MIN_CALL_SECONDS:
+        raise BudgetExhausted(f'요청 예산 소진 — 외부 호출 생략 (남은 {max(left, 0):.2f}s)')
+    if isinstance(default, tuple):
+        return tuple(min(t, left) for t in default)
+    return min(default, left)
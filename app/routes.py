@@ -1,20 +1,31 @@
-from flask import Blueprint, render_template, request, flash, redirect, url_for, jsonify, current_app, session
+from flask import Blueprint, render_template, request, flash, redirect, url_for, jsonify, current_app, session, abort, make_response
 from functools import wraps
 from app import db
-from app.models import Book, User, Review, Order, RestockRequest, CartItem
-from app.mailer import send_email, is_email_configured
+from app.models import Book, User, Review, Order, RestockRequest, CartItem, CoverBatch, CoverDraft
+from app.mailer import is_email_configured
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy import text, cast, String
+from sqlalchemy import text
+from sqlalchemy.orm import contains_eager, joinedload, load_only, undefer
 import google.generativeai as genai
 import os
 import json
 import secrets
-import time
 from PIL import Image
 import io
-import base64
-
-from app.utils import search_books_with_fallback, auto_tag_genre, generate_curator_note, GENRE_TAXONOMY, upgrade_cover_url, is_allowed_cover_image_url
+from urllib.parse import quote
+
+from app.utils import search_books_with_fallback, GENRE_TAXONOMY, upgrade_cover_url, is_allowed_cover_image_url
+from app.catalog import read_filters, fetch_page, InvalidCursor
+from app.facets import CONDITIONS, facet_counts
+from app.loading import BOOK_API, BOOK_CARD, BOOK_TITLE
+from app import covers
+from app.cover_store import cover_response, get_store, save_cover
+from app.cover_variants import variant_key
+from app.catalog_changes import record_changes
+from app.genres import matches_any, untagged
+from app import (bulk_import, circuit_breaker, co_purchase, cover_ingest, hangul_index, http_client, inventory, jobs,
+                 rate_limit, request_budget, similarity, single_flight, text_similarity)
+from app.request_budget import BudgetExhausted
 from app.oauth import PROVIDERS, is_provider_configured, build_authorize_url, exchange_code_for_profile
 # Configure Gemini
 GOOGLE_API_KEY = os.environ.get("GOOGLE_API_KEY")
@@ -25,6 +36,17 @@ if GOOGLE_API_KEY:
 main = Blueprint('main', __name__)
 
 
+@main.before_request
+def _start_request_budget():
+    """외부 호출이 나눠 쓸 요청 예산(마감 시각)을 건다 — app/request_budget.py"""
+    request_budget.start(request_budget.budget_for(request.endpoint))
+
+
+@main.teardown_request
+def _clear_request_budget(exc):
+    request_budget.clear()
+
+
 @main.app_context_processor
 def inject_cart_count():
     """네비게이션 바의 장바구니 뱃지에 쓸 총 수량을 모든 템플릿에서 바로 쓸 수 있게 한다."""
@@ -232,112 +254,94 @@ def terms():
 
 @main.route('/')
 def index():
-    query          = request.args.get('q', '').strip()
-    condition_filter = request.args.get('condition', '').strip()
-    price_filter   = request.args.get('price', '').strip()
-    avail_filter   = request.args.get('avail', '').strip()
-    year_filter    = request.args.get('year', '').strip()
-    edition_filter = request.args.get('edition', '').strip()
-    sort           = request.args.get('sort', '').strip()
-
-    books_q = Book.query
-
-    # 텍스트 검색
-    if query:
-        search_filter = f"%{query}%"
-        books_q = books_q.filter(
-            (Book.title.ilike(search_filter)) |
-            (Book.author.ilike(search_filter)) |
-            (Book.description.ilike(search_filter)) |
-            (Book.condition.ilike(search_filter)) |
-            (cast(Book.year, String).ilike(search_filter))
-        )
-
-    # 컨디션 필터
-    if condition_filter:
-        books_q = books_q.filter(Book.condition == condition_filter)
-
-    # 가격 필터
-    if price_filter:
-        parts = price_filter.split('-')
-        if len(parts) == 2:
-            low, high = parts
-            if low:  books_q = books_q.filter(Book.price >= float(low))
-            if high and high != '0': books_q = books_q.filter(Book.price <= float(high))
-
-    # 재고 필터
-    if avail_filter == 'in_stock':
-        books_q = books_q.filter(Book.stock_quantity > 0)
-    # sold_out 선택 시 전체 표시 (품절 포함)
-
-    # 출판연도대 필터
-    if year_filter == 'pre1900':
-        books_q = books_q.filter(Book.year < 1900)
-    elif year_filter == '1900-1950':
-        books_q = books_q.filter(Book.year >= 1900, Book.year <= 1950)
-    elif year_filter == '1951-2000':
-        books_q = books_q.filter(Book.year >= 1951, Book.year <= 2000)
-    elif year_filter == '2001-now':
-        books_q = books_q.filter(Book.year >= 2001)
-
-    # 판본 필터 (자유 텍스트 필드라 키워드 매칭)
-    edition_keywords = {
-        'first':   ['초판', '1st', 'first'],
-        'reprint': ['재판', 'reprint'],
-        'limited': ['한정판', 'limited'],
-    }
-    if edition_filter in edition_keywords:
-        conds = [Book.edition.ilike(f'%{kw}%') for kw in edition_keywords[edition_filter]]
-        books_q = books_q.filter(db.or_(*conds))
-
-    # 정렬
-    if sort == 'price_asc':
-        books_q = books_q.order_by(Book.price.asc())
-    elif sort == 'price_desc':
-        books_q = books_q.order_by(Book.price.desc())
-    elif sort == 'year_desc':
-        books_q = books_q.order_by(Book.year.desc())
-    elif sort == 'year_asc':
-        books_q = books_q.order_by(Book.year.asc())
-    else:
-        books_q = books_q.order_by(Book.id.desc())
-
-    books = books_q.all()
+    filters = read_filters(request.args)
+    cursor = request.args.get('cursor', '').strip() or None
 
-    ratings = {}
-    for book in books:
-        if book.reviews:
-            ratings[book.id] = (round(sum(r.rating for r in book.reviews) / len(book.reviews), 1), len(book.reviews))
+    try:
+        books, next_cursor = fetch_page(filters, cursor)
+    except InvalidCursor:
+        # 변조되었거나 정렬이 바뀐 뒤의 오래된 커서 — 첫 페이지부터 다시 보여준다
+        cursor = None
+        books, next_cursor = fetch_page(filters)
 
-    # 선호 장르 기반 맞춤 추천 — 필터/검색이 전혀 없는 기본 화면에서만 상단에 노출
+    # 선호 장르 기반 맞춤 추천 — 필터/검색이 전혀 없는 기본 화면(첫 페이지)에서만 상단에 노출
     recommended_books = []
     preferred_genre_list = []
-    no_filters_active = not any([query, condition_filter, price_filter, avail_filter, year_filter, edition_filter, sort])
+    no_filters_active = not any(filters.values()) and not cursor
     if no_filters_active and session.get('user_id'):
         member = User.query.get(session['user_id'])
         if member and member.preferred_genres:
             preferred_genre_list = member.preferred_genres.split(',')
-            genre_conds = [Book.genre.ilike(f'%{g}%') for g in preferred_genre_list]
-            recommended_books = Book.query.filter(db.or_(*genre_conds)).order_by(Book.id.desc()).all()
+            recommended_books = (Book.query.options(BOOK_CARD)
+                                 .filter(matches_any(Book.genre_mask, member.preferred_genre_mask))
+                                 .order_by(Book.id.desc()).all())
 
     return render_template(
         'index.html',
         books=books,
-        ratings=ratings,
-        search_query=query or None,
-        condition_filter=condition_filter,
-        price_filter=price_filter,
-        avail_filter=avail_filter,
-        year_filter=year_filter,
-        edition_filter=edition_filter,
-        sort=sort,
+        next_page_url=_next_page_url(filters, next_cursor),
+        more_url=_next_page_url(filters, next_cursor, endpoint='main.index'),
+        search_query=filters['q'] or None,
+        condition_filter=filters['condition'],
+        price_filter=filters['price'],
+        avail_filter=filters['avail'],
+        year_filter=filters['year'],
+        edition_filter=filters['edition'],
+        genre_filter=filters['genre'],
+        genre_taxonomy=GENRE_TAXONOMY,
+        sort=filters['sort'],
+        facets=facet_counts(filters),
         recommended_books=recommended_books,
         preferred_genre_list=preferred_genre_list,
     )
 
+
+@main.route('/catalog/page')
+def catalog_page():
+    """무한 스크롤용 HTML 조각 — 커서 다음 페이지의 도서 카드만 렌더링한다.
+    다음 페이지 URL은 X-Next-Page 헤더로 전달한다 (마지막 페이지면 헤더 없음)."""
+    filters = read_filters(request.args)
+    try:
+        books, next_cursor = fetch_page(filters, request.args.get('cursor', '').strip() or None)
+    except InvalidCursor:
+        abort(400)
+
+    resp = make_response(render_template('_book_cards.html', books=books))
+    next_url = _next_page_url(filters, next_cursor)
+    if next_url:
+        resp.headers['X-Next-Page'] = next_url
+    return resp
+
+
+def _next_page_url(filters, next_cursor, endpoint='main.catalog_page'):
+    """현재 필터를 유지한 채 다음 커서를 가리키는 URL (기본: 무한 스크롤 조각 엔드포인트)"""
+    if not next_cursor:
+        return None
+    params = {k: v for k, v in filters.items() if v}
+    return url_for(endpoint, cursor=next_cursor, **params)
+
+SUGGEST_LIMIT = 8
+
+
+@main.route('/search/suggest')
+def search_suggest():
+    """검색창 자동완성 — 제목/저자 부분 일치·초성 일치 상위 몇 건을 JSON으로 돌려준다."""
+    q = request.args.get('q', '').strip()
+    if not q:
+        return jsonify([])
+    ids = hangul_index.search(q, limit=SUGGEST_LIMIT)
+    books = {b.id: b for b in Book.query.options(load_only(Book.id, Book.title, Book.author))
+             .filter(Book.id.in_(ids))} if ids else {}
+    return jsonify([
+        {'id': book_id, 'title': books[book_id].title, 'author': books[book_id].author,
+         'url': url_for('main.book_detail', id=book_id)}
+        for book_id in ids if book_id in books
+    ])
+
+
 @main.route('/books', methods=['GET'])
 def get_books():
-    books = Book.query.all()
+    books = Book.query.options(BOOK_API).all()
     book_list = [{
         'id': b.id, 'title': b.title, 'author': b.author,
         'year': b.year, 'edition': b.edition, 'condition': b.condition,
@@ -347,7 +351,7 @@ def get_books():
 
 @main.route('/books/<int:id>', methods=['GET'])
 def get_book(id):
-    book = Book.query.get_or_404(id)
+    book = Book.query.options(undefer(Book.description)).get_or_404(id)
     return jsonify({
         'id': book.id, 'title': book.title, 'author': book.author,
         'year': book.year, 'edition': book.edition, 'condition': book.condition,
@@ -355,34 +359,109 @@ def get_book(id):
         'description': book.description
     })
 
+@main.app_template_global()
+def cover_url(book):
+    """표지 이미지 URL — 해시를 v로 붙여 표지가 바뀌면 URL도 바뀌게 한다 (DB 표지가 없으면 None)."""
+    if book.image_hash:
+        return url_for('main.cover_image', book_id=book.id, v=book.image_hash)
+    return None
+
+
+@main.app_template_global()
+def cover_srcset(book, ext):
+    """반응형 변형 srcset 문자열 ("…/160.webp?v=… 160w, …") — 변형이 없으면 빈 문자열."""
+    return ', '.join(
+        f"{url_for('main.cover_variant', book_id=book.id, width=w, ext=ext, v=book.image_hash)} {w}w"
+        for w in book.cover_variant_widths
+    )
+
+
+@main.route('/covers/<int:book_id>')
+def cover_image(book_id):
+    """표지 바이트를 ETag(내용 해시)와 함께 내려준다. 템플릿이 만든 v=해시 주소는 immutable 캐시."""
+    row = db.session.execute(
+        db.select(Book.image_hash, Book.image_data).where(Book.id == book_id)
+    ).first()
+    if row is None or not row.image_hash:
+        abort(404)
+    return _cached_cover(row.image_hash, row.image_hash,
+                         lambda: cover_response(row.image_hash, row.image_data))
+
+
+@main.route('/covers/<int:book_id>/<int:width>.<any(webp, jpg):ext>')
+def cover_variant(book_id, width, ext):
+    """너비별 반응형 변형 (srcset용). 캐시 규칙은 원본과 같다."""
+    row = db.session.execute(
+        db.select(Book.image_hash, Book.cover_widths).where(Book.id == book_id)
+    ).first()
+    if row is None or not row.image_hash or str(width) not in (row.cover_widths or '').split(','):
+        abort(404)
+    key = variant_key(row.image_hash, width, ext)
+    return _cached_cover(row.image_hash, key.replace('.', '-'), lambda: get_store().response(key))
+
+
+def _cached_cover(image_hash, etag, load):
+    """ETag 재검증이면 저장소를 읽지 않고 304, 아니면 load()로 바이트 응답을 만든다.
+    v=현재 해시로 들어온 요청만 immutable 캐시를 허용한다."""
+    if request.if_none_match.contains(etag):
+        resp = make_response('', 304)
+    else:
+        resp = load()
+        if resp is None:
+            abort(404)
+    resp.set_etag(etag)
+    if request.args.get('v') == image_hash:
+        resp.headers['Cache-Control'] = f'public, max-age={covers.IMMUTABLE_MAX_AGE}, immutable'
+    else:
+        resp.headers['Cache-Control'] = 'public, no-cache'  # 버전 없는 주소는 매번 ETag로 재검증
+    return resp
+
+
 @main.route('/book/<int:id>')
 def book_detail(id):
-    book = Book.query.get_or_404(id)
+    book = Book.query.options(undefer(Book.description)).get_or_404(id)
     
-    # Recommendation Logic: Same Author OR Similar Era (+/- 20 years)
-    similar_books = Book.query.filter(
-        (Book.id != book.id) & 
-        (
-            (Book.author == book.author) | 
-            ((Book.year >= book.year - 20) & (Book.year <= book.year + 20))
-        )
-    ).limit(4).all()
-
-    # Web Search Recommendations (with automatic fallback)
-    web_recommendations = search_books_with_fallback(book.title, book.author)
-
-    # 평점/리뷰: 최신순 정렬, 평균과 개수는 Python에서 계산 (소규모 카탈로그라 충분)
-    reviews = sorted(book.reviews, key=lambda r: r.created_at, reverse=True)
-    avg_rating = round(sum(r.rating for r in reviews) / len(reviews), 1) if reviews else None
+    # 비슷한 도서: 저자·시대·장르·가격대 점수로 미리 계산해 둔 순위 (app/similarity.py)
+    similar_books = similarity.similar_books(book.id, limit=4, options=(BOOK_CARD,))
+    # 소개글이 비슷한 도서: 큐레이터 노트 TF-IDF 코사인 순위 (app/text_similarity.py), 위 목록과 겹치는 책은 뺀다
+    text_similar_books = text_similarity.similar_books(
+        book.id, limit=4, options=(BOOK_CARD,), exclude=[b.id for b in similar_books])
+    # 함께 산 책: 같은 주문 그룹에서 함께 팔린 횟수 순 (app/co_purchase.py)
+    also_bought = co_purchase.also_bought(
+        book.id, limit=4, options=(BOOK_CARD,), exclude=[b.id for b in similar_books + text_similar_books])
+
+    # 평점/리뷰: 평균·개수·분포는 Book에 저장된 요약을 그대로 쓰고, 목록만 최신순으로 조회
+    reviews = (Review.query.filter_by(book_id=book.id).options(joinedload(Review.user))
+               .order_by(Review.created_at.desc(), Review.id.desc()).all())
+    avg_rating = round(book.rating_avg, 1) if book.rating_count else None
     my_review = next((r for r in reviews if r.user_id == session.get('user_id')), None)
 
     return render_template(
-        'detail.html', book=book, similar_books=similar_books, web_recommendations=web_recommendations,
+        'detail.html', book=book, similar_books=similar_books, text_similar_books=text_similar_books,
+        also_bought=also_bought,
         reviews=reviews, avg_rating=avg_rating, avg_rating_floor=int(avg_rating) if avg_rating else 0,
-        review_count=len(reviews), my_review=my_review,
+        review_count=book.rating_count, rating_histogram=book.rating_histogram, my_review=my_review,
     )
 
 
+# 외부 추천 조각 캐시 수명(초): 결과가 있으면 길게, 비어 있으면(제공자 장애일 수 있음) 짧게
+WEB_RECOMMENDATIONS_MAX_AGE = 3600
+WEB_RECOMMENDATIONS_EMPTY_MAX_AGE = 60
+
+
+@main.route('/book/<int:id>/web-recommendations')
+def book_web_recommendations(id):
+    """상세 페이지가 로드 후에 가져가는 "같은 저자의 다른 작품" HTML 조각.
+    외부 API(오픈라이브러리 → 구글 북스) 지연이 상세 페이지 본문 렌더링을 막지 않도록 분리했다."""
+    book = Book.query.options(load_only(Book.id, Book.title, Book.author)).get_or_404(id)
+    web_recommendations = search_books_with_fallback(book.title, book.author)
+
+    resp = make_response(render_template('_web_recommendations.html', web_recommendations=web_recommendations))
+    max_age = WEB_RECOMMENDATIONS_MAX_AGE if web_recommendations else WEB_RECOMMENDATIONS_EMPTY_MAX_AGE
+    resp.headers['Cache-Control'] = f'public, max-age={max_age}, stale-while-revalidate={max_age}'
+    return resp
+
+
 @main.route('/book/<int:id>/review', methods=['POST'])
 @member_required
 def submit_review(id):
@@ -445,7 +524,8 @@ def cart_add(id):
 @member_required
 def cart_view():
     items = (CartItem.query.filter_by(user_id=session['user_id'])
-             .join(Book).order_by(CartItem.created_at.desc()).all())
+             .join(Book).options(contains_eager(CartItem.book).options(BOOK_CARD))
+             .order_by(CartItem.created_at.desc()).all())
     total = sum(i.subtotal for i in items)
     return render_template('cart.html', items=items, total=total)
 
@@ -491,7 +571,8 @@ def checkout():
         book = Book.query.get_or_404(buy_now_id)
         line_items = [{'book': book, 'quantity': max(1, buy_now_qty)}]
     else:
-        cart_items = CartItem.query.filter_by(user_id=session['user_id']).join(Book).all()
+        cart_items = (CartItem.query.filter_by(user_id=session['user_id']).join(Book)
+                      .options(contains_eager(CartItem.book).options(BOOK_CARD)).all())
         line_items = [{'book': ci.book, 'quantity': ci.quantity} for ci in cart_items]
 
     if not line_items:
@@ -533,6 +614,7 @@ def checkout():
                     address1=address1, address2=address2, delivery_memo=memo,
                 ))
 
+            record_changes(db.session.connection(), [li['book'].id for li in line_items])
             if not buy_now_id:
                 CartItem.query.filter_by(user_id=session['user_id']).delete()
 
@@ -601,41 +683,22 @@ def notify_request():
     return redirect(url_for('main.book_detail', id=book.id))
 
 
-def _notify_restock(book):
-    """해당 도서의 미발송 입고 알림 신청자에게 메일을 발송한다.
-    이메일 미설정이면 발송하지 않고 대기 건수만 반환한다.
-    반환: (발송 성공 건수, 전체 대기 건수)"""
-    pending = RestockRequest.query.filter_by(book_id=book.id, notified=False).all()
-    if not pending:
-        return 0, 0
-
-    if not is_email_configured():
-        return 0, len(pending)
-
-    sent = 0
-    subject = f"[Rare Book Store] '{book.title}' 재입고 알림"
+def _enqueue_restock_emails(book):
+    """입고 알림 발송을 작업 큐에 넣는다 (발송은 `flask jobs worker`, app/tasks.py). 커밋은 호출부"""
     detail_url = url_for('main.book_detail', id=book.id, _external=True)
-    for reqst in pending:
-        html = f"""
-        <div style="font-family:sans-serif;max-width:480px">
-            <h2 style="font-weight:700">기다리시던 도서가 입고되었습니다 📚</h2>
-            <p>{reqst.name or '고객'}님, 신청하신 <strong>'{book.title}'</strong>가 다시 입고되었습니다.</p>
-            <p><a href="{detail_url}" style="display:inline-block;background:#111;color:#fff;
-               padding:12px 24px;border-radius:9999px;text-decoration:none">지금 보러가기</a></p>
-            <p style="color:#888;font-size:12px">희귀 도서 특성상 재고가 한정되어 있어 조기 품절될 수 있습니다.</p>
-        </div>"""
-        if send_email(reqst.email, subject, html):
-            reqst.notified = True
-            reqst.notified_at = db.func.now()
-            sent += 1
-    db.session.commit()
-    return sent, len(pending)
+    return jobs.enqueue('restock_emails', {'book_id': book.id, 'detail_url': detail_url}, unique=True)
 
 @main.route('/admin')
 @admin_required
 def admin():
-    books = Book.query.all()
-    return render_template('admin.html', books=books)
+    """재고 목록 — 정렬/필터를 서버에서 적용해 한 페이지만 읽는다 (app/inventory.py)"""
+    filters = inventory.read_filters(request.args)
+    books, total, pages, page = inventory.fetch_page(filters)
+    return render_template(
+        'admin.html', books=books, total=total, pages=pages, page=page, filters=filters,
+        sort_columns=inventory.SORT_COLUMNS, genre_taxonomy=GENRE_TAXONOMY,
+        conditions=CONDITIONS, stuck_jobs=len(jobs.stuck()),
+    )
 
 @main.route('/admin/add', methods=['GET', 'POST'])
 @admin_required
@@ -652,81 +715,17 @@ def admin_add():
                 flash('도서 표지 이미지를 업로드해주세요.', 'error')
                 return redirect(request.url)
 
-            # 3. Gemini Processing
-            # 3. Gemini Processing
-            if not GOOGLE_API_KEY:
+            # 3. Gemini Processing (일괄 입고와 같은 분석기 — 타임아웃·서킷 브레이커 포함, app/cover_ingest.py)
+            if not cover_ingest.analyzer_configured():
                 flash('Google API Key를 찾을 수 없습니다. 자동 분석을 수행할 수 없습니다.', 'error')
                 return redirect(request.url)
-            
-            # Save file locally
-            from werkzeug.utils import secure_filename
-            import uuid
-            
-            # filename = secure_filename(image_file.filename)
-            # unique_filename = f"{uuid.uuid4().hex}_{filename}"
-            # save_path = os.path.join(current_app.root_path, 'static/book_covers', unique_filename)
-            
-            # Reset pointer for saving
-            image_file.seek(0)
-            
-            # --- Image Optimization for Mobile Uploads ---
-            image_bytes = image_file.read()
-            img = Image.open(io.BytesIO(image_bytes))
-            
-            # Convert to RGB if necessary (e.g. for PNG/RGBA uploads or palette modes)
-            if img.mode in ('RGBA', 'P'):
-                img = img.convert('RGB')
-
-            # Resize if too large (Max dimension: 800px)
-            max_size = (800, 800)
-            img.thumbnail(max_size, Image.Resampling.LANCZOS)
-            
-            # Resize if too large (Max dimension: 800px)
-            max_size = (800, 800)
-            img.thumbnail(max_size, Image.Resampling.LANCZOS)
-            
-            # --- BASE64 ENCODING FOR DB ---
-            img_byte_arr = io.BytesIO()
-            img.save(img_byte_arr, format='JPEG')
-            img_byte_arr.seek(0)
-            img_base64 = base64.b64encode(img_byte_arr.getvalue()).decode('utf-8')
-            
-            if not img_base64:
-                raise ValueError("이미지 변환에 실패했습니다 (Base64 Empty).")
-            # ------------------------------
-
-            # For Gemini, we reset the buffer enabling us to send the bytes
-            img_byte_arr.seek(0)
-            
-            # For Gemini, we can pass the Pillow Image object directly
 
+            # --- 모바일 업로드 최적화: RGB 변환 + 최대 800px JPEG (표지 저장소에 저장) ---
+            cover_bytes = cover_ingest.prepare_cover(image_file.read())
+            if not cover_bytes:
+                raise ValueError("이미지 변환에 실패했습니다 (Empty).")
 
-            model = genai.GenerativeModel('gemini-flash-latest')
-            prompt = """
-            Analyze this book cover image.
-            1. Identify the Title and Author of the book from the text on the cover.
-            2. Using your internal knowledge about this specific book (based on the identified Title/Author), generate a "description" that serves as a curatorial note.
-            
-            IMPORTANT: The 'description' field MUST be written in Korean (한국어).
-            The description should NOT just describe the cover art.
-            Instead, explain the book's plot, themes, literary significance, and why it is worth collecting.
-            Make it engaging and professional, like a museum curator introducing a masterpiece.
-
-            Return strictly valid JSON:
-            {
-                "title": "Book Title (Identified from cover)",
-                "author": "Author Name (Identified from cover)",
-                "year": 1900 (Use an estimated year if not visible, as integer),
-                "edition": "First Edition (or 'Unknown')",
-                "condition": "Good (Estimate based on visual wear)",
-                "description": "A rich, engaging curation note about the book's content and literary value. WRITE THIS IN KOREAN."
-            }
-            """
-            
-            response = model.generate_content([prompt, img])
-            # Parse JSON - Simple cleanup if markdown is present
-            json_text = response.text.replace('```json', '').replace('```', '').strip()
-            book_data = json.loads(json_text)
+            book_data = cover_ingest.analyze(cover_bytes)
 
             # 4. Save to DB
             new_book = Book(
@@ -738,19 +737,18 @@ def admin_add():
                 price=price,
                 stock_quantity=stock,
                 description=book_data.get('description', ''),
-                image_file="stored_in_db", # Placeholder as we use DB storage now
-                image_data=img_base64      # New DB storage
             )
+            save_cover(new_book, cover_bytes)  # 표지 저장소 (COVER_STORAGE)
             db.session.add(new_book)
             db.session.commit()
             
             flash(f"도서 '{new_book.title}' 추가 성공! (AI 분석 완료)", 'success')
             return redirect(url_for('main.admin'))
 
+        except json.JSONDecodeError:  # ValueError의 하위 클래스라 먼저 잡는다
+            flash('AI 분석 응답을 처리하는데 실패했습니다. 다시 시도해주세요.', 'error')
         except ValueError:
             flash('가격 자릿수 또는 재고 입력이 올바르지 않습니다.', 'error')
-        except json.JSONDecodeError:
-            flash('AI 분석 응답을 처리하는데 실패했습니다. 다시 시도해주세요.', 'error')
         except Exception as e:
             db.session.rollback()
             flash(f'오류가 발생했습니다: {str(e)}', 'error')
@@ -761,7 +759,7 @@ def admin_add():
 @main.route('/admin/edit/<int:id>', methods=['GET', 'POST'])
 @admin_required
 def admin_edit(id):
-    book = Book.query.get_or_404(id)
+    book = Book.query.options(undefer(Book.description)).get_or_404(id)
     if request.method == 'POST':
         try:
             was_out_of_stock = book.stock_quantity == 0  # 재입고 알림 트리거 판단용
@@ -772,7 +770,9 @@ def admin_edit(id):
             book.condition = request.form['condition']
             book.price = float(request.form['price'])
             book.stock_quantity = int(request.form['stock_quantity'])
-            book.description = request.form.get('description')
+            description = request.form.get('description')
+            if description != book.description:  # 같은 값을 다시 넣어도 소개글 유사도 갱신 작업이 쌓인다
+                book.description = description
             selected_genres = [g for g in request.form.getlist('genre') if g in GENRE_TAXONOMY]
             book.genre = ','.join(selected_genres) if selected_genres else None
 
@@ -793,29 +793,29 @@ def admin_edit(id):
                     img = img.convert('RGB')
                 img.thumbnail((800, 800), Image.Resampling.LANCZOS)
                 
-                # Base64 Encode for DB
                 img_byte_arr = io.BytesIO()
                 img.save(img_byte_arr, format='JPEG')
-                img_base64 = base64.b64encode(img_byte_arr.getvalue()).decode('utf-8')
+                cover_bytes = img_byte_arr.getvalue()
 
-                if not img_base64:
-                    raise ValueError("이미지 변환에 실패했습니다 (Base64 Empty).")
+                if not cover_bytes:
+                    raise ValueError("이미지 변환에 실패했습니다 (Empty).")
                 
                 # Update attributes
-                book.image_file = "stored_in_db"
-                book.image_data = img_base64
+                save_cover(book, cover_bytes)
 
+            # 재고가 0 → 양수로 바뀌면 입고 알림 신청자에게 발송 (수정과 같은 트랜잭션으로 작업 큐에 넣는다)
+            pending = 0
+            if was_out_of_stock and book.stock_quantity > 0:
+                pending = RestockRequest.query.filter_by(book_id=book.id, notified=False).count()
+                if pending and is_email_configured():
+                    _enqueue_restock_emails(book)
             db.session.commit()
             flash('도서 정보가 수정되었습니다!', 'success')
-
-            # 재고가 0 → 양수로 바뀌면 입고 알림 신청자에게 발송
-            if was_out_of_stock and book.stock_quantity > 0:
-                sent, pending = _notify_restock(book)
-                if pending and sent:
-                    flash(f"입고 알림 {sent}건을 발송했습니다.", 'success')
-                elif pending and not sent:
-                    flash(f"입고 알림 신청자 {pending}명이 대기 중입니다. (이메일 미설정 — 발송 대기) "
-                          f"'입고 알림 신청 현황'에서 확인하세요.", 'error')
+            if pending and is_email_configured():
+                flash(f"입고 알림 {pending}건 발송을 예약했습니다.", 'success')
+            elif pending:
+                flash(f"입고 알림 신청자 {pending}명이 대기 중입니다. (이메일 미설정 — 발송 대기) "
+                      f"'입고 알림 신청 현황'에서 확인하세요.", 'error')
 
             return redirect(url_for('main.admin'))
         except ValueError:
@@ -897,6 +897,7 @@ def admin_order_status(group_key):
                     text("UPDATE book SET stock_quantity = stock_quantity + :qty WHERE id = :id"),
                     {'qty': order.quantity, 'id': order.book_id},
                 )
+                record_changes(db.session.connection(), [order.book_id])
             order.status = new_status
         db.session.commit()
         flash(f"주문 상태를 '{Order.STATUS_LABELS[new_status]}'(으)로 변경했습니다.", 'success')
@@ -931,16 +932,19 @@ def admin_restock_requests():
 @admin_required
 def admin_restock_send(book_id):
     """특정 도서의 대기 신청자에게 입고 알림을 지금 발송 (재고가 있을 때만)"""
-    book = Book.query.get_or_404(book_id)
+    book = Book.query.options(BOOK_TITLE).get_or_404(book_id)
     if book.stock_quantity <= 0:
         flash('재고가 없는 도서는 입고 알림을 발송할 수 없습니다.', 'error')
         return redirect(url_for('main.admin_restock_requests'))
 
-    sent, pending = _notify_restock(book)
+    pending = RestockRequest.query.filter_by(book_id=book.id, notified=False).count()
     if not pending:
         flash('대기 중인 신청이 없습니다.', 'error')
-    elif sent:
-        flash(f"'{book.title}' 입고 알림 {sent}건을 발송했습니다.", 'success')
+    elif is_email_configured():
+        job = _enqueue_restock_emails(book)
+        db.session.commit()
+        flash(f"'{book.title}' 입고 알림 {pending}건 발송을 예약했습니다.", 'success')
+        return redirect(url_for('main.admin_jobs', _anchor=f'job-{job.id}'))
     else:
         flash('이메일이 설정되지 않아 발송하지 못했습니다. .env의 SMTP 설정을 확인하세요.', 'error')
     return redirect(url_for('main.admin_restock_requests'))
@@ -950,7 +954,7 @@ def admin_restock_send(book_id):
 @admin_required
 def admin_restock_mark_done(book_id):
     """이메일 미설정 시: 관리자가 수동 연락 후 대기 신청을 '처리 완료'로 표시"""
-    book = Book.query.get_or_404(book_id)
+    book = Book.query.options(BOOK_TITLE).get_or_404(book_id)
     pending = RestockRequest.query.filter_by(book_id=book.id, notified=False).all()
     for r in pending:
         r.notified = True
@@ -960,79 +964,215 @@ def admin_restock_mark_done(book_id):
     return redirect(url_for('main.admin_restock_requests'))
 
 
+PROVIDER_LABELS = {
+    'openlibrary': '오픈라이브러리', 'googlebooks': '구글 북스', 'kakao': '카카오 책 검색',
+    'naver': '네이버 책 검색', 'gemini': 'Gemini',
+}
+
+
+@main.route('/admin/providers')
+@admin_required
+def admin_providers():
+    """외부 제공자 서킷 브레이커 상태 — 차단 여부, 연속 실패 수, 마지막 오류 — 와 Gemini 호출 한도"""
+    return render_template(
+        'admin_providers.html', providers=circuit_breaker.statuses(), labels=PROVIDER_LABELS,
+        buckets=rate_limit.statuses(),
+        threshold=current_app.config.get('CIRCUIT_FAILURE_THRESHOLD', circuit_breaker.DEFAULT_FAILURE_THRESHOLD),
+        open_seconds=current_app.config.get('CIRCUIT_OPEN_SECONDS', circuit_breaker.DEFAULT_OPEN_SECONDS),
+    )
+
+
+@main.route('/admin/providers/<provider>/reset', methods=['POST'])
+@admin_required
+def admin_provider_reset(provider):
+    """제공자 장애가 풀린 것을 확인했을 때 쿨다운을 기다리지 않고 브레이커를 닫는다"""
+    if provider not in circuit_breaker.BREAKER_PROVIDERS:
+        abort(404)
+    circuit_breaker.reset(provider)
+    flash(f"'{PROVIDER_LABELS[provider]}' 브레이커를 닫았습니다.", 'success')
+    return redirect(url_for('main.admin_providers'))
+
+
+@main.route('/admin/import', methods=['GET', 'POST'])
+@admin_required
+def admin_import():
+    """CSV/XLSX 일괄 입고 — 행 단위로 읽어 배치 반영하고 행별 오류를 보여 준다 (app/bulk_import.py)"""
+    result = None
+    if request.method == 'POST':
+        upload = request.files.get('file')
+        if not upload or not upload.filename:
+            flash('올릴 CSV 또는 XLSX 파일을 선택해주세요.', 'error')
+            return redirect(url_for('main.admin_import'))
+        try:
+            result = bulk_import.import_file(upload.stream, upload.filename)
+        except bulk_import.ImportFileError as e:
+            db.session.rollback()
+            flash(str(e), 'error')
+            return redirect(url_for('main.admin_import'))
+        flash(f'신규 {result.inserted}권, 갱신 {result.updated}권을 반영했습니다.'
+              + (f' 오류 {result.error_count}행은 건너뛰었습니다.' if result.error_count else ''),
+              'success' if result.inserted or result.updated else 'error')
+    return render_template('admin_import.html', result=result, columns=bulk_import.COLUMNS,
+                           required=bulk_import.REQUIRED, batch_size=bulk_import.BATCH_SIZE)
+
+
+@main.route('/admin/covers', methods=['GET', 'POST'])
+@admin_required
+def admin_covers():
+    """표지 사진 일괄 입고 — 사진/ZIP을 받아 배치를 만들고 진행 페이지로 넘긴다 (app/cover_ingest.py)"""
+    if request.method == 'POST':
+        if not cover_ingest.analyzer_configured():
+            flash('Google API Key를 찾을 수 없습니다. 자동 분석을 수행할 수 없습니다.', 'error')
+            return redirect(url_for('main.admin_covers'))
+        uploads = [(f.filename, f.stream) for f in request.files.getlist('photos') if f and f.filename]
+        try:
+            batch = cover_ingest.create_batch(uploads)
+        except cover_ingest.IngestError as e:
+            flash(str(e), 'error')
+            return redirect(url_for('main.admin_covers'))
+        cover_ingest.start(batch.id)
+        flash(f'사진 {batch.total}장을 받았습니다. 분석이 끝나는 대로 초안이 나타납니다.', 'success')
+        return redirect(url_for('main.admin_cover_batch', batch_id=batch.id))
+
+    batches = CoverBatch.query.order_by(CoverBatch.id.desc()).limit(20).all()
+    return render_template('admin_covers.html', progresses=[cover_ingest.progress(b) for b in batches],
+                           max_files=cover_ingest.MAX_FILES)
+
+
+@main.route('/admin/covers/<int:batch_id>')
+@admin_required
+def admin_cover_batch(batch_id):
+    """배치 진행률 + 분석이 끝난 초안 검토"""
+    batch = CoverBatch.query.get_or_404(batch_id)
+    drafts = CoverDraft.query.options(undefer(CoverDraft.description)).filter_by(batch_id=batch_id) \
+        .order_by(CoverDraft.id).all()
+    return render_template('admin_cover_batch.html', progress=cover_ingest.progress(batch), drafts=drafts,
+                           conditions=CONDITIONS)
+
+
+@main.route('/admin/covers/<int:batch_id>/resume', methods=['POST'])
+@admin_required
+def admin_cover_batch_resume(batch_id):
+    """실패한 초안을 다시 분석 대기로 돌리고, 멈춘 배치를 이어서 처리한다"""
+    CoverBatch.query.get_or_404(batch_id)
+    requeued = cover_ingest.requeue_failed(batch_id)
+    cover_ingest.start(batch_id)
+    flash(f'배치를 다시 처리합니다. (재시도 {requeued}장)', 'success')
+    return redirect(url_for('main.admin_cover_batch', batch_id=batch_id))
+
+
+@main.route('/admin/covers/drafts/<int:draft_id>/image')
+@admin_required
+def admin_cover_draft_image(draft_id):
+    draft = CoverDraft.query.options(undefer(CoverDraft.image)).get_or_404(draft_id)
+    if not draft.image:
+        abort(404)
+    resp = make_response(draft.image)
+    resp.mimetype = 'image/jpeg'
+    return resp
+
+
+@main.route('/admin/covers/drafts/<int:draft_id>/accept', methods=['POST'])
+@admin_required
+def admin_cover_draft_accept(draft_id):
+    """검토한 초안을 가격/재고와 함께 도서로 등록한다"""
+    draft = CoverDraft.query.options(undefer(CoverDraft.image)).get_or_404(draft_id)
+    back = url_for('main.admin_cover_batch', batch_id=draft.batch_id) + f'#draft-{draft.id}'
+    if draft.status != 'ready':
+        flash('분석이 끝난 초안만 등록할 수 있습니다.', 'error')
+        return redirect(back)
+    try:
+        book = cover_ingest.accept(
+            draft,
+            title=request.form['title'].strip(),
+            author=request.form['author'].strip(),
+            year=int(request.form.get('year') or 0),
+            edition=request.form.get('edition', '').strip(),
+            condition=request.form.get('condition') or 'Good',
+            description=request.form.get('description', '').strip(),
+            price=float(request.form['price']),
+            stock_quantity=int(request.form.get('stock_quantity') or 1),
+        )
+        db.session.commit()
+    except (KeyError, ValueError):
+        db.session.rollback()
+        flash('가격 자릿수 또는 재고 입력이 올바르지 않습니다.', 'error')
+        return redirect(back)
+    flash(f"도서 '{book.title}' 추가 성공!", 'success')
+    return redirect(back)
+
+
+@main.route('/admin/covers/drafts/<int:draft_id>/discard', methods=['POST'])
+@admin_required
+def admin_cover_draft_discard(draft_id):
+    draft = CoverDraft.query.get_or_404(draft_id)
+    batch_id = draft.batch_id
+    if draft.status in ('pending', 'analyzing'):
+        flash('처리 중인 초안은 버릴 수 없습니다.', 'error')
+    else:
+        db.session.delete(draft)
+        db.session.commit()
+    return redirect(url_for('main.admin_cover_batch', batch_id=batch_id))
+
+
 @main.route('/admin/tag-genres', methods=['POST'])
 @admin_required
 def admin_tag_genres():
-    """장르 미태깅 도서 전체에 대해 Gemini 자동 분류 실행"""
+    """장르 미태깅 도서 전체에 대한 Gemini 자동 분류를 작업 큐에 넣는다 (app/tasks.py)"""
     if not GOOGLE_API_KEY:
         flash('Google API Key가 설정되지 않아 장르 자동 태깅을 실행할 수 없습니다.', 'error')
         return redirect(url_for('main.admin'))
 
-    targets = Book.query.filter((Book.genre == None) | (Book.genre == '')).all()
+    targets = Book.query.filter(untagged(Book.genre_mask)).count()
     if not targets:
         flash('이미 모든 도서에 장르가 태깅되어 있습니다.', 'success')
         return redirect(url_for('main.admin'))
 
-    tagged, failed = 0, 0
-    for i, book in enumerate(targets):
-        if i > 0:
-            time.sleep(13)  # Gemini 무료 등급 분당 호출 한도(5건/분)를 넘지 않도록 호출 간 간격을 둔다
-        genres = auto_tag_genre(book.title, book.author, book.description)
-        if genres:
-            book.genre = ','.join(genres)
-            tagged += 1
-        else:
-            failed += 1
-        # 책마다 즉시 커밋 — 중간에 타임아웃/장애가 나도 이미 태깅된 결과는 보존된다.
-        # (다음 실행 시 이미 태깅된 도서는 targets 조회에서 자동으로 제외되어 이어서 처리됨)
-        db.session.commit()
-
-    if failed:
-        flash(f'{tagged}권 자동 태깅 완료, {failed}권 실패 (API 오류 — 재시도해주세요).', 'success' if tagged else 'error')
-    else:
-        flash(f'{tagged}권 장르 자동 태깅 완료. 결과는 관리자 화면에서 검수/수정하세요.', 'success')
-    return redirect(url_for('main.admin'))
-
-
-def _looks_truncated(description):
-    """검색 API 미리보기 스니펫이 문장 중간에서 끊긴 것으로 보이는지 휴리스틱 판단"""
-    text = (description or '').strip()
-    if not text:
-        return True
-    return text[-1] not in '.!?」』”’"\''
+    job = jobs.enqueue('tag_genres', unique=True)
+    db.session.commit()
+    flash(f'{targets}권 장르 자동 태깅을 시작합니다. 결과는 관리자 화면에서 검수/수정하세요.', 'success')
+    return redirect(url_for('main.admin_jobs', _anchor=f'job-{job.id}'))
 
 
 @main.route('/admin/regenerate-notes', methods=['POST'])
 @admin_required
 def admin_regenerate_notes():
     """문장 중간에서 끊긴 것으로 보이는 큐레이터 노트(검색 API 미리보기 스니펫)를
-    Gemini로 완결된 글로 재작성한다. 장르 태깅과 동일하게 책마다 즉시 커밋한다."""
+    Gemini로 완결된 글로 재작성하는 작업을 큐에 넣는다 (app/tasks.py)."""
     if not GOOGLE_API_KEY:
         flash('Google API Key가 설정되지 않아 큐레이터 노트 재작성을 실행할 수 없습니다.', 'error')
         return redirect(url_for('main.admin'))
 
-    targets = [b for b in Book.query.all() if _looks_truncated(b.description)]
+    # 끊김 여부는 description을 저장할 때 Book.note_truncated에 기록해 둔다 (looks_truncated)
+    targets = Book.query.filter(Book.note_truncated).count()
     if not targets:
         flash('끊긴 것으로 보이는 큐레이터 노트가 없습니다.', 'success')
         return redirect(url_for('main.admin'))
 
-    done, failed = 0, 0
-    for i, book in enumerate(targets):
-        if i > 0:
-            time.sleep(13)  # Gemini 무료 등급 분당 호출 한도(5건/분)를 넘지 않도록 호출 간 간격을 둔다
-        note = generate_curator_note(book.title, book.author, book.description)
-        if note:
-            book.description = note
-            done += 1
-        else:
-            failed += 1
-        db.session.commit()  # 책마다 즉시 커밋 — 중간에 실패해도 이미 완료된 결과는 보존된다.
+    job = jobs.enqueue('regenerate_notes', unique=True)
+    db.session.commit()
+    flash(f'{targets}권의 큐레이터 노트 재작성을 시작합니다.', 'success')
+    return redirect(url_for('main.admin_jobs', _anchor=f'job-{job.id}'))
+
 
-    if failed:
-        flash(f'{done}권 노트 재작성 완료, {failed}권 실패 (API 오류 — 잠시 후 다시 시도해주세요).', 'success' if done else 'error')
+@main.route('/admin/jobs')
+@admin_required
+def admin_jobs():
+    """백그라운드 작업 진행 현황 (app/jobs.py). 워커가 가져가지 않는 작업은 이 요청에서 한 건씩 대신 처리한다."""
+    jobs.run_stuck()
+    recent = jobs.recent()
+    return render_template('admin_jobs.html', jobs=recent, labels=jobs.LABELS, stuck=jobs.stuck(),
+                           active=any(j.status in ('queued', 'running') for j in recent))
+
+
+@main.route('/admin/jobs/<int:job_id>/retry', methods=['POST'])
+@admin_required
+def admin_job_retry(job_id):
+    if jobs.retry(job_id):
+        flash('작업을 다시 대기열에 넣었습니다.', 'success')
     else:
-        flash(f'{done}권의 큐레이터 노트를 재작성했습니다.', 'success')
-    return redirect(url_for('main.admin'))
+        flash('실패한 작업만 다시 실행할 수 있습니다.', 'error')
+    return redirect(url_for('main.admin_jobs', _anchor=f'job-{job_id}'))
 
 
 # --- Admin: Book Search Routes ---
@@ -1048,11 +1188,18 @@ def admin_search():
 @admin_required
 def admin_search_books():
     """도서 검색 API — 카카오(한국어) → 네이버 → Google Books → Open Library 순 폴백"""
-    import requests as req
     q = request.args.get('q', '').strip()
     if not q:
         return jsonify({'items': []})
+    # 같은 검색어를 동시에 여러 번 보내면(더블 클릭, 여러 탭) 제공자 호출은 한 번만 나가고 결과를 함께 쓴다
+    try:
+        return jsonify(single_flight.do(('admin-search', q), lambda: _search_book_providers(q)))
+    except BudgetExhausted:
+        return jsonify({'items': [], 'message': 'no_results'})
 
+
+def _search_book_providers(q):
+    """admin_search_books의 제공자 폴백 파이프라인. 반환: JSON으로 내보낼 dict"""
     headers = {'User-Agent': 'RareBookStore/1.0 (admin search)'}
 
     # ── 한국어 포함 여부 감지 ──
@@ -1153,22 +1300,21 @@ def admin_search_books():
 
     # ── 검색 파이프라인 ──
     korean = is_korean(q)
-    encoded_q = req.utils.quote(q)
+    encoded_q = quote(q)
 
     # 1순위: 카카오 책 검색
     kakao_key = os.environ.get('KAKAO_REST_API_KEY', '').strip()
     if kakao_key:
         try:
-            resp = req.get(
-                f"https://dapi.kakao.com/v3/search/book?query={encoded_q}&size=20",
+            resp = http_client.get(
+                f"https://dapi.kakao.com/v3/search/book?query={encoded_q}&size=20", 'kakao',
                 headers={**headers, 'Authorization': f'KakaoAK {kakao_key}'},
-                timeout=8
             )
             resp.raise_for_status()
             items = parse_kakao(resp.json())
             if items:
                 print(f"카카오 검색 성공: {len(items)}건")
-                return jsonify({'items': items, 'source': 'kakao'})
+                return {'items': items, 'source': 'kakao'}
         except Exception as e:
             print(f"카카오 검색 실패: {e}")
 
@@ -1177,20 +1323,19 @@ def admin_search_books():
     naver_secret = os.environ.get('NAVER_CLIENT_SECRET', '').strip()
     if naver_id and naver_secret:
         try:
-            resp = req.get(
-                f"https://openapi.naver.com/v1/search/book.json?query={encoded_q}&display=20",
+            resp = http_client.get(
+                f"https://openapi.naver.com/v1/search/book.json?query={encoded_q}&display=20", 'naver',
                 headers={
                     **headers,
                     'X-Naver-Client-Id':     naver_id,
                     'X-Naver-Client-Secret': naver_secret,
                 },
-                timeout=8
             )
             resp.raise_for_status()
             items = parse_naver(resp.json())
             if items:
                 print(f"네이버 검색 성공: {len(items)}건")
-                return jsonify({'items': items, 'source': 'naver'})
+                return {'items': items, 'source': 'naver'}
         except Exception as e:
             print(f"네이버 검색 실패: {e}")
 
@@ -1200,40 +1345,38 @@ def admin_search_books():
         key_param  = f'&key={google_key}' if google_key else ''
         lang_param = '&langRestrict=ko' if korean else ''
         url = f"https://www.googleapis.com/books/v1/volumes?q={encoded_q}&maxResults=20&printType=books{lang_param}{key_param}"
-        resp = req.get(url, headers=headers, timeout=10)
+        resp = http_client.get(url, 'googlebooks', headers=headers)
         if resp.status_code == 429:
             raise Exception('Rate limited')
         resp.raise_for_status()
         items = parse_google(resp.json())
         if items:
             print(f"Google Books 검색 성공: {len(items)}건")
-            return jsonify({'items': items, 'source': 'google'})
+            return {'items': items, 'source': 'google'}
     except Exception as e:
         print(f"Google Books 실패: {e}")
 
     # 4순위: Open Library
     try:
         ol_url = f"https://openlibrary.org/search.json?q={encoded_q}&limit=20"
-        ol_resp = req.get(ol_url, headers=headers, timeout=10)
+        ol_resp = http_client.get(ol_url, 'openlibrary', headers=headers)
         ol_resp.raise_for_status()
         items = parse_openlibrary(ol_resp.json())
         if items:
             print(f"Open Library 검색 성공: {len(items)}건")
-            return jsonify({'items': items, 'source': 'openlibrary'})
+            return {'items': items, 'source': 'openlibrary'}
     except Exception as e2:
         print(f"Open Library 실패: {e2}")
 
     # 모두 실패 — 한국어이고 API Key 없으면 안내
     no_key = korean and not kakao_key and not naver_id
-    return jsonify({'items': [], 'message': 'no_key' if no_key else 'no_results'})
+    return {'items': [], 'message': 'no_key' if no_key else 'no_results'}
 
 
 @main.route('/admin/add-from-search', methods=['POST'])
 @admin_required
 def admin_add_from_search():
-    """검색 결과로 도서 등록 — 표지를 URL에서 다운로드해 Base64로 저장"""
-    import requests as req
-
+    """검색 결과로 도서 등록 — 표지를 URL에서 다운로드해 표지 저장소에 저장"""
     try:
         title       = request.form.get('title', '').strip()
         author      = request.form.get('author', '').strip()
@@ -1251,18 +1394,18 @@ def admin_add_from_search():
             flash('도서 제목이 없습니다.', 'error')
             return redirect(url_for('main.admin_search'))
 
-        # 표지 이미지 다운로드 → Base64 (저해상도 썸네일은 고해상도 원본으로 업그레이드 후 저장)
+        # 표지 이미지 다운로드 → 표지 저장소 (저해상도 썸네일은 고해상도 원본으로 업그레이드 후 저장)
         # SSRF 방지: 실제로 요청을 보낼 최종 URL(업그레이드 이후)을 검증한다.
         # upgrade_cover_url 이전 URL만 검증하면 kakaocdn 형태의 URL에 fname= 파라미터로
         # 내부망 주소를 숨겨 보내는 우회가 가능하므로, 반드시 변환 *이후* 값을 검사해야 한다.
-        img_base64 = None
+        cover_bytes = None
         resolved_cover_url = upgrade_cover_url(cover_url) if cover_url else ''
         if resolved_cover_url and not is_allowed_cover_image_url(resolved_cover_url):
             print(f"표지 이미지 다운로드 차단 (허용되지 않은 호스트): {resolved_cover_url}")
             resolved_cover_url = ''
         if resolved_cover_url:
             try:
-                img_resp = req.get(resolved_cover_url, timeout=8)
+                img_resp = http_client.get(resolved_cover_url, 'cover')
                 img_resp.raise_for_status()
                 img = Image.open(io.BytesIO(img_resp.content))
                 if img.mode in ('RGBA', 'P'):
@@ -1270,7 +1413,7 @@ def admin_add_from_search():
                 img.thumbnail((1000, 1000), Image.Resampling.LANCZOS)
                 buf = io.BytesIO()
                 img.save(buf, format='JPEG', quality=90, optimize=True)
-                img_base64 = base64.b64encode(buf.getvalue()).decode('utf-8')
+                cover_bytes = buf.getvalue()
             except Exception as e:
                 print(f"Cover download failed: {e}")
 
@@ -1283,9 +1426,9 @@ def admin_add_from_search():
             price          = price,
             stock_quantity = stock,
             description    = description,
-            image_file     = 'stored_in_db' if img_base64 else None,
-            image_data     = img_base64,
         )
+        if cover_bytes:
+            save_cover(new_book, cover_bytes)
         db.session.add(new_book)
         db.session.commit()
 
@@ -0,0 +1,168 @@
+"""
+스토어프론트 `q` 검색용 전문 검색(Full-Text Search) 인덱스.
+
+다섯 개 컬럼에 `ilike '%q%'`를 OR로 거는 방식은 어떤 인덱스도 탈 수 없어 매 검색이
+description 텍스트까지 포함한 전체 테이블 스캔이 된다. DB별 전문 검색 엔진을 쓰되
+호출부(app/catalog.py)에는 하나의 API만 노출한다.
+
+- SQLite: FTS5 가상 테이블 `book_fts` (external content = book 테이블).
+  book 테이블의 INSERT/DELETE/검색 대상 컬럼 UPDATE 트리거가 인덱스를 행 단위로 즉시 갱신한다.
+  관련도는 bm25() (제목 > 저자 > 나머지 순 가중치).
+- PostgreSQL: book.search_vector 생성 컬럼(tsvector, GENERATED ALWAYS ... STORED) + GIN 인덱스.
+  행이 저장될 때 DB가 벡터를 다시 계산하므로 별도 동기화 코드가 필요 없다.
+  관련도는 ts_rank() (setweight로 제목 A, 저자 B, 설명 C).
+
+둘 다 쓸 수 없는 환경(FTS5 미포함 SQLite 빌드 등)에서는 available()이 False가 되고
+호출부가 기존 ilike 검색으로 되돌아간다.
+
+공백 단위 토크나이저가 놓치는 한국어 복합어 안쪽 일치("파수꾼" → "호밀밭의파수꾼")와 초성 검색
+("ㅎㅁㅂ")은 제목/저자 인메모리 인덱스(app/hangul_index.py) 결과를 합쳐서 보완한다.
+전문 검색 일치보다 뒤에 오도록 rank를 양수로 준다.
+
+관리자 화면의 도서 추가/수정/삭제는 모두 book 행 변경이라 위 트리거/생성 컬럼이 그대로
+인덱스를 갱신한다. 전체 재구축은 `flask catalog rebuild-search`.
+"""
+import re
+
+from flask import current_app
+from sqlalchemy import Float, Integer, case, cast, func, select, text, union_all
+
+from app import hangul_index
+from app.models import Book
+
+FTS_TABLE = 'book_fts'
+
+# bm25 컬럼 가중치: title, author, description, condition, year
+_BM25_WEIGHTS = '10.0, 5.0, 1.0, 1.0, 1.0'
+
+_SQLITE_SETUP = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, author, description, condition, year,
+        content='book', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON book BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, author, description, condition, year)
+        VALUES (new.id, new.title, new.author, new.description, new.condition, new.year);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON book BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, author, description, condition, year)
+        VALUES ('delete', old.id, old.title, old.author, old.description, old.condition, old.year);
+    END""",
+    # 재고 차감 같은 잦은 UPDATE에는 반응하지 않도록 검색 대상 컬럼이 바뀔 때만 재색인
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF title, author, description, condition, year ON book BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, author, description, condition, year)
+        VALUES ('delete', old.id, old.title, old.author, old.description, old.condition, old.year);
+        INSERT INTO {FTS_TABLE}(rowid, title, author, description, condition, year)
+        VALUES (new.id, new.title, new.author, new.description, new.condition, new.year);
+    END""",
+]
+
+_POSTGRES_SETUP = [
+    """ALTER TABLE book ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(author, '')), 'B') ||
+        setweight(to_tsvector('simple', coalesce(description, '')), 'C') ||
+        setweight(to_tsvector('simple', coalesce(condition, '') || ' ' || year::text), 'D')
+    ) STORED""",
+    "CREATE INDEX IF NOT EXISTS ix_book_search_vector ON book USING GIN (search_vector)",
+]
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+HANGUL_MATCH_LIMIT = 200  # 검색 1회에 합치는 제목/저자 인덱스 결과 상한
+
+
+def ensure_search_index(engine):
+    """전문 검색 인덱스(및 동기화 트리거)를 준비한다. 반환: 사용 가능한 엔진 이름 또는 None.
+    SQLite에서 FTS 테이블을 새로 만든 경우에는 기존 행을 한 번에 색인한다."""
+    dialect = engine.dialect.name
+    try:
+        with engine.begin() as conn:
+            if dialect == 'sqlite':
+                existed = conn.execute(
+                    text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                    {'name': FTS_TABLE},
+                ).first() is not None
+                for stmt in _SQLITE_SETUP:
+                    conn.execute(text(stmt))
+                if not existed:
+                    conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+                return 'sqlite_fts5'
+            if dialect == 'postgresql':
+                for stmt in _POSTGRES_SETUP:
+                    conn.execute(text(stmt))
+                return 'postgres_tsvector'
+    except Exception as e:
+        print(f"전문 검색 인덱스 준비 실패 — ilike 검색으로 동작합니다: {e}")
+    return None
+
+
+def available():
+    return bool(current_app.config.get('FULLTEXT_SEARCH'))
+
+
+def query_tokens(q):
+    """사용자 입력에서 검색 단어만 뽑는다 (FTS 문법 문자/연산자 주입 방지)."""
+    return _TOKEN_RE.findall(q or '')
+
+
+def rank_subquery(q):
+    """검색어와 일치하는 도서의 (book_id, rank) 서브쿼리. rank는 작을수록 관련도가 높다.
+    검색 가능한 단어가 하나도 없으면 None."""
+    tokens = query_tokens(q)
+    if not tokens:
+        return None
+
+    parts = []
+    fulltext = _fulltext_subquery(tokens)
+    if fulltext is not None:
+        parts.append(select(fulltext.c.book_id, fulltext.c.rank))
+
+    hangul_ids = hangul_index.search(q, limit=HANGUL_MATCH_LIMIT)
+    if hangul_ids:
+        # 인덱스가 매긴 순서를 rank로 옮긴다 (VALUES 목록은 SQLite가 컬럼 별칭을 지원하지 않아 CASE 사용)
+        ranks = {book_id: (pos + 1) * 1e-6 for pos, book_id in enumerate(hangul_ids)}
+        parts.append(
+            select(Book.id.label('book_id'), cast(case(ranks, value=Book.id), Float).label('rank'))
+            .where(Book.id.in_(hangul_ids))
+        )
+
+    if not parts:
+        return None
+    combined = (union_all(*parts) if len(parts) > 1 else parts[0]).subquery('matches')
+    return (select(combined.c.book_id, func.min(combined.c.rank).label('rank'))
+            .group_by(combined.c.book_id).subquery('fts'))
+
+
+def _fulltext_subquery(tokens):
+    """DB 전문 검색 엔진의 (book_id, rank) 서브쿼리. 엔진이 없으면 None."""
+    engine_name = current_app.config.get('FULLTEXT_SEARCH')
+    if engine_name == 'sqlite_fts5':
+        # 각 단어를 따옴표로 감싼 접두어 검색("호밀밭"* → 호밀밭의), 단어 간 AND
+        match = ' '.join('"{}"*'.format(t.replace('"', '""')) for t in tokens)
+        # LIMIT -1: 바깥 GROUP BY 쿼리로 평탄화(flatten)되면 bm25()를 쓸 수 없어 서브쿼리를 고정한다
+        stmt = text(
+            f"SELECT rowid AS book_id, bm25({FTS_TABLE}, {_BM25_WEIGHTS}) AS rank "
+            f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :fts_q LIMIT -1"
+        ).bindparams(fts_q=match)
+    elif engine_name == 'postgres_tsvector':
+        tsquery = ' & '.join(f"'{t}':*" for t in tokens)
+        stmt = text(
+            "SELECT id AS book_id, -ts_rank(search_vector, to_tsquery('simple', :fts_q)) AS rank "
+            "FROM book WHERE search_vector @@ to_tsquery('simple', :fts_q)"
+        ).bindparams(fts_q=tsquery)
+    else:
+        return None
+    return stmt.columns(book_id=Integer, rank=Float).subquery('fulltext')
+
+
+def rebuild(engine):
+    """전문 검색 인덱스를 처음부터 다시 만든다 (데이터 일괄 이관 후 등)."""
+    engine_name = ensure_search_index(engine)
+    with engine.begin() as conn:
+        if engine_name == 'sqlite_fts5':
+            conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+            conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')"))
+        elif engine_name == 'postgres_tsvector':
+            conn.execute(text("REINDEX INDEX ix_book_search_vector"))
+    return engine_name
@@ -0,0 +1,218 @@
+"""
+비슷한 도서 상위 K권 사전 계산.
+
+상세 페이지의 "이런 책은 어떠세요" 목록은 `author == X OR year BETWEEN` 조건에 정렬 없이
+limit(4)를 걸어, 결과가 임의적이고 매번 book 테이블 전체를 훑었다. 도서 쌍마다 아래 항목에
+가중치를 곱해 점수를 매기고, 도서별 상위 TOP_K권을 book_similarity 테이블에 순위대로 저장해
+둔다. 상세 페이지는 (book_id, rank) 기본키로 몇 행만 읽는다.
+
+- 같은 저자 (정규화한 이름이 같으면 1)
+- 시대 거리: 출간 연도 차이가 ERA_SPAN년 이내면 1 → 0으로 선형 감소
+- 장르: 두 도서 장르 비트의 Jaccard 유사도 ('기타'는 제외)
+- 가격대: PRICE_BANDS 기준 같은 구간 1, 인접 구간 0.5
+
+점수가 MIN_SCORE 미만인 쌍(예: 가격대만 같음)은 목록에 넣지 않는다.
+
+도서가 추가·수정(저자/연도/장르/가격)·삭제되어 flush되면 after_flush 리스너가 같은 트랜잭션
+안에서 갱신한다. 바뀐 도서는 목록을 새로 계산하고, 다른 도서의 목록에는 바뀐 도서만 빼고
+다시 끼워 넣는다. 꽉 찬 목록에서 항목이 빠졌을 때만 그 도서 목록을 전부 다시 계산한다.
+후보는 같은 저자·시대·겹치는 장르 비트 조건으로 DB에서 골라 그 도서의 특징만 읽는다.
+전체 재계산은 `flask catalog rebuild-similarity`.
+"""
+from sqlalchemy import delete, event, func, or_, select
+
+from app import db
+from app.genres import GENRE_BITS
+from app.models import Book, BookSimilarity
+
+TOP_K = 8
+WEIGHTS = {'author': 3.0, 'era': 1.5, 'genre': 2.0, 'price': 0.5}
+ERA_SPAN = 30
+PRICE_BANDS = (30000, 100000, 300000)  # 원 — 이 경계로 가격대를 나눈다
+MIN_SCORE = 0.75
+SCORED_COLUMNS = ('author', 'year', 'genre', 'genre_mask', 'price')
+BULK_REFRESH = 50  # 한 flush에서 이보다 많이 바뀌면 후보를 도서마다 조회하지 않고 전체 특징을 한 번 읽는다
+
+_IGNORED_GENRE_BITS = GENRE_BITS['기타']
+_table = BookSimilarity.__table__
+_book = Book.__table__
+
+
+def _features(row):
+    band = sum(row.price >= edge for edge in PRICE_BANDS)
+    author = ' '.join((row.author or '').lower().split())
+    return row.id, author, row.year or 0, (row.genre_mask or 0) & ~_IGNORED_GENRE_BITS, band
+
+
+def score(a, b):
+    """_features() 두 개의 유사도 점수"""
+    _, author_a, year_a, mask_a, band_a = a
+    _, author_b, year_b, mask_b, band_b = b
+    total = 0.0
+    if author_a and author_a == author_b:
+        total += WEIGHTS['author']
+    if year_a and year_b:
+        total += WEIGHTS['era'] * max(0.0, 1 - abs(year_a - year_b) / ERA_SPAN)
+    if mask_a and mask_b:
+        total += WEIGHTS['genre'] * bin(mask_a & mask_b).count('1') / bin(mask_a | mask_b).count('1')
+    gap = abs(band_a - band_b)
+    if gap <= 1:
+        total += WEIGHTS['price'] * (1.0 if gap == 0 else 0.5)
+    return total
+
+
+def _rank(entries):
+    """[(점수, similar_id)] → 점수 내림차순(동점은 id 오름차순) 상위 TOP_K"""
+    return sorted(entries, key=lambda e: (-e[0], e[1]))[:TOP_K]
+
+
+def _top_k(target, features):
+    entries = []
+    for other in features.values():
+        if other[0] == target[0]:
+            continue
+        s = score(target, other)
+        if s >= MIN_SCORE:
+            entries.append((s, other[0]))
+    return _rank(entries)
+
+
+def _load_features(connection, ids=None):
+    query = select(_book.c.id, _book.c.author, _book.c.year, _book.c.genre_mask, _book.c.price)
+    if ids is not None:
+        query = query.where(_book.c.id.in_(list(ids)))
+    return {row.id: _features(row) for row in connection.execute(query)}
+
+
+def _candidates(connection, target):
+    """target과 MIN_SCORE 이상이 나올 수 있는 도서만 읽는다 — 같은 저자, ERA_SPAN년 이내, 겹치는 장르 비트.
+    셋 다 아니면 가격대 점수(최대 WEIGHTS['price'])뿐이라 MIN_SCORE에 못 미친다."""
+    _, author, year, mask, _ = target
+    conditions = []
+    if author:
+        conditions.append(func.lower(_book.c.author) == author)
+    if year:
+        conditions.append(_book.c.year.between(year - ERA_SPAN, year + ERA_SPAN))
+    if mask:
+        conditions.append(_book.c.genre_mask.op('&')(mask) != 0)
+    if not conditions:
+        return {}
+    query = (select(_book.c.id, _book.c.author, _book.c.year, _book.c.genre_mask, _book.c.price)
+             .where(or_(*conditions), _book.c.id != target[0]))
+    return {row.id: _features(row) for row in connection.execute(query)}
+
+
+def _write(connection, lists):
+    """{book_id: [(점수, similar_id), ...]} 목록을 통째로 교체한다."""
+    if not lists:
+        return
+    connection.execute(delete(_table).where(_table.c.book_id.in_(list(lists))))
+    params = [{'book_id': book_id, 'rank': rank, 'similar_id': similar_id, 'score': s}
+              for book_id, entries in lists.items() for rank, (s, similar_id) in enumerate(entries)]
+    if params:
+        connection.execute(_table.insert(), params)
+
+
+def refresh(connection, changed_ids=(), deleted_ids=(), affected_ids=()):
+    """바뀐(추가·수정) 도서와 삭제된 도서를 반영해 관련 목록만 다시 쓴다.
+    affected_ids: 삭제된 도서를 목록에 갖고 있던 도서 (FK CASCADE로 행이 이미 빠졌을 수 있어 전부 다시 계산)
+
+    카탈로그 전체가 아니라 바뀐 도서의 후보(_candidates)와 바뀐·삭제된 도서를 목록에 가진 도서만 읽는다.
+    한 번에 BULK_REFRESH권 넘게 바뀌면(일괄 입고) 후보 조회를 도서마다 보내는 대신 전체 특징을 한 번 읽는다."""
+    changed_ids, deleted_ids = set(changed_ids) - set(deleted_ids), set(deleted_ids)
+    if not changed_ids and not deleted_ids:
+        return
+    touched = changed_ids | deleted_ids
+    bulk = len(changed_ids) + len(set(affected_ids)) > BULK_REFRESH
+    everything = _load_features(connection) if bulk else None
+
+    def candidates(target):
+        return everything if bulk else _candidates(connection, target)
+
+    features = everything if bulk else _load_features(connection, changed_ids)
+    changed_ids &= set(features)
+    if deleted_ids:
+        connection.execute(delete(_table).where(_table.c.book_id.in_(deleted_ids)))
+
+    # 바뀐 도서와 점수가 날 수 있는 도서, 바뀐·삭제된 도서를 목록에 갖고 있던 도서만 다시 본다
+    others = {}
+    lists = {}
+    for book_id in changed_ids:
+        pool = candidates(features[book_id])
+        lists[book_id] = _top_k(features[book_id], pool)
+        if not bulk:
+            others.update(pool)
+    holders = set(connection.execute(select(_table.c.book_id).where(_table.c.similar_id.in_(touched))).scalars())
+    holders |= set(affected_ids)
+    if bulk:
+        others = everything
+    else:
+        missing = holders - set(others) - touched
+        if missing:
+            others.update(_load_features(connection, missing))
+    affected_ids = (set(affected_ids) & set(others)) - changed_ids
+    for book_id in affected_ids:
+        lists[book_id] = _top_k(others[book_id], candidates(others[book_id]))
+
+    review = [book_id for book_id in others if book_id not in lists and book_id not in touched]
+    current = {}
+    if review:
+        for book_id, rank, similar_id, s in connection.execute(
+                select(_table.c.book_id, _table.c.rank, _table.c.similar_id, _table.c.score)
+                .where(_table.c.book_id.in_(review)).order_by(_table.c.book_id, _table.c.rank)):
+            current.setdefault(book_id, []).append((s, similar_id))
+
+    for book_id in review:
+        target = others[book_id]
+        old = current.get(book_id, [])
+        kept = [e for e in old if e[1] not in touched]
+        if len(kept) < len(old) and len(old) >= TOP_K:
+            # 꽉 찬 목록에서 빠진 자리에 들어갈 다음 후보를 모른다 — 이 도서만 전부 다시 계산
+            lists[book_id] = _top_k(target, candidates(target))
+            continue
+        for other_id in changed_ids:
+            s = score(target, features[other_id])
+            if s >= MIN_SCORE:
+                kept.append((s, other_id))
+        new = _rank(kept)
+        if new != old:
+            lists[book_id] = new
+    _write(connection, lists)
+
+
+def rebuild(connection=None):
+    """모든 도서의 목록을 처음부터 다시 계산한다. 반환: 목록을 만든 도서 수"""
+    connection = connection or db.session.connection()
+    features = _load_features(connection)
+    connection.execute(delete(_table))
+    _write(connection, {book_id: _top_k(target, features) for book_id, target in features.items()})
+    return len(features)
+
+
+def similar_books(book_id, limit=4, options=()):
+    """상세 페이지용 — 미리 계산된 순위대로 도서 limit권"""
+    return (Book.query.options(*options)
+            .join(BookSimilarity, BookSimilarity.similar_id == Book.id)
+            .filter(BookSimilarity.book_id == book_id)
+            .order_by(BookSimilarity.rank).limit(limit).all())
+
+
+@event.listens_for(db.session, 'before_flush')
+def _collect_affected_by_deletes(session, flush_context, instances):
+    deleted = [obj.id for obj in session.deleted if isinstance(obj, Book) and obj.id is not None]
+    if deleted:
+        rows = session.connection().execute(select(_table.c.book_id).where(_table.c.similar_id.in_(deleted)))
+        session.info.setdefault('similarity_affected', set()).update(rows.scalars())
+
+
+@event.listens_for(db.session, 'after_flush')
+def _refresh_changed_books(session, flush_context):
+    changed = [obj.id for obj in session.new if isinstance(obj, Book)]
+    for obj in session.dirty:
+        if isinstance(obj, Book):
+            state = db.inspect(obj)
+            if any(state.attrs[name].history.has_changes() for name in SCORED_COLUMNS):
+                changed.append(obj.id)
+    deleted = [obj.id for obj in session.deleted if isinstance(obj, Book)]
+    if changed or deleted:
+        refresh(session.connection(), changed, deleted, session.info.pop('similarity_affected', ()))
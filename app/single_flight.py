@@ -0,0 +1,101 @@
+"""
+같은 외부 조회를 동시에 여러 번 보내지 않게 묶는다 (single-flight).
+
+인기 도서나 크롤러가 몰리면 여러 워커·스레드가 같은 저자로 같은 순간에 오픈라이브러리를
+호출했다 (캐시 미스 dogpile). 같은 키의 호출이 이미 진행 중이면 새 호출은 보내지 않고 그
+결과를 함께 받는다.
+
+- 프로세스 안: do(key, fn) — 첫 호출(리더)만 fn을 실행하고, 나머지는 리더의 Future를 기다린다.
+  리더가 예외로 끝나면 기다리던 쪽도 같은 예외를 받는다.
+- 프로세스 사이: file_lock(key) — 키별 잠금 파일(fcntl.flock)을 잡는다. 결과를 공유 저장소에
+  남기는 작업(외부 캐시 채우기)에 쓰고, 잠금을 얻은 뒤 저장소를 다시 확인하면 다른 워커가 방금
+  받아 온 값을 그대로 쓸 수 있다. fcntl이 없는 플랫폼에서는 프로세스 간 잠금 없이 진행한다.
+- 기다리는 시간은 요청 예산(app/request_budget.py)을 넘지 않는다. 예산이 다 되면
+  BudgetExhausted를 던진다 (다른 외부 호출 실패와 같은 경로로 처리된다).
+"""
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from contextlib import contextmanager
+
+from flask import current_app, has_app_context
+
+from app import request_budget
+from app.request_budget import BudgetExhausted
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+LOCK_POLL_SECONDS = 0.05
+MAX_LOCK_WAIT = 30  # 예산이 없는 호출(관리자 일괄 작업 등)이 잠금을 기다리는 최대 시간
+
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+
+def do(key, fn):
+    """key가 같은 동시 호출을 하나로 합쳐 fn()의 결과를 함께 돌려준다."""
+    with _inflight_lock:
+        future = _inflight.get(key)
+        leader = future is None
+        if leader:
+            future = _inflight[key] = Future()
+
+    if not leader:
+        try:
+            return future.result(timeout=request_budget.remaining())
+        except FutureTimeout:
+            raise BudgetExhausted(f'같은 조회를 기다리다 요청 예산 소진 ({key})')
+
+    try:
+        result = fn()
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    else:
+        future.set_result(result)
+        return result
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+
+
+def _lock_dir():
+    if has_app_context() and current_app.config.get('SINGLE_FLIGHT_LOCK_DIR'):
+        return current_app.config['SINGLE_FLIGHT_LOCK_DIR']
+    return os.path.join(tempfile.gettempdir(), 'rarebook-single-flight')
+
+
+@contextmanager
+def file_lock(key):
+    """다른 프로세스와 공유하는 키별 잠금. 잠금을 기다리다 시간이 다 되면 잠금 없이 진행한다
+    (중복 호출이 한 번 더 나가는 편이 요청을 막는 것보다 낫다). 반환값: 잠금을 얻었는지"""
+    if fcntl is None:
+        yield False
+        return
+    os.makedirs(_lock_dir(), exist_ok=True)
+    path = os.path.join(_lock_dir(), hashlib.sha1(str(key).encode('utf-8')).hexdigest() + '.lock')
+    left = request_budget.remaining()
+    give_up_at = time.monotonic() + (MAX_LOCK_WAIT if left is None else max(left, 0))
+
+    with open(path, 'a') as f:
+        while True:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                acquired = True
+                break
+            except BlockingIOError:
+                if time.monotonic() >= give_up_at:
+                    acquired = False
+                    break
+                time.sleep(LOCK_POLL_SECONDS)
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                fcntl.flock(f, fcntl.LOCK_UN)
@@ -0,0 +1,129 @@
+"""
+백그라운드 작업 처리 함수 (app/jobs.py 큐, `flask jobs worker`가 실행).
+
+- tag_genres: 장르 미태깅 도서 전체를 Gemini로 자동 분류
+- regenerate_notes: 끊긴 큐레이터 노트(Book.note_truncated)를 Gemini로 재작성
+- restock_emails: 재입고된 도서의 입고 알림 메일 발송
+- cover_batch: 표지 사진 일괄 입고 배치 처리 (app/cover_ingest.py)
+- text_similarity: 소개글이 바뀐 도서의 소개글 유사도 목록 갱신 (app/text_similarity.py, 도서 저장 시 자동)
+
+모두 도서/신청 한 건마다 커밋하고, 다시 실행하면 남은 대상만 처리한다 (재시도해도 안전). 한 권이라도
+실패하면 TaskFailed로 끝내 백오프 뒤 남은 대상을 다시 시도한다.
+Gemini 호출 간격은 auto_tag_genre/generate_curator_note 안의 공유 토큰 버킷(app/rate_limit.py)이 맞춘다.
+"""
+import json
+
+from sqlalchemy.orm import undefer
+
+from app import cover_ingest, db, jobs, text_similarity
+from app.genres import untagged
+from app.mailer import is_email_configured, send_email
+from app.models import Book, RestockRequest
+from app.utils import auto_tag_genre, generate_curator_note
+
+
+class TaskFailed(RuntimeError):
+    """외부 API/SMTP 장애로 보이는 실패 — 예외를 던져 백오프 뒤 남은 대상으로 다시 시도한다."""
+
+
+@jobs.handler('tag_genres', '장르 자동 태깅')
+def tag_genres(job, payload):
+    targets = jobs.take(Book.query.options(undefer(Book.description))
+                        .filter(untagged(Book.genre_mask)).order_by(Book.id).all())
+    tagged, failed = 0, 0
+    jobs.report(job, total=len(targets), done=0, tagged=0, failed=0)
+    for i, book in enumerate(targets):
+        genres = auto_tag_genre(book.title, book.author, book.description)
+        if genres:
+            book.genre = ','.join(genres)
+            tagged += 1
+        else:
+            failed += 1
+        jobs.report(job, done=i + 1, tagged=tagged, failed=failed)  # 책마다 커밋
+    if failed:
+        raise TaskFailed(f'{len(targets)}권 중 {failed}권 태깅 실패 (API 오류)')
+
+
+@jobs.handler('regenerate_notes', '큐레이터 노트 재작성')
+def regenerate_notes(job, payload):
+    # 끊김 여부는 description을 저장할 때 Book.note_truncated에 기록해 둔다 (looks_truncated)
+    targets = jobs.take(Book.query.options(undefer(Book.description))
+                        .filter(Book.note_truncated).order_by(Book.id).all())
+    rewritten, failed = 0, 0
+    jobs.report(job, total=len(targets), done=0, rewritten=0, failed=0)
+    # 소개글 유사도는 책마다 커밋할 때가 아니라 작업이 끝날 때 한 번만 갱신한다 (갱신마다 전체 벡터화)
+    with text_similarity.deferred():
+        for i, book in enumerate(targets):
+            note = generate_curator_note(book.title, book.author, book.description)
+            if note:
+                book.description = note
+                rewritten += 1
+            else:
+                failed += 1
+            jobs.report(job, done=i + 1, rewritten=rewritten, failed=failed)
+    if failed:
+        raise TaskFailed(f'{len(targets)}권 중 {failed}권 노트 재작성 실패 (API 오류)')
+
+
+def notify_restock(book, detail_url):
+    """해당 도서의 미발송 입고 알림 신청자에게 메일을 발송한다.
+    이메일 미설정이면 발송하지 않고 대기 건수만 반환한다.
+    반환: (발송 성공 건수, 전체 대기 건수)"""
+    pending = RestockRequest.query.filter_by(book_id=book.id, notified=False).all()
+    if not pending:
+        return 0, 0
+
+    if not is_email_configured():
+        return 0, len(pending)
+
+    sent = 0
+    subject = f"[Rare Book Store] '{book.title}' 재입고 알림"
+    for reqst in pending:
+        html = f"""
+        <div style="font-family:sans-serif;max-width:480px">
+            <h2 style="font-weight:700">기다리시던 도서가 입고되었습니다 📚</h2>
+            <p>{reqst.name or '고객'}님, 신청하신 <strong>'{book.title}'</strong>가 다시 입고되었습니다.</p>
+            <p><a href="{detail_url}" style="display:inline-block;background:#111;color:#fff;
+               padding:12px 24px;border-radius:9999px;text-decoration:none">지금 보러가기</a></p>
+            <p style="color:#888;font-size:12px">희귀 도서 특성상 재고가 한정되어 있어 조기 품절될 수 있습니다.</p>
+        </div>"""
+        if send_email(reqst.email, subject, html):
+            reqst.notified = True
+            reqst.notified_at = db.func.now()
+            sent += 1
+        db.session.commit()  # 보낸 건은 바로 기록 — 재시도 때 중복 발송하지 않는다
+    return sent, len(pending)
+
+
+@jobs.handler('restock_emails', '입고 알림 발송')
+def restock_emails(job, payload):
+    # 상세 페이지 주소는 요청 컨텍스트가 있는 enqueue 시점에 만들어 넘긴다 (워커에는 요청이 없다)
+    book = db.session.get(Book, payload['book_id'])
+    if book is None or book.stock_quantity <= 0:
+        jobs.report(job, sent=0, pending=0)
+        return
+    sent, pending = notify_restock(book, payload['detail_url'])
+    jobs.report(job, sent=sent, pending=pending)
+    if sent < pending and is_email_configured():
+        raise TaskFailed(f'{pending - sent}건 발송 실패 (SMTP 오류)')
+
+
+@jobs.handler('cover_batch', '표지 일괄 입고')
+def cover_batch(job, payload):
+    progress = cover_ingest.run(payload['batch_id'])
+    if progress is not None:
+        jobs.report(job, batch_id=payload['batch_id'], ready=progress.counts.get('ready', 0),
+                    failed=progress.counts.get('failed', 0), per_minute=progress.per_minute)
+
+
+@jobs.handler(text_similarity.REFRESH_JOB, '소개글 유사도 갱신')
+def refresh_text_similarity(job, payload):
+    # 대기 중인 같은 작업을 합쳐 전체 벡터화를 한 번만 한다 (합친 인자는 이 작업에 남겨 재시도에 대비)
+    ids = {key: set(payload.get(key, ())) for key in ('changed', 'deleted', 'affected')}
+    for other in jobs.absorb(job):
+        for key in ids:
+            ids[key].update(other.get(key, ()))
+    job.payload = json.dumps({key: sorted(values) for key, values in ids.items()}, sort_keys=True)
+    db.session.commit()
+    text_similarity.refresh(db.session.connection(), ids['changed'], ids['deleted'], ids['affected'])
+    jobs.report(job, changed=len(ids['changed']), deleted=len(ids['deleted']))
@@ -0,0 +1,269 @@
+"""
+소개글(description) 기반 비슷한 도서 — 해시 n-gram TF-IDF 코사인 상위 K권 사전 계산.
+
+app/similarity.py는 저자·시대·장르·가격대 같은 메타데이터만 본다. 큐레이터 노트(대개
+generate_curator_note가 쓴 한국어 글)에 담긴 내용 — 주제, 배경, 인물 — 은 추천에 쓰이지 않았다.
+외부 호출 없이 로컬에서 소개글을 벡터로 만들어, 도서별로 코사인 유사도 상위 TOP_K권을
+book_text_similarity 테이블에 저장한다. 상세 페이지는 (book_id, rank) 기본키로 몇 행만 읽는다.
+
+- 토크나이저: NFKC + 소문자화 뒤 한글 덩어리는 음절 바이그램("호밀밭의" → 호밀, 밀밭, 밭의),
+  영문/숫자 덩어리는 단어 그대로. 조사·어미가 붙은 어절도 어간 바이그램이 겹쳐 형태소 분석기
+  없이 맞물린다.
+- 특징: n-gram을 crc32로 N_FEATURES 차원에 해시 (어휘 사전을 저장하지 않음, 프로세스 간 동일)
+- 가중치: 1 + log(tf) × 평활 IDF, 행마다 L2 정규화 → 내적이 곧 코사인 유사도
+- 계산: scipy.sparse CSR 행렬 곱을 CHUNK_ROWS 행씩 잘라 밀집 블록에서 상위 K를 고른다.
+
+갱신(refresh) 한 번은 IDF 때문에 전체 소개글을 다시 벡터화한다 (5,000권이면 수 초). 그래서 소개글이
+바뀐 도서가 flush되면(추가·수정·삭제) after_flush 리스너는 갱신하지 않고, 같은 트랜잭션에
+text_similarity 작업을 넣기만 한다 (enqueue_refresh — 처리는 app/tasks.py). 워커는 대기 중인 같은
+작업들을 합쳐 한 번에 갱신하므로, 관리자 저장 요청은 벡터화 비용을 치르지 않고 연달아 저장해도
+벡터화는 한 번이다. 작업이 돌기 전까지 상세 페이지는 옛 목록을 보여 준다 (삭제된 도서는 FK
+CASCADE로 바로 빠진다). 도서마다 커밋하는 작업(큐레이터 노트 재작성)은 deferred() 블록 안에서
+돌려 작업이 끝날 때 그 자리에서 한 번만 갱신한다.
+
+갱신은 바뀐 도서의 목록을 새로 계산하고, 바뀐 도서와 점수가 나는 도서·바뀐 도서를 목록에 가진
+도서의 목록만 읽어 바뀐 도서만 빼고 다시 끼워 넣는다 (꽉 찬 목록에서 항목이 빠졌을 때만 그 도서
+목록을 다시 계산). IDF는 갱신할 때의 전체 소개글로 다시 구하므로, 바뀌지 않은 도서 쌍의 점수는
+계산했던 시점의 IDF 그대로 남는다 — 카탈로그가 크게 바뀐 뒤에는
+`flask catalog rebuild-text-similarity`로 전부 다시 계산한다.
+"""
+import math
+import re
+import unicodedata
+import zlib
+from collections import Counter
+from contextlib import contextmanager
+
+import numpy as np
+from scipy import sparse
+from sqlalchemy import delete, event, select
+
+from app import db, jobs
+from app.models import Book, BookTextSimilarity
+
+TOP_K = 8
+MIN_SCORE = 0.1       # 코사인 유사도가 이보다 낮은 쌍은 목록에 넣지 않는다
+N_FEATURES = 2 ** 18
+CHUNK_ROWS = 256      # 유사도 밀집 블록 크기 (행 수 × 소개글 있는 도서 수)
+STOPWORDS = frozenset('the and of to in a an is was for with by on as at from this that it its'.split())
+
+REFRESH_JOB = 'text_similarity'
+_DEFERRED = 'text_similarity_deferred'
+_TOKEN = re.compile(r'[가-힣]+|[a-z0-9]+')
+_table = BookTextSimilarity.__table__
+_book = Book.__table__
+
+
+def tokenize(text):
+    """소개글 → n-gram 목록 (한글은 음절 바이그램, 영문/숫자는 단어)"""
+    grams = []
+    for token in _TOKEN.findall(unicodedata.normalize('NFKC', text or '').lower()):
+        if token[0] >= '가':
+            grams.extend(token[i:i + 2] for i in range(len(token) - 1))
+        elif len(token) > 1 and token not in STOPWORDS:
+            grams.append(token)
+    return grams
+
+
+def _feature(gram):
+    return zlib.crc32(gram.encode('utf-8')) & (N_FEATURES - 1)
+
+
+def _load_docs(connection):
+    """소개글이 있는 도서 (id 오름차순). 반환: (ids 배열, 소개글 목록)"""
+    rows = connection.execute(
+        select(_book.c.id, _book.c.description).where(_book.c.description.isnot(None)).order_by(_book.c.id))
+    docs = [(row.id, row.description) for row in rows if tokenize(row.description)]
+    return np.array([d[0] for d in docs], dtype=np.int64), [d[1] for d in docs]
+
+
+def vectorize(texts):
+    """소개글 목록 → L2 정규화된 TF-IDF CSR 행렬 (len(texts) × N_FEATURES)"""
+    indptr, indices, values = [0], [], []
+    for text in texts:
+        counts = Counter(_feature(g) for g in tokenize(text))
+        indices.extend(counts)
+        values.extend(1 + math.log(tf) for tf in counts.values())
+        indptr.append(len(indices))
+    matrix = sparse.csr_matrix((np.array(values, dtype=np.float64), np.array(indices, dtype=np.int64), indptr),
+                               shape=(len(texts), N_FEATURES))
+    matrix.sum_duplicates()  # 해시 충돌로 같은 열에 겹친 값 합치기
+
+    df = np.bincount(matrix.indices, minlength=N_FEATURES)
+    idf = np.log((1 + len(texts)) / (1 + df)) + 1
+    matrix = matrix.multiply(idf.reshape(1, -1)).tocsr()
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return sparse.diags(1 / norms) @ matrix
+
+
+def _scores(matrix, rows):
+    """rows 위치 도서들과 모든 도서의 코사인 유사도 밀집 블록을 CHUNK_ROWS 행씩 돌려준다.
+    자기 자신은 -1, 부동소수 오차로 순위가 흔들리지 않게 소수 6자리로 반올림한다."""
+    for start in range(0, len(rows), CHUNK_ROWS):
+        chunk = rows[start:start + CHUNK_ROWS]
+        block = np.round((matrix[chunk] @ matrix.T).toarray(), 6)
+        block[np.arange(len(chunk)), chunk] = -1
+        yield chunk, block
+
+
+def _top_k(row_scores, ids):
+    """유사도 한 행 → [(점수, similar_id)] 점수 내림차순(동점은 id 오름차순) 상위 TOP_K"""
+    candidates = np.flatnonzero(row_scores >= MIN_SCORE)
+    order = np.lexsort((ids[candidates], -row_scores[candidates]))[:TOP_K]
+    return [(float(row_scores[c]), int(ids[c])) for c in candidates[order]]
+
+
+def _rank(entries):
+    return sorted(entries, key=lambda e: (-e[0], e[1]))[:TOP_K]
+
+
+def _lists_for(matrix, ids, positions):
+    return {int(ids[p]): _top_k(block[i], ids)
+            for chunk, block in _scores(matrix, np.asarray(positions, dtype=np.int64))
+            for i, p in enumerate(chunk)}
+
+
+def _write(connection, lists):
+    """{book_id: [(점수, similar_id), ...]} 목록을 통째로 교체한다."""
+    if not lists:
+        return
+    book_ids = list(lists)
+    for start in range(0, len(book_ids), 500):
+        connection.execute(delete(_table).where(_table.c.book_id.in_(book_ids[start:start + 500])))
+    params = [{'book_id': book_id, 'rank': rank, 'similar_id': similar_id, 'score': s}
+              for book_id, entries in lists.items() for rank, (s, similar_id) in enumerate(entries)]
+    if params:
+        connection.execute(_table.insert(), params)
+
+
+def refresh(connection, changed_ids=(), deleted_ids=(), affected_ids=()):
+    """소개글이 바뀐(추가·수정·비움) 도서와 삭제된 도서를 반영해 관련 목록만 다시 쓴다.
+    affected_ids: 삭제된 도서를 목록에 갖고 있던 도서 (전부 다시 계산)"""
+    deleted_ids = set(deleted_ids)
+    changed_ids = set(changed_ids) - deleted_ids
+    if not changed_ids and not deleted_ids:
+        return
+    if deleted_ids:
+        connection.execute(delete(_table).where(_table.c.book_id.in_(deleted_ids)))
+
+    ids, texts = _load_docs(connection)
+    position = {int(book_id): p for p, book_id in enumerate(ids)}
+    # 소개글을 지운 도서는 목록을 비운다 (다른 목록에서는 아래에서 touched로 빠진다)
+    lists = {book_id: [] for book_id in changed_ids if book_id not in position}
+    if not len(ids):
+        _write(connection, lists)
+        return
+    matrix = vectorize(texts)
+
+    changed = [position[b] for b in sorted(changed_ids) if b in position]
+    recompute = {position[b] for b in affected_ids if b in position} | set(changed)
+    touched = changed_ids | deleted_ids
+
+    # 바뀐 도서 × 전체 유사도 (대칭이므로 열 j가 도서 j 입장에서 본 바뀐 도서들의 점수)
+    against_changed = np.vstack([block for _, block in _scores(matrix, np.array(changed, dtype=np.int64))]) \
+        if changed else np.zeros((0, len(ids)))
+    changed_book_ids = ids[changed]
+    # 다시 볼 도서: 바뀐 도서가 새로 들어갈 수 있는 도서 + 바뀐·삭제된 도서를 목록에 갖고 있던 도서.
+    # 나머지 도서의 목록은 그대로이므로 읽지 않는다.
+    review = set(np.flatnonzero((against_changed >= MIN_SCORE).any(axis=0)).tolist())
+    holders = connection.execute(select(_table.c.book_id).where(_table.c.similar_id.in_(touched))).scalars()
+    review |= {position[b] for b in holders if b in position}
+    review -= recompute
+    review_ids = [int(ids[p]) for p in review]
+
+    current = {}
+    for start in range(0, len(review_ids), 500):
+        for book_id, similar_id, s in connection.execute(
+                select(_table.c.book_id, _table.c.similar_id, _table.c.score)
+                .where(_table.c.book_id.in_(review_ids[start:start + 500])).order_by(_table.c.book_id, _table.c.rank)):
+            current.setdefault(book_id, []).append((s, similar_id))
+
+    for p in sorted(review):
+        book_id = int(ids[p])
+        old = current.get(book_id, [])
+        kept = [e for e in old if e[1] not in touched]
+        if len(kept) < len(old) and len(old) >= TOP_K:
+            recompute.add(p)  # 꽉 찬 목록에서 빠진 자리에 들어갈 다음 후보를 모른다
+            continue
+        column = against_changed[:, p]
+        kept.extend((float(s), int(other)) for s, other in zip(column, changed_book_ids) if s >= MIN_SCORE)
+        new = _rank(kept)
+        if new != old:
+            lists[book_id] = new
+    lists.update(_lists_for(matrix, ids, sorted(recompute)))
+    _write(connection, lists)
+
+
+def rebuild(connection=None):
+    """모든 도서의 목록을 처음부터 다시 계산한다. 반환: 소개글이 있어 목록을 만든 도서 수"""
+    connection = connection or db.session.connection()
+    connection.execute(delete(_table))
+    ids, texts = _load_docs(connection)
+    if len(ids):
+        _write(connection, _lists_for(vectorize(texts), ids, range(len(ids))))
+    return len(ids)
+
+
+def similar_books(book_id, limit=4, options=(), exclude=()):
+    """상세 페이지용 — 소개글이 비슷한 순서대로 도서 limit권 (exclude id는 건너뜀)"""
+    query = (Book.query.options(*options)
+             .join(BookTextSimilarity, BookTextSimilarity.similar_id == Book.id)
+             .filter(BookTextSimilarity.book_id == book_id))
+    if exclude:
+        query = query.filter(Book.id.notin_(list(exclude)))
+    return query.order_by(BookTextSimilarity.rank).limit(limit).all()
+
+
+@event.listens_for(db.session, 'before_flush')
+def _collect_affected_by_deletes(session, flush_context, instances):
+    deleted = [obj.id for obj in session.deleted if isinstance(obj, Book) and obj.id is not None]
+    if deleted:
+        rows = session.connection().execute(select(_table.c.book_id).where(_table.c.similar_id.in_(deleted)))
+        session.info.setdefault('text_similarity_affected', set()).update(rows.scalars())
+
+
+def enqueue_refresh(connection, changed_ids=(), deleted_ids=(), affected_ids=()):
+    """refresh()를 작업 큐로 미룬다 — connection의 트랜잭션에 작업 행을 넣어 함께 커밋된다."""
+    jobs.enqueue_on(connection, REFRESH_JOB, {'changed': sorted(set(changed_ids)), 'deleted': sorted(set(deleted_ids)),
+                                              'affected': sorted(set(affected_ids))})
+
+
+@contextmanager
+def deferred():
+    """블록 안에서 flush된 소개글 변경은 바로 갱신하지 않고 모았다가 블록이 끝날 때 한 번에 반영해 커밋한다.
+    그동안 상세 페이지 목록은 블록 시작 전 그대로다. 블록이 예외로 끝나면 커밋하지 않은 변경은 되돌리고
+    이미 커밋된 도서만 반영한다."""
+    session = db.session
+    if _DEFERRED in session.info:  # 바깥 블록이 반영한다
+        yield
+        return
+    changed, deleted, affected = pending = session.info[_DEFERRED] = (set(), set(), set())
+    try:
+        yield
+    except BaseException:
+        session.rollback()
+        raise
+    finally:
+        session.info.pop(_DEFERRED, None)
+        if changed or deleted:
+            refresh(session.connection(), changed, deleted, affected)
+            session.commit()
+
+
+@event.listens_for(db.session, 'after_flush')
+def _refresh_changed_books(session, flush_context):
+    changed = [obj.id for obj in session.new if isinstance(obj, Book) and obj.description]
+    for obj in session.dirty:
+        if isinstance(obj, Book) and db.inspect(obj).attrs.description.history.has_changes():
+            changed.append(obj.id)
+    deleted = [obj.id for obj in session.deleted if isinstance(obj, Book)]
+    if not changed and not deleted:
+        return
+    affected = session.info.pop('text_similarity_affected', ())
+    pending = session.info.get(_DEFERRED)
+    if pending is None:
+        enqueue_refresh(session.connection(), changed, deleted, affected)
+    else:
+        for ids, new in zip(pending, (changed, deleted, affected)):
+            ids.update(new)
@@ -1,9 +1,19 @@
 import requests
 import os
 import json
+import time
+import contextvars
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from urllib.parse import urlparse, parse_qs, unquote
 from typing import List, Dict, Optional
 
+from flask import current_app
+
+from app import circuit_breaker, external_cache, http_client, rate_limit, request_budget, single_flight
+from app.genres import GENRE_TAXONOMY  # 장르 분류 체계 (위치가 곧 장르 비트 번호라 app/genres.py 한 곳에서 관리)
+from app.http_client import USER_AGENT  # User-Agent header for API requests (best practice for Open Library)
+from app.request_budget import BudgetExhausted
+
 
 def upgrade_cover_url(url: Optional[str]) -> Optional[str]:
     """저해상도 썸네일 URL을 고해상도 원본 URL로 변환한다.
@@ -47,22 +57,23 @@ def is_allowed_cover_image_url(url: Optional[str]) -> bool:
         return False
 
 
-# User-Agent header for API requests (best practice for Open Library)
-USER_AGENT = "RareBookStore/1.0 (Flask-based rare book inventory app)"
+# 추천 제공자 엔드포인트 (benchmarks/provider_fanout.py가 로컬 스텁 서버로 바꿔 끼운다)
+OPEN_LIBRARY_SEARCH_URL = "https://openlibrary.org/search.json"
+GOOGLE_BOOKS_VOLUMES_URL = "https://www.googleapis.com/books/v1/volumes"
 
-# 도서 장르 자동 태깅용 분류 체계
-# 국내 주요 서점(알라딘) 1depth 카테고리와 아마존 Books 카테고리를 참고해 보강함.
-# - 자기계발: 알라딘 "자기계발"에 대응. 기존엔 경제/경영·에세이/철학에 억지로 끼워 넣던
-#   자기계발서(시크릿, Atomic Habits 등)를 위한 별도 카테고리.
-# - 장르소설: 알라딘 "장르소설"/아마존 "Mystery, Thriller & Suspense", "Science Fiction & Fantasy"에
-#   대응. 추리·스릴러·SF·디스토피아 풍자소설(1984, 동물농장 등) 전용.
-GENRE_TAXONOMY = [
-    "고전문학", "현대소설", "장르소설", "인문/교양", "과학/대중과학",
-    "역사", "에세이/철학", "예술/디자인", "경제/경영", "자기계발", "기타"
-]
+GEMINI_MODEL = 'gemini-flash-latest'
 
 
 def auto_tag_genre(title: str, author: str, description: Optional[str]) -> List[str]:
+    """같은 도서의 동시 태깅 요청은 Gemini 호출 한 번으로 합친다 (app/single_flight.py)."""
+    try:
+        return single_flight.do(('auto_tag_genre', title, author, description),
+                                lambda: _auto_tag_genre(title, author, description))
+    except BudgetExhausted:
+        return []
+
+
+def _auto_tag_genre(title: str, author: str, description: Optional[str]) -> List[str]:
     """
     Gemini를 사용해 책의 제목/저자/설명으로 장르를 1~2개 자동 분류한다.
     GOOGLE_API_KEY가 없거나 호출이 실패하면 빈 리스트를 반환한다 (호출부에서 '기타' 등 기본값 처리).
@@ -85,9 +96,12 @@ def auto_tag_genre(title: str, author: str, description: Optional[str]) -> List[
 예: ["고전문학"]"""
 
     try:
-        model = genai.GenerativeModel('gemini-flash-latest')
-        # 호출 1건이 너무 오래 걸려 gunicorn 워커 타임아웃(전체 배치)을 다 잡아먹지 않도록 개별 타임아웃을 둔다.
-        response = model.generate_content(prompt, request_options={'timeout': 20})
+        model = genai.GenerativeModel(GEMINI_MODEL)
+        # 호출 1건이 너무 오래 걸려 작업 워커의 임대를 넘기지 않도록 개별 타임아웃을 둔다.
+        timeout = request_budget.timeout(20)  # 예산이 모자라면 호출하지 않고 아래 except로 빠진다
+        # 분당 호출 한도는 모든 프로세스가 나눠 쓴다 (app/rate_limit.py) — 차례가 올 때까지 기다린다
+        with circuit_breaker.guard('gemini'), rate_limit.limited(GEMINI_MODEL):
+            response = model.generate_content(prompt, request_options={'timeout': timeout})
         json_text = response.text.replace('```json', '').replace('```', '').strip()
         genres = json.loads(json_text)
         if not isinstance(genres, list):
@@ -100,6 +114,15 @@ def auto_tag_genre(title: str, author: str, description: Optional[str]) -> List[
 
 
 def generate_curator_note(title: str, author: str, snippet: Optional[str] = None) -> Optional[str]:
+    """같은 도서의 동시 노트 생성 요청은 Gemini 호출 한 번으로 합친다 (app/single_flight.py)."""
+    try:
+        return single_flight.do(('generate_curator_note', title, author, snippet),
+                                lambda: _generate_curator_note(title, author, snippet))
+    except BudgetExhausted:
+        return None
+
+
+def _generate_curator_note(title: str, author: str, snippet: Optional[str] = None) -> Optional[str]:
     """
     Gemini로 완결된 한국어 큐레이터 노트를 새로 작성한다.
     '검색으로 등록' 시 가져오는 설명은 네이버/카카오 등 검색 API 자체의 미리보기 스니펫이라
@@ -127,8 +150,10 @@ def generate_curator_note(title: str, author: str, snippet: Optional[str] = None
 - 마크다운, 따옴표, 접두사 없이 노트 본문만 출력"""
 
     try:
-        model = genai.GenerativeModel('gemini-flash-latest')
-        response = model.generate_content(prompt, request_options={'timeout': 20})
+        model = genai.GenerativeModel(GEMINI_MODEL)
+        timeout = request_budget.timeout(20)  # 예산이 모자라면 호출하지 않고 아래 except로 빠진다
+        with circuit_breaker.guard('gemini'), rate_limit.limited(GEMINI_MODEL):
+            response = model.generate_content(prompt, request_options={'timeout': timeout})
         note = response.text.strip()
         return note or None
     except Exception as e:
@@ -141,17 +166,24 @@ def search_open_library(title: str, author: str) -> List[Dict[str, Optional[str]
     Returns a list of dictionaries with title, author, thumbnail, and link.
     
     Open Library is completely free and provides rich metadata.
+    The author's works are cached (app/external_cache.py); only the current title is filtered per call.
     """
     if not title or not author:
         return []
+    candidates = external_cache.cached(external_cache.cache_key('openlibrary', author),
+                                       lambda: fetch_open_library(author))
+    return _exclude_title(candidates, title)
 
+
+def fetch_open_library(author: str) -> Optional[List[Dict[str, Optional[str]]]]:
+    """Open Library에서 저자의 작품 목록(최대 10건)을 받아 온다. 네트워크 오류면 None (캐시하지 않음)."""
     try:
         # Search by author using Open Library Search API
         query = f"author:{author}"
-        url = f"https://openlibrary.org/search.json?q={query}&limit=10&lang=ko"
+        url = f"{OPEN_LIBRARY_SEARCH_URL}?q={query}&limit=10&lang=ko"
         
         headers = {'User-Agent': USER_AGENT}
-        response = requests.get(url, headers=headers, timeout=10)
+        response = http_client.get(url, 'openlibrary', headers=headers)
         response.raise_for_status()
         
         data = response.json()
@@ -161,10 +193,6 @@ def search_open_library(title: str, author: str) -> List[Dict[str, Optional[str]
         for doc in docs:
             book_title = doc.get('title', 'Unknown Title')
             
-            # Skip if it's the same book (case-insensitive check)
-            if title.lower() in book_title.lower():
-                continue
-            
             # Get authors
             book_authors = doc.get('author_name', ['Unknown'])
             
@@ -190,22 +218,19 @@ def search_open_library(title: str, author: str) -> List[Dict[str, Optional[str]
                 'thumbnail': thumbnail,
                 'link': info_link
             })
-            
-            if len(results) >= 4:
-                break
         
-        print(f"Open Library API: Found {len(results)} recommendations")
+        print(f"Open Library API: Found {len(results)} works by {author}")
         return results
         
     except requests.exceptions.Timeout:
         print("Open Library API: Request timed out")
-        return []
+        return None
     except requests.exceptions.RequestException as e:
         print(f"Open Library API: Network error - {e}")
-        return []
+        return None
     except Exception as e:
         print(f"Open Library API: Unexpected error - {e}")
-        return []
+        return None
 
 
 def search_google_books(title: str, author: str) -> List[Dict[str, Optional[str]]]:
@@ -214,16 +239,23 @@ def search_google_books(title: str, author: str) -> List[Dict[str, Optional[str]
     Returns a list of dictionaries with title, author, thumbnail, and link.
     
     This is now used as a fallback when Open Library fails.
+    The author's works are cached (app/external_cache.py); only the current title is filtered per call.
     """
     if not title or not author:
         return []
+    candidates = external_cache.cached(external_cache.cache_key('googlebooks', author),
+                                       lambda: fetch_google_books(author))
+    return _exclude_title(candidates, title)
 
+
+def fetch_google_books(author: str) -> Optional[List[Dict[str, Optional[str]]]]:
+    """Google Books에서 저자의 최신 작품 목록(최대 10건)을 받아 온다. 네트워크 오류면 None (캐시하지 않음)."""
     try:
         # Construct query: inauthor:{author}, order by newest
         query = f"inauthor:{author}"
-        url = f"https://www.googleapis.com/books/v1/volumes?q={query}&orderBy=newest&maxResults=10&langRestrict=ko"
+        url = f"{GOOGLE_BOOKS_VOLUMES_URL}?q={query}&orderBy=newest&maxResults=10&langRestrict=ko"
         
-        response = requests.get(url, timeout=10)
+        response = http_client.get(url, 'googlebooks')
         response.raise_for_status()
         
         data = response.json()
@@ -235,10 +267,6 @@ def search_google_books(title: str, author: str) -> List[Dict[str, Optional[str]
             
             # Extract relevant info
             book_title = volume_info.get('title', 'Unknown Title')
-            
-            # Skip if it's the same book (simple exact match check)
-            if title.lower() in book_title.lower():
-                continue
             book_authors = volume_info.get('authors', ['Unknown'])
             
             # Get thumbnail if available, and try to upgrade quality
@@ -263,51 +291,139 @@ def search_google_books(title: str, author: str) -> List[Dict[str, Optional[str]
                 'thumbnail': thumbnail,
                 'link': info_link
             })
-            
-            if len(results) >= 4:
-                break
         
-        print(f"Google Books API: Found {len(results)} recommendations")
+        print(f"Google Books API: Found {len(results)} works by {author}")
         return results
         
     except requests.exceptions.Timeout:
         print("Google Books API: Request timed out")
-        return []
+        return None
     except requests.exceptions.RequestException as e:
         print(f"Google Books API: Network error - {e}")
-        return []
+        return None
     except Exception as e:
         print(f"Google Books API: Unexpected error - {e}")
+        return None
+
+
+def _exclude_title(candidates: List[Dict[str, Optional[str]]], title: str, limit: int = 4) -> List[Dict[str, Optional[str]]]:
+    """저자 작품 목록에서 현재 도서(제목이 포함된 항목)를 빼고 앞에서 limit건만 남긴다."""
+    return [c for c in candidates if title.lower() not in (c.get('title') or '').lower()][:limit]
+
+
+# 외부 추천 조회 방식 (app.config로 덮어쓸 수 있음)
+# - 'hedged' (기본): 오픈라이브러리를 먼저 보내고 HEDGE_DELAY 안에 결과가 없으면 구글 북스도 동시에 보낸 뒤,
+#   DEADLINE 안에 먼저 도착한 비어 있지 않은 결과를 쓴다. 늦게 끝난 쪽은 기다리지 않는다
+#   (스레드는 끝까지 돌아 결과를 캐시에 남기므로 다음 요청에 쓰인다).
+# - 'sequential': 예전 방식. 오픈라이브러리가 실패/빈 결과일 때만 구글 북스를 호출한다.
+WEB_RECOMMENDATIONS_MODE = 'hedged'
+WEB_RECOMMENDATIONS_HEDGE_DELAY = 0.5   # 초, 0이면 처음부터 두 곳에 동시에 보낸다
+WEB_RECOMMENDATIONS_DEADLINE = 5.0      # 초
+
+_provider_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix='book-provider')
+
+
+def search_books_with_fallback(title: str, author: str, mode: Optional[str] = None,
+                               hedge_delay: Optional[float] = None,
+                               deadline: Optional[float] = None) -> List[Dict[str, Optional[str]]]:
+    """
+    Search for book recommendations with automatic fallback (see _search_books_with_fallback).
+    Identical concurrent lookups (same author and title) share one in-flight call.
+    """
+    key = ('recommendations', external_cache.normalize_author(author), (title or '').lower())
+    try:
+        return single_flight.do(key, lambda: _search_books_with_fallback(title, author, mode, hedge_delay, deadline))
+    except BudgetExhausted:
         return []
 
 
-def search_books_with_fallback(title: str, author: str) -> List[Dict[str, Optional[str]]]:
+def _search_books_with_fallback(title: str, author: str, mode: Optional[str] = None,
+                                hedge_delay: Optional[float] = None,
+                                deadline: Optional[float] = None) -> List[Dict[str, Optional[str]]]:
     """
     Search for book recommendations with automatic fallback.
     
     Strategy:
     1. Try Open Library API first (completely free, rich metadata)
-    2. If Open Library fails or returns no results, try Google Books API
-    3. If both fail, return empty list
+    2. If Open Library fails, returns no results, or is still pending after the hedge delay,
+       try Google Books API (concurrently in 'hedged' mode)
+    3. If both fail or the deadline passes, return empty list
     
     Args:
         title: Title of the current book
         author: Author of the current book
+        mode / hedge_delay / deadline: override WEB_RECOMMENDATIONS_* config
         
     Returns:
         List of recommended books with metadata
     """
     print(f"Searching recommendations for '{title}' by {author}")
-    
-    # Try Open Library first
-    results = search_open_library(title, author)
-    
-    # Fallback to Google Books if needed
-    if not results:
-        print("Open Library returned no results, trying Google Books...")
-        results = search_google_books(title, author)
+    config = current_app.config
+    mode = mode or config.get('WEB_RECOMMENDATIONS_MODE', WEB_RECOMMENDATIONS_MODE)
+
+    if mode == 'sequential':
+        # Try Open Library first
+        results = search_open_library(title, author)
+
+        # Fallback to Google Books if needed
+        if not results:
+            print("Open Library returned no results, trying Google Books...")
+            results = search_google_books(title, author)
+    else:
+        results = _search_hedged(
+            title, author,
+            config.get('WEB_RECOMMENDATIONS_HEDGE_DELAY', WEB_RECOMMENDATIONS_HEDGE_DELAY) if hedge_delay is None else hedge_delay,
+            config.get('WEB_RECOMMENDATIONS_DEADLINE', WEB_RECOMMENDATIONS_DEADLINE) if deadline is None else deadline,
+        )
     
     if not results:
         print("No recommendations found from any API")
     
     return results
+
+
+def _search_hedged(title: str, author: str, hedge_delay: float, deadline: float) -> List[Dict[str, Optional[str]]]:
+    """오픈라이브러리 → (hedge_delay 후) 구글 북스를 스레드 풀에서 보내고, deadline 안에 먼저 도착한
+    비어 있지 않은 결과를 돌려준다. 둘이 함께 끝났으면 오픈라이브러리 쪽을 우선한다."""
+    app = current_app._get_current_object()
+
+    def run(provider):
+        with app.app_context():  # 캐시(DB 세션)를 스레드별 앱 컨텍스트에서 쓴다
+            return provider(title, author)
+
+    left = request_budget.remaining()
+    if left is not None:
+        deadline = min(deadline, left)  # 요청 예산이 더 빡빡하면 그쪽을 따른다
+    deadline_at = time.monotonic() + deadline
+    providers = [search_open_library, search_google_books]
+    # 풀 스레드도 같은 요청 예산(contextvar)을 보도록 호출마다 컨텍스트를 복사해 넘긴다
+    futures = [_provider_pool.submit(contextvars.copy_context().run, run, providers[0])]
+    pending = set(futures)
+
+    while pending:
+        hedge_at = deadline_at if len(futures) == len(providers) else min(deadline_at, time.monotonic() + hedge_delay)
+        done, _ = wait(pending, timeout=max(0.0, hedge_at - time.monotonic()), return_when=FIRST_COMPLETED)
+        for future in futures:  # 제공자 우선순위대로 확인
+            if future not in done:
+                continue
+            pending.discard(future)
+            try:
+                results = future.result()
+            except Exception as e:
+                print(f"Recommendation provider failed: {e}")
+                results = []
+            if results:
+                for other in pending:
+                    other.cancel()  # 아직 시작 전이면 취소, 이미 돌고 있으면 결과를 기다리지 않는다
+                return results
+        if time.monotonic() >= deadline_at:
+            print(f"Recommendation deadline ({deadline}s) exceeded")
+            break
+        if len(futures) < len(providers) and (not pending or time.monotonic() >= hedge_at):
+            future = _provider_pool.submit(contextvars.copy_context().run, run, providers[len(futures)])
+            futures.append(future)
+            pending.add(future)
+
+    for other in pending:
+        other.cancel()
+    return []
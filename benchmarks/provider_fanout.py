@@ -0,0 +1,128 @@
+"""
+외부 추천 조회 방식 벤치마크: sequential vs hedged.
+
+로컬에 오픈라이브러리/구글 북스 흉내를 내는 스텁 서버 두 개를 띄우고, 캐시에 없는 저자로
+search_books_with_fallback()을 반복 호출해 지연 분포(p50/p90/p99/max)를 비교한다.
+스텁 지연은 시드 고정 난수라 실행마다 같은 분포가 나온다.
+
+- 오픈라이브러리 스텁: 대부분 40ms, 가끔 1초, 드물게 3초 (꼬리 지연), 일부는 빈 결과
+- 구글 북스 스텁: 80ms ~ 300ms
+
+    python benchmarks/provider_fanout.py --requests 100 --hedge-delay 0.2 --deadline 2
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+_db_fd, _db_path = tempfile.mkstemp(suffix='.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{_db_path}'
+
+from app import create_app, utils  # noqa: E402
+
+
+def _open_library_latency(rng):
+    roll = rng.random()
+    if roll < 0.03:
+        return 3.0, False
+    if roll < 0.12:
+        return 1.0, True
+    return 0.04, rng.random() > 0.05
+
+
+def _google_books_latency(rng):
+    return rng.uniform(0.08, 0.3), True
+
+
+def _stub_server(latency, body):
+    rng = random.Random(42)
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            with lock:
+                delay, has_results = latency(rng)
+            time.sleep(delay)
+            payload = json.dumps(body(has_results)).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _open_library_body(has_results):
+    docs = [{'title': f'작품 {i}', 'author_name': ['스텁'], 'key': f'/works/OL{i}W'} for i in range(6)]
+    return {'docs': docs if has_results else []}
+
+
+def _google_books_body(has_results):
+    return {'items': [{'volumeInfo': {'title': f'도서 {i}', 'authors': ['스텁'], 'infoLink': '#'}} for i in range(6)]}
+
+
+def _percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+
+def run(mode, n, hedge_delay, deadline):
+    """캐시에 없는 저자로 n회 조회하고 결과 한 줄을 돌려준다."""
+    samples, empty = [], 0
+    for i in range(n):
+        started = time.perf_counter()
+        results = utils.search_books_with_fallback('없는 제목', f'{mode}-저자-{i}', mode=mode,
+                                                   hedge_delay=hedge_delay, deadline=deadline)
+        samples.append(time.perf_counter() - started)
+        empty += not results
+    ms = lambda seconds: f'{seconds * 1000:7.0f}ms'  # noqa: E731
+    return (f'{mode:>10}: p50 {ms(statistics.median(samples))}  p90 {ms(_percentile(samples, 90))}  '
+            f'p99 {ms(_percentile(samples, 99))}  max {ms(max(samples))}  빈 결과 {empty}/{n}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='외부 추천 조회 방식 벤치마크: sequential vs hedged')
+    parser.add_argument('--requests', type=int, default=100)
+    parser.add_argument('--hedge-delay', type=float, default=0.2)
+    parser.add_argument('--deadline', type=float, default=2.0)
+    args = parser.parse_args()
+
+    open_library = _stub_server(_open_library_latency, _open_library_body)
+    google_books = _stub_server(_google_books_latency, _google_books_body)
+    utils.OPEN_LIBRARY_SEARCH_URL = f'http://127.0.0.1:{open_library.server_port}/search.json'
+    utils.GOOGLE_BOOKS_VOLUMES_URL = f'http://127.0.0.1:{google_books.server_port}/volumes'
+
+    # 앱/제공자 함수의 진행 로그(print)는 숨기고 요약만 출력한다
+    with contextlib.redirect_stdout(io.StringIO()):
+        app = create_app()
+        with app.app_context():
+            lines = [run(mode, args.requests, args.hedge_delay, args.deadline) for mode in ('sequential', 'hedged')]
+            utils._provider_pool.shutdown(wait=True)  # 기다리지 않고 넘어간 느린 호출까지 정리
+
+    print(f'요청 {args.requests}회, hedge 지연 {args.hedge_delay}s, 마감 {args.deadline}s')
+    for line in lines:
+        print(line)
+
+    open_library.shutdown()
+    google_books.shutdown()
+    os.close(_db_fd)
+    os.unlink(_db_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,6 @@
+#!/bin/sh
+# 웹과 작업 워커를 컨테이너 하나에서 같이 띄운다 (Dockerfile, railway.json — 워커 서비스를 따로 두지 않는 배포).
+# 워커가 죽으면 5초 뒤 다시 띄운다. 웹(gunicorn)이 끝나면 컨테이너도 끝난다.
+set -e
+(while true; do flask --app run jobs worker || true; sleep 5; done) &
+exec gunicorn --bind 0.0.0.0:${PORT:-8080} run:app
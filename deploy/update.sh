@@ -1,5 +1,5 @@
 #!/usr/bin/env bash
-# 맥미니 서버에 최신 코드 배포: git pull → 의존성 갱신 → gunicorn 재시작
+# 맥미니 서버에 최신 코드 배포: git pull → 의존성 갱신 → gunicorn·작업 워커 재시작
 set -euo pipefail
 
 APP_DIR="$HOME/rare-book-store"
@@ -14,6 +14,9 @@ echo "==> 의존성 갱신"
 echo "==> gunicorn 재시작"
 launchctl kickstart -k "gui/$(id -u)/com.rarebook.web"
 
+echo "==> 작업 워커 재시작 (처리 중이던 작업은 임대가 끝나면 다시 실행된다)"
+launchctl kickstart -k "gui/$(id -u)/com.rarebook.worker" || echo "   com.rarebook.worker 미등록 — deploy/README.md 4단계 참고"
+
 sleep 3
 echo "==> 헬스 체크"
 curl -s -o /dev/null -w "local  http://127.0.0.1:8000/  -> HTTP %{http_code}\n" http://127.0.0.1:8000/
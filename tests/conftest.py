@@ -52,6 +52,10 @@ def _clean_db(app):
         for table in reversed(_db.metadata.sorted_tables):
             _db.session.execute(table.delete())
         _db.session.commit()
+    # 워커 프로세스 메모리에 올려 두는 인덱스/캐시도 비운다 (SQLite는 삭제 후 id를 재사용하므로 필수)
+    from app import facets, hangul_index
+    hangul_index.reset()
+    facets.clear_cache()
     yield
 
 
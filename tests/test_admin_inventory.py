@@ -0,0 +1,93 @@
+"""관리자 재고 목록 — 서버 측 페이지네이션/정렬/필터, 노트 끊김 플래그, 재고 수와 무관한 쿼리 수"""
+import re
+
+import pytest
+from sqlalchemy import event
+
+from conftest import login_admin, make_book
+from app import inventory
+from app.models import Book
+
+
+def _ids(body):
+    return [int(i) for i in re.findall(r'data-book-id="(\d+)"', body)]
+
+
+@pytest.fixture()
+def small_pages(monkeypatch):
+    monkeypatch.setattr(inventory, 'PAGE_SIZE', 3)
+
+
+def test_pages_cover_every_book_once_in_sort_order(client, db, small_pages):
+    prices = [30000, 10000, 50000, 10000, 20000, 40000, 10000]
+    books = [make_book(db, title=f'도서{i}', price=p) for i, p in enumerate(prices)]
+    login_admin(client)
+
+    seen = []
+    for page in (1, 2, 3):
+        body = client.get(f'/admin?sort=price&dir=asc&page={page}').data.decode()
+        seen += _ids(body)
+    expected = [b.id for b in sorted(books, key=lambda b: (b.price, b.id))]
+    assert seen == expected
+    assert '총 7권 · 3/3 페이지' in body
+
+    # 끝을 넘는 페이지 번호는 마지막 페이지로
+    assert _ids(client.get('/admin?sort=price&dir=asc&page=99').data.decode()) == expected[6:]
+    # 기본 정렬: 최신 등록순
+    assert _ids(client.get('/admin').data.decode()) == [b.id for b in books[::-1][:3]]
+
+
+def test_filters_stock_genre_condition_and_truncated_note(client, db):
+    sold_out = make_book(db, title='품절', stock_quantity=0, genre='역사', description='완결된 노트입니다.')
+    untagged = make_book(db, title='미태깅', stock_quantity=1, condition='Fine', description='끊긴 노트인데')
+    tagged = make_book(db, title='태깅', stock_quantity=5, genre='현대소설,역사', description='완결.')
+    login_admin(client)
+
+    def ids(query):
+        return sorted(_ids(client.get(f'/admin?{query}').data.decode()))
+
+    assert ids('stock=sold_out') == [sold_out.id]
+    assert ids('stock=low') == [untagged.id]
+    assert ids('genre=역사') == sorted([sold_out.id, tagged.id])
+    assert ids('genre=untagged') == [untagged.id]
+    assert ids('condition=Fine') == [untagged.id]
+    assert ids('note=truncated') == [untagged.id]
+    assert ids('stock=in_stock&genre=역사') == [tagged.id]
+    assert ids('stock=bogus&sort=nope&page=x') == sorted([sold_out.id, untagged.id, tagged.id])
+
+
+def test_note_truncated_follows_description_edits(db):
+    book = make_book(db)
+    assert book.note_truncated  # 노트 없음 → 재작성 대상
+    book.description = '완결된 큐레이터 노트입니다.'
+    db.session.commit()
+    assert Book.query.filter(Book.note_truncated.is_(False)).count() == 1
+    book.description = '검색 미리보기 스니펫이 중간에서'
+    db.session.commit()
+    assert Book.query.filter(Book.note_truncated.is_(True)).count() == 1
+
+
+def test_query_count_does_not_grow_with_inventory(client, db, small_pages):
+    login_admin(client)
+    statements = []
+
+    def _capture(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    def page_queries():
+        statements.clear()
+        assert client.get('/admin?sort=title').status_code == 200
+        return [s for s in statements if 'FROM book' in s]
+
+    for i in range(4):
+        make_book(db, title=f'도서{i}')
+    event.listen(db.engine, 'before_cursor_execute', _capture)
+    try:
+        small = page_queries()
+        for i in range(20):
+            make_book(db, title=f'추가{i}')
+        large = page_queries()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', _capture)
+    assert len(small) == len(large) == 2  # COUNT 한 번 + 페이지 조회 한 번
+    assert any('LIMIT' in s for s in large)
@@ -8,6 +8,16 @@ def test_admin_routes_blocked_when_anonymous(client):
         ('/admin/add', 'get'),
         ('/admin/orders', 'get'),
         ('/admin/restock-requests', 'get'),
+        ('/admin/providers', 'get'),
+        ('/admin/providers/kakao/reset', 'post'),
+        ('/admin/import', 'get'),
+        ('/admin/import', 'post'),
+        ('/admin/covers', 'get'),
+        ('/admin/covers', 'post'),
+        ('/admin/covers/1', 'get'),
+        ('/admin/covers/drafts/1/accept', 'post'),
+        ('/admin/jobs', 'get'),
+        ('/admin/jobs/1/retry', 'post'),
     ]:
         resp = getattr(client, method)(path)
         assert resp.status_code == 302
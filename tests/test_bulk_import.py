@@ -0,0 +1,136 @@
+"""CSV/XLSX 일괄 입고 — 행 검증/오류 보고, ISBN·자연키 upsert, 배치 경계, 파생 컬럼, XLSX"""
+import io
+import time
+
+import pytest
+
+from conftest import login_admin, make_book
+from app import bulk_import, hangul_index
+from app.models import Book
+
+HEADER = 'isbn,title,author,year,edition,condition,price,stock,genre,description\n'
+
+
+def _upload(client, text, filename='books.csv'):
+    login_admin(client)
+    return client.post('/admin/import', data={'file': (io.BytesIO(text.encode('utf-8')), filename)},
+                       content_type='multipart/form-data')
+
+
+def test_normalize_isbn():
+    assert bulk_import.normalize_isbn('89-374-6044-0') == bulk_import.normalize_isbn('978-89-374-6044-9') == '9788937460449'
+    assert bulk_import.normalize_isbn('080442957X') == '9780804429573'
+    with pytest.raises(ValueError):
+        bulk_import.normalize_isbn('9788937460440')
+
+
+def test_csv_upload_inserts_updates_and_reports_row_errors(client, db):
+    existing = make_book(db, title='토지', author='박경리', year=1973, edition='초판', price=50000, stock_quantity=1)
+    by_isbn = make_book(db, title='옛 제목', author='한강', year=2014, price=10000)
+    by_isbn.isbn = '9788936434120'
+    db.session.commit()
+
+    resp = _upload(client, HEADER + '\n'.join([
+        ',토지,박경리,1973,초판,Fine,"65,000",3,,',                              # 자연키로 갱신
+        '978-89-364-3412-0,소년이 온다,한강,2014,,,12000,,현대소설,광주의 기억을 다룬다.',  # ISBN으로 갱신
+        '89-374-6044-0,호밀밭의 파수꾼,샐린저,1951,,Good,9000,2,"고전문학,없는장르",',   # ISBN-10 신규
+        ',제목만,,1999,,,1000,,,',                                                # 저자 누락
+        ',나쁜 연도,누군가,19x9,,,1000,,,',
+        ',나쁜 상태,누군가,1999,,Broken,1000,,,',
+        ',,,,,,,,,',                                                              # 빈 행은 건너뜀
+    ]) + '\n')
+    body = resp.data.decode()
+    assert resp.status_code == 200
+    assert '신규 1권 · 갱신 2권 · 오류 3행' in body
+    assert '필수 값 누락: author' in body and '연도가 숫자가 아닙니다' in body and 'Broken' in body
+
+    db.session.expire_all()
+    assert (existing.price, existing.stock_quantity, existing.condition) == (65000, 3, 'Fine')
+    assert by_isbn.title == '소년이 온다' and by_isbn.genre == '현대소설' and by_isbn.genre_mask
+    assert by_isbn.note_truncated is False and by_isbn.price == 12000
+    new = Book.query.filter_by(isbn='9788937460449').one()
+    assert (new.title, new.genre, new.stock_quantity, new.note_truncated) == ('호밀밭의 파수꾼', '고전문학', 2, True)
+    # 카탈로그 변경 로그를 남기므로 다른 인덱스(한글 검색)에도 반영된다
+    assert new.id in hangul_index.search('파수꾼')
+
+
+def test_batches_and_duplicate_rows_in_one_file(client, db, monkeypatch):
+    monkeypatch.setattr(bulk_import, 'BATCH_SIZE', 4)
+    rows = [f',도서{i},작가{i % 3},{1900 + i},,,{1000 + i},1,,' for i in range(10)]
+    rows += [',도서3,작가0,1903,,,9999,7,,', '9788937460449,ISBN책,작가,2000,,,100,1,,', '9788937460449,ISBN책 개정,작가,2000,,,200,2,,']
+    _upload(client, HEADER + '\n'.join(rows) + '\n')
+
+    assert Book.query.count() == 11
+    book3 = Book.query.filter_by(title='도서3').one()
+    assert (book3.price, book3.stock_quantity) == (9999, 7)  # 다음 배치의 같은 도서 → 갱신
+    isbn_book = Book.query.filter_by(isbn='9788937460449').one()
+    assert (isbn_book.title, isbn_book.price) == ('ISBN책 개정', 200)  # 같은 배치 안 중복 → 뒤 행이 이긴다
+
+
+def test_rejects_unknown_format_and_missing_header(client, db):
+    resp = _upload(client, 'a,b\n1,2\n', filename='books.txt')
+    assert resp.status_code == 302
+    resp = _upload(client, 'title,author\n가,나\n')
+    assert resp.status_code == 302
+    assert Book.query.count() == 0
+
+
+def test_xlsx_upload(client, db):
+    openpyxl = pytest.importorskip('openpyxl')
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append(['제목', '저자', '연도', '가격', '재고', 'ISBN'])
+    sheet.append(['채식주의자', '한강', 2007, 15000, 4, 9788936433598])
+    buf = io.BytesIO()
+    workbook.save(buf)
+
+    login_admin(client)
+    client.post('/admin/import', data={'file': (io.BytesIO(buf.getvalue()), 'books.xlsx')},
+                content_type='multipart/form-data')
+    book = Book.query.one()
+    assert (book.title, book.year, book.stock_quantity, book.isbn) == ('채식주의자', 2007, 4, '9788936433598')
+
+
+def test_cli_imports_ten_thousand_rows_within_a_minute(app, db, tmp_path):
+    path = tmp_path / 'estate.csv'
+    path.write_text(HEADER + ''.join(f',도서 {i},작가 {i % 500},{1800 + i % 200},,Good,{1000 + i},1,역사,\n'
+                                     for i in range(10000)), encoding='utf-8')
+    started = time.monotonic()
+    result = app.test_cli_runner().invoke(args=['catalog', 'import-books', str(path)])
+    elapsed = time.monotonic() - started
+    assert '신규 10000권, 갱신 0권, 오류 0행' in result.output
+    assert Book.query.count() == 10000
+    assert elapsed < 60
+
+
+def test_isbn_conflict_inside_a_batch_rejects_only_that_row(client, db):
+    """자연키로 찾은 기존 도서에 ISBN을 넣는 행과 같은 ISBN의 신규 행이 한 배치에 있으면 뒤 행만 오류"""
+    existing = make_book(db, title='토지', author='박경리', year=1973, edition='초판')
+    resp = _upload(client, HEADER + '\n'.join([
+        '9788937460449,토지,박경리,1973,초판,,50000,1,,',   # 기존 도서에 ISBN 부여
+        '9788937460449,다른 책,다른 저자,2001,,,1000,1,,',  # 같은 ISBN으로 신규 → 충돌
+        ',멀쩡한 책,누군가,1999,,,3000,1,,',
+    ]) + '\n')
+    body = resp.data.decode()
+    assert '신규 1권 · 갱신 1권 · 오류 1행' in body and '같은 파일의 다른 도서' in body
+
+    db.session.expire_all()
+    assert existing.isbn == '9788937460449'
+    assert Book.query.filter_by(title='멀쩡한 책').count() == 1
+    assert Book.query.filter_by(title='다른 책').count() == 0
+
+
+def test_unresolved_unique_conflict_falls_back_to_row_by_row(db, monkeypatch):
+    """다시 조회해도 풀리지 않는 충돌(예: 보이지 않는 동시 입고)은 행마다 반영해 걸린 행만 오류로 남긴다"""
+    taken = make_book(db, title='먼저 들어온 책', author='누군가', year=2000)
+    taken.isbn = '9788937460449'
+    db.session.commit()
+    monkeypatch.setattr(bulk_import, '_find_existing', lambda connection, batch: ({}, {}))
+
+    result = bulk_import.run([
+        (2, {'isbn': '9788937460449', 'title': '충돌', 'author': 'a', 'year': '2001', 'price': '1'}),
+        (3, {'title': '정상', 'author': 'b', 'year': '2002', 'price': '1'}),
+    ])
+    assert (result.inserted, result.error_count) == (1, 1)
+    assert result.errors == [(2, 'ISBN 중복으로 저장하지 못했습니다')]
+    assert Book.query.filter_by(title='정상').count() == 1
@@ -0,0 +1,181 @@
+"""외부 제공자 서킷 브레이커 — 연속 실패 시 차단, half-open 시험 호출, HTTP 클라이언트 연동, 관리자 상태 페이지 테스트"""
+import threading
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from conftest import login_admin
+from app import circuit_breaker, http_client, request_budget, utils
+from app.circuit_breaker import ProviderUnavailable, guard
+from app.models import ProviderHealth
+
+
+def _fail(provider, times=1):
+    for _ in range(times):
+        with pytest.raises(RuntimeError):
+            with guard(provider):
+                raise RuntimeError('timeout')
+
+
+def _expire_cooldown(db, provider):
+    health = db.session.get(ProviderHealth, provider)
+    health.opened_at -= timedelta(seconds=circuit_breaker.DEFAULT_OPEN_SECONDS + 1)
+    db.session.commit()
+
+
+def test_opens_after_consecutive_failures_and_skips_calls(db):
+    _fail('naver', 2)
+    with guard('naver'):
+        pass  # 성공하면 연속 실패 수가 초기화된다
+    _fail('naver', 3)
+
+    health = db.session.get(ProviderHealth, 'naver')
+    assert health.state == 'open' and health.consecutive_failures == 3
+    assert health.last_error == 'timeout'
+
+    called = []
+    with pytest.raises(ProviderUnavailable):
+        with guard('naver'):
+            called.append(True)
+    assert called == []
+    with guard('kakao'):  # 다른 제공자는 영향 없음
+        called.append(True)
+    assert called == [True]
+
+
+def test_half_open_allows_a_single_probe(db):
+    _fail('gemini', 3)
+    _expire_cooldown(db, 'gemini')
+
+    assert circuit_breaker.allow('gemini')[0] is True     # 첫 요청이 시험 호출을 맡고
+    assert circuit_breaker.allow('gemini')[0] is False    # 그 사이 다른 요청은 계속 건너뛴다
+    circuit_breaker.record_failure('gemini', 'still down')
+    db.session.expire_all()
+    assert db.session.get(ProviderHealth, 'gemini').state == 'open'  # 시험 호출 실패 → 다시 차단
+
+    _expire_cooldown(db, 'gemini')
+    with guard('gemini'):
+        pass
+    db.session.expire_all()
+    health = db.session.get(ProviderHealth, 'gemini')
+    assert health.state == 'closed' and health.consecutive_failures == 0
+
+
+@pytest.fixture()
+def failing_server():
+    hits = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            hits.append(self.path)
+            self.send_response(500)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{server.server_port}', hits
+    server.shutdown()
+    server.server_close()
+
+
+def test_http_provider_errors_trip_the_breaker(app, db, failing_server, monkeypatch):
+    base, hits = failing_server
+    monkeypatch.setattr(utils, 'OPEN_LIBRARY_SEARCH_URL', f'{base}/search.json')
+    for i in range(3):
+        assert utils.fetch_open_library(f'작가{i}') is None
+    assert len(hits) == 3
+    assert db.session.get(ProviderHealth, 'openlibrary').state == 'open'
+
+    # 차단 중에는 요청을 보내지 않고 바로 실패 → 폴백 경로로 넘어간다
+    assert utils.fetch_open_library('작가3') is None
+    with pytest.raises(ProviderUnavailable):
+        http_client.get(f'{base}/search.json', 'openlibrary')
+    assert len(hits) == 3
+
+
+@pytest.fixture()
+def slow_server():
+    """평소 타임아웃 안에는 답하지만 0.5초 걸리는 제공자"""
+    stop = threading.Event()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            stop.wait(0.5)
+            self.send_response(200)
+            self.send_header('Content-Length', '2')
+            self.end_headers()
+            self.wfile.write(b'{}')
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{server.server_port}'
+    stop.set()
+    server.shutdown()
+    server.server_close()
+
+
+def test_budget_cut_timeouts_do_not_trip_the_breaker(app, db, slow_server):
+    """스토어 예산(짧음)에 잘린 느린 응답은 제공자 장애가 아니다 — 관리자 검색(긴 예산)은 계속 호출할 수 있어야 한다"""
+    for _ in range(circuit_breaker.DEFAULT_FAILURE_THRESHOLD + 1):
+        token = request_budget.start(0.1)
+        try:
+            with pytest.raises(request_budget.BudgetExhausted):
+                http_client.get(f'{slow_server}/search.json', 'openlibrary')
+        finally:
+            request_budget.clear(token)
+    health = db.session.get(ProviderHealth, 'openlibrary')
+    assert health is None or (health.state == 'closed' and not health.consecutive_failures)
+
+    token = request_budget.start(10)
+    try:
+        assert http_client.get(f'{slow_server}/search.json', 'openlibrary').status_code == 200
+    finally:
+        request_budget.clear(token)
+
+    # 예산 없이 평소 타임아웃으로 잘린 건 그대로 실패로 센다
+    with pytest.raises(Exception) as exc:
+        http_client.get(f'{slow_server}/search.json', 'openlibrary', timeout=0.1)
+    assert not isinstance(exc.value, request_budget.BudgetExhausted)
+    db.session.expire_all()
+    assert db.session.get(ProviderHealth, 'openlibrary').consecutive_failures == 1
+
+
+def test_budget_cut_timeouts_past_the_probe_window_trip_the_breaker(app, db, slow_server):
+    """예산에 줄었어도 CIRCUIT_MIN_PROBE_SECONDS 넘게 기다린 응답 없음은 실패 — 멈춘 제공자에는 브레이커가 열린다"""
+    app.config['CIRCUIT_MIN_PROBE_SECONDS'] = 0.2
+    try:
+        for _ in range(circuit_breaker.DEFAULT_FAILURE_THRESHOLD):
+            token = request_budget.start(0.3)
+            try:
+                with pytest.raises(Exception) as exc:
+                    http_client.get(f'{slow_server}/search.json', 'openlibrary')
+                assert not isinstance(exc.value, request_budget.BudgetExhausted)
+            finally:
+                request_budget.clear(token)
+    finally:
+        app.config.pop('CIRCUIT_MIN_PROBE_SECONDS')
+    db.session.expire_all()
+    assert db.session.get(ProviderHealth, 'openlibrary').state == 'open'
+    with pytest.raises(ProviderUnavailable):
+        http_client.get(f'{slow_server}/search.json', 'openlibrary')
+
+
+def test_admin_provider_status_page_and_reset(client, db):
+    _fail('kakao', 3)
+    login_admin(client)
+    body = client.get('/admin/providers').data.decode()
+    assert '카카오 책 검색' in body and '차단' in body and '오픈라이브러리' in body
+
+    resp = client.post('/admin/providers/kakao/reset', follow_redirects=True)
+    assert '브레이커를 닫았습니다' in resp.data.decode()
+    db.session.expire_all()
+    assert db.session.get(ProviderHealth, 'kakao').state == 'closed'
+    assert client.post('/admin/providers/unknown/reset').status_code == 404
@@ -0,0 +1,71 @@
+"""함께 산 책 — 주문 그룹 쌍 집계, 취소/취소 철회 반영, 상세 페이지 노출, 전체 재계산 일치"""
+from conftest import DEFAULT_SHIPPING, login_admin, login_member, make_book, make_user
+from app import co_purchase
+from app.models import BookCoPurchase, Order
+
+
+def _checkout(client, db, user, books):
+    login_member(client, user.id, user.name)
+    for b in books:
+        client.post(f'/cart/add/{b.id}', data={'quantity': '1'})
+    client.post('/checkout', data=DEFAULT_SHIPPING)
+    return Order.query.filter_by(user_id=user.id).order_by(Order.id.desc()).first().order_group_id
+
+
+def _counts():
+    return {(r.book_id, r.other_id): r.count for r in BookCoPurchase.query.all()}
+
+
+def test_checkout_counts_pairs_and_detail_shows_frequent_ones(client, db):
+    a, b, c, d = (make_book(db, title=f'도서{i}', author=f'작가{i}', year=1900 + i * 40, stock_quantity=10)
+                  for i in range(4))
+    u1 = make_user(db, provider_id='u1', email='u1@example.com')
+    u2 = make_user(db, provider_id='u2', email='u2@example.com')
+    _checkout(client, db, u1, [a, b, c])
+    _checkout(client, db, u2, [a, b])
+
+    counts = _counts()
+    assert counts[(a.id, b.id)] == counts[(b.id, a.id)] == 2
+    assert counts[(a.id, c.id)] == 1 and (a.id, d.id) not in counts
+
+    # 한 번만 함께 팔린 쌍(MIN_COUNT 미만)은 보여 주지 않는다
+    assert [x.id for x in co_purchase.also_bought(a.id)] == [b.id]
+    body = client.get(f'/book/{a.id}').data.decode()
+    assert '도서1' in body[body.index('id="also-bought"'):]
+
+
+def test_cancel_and_uncancel_adjust_counts(client, db):
+    a, b = make_book(db, title='가', stock_quantity=10), make_book(db, title='나', stock_quantity=10)
+    u = make_user(db)
+    group = _checkout(client, db, u, [a, b])
+    assert _counts() == {(a.id, b.id): 1, (b.id, a.id): 1}
+
+    login_admin(client)
+    client.post(f'/admin/orders/{group}/status', data={'status': 'cancelled'})
+    db.session.expire_all()
+    assert _counts() == {}
+    client.post(f'/admin/orders/{group}/status', data={'status': 'shipped'})
+    db.session.expire_all()
+    assert _counts() == {(a.id, b.id): 1, (b.id, a.id): 1}
+    client.post(f'/admin/orders/{group}/status', data={'status': 'completed'})  # 취소와 무관한 변경
+    db.session.expire_all()
+    assert _counts() == {(a.id, b.id): 1, (b.id, a.id): 1}
+
+
+def test_incremental_counts_match_streamed_rebuild(client, db, monkeypatch):
+    monkeypatch.setattr(co_purchase, 'BATCH_SIZE', 2)  # 그룹이 배치 경계에 걸치도록
+    books = [make_book(db, title=f'도서{i}', stock_quantity=20) for i in range(5)]
+    baskets = [[0, 1, 2], [1, 2], [0, 3, 4], [2, 3], [0, 1, 2, 3, 4], [4]]
+    groups = []
+    for i, basket in enumerate(baskets):
+        u = make_user(db, provider_id=f'u{i}', email=f'u{i}@example.com')
+        groups.append(_checkout(client, db, u, [books[j] for j in basket]))
+    login_admin(client)
+    client.post(f'/admin/orders/{groups[2]}/status', data={'status': 'cancelled'})
+    client.post(f'/admin/delete/{books[3].id}')
+
+    db.session.expire_all()
+    incremental = _counts()
+    assert co_purchase.rebuild() == 5  # 취소된 그룹은 세지 않는다
+    db.session.commit()
+    assert _counts() == incremental
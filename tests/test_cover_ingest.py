@@ -0,0 +1,182 @@
+"""표지 사진 일괄 입고 — ZIP/여러 장 업로드, 리사이즈, 가짜 Gemini 분석, 동시성/속도 제한, 재처리, 초안 등록, 작업 큐"""
+import io
+import threading
+import time
+import zipfile
+from datetime import timedelta
+
+import pytest
+from PIL import Image
+
+from conftest import login_admin
+from app import cover_ingest, jobs
+from app.models import Book, CoverBatch, CoverDraft
+
+
+@pytest.fixture()
+def stub_analyzer(app, tmp_path):
+    app.config.update(COVER_ANALYZER='stub', COVER_INGEST_PROCESSES=0,
+                      GEMINI_RATE_LIMITS={cover_ingest.MODEL_NAME: (0, 1)}, COVER_INGEST_PATH=str(tmp_path / 'spool'))
+    yield
+    for key in ('COVER_INGEST_PROCESSES', 'GEMINI_RATE_LIMITS',
+                'COVER_ANALYSIS_CONCURRENCY', 'COVER_INGEST_PATH', 'COVER_STUB_LATENCY'):
+        app.config.pop(key, None)
+    app.config['COVER_ANALYZER'] = 'gemini'
+
+
+def _photo(color, size=(1200, 1600), fmt='JPEG'):
+    buf = io.BytesIO()
+    Image.new('RGB', size, color).save(buf, format=fmt)
+    return buf.getvalue()
+
+
+def _zip(entries):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, 'w') as archive:
+        for name, data in entries:
+            archive.writestr(name, data)
+    return buf.getvalue()
+
+
+def _upload(client, files):
+    """업로드 후 작업 큐(cover_batch)를 이 프로세스에서 비운다 — 운영에서는 flask jobs worker가 맡는다."""
+    login_admin(client)
+    resp = client.post('/admin/covers', data={'photos': [(io.BytesIO(data), name) for name, data in files]},
+                       content_type='multipart/form-data')
+    jobs.work(burst=True)
+    return resp
+
+
+def test_zip_and_loose_photos_become_reviewable_drafts(client, db, stub_analyzer):
+    archive = _zip([('covers/a.jpg', _photo('red')), ('covers/b.png', _photo('blue', fmt='PNG')),
+                    ('covers/readme.txt', b'skip'), ('__MACOSX/covers/._a.jpg', b'junk'), ('covers/broken.jpg', b'not an image')])
+    resp = _upload(client, [('estate.zip', archive), ('c.jpg', _photo('green'))])
+    batch = CoverBatch.query.one()
+    assert resp.headers['Location'].endswith(f'/admin/covers/{batch.id}')
+    assert (batch.total, batch.status) == (4, 'done')
+
+    drafts = {d.filename: d for d in batch.drafts}
+    assert {name: d.status for name, d in drafts.items()} == {
+        'a.jpg': 'ready', 'b.png': 'ready', 'c.jpg': 'ready', 'broken.jpg': 'failed'}
+    assert drafts['a.jpg'].title.startswith('표지 ') and drafts['a.jpg'].year == 1950
+    assert max(Image.open(io.BytesIO(drafts['b.png'].image)).size) == 800  # 800px JPEG로 줄여 둔다
+    assert drafts['broken.jpg'].error == '이미지를 읽을 수 없습니다.'
+
+    body = client.get(f'/admin/covers/{batch.id}').data.decode()
+    assert body.count('data-draft-status="ready"') == 3 and '분당' in body
+    assert client.get(f'/admin/covers/drafts/{drafts["a.jpg"].id}/image').mimetype == 'image/jpeg'
+
+
+def test_rejects_upload_without_images(client, db, stub_analyzer):
+    resp = _upload(client, [('notes.txt', b'hello'), ('empty.zip', _zip([('a.txt', b'x')]))])
+    assert resp.status_code == 302 and resp.headers['Location'].endswith('/admin/covers')
+    assert CoverBatch.query.count() == 0
+
+
+def test_accepting_a_draft_creates_the_book(client, db, stub_analyzer):
+    _upload(client, [('a.jpg', _photo('red'))])
+    draft = CoverDraft.query.one()
+    resp = client.post(f'/admin/covers/drafts/{draft.id}/accept', data={
+        'title': '토지', 'author': '박경리', 'year': '1973', 'edition': '초판', 'condition': 'Fine',
+        'description': '대하소설.', 'price': '50000', 'stock_quantity': '2'})
+    assert resp.status_code == 302
+
+    book = Book.query.one()
+    assert (book.title, book.author, book.price, book.stock_quantity, book.condition) == ('토지', '박경리', 50000, 2, 'Fine')
+    assert book.image_hash and book.cover_widths
+    db.session.expire_all()
+    assert (draft.status, draft.book_id, draft.image) == ('accepted', book.id, None)
+    # 이미 등록한 초안은 다시 등록되지 않는다
+    client.post(f'/admin/covers/drafts/{draft.id}/accept', data={'title': 'x', 'author': 'y', 'price': '1'})
+    assert Book.query.count() == 1
+
+
+def test_concurrency_is_bounded_and_rate_is_spaced(app, db, stub_analyzer, monkeypatch):
+    app.config.update(COVER_ANALYSIS_CONCURRENCY=2, GEMINI_RATE_LIMITS={cover_ingest.MODEL_NAME: (1200, 1)})
+    active, peak, calls, started = [0], [0], [], []
+    lock = threading.Lock()
+    original = cover_ingest.StubModel.generate_content
+
+    def tracking(self, contents, request_options=None):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+            calls.append(request_options['timeout'])
+            started.append(time.monotonic())
+        try:
+            time.sleep(0.15)  # 토큰 간격(0.05초)보다 길게 — 상한이 없으면 셋 이상 겹친다
+            return original(self, contents, request_options)
+        finally:
+            with lock:
+                active[0] -= 1
+
+    monkeypatch.setattr(cover_ingest.StubModel, 'generate_content', tracking)
+    batch = cover_ingest.create_batch([(f'{i}.jpg', io.BytesIO(_photo((i * 30, 0, 0), size=(200, 300))))
+                                       for i in range(6)])
+    progress = cover_ingest.run(batch.id)
+    assert progress.counts == {'ready': 6} and progress.per_minute > 0
+    assert len(calls) == 6 and peak[0] == 2
+    assert calls[0] == cover_ingest.DEFAULT_TIMEOUT  # 호출마다 타임아웃을 건다
+    # 분당 1200회 = 0.05초 간격: 첫 호출은 바로, 나머지 다섯 번은 공유 토큰 버킷이 간격을 둔다
+    assert max(started) - min(started) >= 0.24
+
+
+def test_failed_analysis_can_be_retried(client, db, stub_analyzer, monkeypatch):
+    original = cover_ingest.StubModel.generate_content
+    monkeypatch.setattr(cover_ingest.StubModel, 'generate_content',
+                        lambda self, contents, request_options=None: (_ for _ in ()).throw(TimeoutError('응답 없음')))
+    _upload(client, [('a.jpg', _photo('red'))])
+    draft = CoverDraft.query.one()
+    assert draft.status == 'failed' and 'TimeoutError' in draft.error
+
+    monkeypatch.setattr(cover_ingest.StubModel, 'generate_content', original)
+    client.post(f'/admin/covers/{draft.batch_id}/resume')
+    jobs.work(burst=True)
+    db.session.expire_all()
+    assert draft.status == 'ready' and draft.error is None
+
+
+def test_claim_lets_only_one_runner_process_a_batch(app, db, stub_analyzer):
+    batch = cover_ingest.create_batch([('a.jpg', io.BytesIO(_photo('red')))])
+    assert cover_ingest.claim(batch.id) is True
+    assert cover_ingest.run(batch.id) is None  # 다른 곳이 처리 중 (하트비트 살아 있음)
+    assert CoverDraft.query.one().status == 'pending'
+
+
+def test_queued_batch_runs_in_worker_with_process_pool(app, db, stub_analyzer):
+    app.config.update(COVER_INGEST_PROCESSES=2)
+    batch = cover_ingest.create_batch([(f'{i}.jpg', io.BytesIO(_photo('red'))) for i in range(3)])
+    job = cover_ingest.start(batch.id)
+    assert cover_ingest.start(batch.id).id == job.id  # 같은 배치는 한 번만 대기열에
+    assert jobs.work(burst=True) == 1
+    db.session.expire_all()
+    assert [d.status for d in CoverBatch.query.one().drafts] == ['ready'] * 3
+
+
+def test_jobs_page_fallback_processes_one_photo_per_request(app, db, stub_analyzer):
+    batch = cover_ingest.create_batch([(f'{i}.jpg', io.BytesIO(_photo('red'))) for i in range(2)])
+    job = cover_ingest.start(batch.id)
+    job.run_at -= timedelta(seconds=jobs.STUCK_SECONDS + 1)  # 워커 없이 1분 넘게 대기
+    db.session.commit()
+
+    with app.test_request_context('/admin/jobs'):
+        assert jobs.run_stuck() == 1
+    db.session.expire_all()
+    assert [d.status for d in CoverBatch.query.one().drafts] == ['ready', 'pending']
+    assert CoverBatch.query.one().status == 'queued' and job.status == 'queued'  # 남은 원본은 다음 요청이
+
+    with app.test_request_context('/admin/jobs'):
+        assert jobs.run_stuck() == 1
+    db.session.expire_all()
+    assert [d.status for d in CoverBatch.query.one().drafts] == ['ready', 'ready']
+    assert CoverBatch.query.one().status == 'done' and job.status == 'done'
+
+
+def test_cli_reports_books_per_minute(app, db, stub_analyzer, tmp_path):
+    folder = tmp_path / 'photos'
+    folder.mkdir()
+    for i in range(3):
+        (folder / f'{i}.jpg').write_bytes(_photo('blue', size=(300, 400)))
+    (folder / 'list.txt').write_text('skip')
+    result = app.test_cli_runner().invoke(args=['catalog', 'ingest-covers', str(folder), '--processes', '0'])
+    assert '사진 3장' in result.output and '검토 대기 3장' in result.output and '분당' in result.output
@@ -0,0 +1,124 @@
+"""표지 저장소(db / fs 백엔드) + Base64 이관 명령 테스트"""
+import base64
+import io
+import os
+
+import pytest
+from PIL import Image
+
+from conftest import login_admin, make_book
+from app.models import Book, CoverBlob
+
+
+def _jpeg_bytes(color='red', size=(40, 60)):
+    buf = io.BytesIO()
+    Image.new('RGB', size, color).save(buf, format='JPEG')
+    return buf.getvalue()
+
+
+def _upload_cover(client, book, data):
+    return client.post(f'/admin/edit/{book.id}', content_type='multipart/form-data', data={
+        'title': book.title, 'author': book.author, 'year': str(book.year), 'condition': book.condition,
+        'edition': '', 'price': str(book.price), 'stock_quantity': str(book.stock_quantity),
+        'book_image': (io.BytesIO(data), 'cover.jpg'),
+    })
+
+
+@pytest.fixture()
+def fs_storage(app, tmp_path, monkeypatch):
+    monkeypatch.setitem(app.config, 'COVER_STORAGE', 'fs')
+    monkeypatch.setitem(app.config, 'COVER_STORAGE_PATH', str(tmp_path))
+    return tmp_path
+
+
+def test_uploaded_cover_goes_to_blob_table_not_book_row(client, db):
+    b = make_book(db)
+    login_admin(client)
+    _upload_cover(client, b, _jpeg_bytes())
+
+    db.session.refresh(b)
+    assert b.image_data is None and b.image_hash
+    blob = db.session.get(CoverBlob, b.image_hash)
+    resp = client.get(f'/covers/{b.id}?v={b.image_hash}')
+    assert resp.status_code == 200
+    assert resp.data == blob.data
+    assert 'immutable' in resp.headers['Cache-Control']
+
+
+def test_same_image_is_stored_once(client, db):
+    login_admin(client)
+    data = _jpeg_bytes('green')
+    for title in ('하나', '둘'):
+        _upload_cover(client, make_book(db, title=title), data)
+    assert CoverBlob.query.count() == 1
+
+
+def test_db_store_skips_existing_and_pending_blobs(db):
+    from app.cover_store import DatabaseCoverStore
+    store, data = DatabaseCoverStore(), _jpeg_bytes('blue')
+    key = store.save(data)
+    assert store.save(data) == key  # 아직 커밋 전(같은 세션)이어도 한 번만 넣는다
+    db.session.commit()
+    assert store.save(data) == key
+    db.session.commit()
+    assert CoverBlob.query.count() == 1
+
+
+def test_filesystem_backend_is_content_addressed_and_served(client, db, fs_storage):
+    b = make_book(db)
+    login_admin(client)
+    _upload_cover(client, b, _jpeg_bytes('blue'))
+
+    db.session.refresh(b)
+    path = os.path.join(fs_storage, b.image_hash[:2], b.image_hash)
+    assert os.path.isfile(path)
+    assert CoverBlob.query.count() == 0
+
+    resp = client.get(f'/covers/{b.id}?v={b.image_hash}')
+    assert resp.status_code == 200
+    assert resp.mimetype == 'image/jpeg'
+    with open(path, 'rb') as f:
+        assert resp.data == f.read()
+    assert resp.headers['ETag'] == f'"{b.image_hash}"'
+    resp.close()
+
+
+@pytest.mark.parametrize('storage', ['db', 'fs'])
+def test_migrate_covers_command_moves_base64_rows(app, client, db, tmp_path, monkeypatch, storage):
+    data = _jpeg_bytes('yellow')
+    books = [make_book(db, title=f'옛표지{i}', image_file='stored_in_db',
+                       image_data=base64.b64encode(data).decode('ascii')) for i in range(3)]
+    expected_hash = books[0].image_hash
+    monkeypatch.setitem(app.config, 'COVER_STORAGE_PATH', str(tmp_path))
+
+    result = app.test_cli_runner().invoke(args=['catalog', 'migrate-covers', '--batch-size', '2', '--storage', storage])
+    assert result.exit_code == 0
+    assert '3권' in result.output
+
+    db.session.expire_all()
+    for b in Book.query.all():
+        assert b.image_data is None
+        assert b.image_hash == expected_hash
+
+    # 다시 실행하면 옮길 것이 없다
+    result = app.test_cli_runner().invoke(args=['catalog', 'migrate-covers', '--storage', storage])
+    assert '0권' in result.output
+
+    monkeypatch.setitem(app.config, 'COVER_STORAGE', storage)
+    resp = client.get(f'/covers/{books[0].id}')
+    assert resp.status_code == 200 and resp.data == data
+    resp.close()
+
+
+def test_db_store_tolerates_a_concurrent_save_of_the_same_image(db, monkeypatch):
+    import sqlalchemy
+    from app import cover_store
+    store, data = cover_store.DatabaseCoverStore(), _jpeg_bytes('yellow')
+    key = store.save(data)
+    db.session.commit()
+    # 다른 요청이 넣기 직전에 확인했다 — 있는지 보는 쿼리가 아무것도 못 찾은 것처럼 만든다
+    monkeypatch.setattr(cover_store, 'select', lambda *cols: sqlalchemy.select(*cols).where(sqlalchemy.false()))
+    book = make_book(db, title='같은 표지')
+    book.image_hash = store.save(data)
+    db.session.commit()  # 겹친 INSERT는 SAVEPOINT만 되돌려 바깥 트랜잭션은 살아 있다
+    assert book.image_hash == key and CoverBlob.query.count() == 1
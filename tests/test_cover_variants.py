@@ -0,0 +1,90 @@
+"""반응형 표지 변형(WebP/JPEG, 너비별) 생성·전송·일괄 재생성 테스트"""
+import io
+
+from PIL import Image
+
+from conftest import login_admin, make_book
+from app.models import CoverBlob
+
+
+def _jpeg_bytes(size):
+    buf = io.BytesIO()
+    Image.new('RGB', size, 'purple').save(buf, format='JPEG')
+    return buf.getvalue()
+
+
+def _upload_cover(client, book, data):
+    return client.post(f'/admin/edit/{book.id}', content_type='multipart/form-data', data={
+        'title': book.title, 'author': book.author, 'year': str(book.year), 'condition': book.condition,
+        'edition': '', 'price': str(book.price), 'stock_quantity': str(book.stock_quantity),
+        'book_image': (io.BytesIO(data), 'cover.jpg'),
+    })
+
+
+def test_upload_generates_variants_up_to_original_width(client, db):
+    b = make_book(db)
+    login_admin(client)
+    _upload_cover(client, b, _jpeg_bytes((400, 600)))
+
+    db.session.refresh(b)
+    assert b.cover_widths == '160,320'
+    keys = {blob.hash for blob in CoverBlob.query.all()}
+    assert {f'{b.image_hash}-{w}.{ext}' for w in (160, 320) for ext in ('webp', 'jpg')} <= keys
+
+    resp = client.get(f'/covers/{b.id}/160.webp?v={b.image_hash}')
+    assert resp.status_code == 200
+    assert resp.mimetype == 'image/webp'
+    assert Image.open(io.BytesIO(resp.data)).size == (160, 240)
+    assert 'immutable' in resp.headers['Cache-Control']
+
+    etag = resp.headers['ETag']
+    assert client.get(f'/covers/{b.id}/160.webp', headers={'If-None-Match': etag}).status_code == 304
+    assert client.get(f'/covers/{b.id}/640.webp').status_code == 404
+
+
+def test_templates_render_picture_with_srcset(client, db):
+    b = make_book(db, title='ZZVARIANTZZ')
+    login_admin(client)
+    _upload_cover(client, b, _jpeg_bytes((800, 1000)))  # 업로드 경로의 800px 제한 → 640x800
+    db.session.refresh(b)
+
+    body = client.get('/').data.decode()
+    assert '<source type="image/webp"' in body
+    assert f'/covers/{b.id}/640.webp?v={b.image_hash} 640w' in body
+    assert f'/covers/{b.id}/320.jpg?v={b.image_hash} 320w' in body
+
+    body = client.get(f'/book/{b.id}').data.decode()
+    assert 'sizes="(min-width: 1024px) 512px, 100vw"' in body
+
+
+def test_small_cover_gets_no_variants_and_plain_img(client, db):
+    b = make_book(db, title='ZZSMALLZZ')
+    login_admin(client)
+    _upload_cover(client, b, _jpeg_bytes((100, 150)))
+    db.session.refresh(b)
+
+    assert b.cover_widths is None
+    body = client.get('/').data.decode()
+    assert f'/covers/{b.id}?v={b.image_hash}' in body
+    assert 'srcset' not in body
+
+
+def test_regenerate_command_builds_variants_for_existing_catalog(app, client, db):
+    login_admin(client)
+    books = [make_book(db, title=f'기존{i}') for i in range(3)]
+    for b in books:
+        _upload_cover(client, b, _jpeg_bytes((330, 500)))
+    # 변형 도입 이전 상태로 되돌린다
+    db.session.execute(db.text("DELETE FROM cover_blob WHERE hash LIKE '%-%'"))
+    db.session.execute(db.text('UPDATE book SET cover_widths = NULL'))
+    db.session.commit()
+
+    result = app.test_cli_runner().invoke(args=['catalog', 'regenerate-cover-variants', '--workers', '2', '--batch-size', '2'])
+    assert result.exit_code == 0, result.output
+    assert '표지 1개' in result.output  # 세 권이 같은 이미지라 변형은 한 벌만 만든다
+
+    db.session.expire_all()
+    for b in books:
+        db.session.refresh(b)
+        assert b.cover_widths == '160,320'
+    assert client.get(f'/covers/{books[0].id}/320.jpg').status_code == 200
@@ -0,0 +1,70 @@
+"""표지 이미지 전용 엔드포인트(/covers/<id>) — ETag / immutable 캐시 / 304 테스트"""
+import base64
+import io
+
+from PIL import Image
+
+from conftest import make_book
+from app import covers
+
+
+def _jpeg_base64(color='red', size=(40, 60)):
+    buf = io.BytesIO()
+    Image.new('RGB', size, color).save(buf, format='JPEG')
+    return base64.b64encode(buf.getvalue()).decode('ascii')
+
+
+def test_listing_links_covers_instead_of_inlining_them(client, db):
+    b = make_book(db, title='ZZCOVERZZ', image_file='stored_in_db', image_data=_jpeg_base64())
+    body = client.get('/').data.decode()
+    assert 'data:image' not in body
+    assert f'/covers/{b.id}?v={b.image_hash}' in body
+
+
+def test_versioned_cover_is_immutable_and_revalidates_with_304(client, db):
+    data = _jpeg_base64()
+    b = make_book(db, image_data=data)
+    assert b.image_hash == covers.content_hash(base64.b64decode(data))
+
+    resp = client.get(f'/covers/{b.id}?v={b.image_hash}')
+    assert resp.status_code == 200
+    assert resp.mimetype == 'image/jpeg'
+    assert resp.data == base64.b64decode(data)
+    assert resp.headers['ETag'] == f'"{b.image_hash}"'
+    assert 'immutable' in resp.headers['Cache-Control']
+
+    resp = client.get(f'/covers/{b.id}', headers={'If-None-Match': f'"{b.image_hash}"'})
+    assert resp.status_code == 304
+    assert resp.data == b''
+    assert 'immutable' not in resp.headers['Cache-Control']
+
+
+def test_replacing_cover_changes_url_and_etag(client, db):
+    b = make_book(db, image_data=_jpeg_base64('red'))
+    old_hash = b.image_hash
+    b.image_data = _jpeg_base64('blue')
+    db.session.commit()
+    assert b.image_hash != old_hash
+
+    resp = client.get(f'/covers/{b.id}', headers={'If-None-Match': f'"{old_hash}"'})
+    assert resp.status_code == 200
+    # 예전 버전 주소로 들어온 요청에는 immutable을 주지 않는다
+    resp = client.get(f'/covers/{b.id}?v={old_hash}')
+    assert 'immutable' not in resp.headers['Cache-Control']
+
+
+def test_book_without_cover_returns_404(client, db):
+    b = make_book(db)
+    assert client.get(f'/covers/{b.id}').status_code == 404
+    assert client.get('/covers/999999').status_code == 404
+
+
+def test_backfill_hashes_for_existing_rows(db):
+    data = _jpeg_base64()
+    b = make_book(db, image_data=data)
+    db.session.execute(db.text('UPDATE book SET image_hash = NULL'))
+    db.session.commit()
+
+    assert covers.backfill_hashes() == 1
+    db.session.refresh(b)
+    assert b.image_hash == covers.hash_image_data(data)
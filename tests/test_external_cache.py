@@ -0,0 +1,151 @@
+"""외부 추천(오픈라이브러리/구글 북스) — 상세 페이지 분리 조각, DB 캐시(TTL, 빈 결과 캐시, stale-while-revalidate, LRU) 테스트"""
+from datetime import timedelta
+
+import pytest
+
+from conftest import make_book
+from app import external_cache, utils
+from app.models import Book, ExternalCacheEntry
+
+
+def _works(*titles):
+    return [{'title': t, 'author': '한강', 'thumbnail': None, 'link': '#'} for t in titles]
+
+
+@pytest.fixture()
+def providers(monkeypatch):
+    """제공자 호출을 가로채 호출 횟수를 센다. 반환값은 테스트에서 바꿔 끼운다."""
+    calls = {'openlibrary': [], 'googlebooks': []}
+    results = {'openlibrary': _works('소년이 온다', '채식주의자', '흰'), 'googlebooks': []}
+
+    def fake(provider):
+        def fetch(author):
+            calls[provider].append(author)
+            return results[provider]
+        return fetch
+
+    monkeypatch.setattr(utils, 'fetch_open_library', fake('openlibrary'))
+    monkeypatch.setattr(utils, 'fetch_google_books', fake('googlebooks'))
+    return calls, results
+
+
+def test_detail_page_renders_without_calling_providers(client, db, monkeypatch):
+    def unreachable(author):
+        raise AssertionError('상세 페이지 본문은 외부 API를 기다리지 않아야 함')
+    monkeypatch.setattr(utils, 'fetch_open_library', unreachable)
+    monkeypatch.setattr(utils, 'fetch_google_books', unreachable)
+    b = make_book(db, title='소년이 온다', author='한강')
+
+    body = client.get(f'/book/{b.id}').data.decode()
+    assert f'data-url="/book/{b.id}/web-recommendations"' in body
+    assert 'View on Google Books' not in body
+
+
+def test_web_recommendations_fragment_and_cache_headers(client, db, providers):
+    _, results = providers
+    b = make_book(db, title='소년이 온다', author='한강')
+
+    resp = client.get(f'/book/{b.id}/web-recommendations')
+    body = resp.data.decode()
+    assert '같은 저자의 다른 작품' in body and '채식주의자' in body
+    assert '<html' not in body
+    assert 'public, max-age=3600' in resp.headers['Cache-Control']
+
+    other = make_book(db, title='책', author='무명작가')
+    results['openlibrary'] = []
+    resp = client.get(f'/book/{other.id}/web-recommendations')
+    assert resp.data.decode().strip() == ''
+    assert 'max-age=60' in resp.headers['Cache-Control']
+    assert client.get('/book/9999/web-recommendations').status_code == 404
+
+
+def test_provider_is_called_once_per_author(client, db, providers):
+    calls, _ = providers
+    b1 = make_book(db, title='소년이 온다', author='한강')
+    b2 = make_book(db, title='흰', author=' 한강 ')
+
+    body = client.get(f'/book/{b1.id}/web-recommendations').data.decode()
+    assert '채식주의자' in body
+    client.get(f'/book/{b1.id}/web-recommendations')
+    body = client.get(f'/book/{b2.id}/web-recommendations').data.decode()
+    assert '채식주의자' in body
+
+    # 두 도서 모두 같은 정규화된 저자 키를 쓰고, 현재 도서 제목만 요청마다 걸러낸다
+    assert calls['openlibrary'] == ['한강']
+    assert utils.search_open_library('흰', '한강') == _works('소년이 온다', '채식주의자')
+
+
+def test_empty_results_are_negatively_cached_but_errors_are_not(app, db, providers, monkeypatch):
+    calls, results = providers
+    results['openlibrary'] = []
+    assert utils.search_books_with_fallback('없는책', '무명작가') == []
+    assert utils.search_books_with_fallback('없는책', '무명작가') == []
+    assert len(calls['openlibrary']) == 1 and len(calls['googlebooks']) == 1
+
+    entry = db.session.get(ExternalCacheEntry, external_cache.cache_key('openlibrary', '무명작가'))
+    assert entry.expires_at - entry.fetched_at == timedelta(seconds=external_cache.DEFAULT_NEGATIVE_TTL)
+
+    monkeypatch.setattr(utils, 'fetch_open_library', lambda author: calls['openlibrary'].append(author))
+    assert utils.search_open_library('책', '오류작가') == []
+    assert utils.search_open_library('책', '오류작가') == []
+    assert len(calls['openlibrary']) == 3  # None(네트워크 오류)은 저장하지 않는다
+    assert db.session.get(ExternalCacheEntry, external_cache.cache_key('openlibrary', '오류작가')) is None
+
+
+def test_stale_entry_is_served_while_refreshing_in_background(db, providers):
+    calls, results = providers
+    key = external_cache.cache_key('openlibrary', '한강')
+    utils.search_open_library('흰', '한강')
+    entry = db.session.get(ExternalCacheEntry, key)
+    entry.expires_at -= timedelta(seconds=external_cache.DEFAULT_TTL + 60)
+    db.session.commit()
+
+    results['openlibrary'] = _works('작별하지 않는다')
+    assert utils.search_open_library('흰', '한강') == _works('소년이 온다', '채식주의자')  # 옛 값을 즉시 반환
+    external_cache.wait_for_refreshes()
+
+    db.session.expire_all()
+    assert len(calls['openlibrary']) == 2
+    assert utils.search_open_library('흰', '한강') == _works('작별하지 않는다')
+
+    # stale 기간까지 지난 항목은 미스로 취급해 동기로 다시 받는다
+    entry = db.session.get(ExternalCacheEntry, key)
+    entry.expires_at -= timedelta(seconds=external_cache.DEFAULT_TTL + external_cache.DEFAULT_STALE_TTL)
+    db.session.commit()
+    results['openlibrary'] = _works('희랍어 시간')
+    assert utils.search_open_library('흰', '한강') == _works('희랍어 시간')
+
+
+def test_lru_eviction_keeps_recently_used_entries(app, db, providers, monkeypatch):
+    monkeypatch.setitem(app.config, 'EXTERNAL_CACHE_MAX_ENTRIES', 2)
+    monkeypatch.setitem(app.config, 'EXTERNAL_CACHE_EVICT_EVERY', 1)  # 저장할 때마다 정리
+    utils.search_open_library('책', '작가1')
+    utils.search_open_library('책', '작가2')
+    older = db.session.get(ExternalCacheEntry, external_cache.cache_key('openlibrary', '작가2'))
+    older.last_used_at -= timedelta(hours=1)
+    db.session.commit()
+
+    utils.search_open_library('책', '작가3')
+    keys = {e.key for e in ExternalCacheEntry.query.all()}
+    assert keys == {external_cache.cache_key('openlibrary', '작가1'), external_cache.cache_key('openlibrary', '작가3')}
+
+
+def test_cache_writes_do_not_commit_the_callers_session(app, db, providers, monkeypatch):
+    monkeypatch.setitem(app.config, 'EXTERNAL_CACHE_EVICT_EVERY', 1)
+    book = make_book(db, title='원래 제목')
+    key = external_cache.cache_key('openlibrary', '한강')
+    utils.search_open_library('흰', '한강')
+    entry = db.session.get(ExternalCacheEntry, key)
+    entry.last_used_at -= external_cache.TOUCH_INTERVAL
+    db.session.commit()
+    touched_before = entry.last_used_at
+
+    book.title = '요청이 아직 커밋하지 않은 제목'
+    utils.search_open_library('흰', '한강')   # 캐시 적중 → last_used_at 갱신
+    utils.search_open_library('책', '작가2')  # 미스 → 저장 + 정리
+    db.session.rollback()
+
+    db.session.expire_all()
+    assert db.session.get(Book, book.id).title == '원래 제목'
+    assert db.session.get(ExternalCacheEntry, key).last_used_at > touched_before
+    assert db.session.get(ExternalCacheEntry, external_cache.cache_key('openlibrary', '작가2')) is not None
@@ -0,0 +1,94 @@
+"""필터 바 패싯 개수(단일 집계 쿼리 + 카탈로그 버전별 캐시) 테스트"""
+from sqlalchemy import event
+
+from conftest import login_admin, make_book
+from app import facets
+from app.catalog import read_filters
+
+
+def _filters(**kwargs):
+    return read_filters(kwargs)
+
+
+def _count_selects(app, fn):
+    from app import db
+    statements = []
+
+    def _capture(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', _capture)
+        try:
+            result = fn()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', _capture)
+    return result, [s for s in statements if 'FROM book' in s]
+
+
+def test_counts_exclude_own_facet_but_apply_others(app, db):
+    make_book(db, condition='Fine', price=30000, genre='역사')
+    make_book(db, condition='Fine', price=150000, genre='역사')
+    make_book(db, condition='Good', price=30000, genre='고전문학', stock_quantity=0)
+
+    counts = facets.facet_counts(_filters())
+    assert counts['total'] == 3
+    assert counts['condition']['Fine'] == 2 and counts['condition']['Good'] == 1
+    assert counts['price']['0-50000'] == 2 and counts['price']['100000-300000'] == 1
+    assert counts['avail']['in_stock'] == 2
+    assert counts['genre']['역사'] == 2 and counts['genre']['기타'] == 0
+
+    counts = facets.facet_counts(_filters(condition='Fine'))
+    assert counts['total'] == 2
+    # 컨디션을 골라도 다른 컨디션 개수는 그대로 보이고, 다른 패싯은 Fine 기준으로 좁혀진다
+    assert counts['condition']['Good'] == 1
+    assert counts['price']['0-50000'] == 1
+    assert counts['genre']['고전문학'] == 0
+
+
+def test_counts_follow_search_query(app, db):
+    make_book(db, title='호밀밭의 파수꾼', condition='Fine')
+    make_book(db, title='ZZ무관ZZ', condition='Fine')
+    with app.test_request_context():
+        counts = facets.facet_counts(_filters(q='파수꾼'))
+    assert counts['total'] == 1 and counts['condition']['Fine'] == 1
+
+
+def test_all_facets_in_one_query_and_memoized_per_version(app, db):
+    make_book(db, condition='Fine')
+    counts, selects = _count_selects(app, lambda: facets.facet_counts(_filters(year='2001-now')))
+    assert len(selects) == 1
+    assert counts['total'] == 1
+
+    _, selects = _count_selects(app, lambda: facets.facet_counts(_filters(year='2001-now')))
+    assert selects == []
+
+    # 도서가 추가되면 카탈로그 버전이 올라 캐시가 자연히 무효화된다
+    make_book(db, condition='Fine')
+    counts, selects = _count_selects(app, lambda: facets.facet_counts(_filters(year='2001-now')))
+    assert len(selects) == 1
+    assert counts['total'] == 2
+
+
+def test_stock_change_from_checkout_refreshes_availability_count(client, db):
+    from conftest import buy_now, make_user, login_member
+    b = make_book(db, stock_quantity=1)
+    assert facets.facet_counts(_filters())['avail']['in_stock'] == 1
+
+    u = make_user(db)
+    login_member(client, u.id, u.name)
+    buy_now(client, b.id)
+    assert facets.facet_counts(_filters())['avail']['in_stock'] == 0
+
+
+def test_filter_bar_shows_counts(client, db):
+    make_book(db, condition='Fine')
+    first = make_book(db, condition='Fine', edition='초판')
+    body = client.get('/').data.decode()
+    assert 'Fine (2)' in body
+    assert '초판 (1)' in body
+    assert '전체 컬렉션 (2권)' in body
+
+    login_admin(client)
+    client.post(f'/admin/delete/{first.id}')
+    assert 'Fine (1)' in client.get('/').data.decode()
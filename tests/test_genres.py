@@ -64,3 +64,59 @@ def test_personalized_section_shown_only_without_filters(client, db):
     # 필터가 걸리면 추천 섹션은 숨겨야 한다
     resp2 = client.get('/?condition=Good')
     assert '을 위한 추천' not in resp2.data.decode()
+
+
+def test_genre_masks_follow_string_columns(client, db):
+    from app.genres import GENRE_BITS, mask_genres
+    b = make_book(db, genre='역사,고전문학')
+    assert b.genre_mask == GENRE_BITS['역사'] | GENRE_BITS['고전문학']
+    assert mask_genres(b.genre_mask) == ['고전문학', '역사']
+
+    u = make_user(db)
+    login_member(client, u.id, u.name)
+    client.post('/member/genres', data={'action': 'save', 'genres': ['기타']})
+    db.session.refresh(u)
+    assert u.preferred_genre_mask == GENRE_BITS['기타']
+    client.post('/member/genres', data={'action': 'skip'})
+    db.session.refresh(u)
+    assert u.preferred_genre_mask == 0
+
+
+def test_recommendations_match_whole_genres_only(client, db):
+    u = make_user(db)
+    u.preferred_genres = '역사'
+    db.session.commit()
+    make_book(db, title='추천될책', genre='인문/교양,역사')
+    # 예전 ilike('%역사%')는 분류표 밖 값("세계역사" 등)에 들어 있는 부분 문자열까지 걸렸다
+    make_book(db, title='오탐될책', genre='세계역사,기타')
+    login_member(client, u.id, u.name)
+
+    body = client.get('/').data.decode()
+    section = body[body.index('을 위한 추천'):]
+    assert '추천될책' in section
+    assert '오탐될책' not in section[:section.index('book-grid')]
+
+
+def test_storefront_genre_filter(client, db):
+    make_book(db, title='ZZSCIENCEZZ', genre='과학/대중과학')
+    make_book(db, title='ZZNOVELZZ', genre='현대소설')
+    body = client.get('/', query_string={'genre': '과학/대중과학'}).data.decode()
+    assert 'ZZSCIENCEZZ' in body and 'ZZNOVELZZ' not in body
+    # 분류표에 없는 값은 무시하고 전체를 보여준다
+    body = client.get('/', query_string={'genre': '해킹장르'}).data.decode()
+    assert 'ZZSCIENCEZZ' in body and 'ZZNOVELZZ' in body
+
+
+def test_backfill_masks_converts_existing_strings(db):
+    from app.genres import GENRE_BITS, backfill_masks
+    from app.models import Book, User
+    make_book(db, title='옛데이터', genre='자기계발')
+    make_user(db)
+    db.session.execute(db.text("UPDATE book SET genre_mask = 0"))
+    db.session.execute(db.text("UPDATE \"user\" SET preferred_genres = '장르소설', preferred_genre_mask = 0"))
+    db.session.commit()
+
+    assert backfill_masks() == (1, 1)
+    db.session.expire_all()
+    assert Book.query.filter_by(title='옛데이터').one().genre_mask == GENRE_BITS['자기계발']
+    assert User.query.one().preferred_genre_mask == GENRE_BITS['장르소설']
@@ -0,0 +1,88 @@
+"""제목/저자 한국어 인메모리 인덱스(바이그램 + 초성) 및 자동완성 엔드포인트 테스트"""
+import time
+
+from conftest import login_admin, make_book
+from app import hangul_index
+
+
+def test_chosung_and_compound_word_queries(client, db):
+    make_book(db, title='호밀밭의 파수꾼', author='제롬 데이비드 샐린저')
+    make_book(db, title='ZZOTHERZZ', author='다른 저자')
+
+    body = client.get('/?q=ㅎㅁㅂ').data.decode()
+    assert '호밀밭의 파수꾼' in body and 'ZZOTHERZZ' not in body
+    # 띄어쓰기 없이 붙여 쓴 질의도 정규화 후 부분 일치로 찾는다
+    assert '호밀밭의 파수꾼' in client.get('/?q=밭의파수').data.decode()
+    assert '호밀밭의 파수꾼' in client.get('/?q=샐린저').data.decode()
+
+
+def test_ranking_prefers_title_prefix_then_title_then_author(app, db):
+    prefix = make_book(db, title='파수꾼 이야기', author='저자A')
+    infix = make_book(db, title='호밀밭의 파수꾼', author='저자B')
+    author_only = make_book(db, title='ZZ무관한제목ZZ', author='파수꾼')
+    with app.test_request_context():
+        assert hangul_index.search('파수꾼') == [prefix.id, infix.id, author_only.id]
+
+
+def test_index_follows_admin_edit_and_delete(client, db):
+    b = make_book(db, title='토지', author='박경리')
+    assert hangul_index.search('ㅌㅈ') == [b.id]
+
+    login_admin(client)
+    client.post(f'/admin/edit/{b.id}', data={
+        'title': '태백산맥', 'author': b.author, 'year': str(b.year), 'condition': b.condition,
+        'edition': '', 'price': str(b.price), 'stock_quantity': '1',
+    })
+    assert hangul_index.search('ㅌㅈ') == []
+    assert hangul_index.search('ㅌㅂㅅㅁ') == [b.id]
+
+    client.post(f'/admin/delete/{b.id}')
+    assert hangul_index.search('ㅌㅂㅅㅁ') == []
+
+
+def test_late_committed_change_is_not_skipped(db):
+    """PostgreSQL은 id 42를 읽은 뒤에 41이 커밋될 수 있다 — 빈 id를 기억해 두었다가 채워지면 반영한다"""
+    from app import facets
+    from app.catalog import read_filters
+    from app.models import Book, CatalogChange
+    early = make_book(db, title='토지', author='박경리')
+    late = make_book(db, title='임꺽정', author='홍명희')
+    assert hangul_index.search('ㅌㅈ') == [early.id]
+    generation = facets._changes.generation
+    facets.facet_counts(read_filters({}))
+
+    # 41번이 아직 커밋 전인 상태에서 42번(다른 도서)만 보인다
+    v = db.session.query(db.func.max(CatalogChange.id)).scalar()
+    db.session.add(CatalogChange(id=v + 2, book_id=early.id))
+    db.session.commit()
+    hangul_index.search('ㅌㅈ')
+    assert hangul_index._index.changes.gaps.keys() == {v + 1}
+
+    # 41번 트랜잭션이 늦게 커밋됐다: 도서 제목을 바꾸고 변경 로그를 남김 (ORM 리스너를 거치지 않는 raw SQL)
+    db.session.execute(Book.__table__.update().where(Book.id == late.id).values(title='장길산'))
+    db.session.add(CatalogChange(id=v + 1, book_id=late.id))
+    db.session.commit()
+    assert hangul_index.search('ㅈㄱㅅ') == [late.id]
+    assert hangul_index._index.changes.gaps == {}
+    facets.facet_counts(read_filters({}))
+    assert facets._changes.generation > generation + 1  # 늦게 채워진 변경도 패싯 캐시를 무효화한다
+
+
+def test_search_is_sub_millisecond_on_a_warm_index():
+    index = hangul_index.HangulIndex()
+    for i in range(5000):
+        index.upsert(i, f'도서 제목 {i}번 이야기', f'저자{i % 97}')
+    index.upsert(99999, '호밀밭의 파수꾼', '샐린저')
+
+    started = time.perf_counter()
+    for _ in range(100):
+        assert index.search('ㅎㅁㅂ') == [99999]
+    assert (time.perf_counter() - started) / 100 < 0.001
+
+
+def test_suggest_endpoint_returns_top_matches(client, db):
+    b = make_book(db, title='호밀밭의 파수꾼', author='샐린저')
+    resp = client.get('/search/suggest?q=ㅎㅁㅂ')
+    assert resp.status_code == 200
+    assert resp.get_json() == [{'id': b.id, 'title': '호밀밭의 파수꾼', 'author': '샐린저', 'url': f'/book/{b.id}'}]
+    assert client.get('/search/suggest?q=').get_json() == []
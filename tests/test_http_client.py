@@ -0,0 +1,98 @@
+"""외부 HTTP 공용 클라이언트 — 연결 재사용(keep-alive), 제공자별 타임아웃, 재시도, 쿠키 미보관 테스트"""
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app import http_client, request_budget
+
+
+@pytest.fixture()
+def stub_server():
+    """HTTP/1.1 keep-alive 스텁 서버. 새 TCP 연결 수와 응답 순서를 기록한다."""
+    state = {'connections': 0, 'statuses': []}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def setup(self):
+            state['connections'] += 1
+            super().setup()
+
+        def do_GET(self):
+            state['hits'] = state.get('hits', 0) + 1
+            status = state['statuses'].pop(0) if state['statuses'] else 200
+            body = b'{"ok": true}'
+            self.send_response(status)
+            if state.get('retry_after'):
+                self.send_header('Retry-After', state['retry_after'])
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('Set-Cookie', 'sid=secret; Path=/')
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{server.server_port}', state
+    server.shutdown()
+    server.server_close()
+
+
+def test_connections_are_reused_across_calls(stub_server):
+    base, state = stub_server
+    for _ in range(5):
+        assert http_client.get(f'{base}/search', 'openlibrary').json() == {'ok': True}
+    assert state['connections'] == 1
+
+
+def test_responses_do_not_leave_cookies_in_shared_session(stub_server):
+    base, _ = stub_server
+    http_client.get(base, 'kakao')
+    assert len(http_client.session().cookies) == 0
+
+
+def test_gateway_errors_are_retried_for_get(stub_server):
+    base, state = stub_server
+    state['statuses'] = [503, 502]
+    assert http_client.get(base, 'naver').status_code == 200
+    state['statuses'] = [503, 503, 503]
+    assert http_client.get(base, 'naver').status_code == 503  # 두 번까지만 재시도하고 마지막 응답을 그대로 반환
+
+
+def test_retries_ignore_retry_after_and_stop_under_a_budget(stub_server):
+    base, state = stub_server
+    state['retry_after'] = '2'
+    state['statuses'] = [503, 503, 503]
+    started = time.monotonic()
+    assert http_client.get(base, 'naver').status_code == 503
+    assert state['hits'] == 3 and time.monotonic() - started < 1.5  # 짧은 백오프만, Retry-After 2초는 무시
+
+    state['hits'], state['statuses'] = 0, [503, 503, 503]
+    token = request_budget.start(1.5)
+    try:
+        started = time.monotonic()
+        assert http_client.get(base, 'naver').status_code == 503
+        assert state['hits'] == 1 and time.monotonic() - started < 1.5  # 예산 안에서는 재시도하지 않는다
+    finally:
+        request_budget.clear(token)
+    state['statuses'] = [503]
+    assert http_client.get(base, 'naver').status_code == 200  # 예산이 없으면 다시 재시도한다
+
+
+def test_provider_timeouts_and_per_process_session(monkeypatch):
+    seen = []
+    monkeypatch.setattr(http_client.session(), 'request', lambda method, url, **kw: seen.append(kw['timeout']))
+    http_client.get('https://dapi.kakao.com/x', 'kakao')
+    http_client.get('https://example.com/x')
+    http_client.get('https://example.com/x', 'kakao', timeout=1)
+    assert seen == [http_client.TIMEOUTS['kakao'], http_client.DEFAULT_TIMEOUT, 1]
+
+    first = http_client.session()
+    assert http_client.session() is first
+    monkeypatch.setattr(http_client.os, 'getpid', lambda: -1)  # fork된 워커 흉내
+    assert http_client.session() is not first
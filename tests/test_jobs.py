@@ -0,0 +1,249 @@
+"""백그라운드 작업 큐(app/jobs.py)와 작업 처리 함수(app/tasks.py) 테스트"""
+from datetime import timedelta
+
+import pytest
+
+from conftest import login_admin, make_book
+
+
+@pytest.fixture()
+def flaky(db):
+    """앞의 fail_times번은 실패하는 테스트용 작업 종류를 등록한다"""
+    from app import jobs
+    calls = []
+
+    def register(fail_times):
+        @jobs.handler('test_flaky', '테스트')
+        def _flaky(job, payload):
+            calls.append(job.attempts)
+            if len(calls) <= fail_times:
+                raise RuntimeError('일시 오류')
+            jobs.report(job, ok=True)
+        return calls
+
+    yield register
+    jobs.HANDLERS.pop('test_flaky', None)
+    jobs.LABELS.pop('test_flaky', None)
+
+
+def _due_now(db, job):
+    """백오프 대기 시간을 건너뛴다"""
+    job.run_at = job.created_at - timedelta(seconds=1)
+    db.session.commit()
+
+
+def test_claim_gives_a_job_to_only_one_worker(db, flaky):
+    from app import jobs
+    flaky(0)
+    job = jobs.enqueue('test_flaky')
+    db.session.commit()
+
+    first = jobs.claim('worker-a')
+    assert first.id == job.id and first.locked_by == 'worker-a' and first.attempts == 1
+    assert jobs.claim('worker-b') is None  # 이미 running — 다른 워커는 못 가져간다
+
+
+def test_failed_job_backs_off_then_fails_after_max_attempts(app, db, flaky):
+    from app import jobs
+    from app.models import Job
+    calls = flaky(fail_times=10)
+    job = jobs.enqueue('test_flaky', max_attempts=3)
+    db.session.commit()
+
+    jobs.work(burst=True)
+    job = db.session.get(Job, job.id)
+    assert job.status == 'queued' and job.attempts == 1 and '일시 오류' in job.last_error
+    assert job.run_at >= job.created_at + timedelta(seconds=jobs.backoff(1) - 1)
+    assert jobs.work(burst=True) == 0  # 백오프 중에는 가져가지 않는다
+
+    for _ in range(2):
+        _due_now(db, job)
+        jobs.work(burst=True)
+    job = db.session.get(Job, job.id)
+    assert job.status == 'failed' and job.attempts == 3 and calls == [1, 2, 3]
+    assert jobs.backoff(1) < jobs.backoff(2) < jobs.backoff(3)
+    assert jobs.backoff(50) == app.config.get('JOB_BACKOFF_MAX', jobs.BACKOFF_MAX)
+
+
+def test_retry_succeeds_and_records_progress(db, flaky):
+    from app import jobs
+    from app.models import Job
+    flaky(fail_times=1)
+    job = jobs.enqueue('test_flaky')
+    db.session.commit()
+    jobs.work(burst=True)
+    _due_now(db, job)
+    jobs.work(burst=True)
+
+    job = db.session.get(Job, job.id)
+    assert job.status == 'done' and job.attempts == 2 and job.progress_data == {'ok': True}
+    assert job.finished_at is not None
+
+
+def test_expired_lease_is_reclaimed_by_another_worker(app, db, flaky):
+    from app import jobs
+    from app.models import Job
+    flaky(0)
+    job = jobs.enqueue('test_flaky')
+    db.session.commit()
+    jobs.claim('dead-worker')  # 가져간 뒤 죽은 워커
+
+    assert jobs.claim('worker-b') is None
+    job = db.session.get(Job, job.id)
+    job.locked_at -= timedelta(seconds=app.config.get('JOB_LEASE_SECONDS', jobs.JOB_LEASE_SECONDS) + 1)
+    db.session.commit()
+
+    assert jobs.work(worker_id='worker-b', burst=True) == 1
+    job = db.session.get(Job, job.id)
+    assert job.status == 'done' and job.attempts == 2
+
+
+def test_unique_enqueue_reuses_pending_job(db, flaky):
+    from app import jobs
+    flaky(0)
+    a = jobs.enqueue('test_flaky', {'x': 1}, unique=True)
+    b = jobs.enqueue('test_flaky', {'x': 1}, unique=True)
+    c = jobs.enqueue('test_flaky', {'x': 2}, unique=True)
+    assert a.id == b.id != c.id
+    with pytest.raises(LookupError):
+        jobs.enqueue('no_such_kind')
+
+
+def test_tag_genres_route_enqueues_and_worker_tags(client, db, app, monkeypatch):
+    """요청은 작업만 넣고 바로 돌아오며, Gemini 호출은 워커에서 일어난다"""
+    import app.routes as routes
+    import app.tasks as tasks
+    from app import jobs
+    from app.models import Book, Job
+    calls = []
+    monkeypatch.setattr(routes, 'GOOGLE_API_KEY', 'test-key')
+    monkeypatch.setattr(tasks, 'auto_tag_genre', lambda title, author, desc: (calls.append(title), ['문학'])[1])
+    book = make_book(db, genre=None)
+    login_admin(client)
+
+    resp = client.post('/admin/tag-genres')
+    assert resp.status_code == 302 and '/admin/jobs' in resp.headers['Location']
+    assert calls == []
+    client.post('/admin/tag-genres')  # 연타해도 작업은 하나
+    assert Job.query.count() == 1
+
+    assert jobs.work(burst=True) == 1
+    assert calls == [book.title]
+    assert db.session.get(Book, book.id).genre == '문학'
+    job = Job.query.one()
+    assert job.status == 'done' and job.progress_data['tagged'] == 1
+
+    page = client.get('/admin/jobs').data.decode()
+    assert '장르 자동 태깅' in page and '완료' in page
+
+
+def test_admin_can_retry_failed_job(client, db, flaky):
+    from app import jobs
+    from app.models import Job
+    flaky(fail_times=1)
+    job = jobs.enqueue('test_flaky', max_attempts=1)
+    db.session.commit()
+    jobs.work(burst=True)
+    assert db.session.get(Job, job.id).status == 'failed'
+
+    login_admin(client)
+    resp = client.post(f'/admin/jobs/{job.id}/retry')
+    assert resp.status_code == 302
+    job = db.session.get(Job, job.id, populate_existing=True)
+    assert job.status == 'queued' and job.attempts == 0
+    assert jobs.work(burst=True) == 1
+    assert db.session.get(Job, job.id, populate_existing=True).status == 'done'
+
+
+def test_worker_cli_burst(app, db, flaky):
+    from app import jobs
+    from app.models import Job
+    flaky(0)
+    jobs.enqueue('test_flaky')
+    jobs.enqueue('test_flaky')
+    db.session.commit()
+
+    result = app.test_cli_runner().invoke(args=['jobs', 'worker', '--burst'])
+    assert result.exit_code == 0, result.output
+    assert '2' in result.output
+    assert {j.status for j in Job.query.all()} == {'done'}
+
+
+def test_unclaimed_job_is_flagged_and_run_by_the_jobs_page(client, db, app, flaky):
+    from app import jobs
+    from app.models import Job
+    calls = flaky(fail_times=0)
+    job = jobs.enqueue('test_flaky')
+    db.session.commit()
+    login_admin(client)
+
+    page = client.get('/admin/jobs').data.decode()
+    assert 'data-stuck-jobs' not in page and calls == []  # 방금 넣은 작업은 워커 몫
+
+    job.run_at = job.run_at - timedelta(seconds=jobs.STUCK_SECONDS + 1)  # 워커 없이 1분 넘게 대기
+    db.session.commit()
+    assert [j.id for j in jobs.stuck()] == [job.id]
+    assert '처리되지 않고 대기 중' in client.get('/admin').data.decode()
+
+    app.config['JOB_INLINE_FALLBACK'] = False
+    assert 'data-stuck-jobs="1"' in client.get('/admin/jobs').data.decode() and calls == []
+
+    app.config['JOB_INLINE_FALLBACK'] = True
+    page = client.get('/admin/jobs').data.decode()
+    assert calls == [1] and db.session.get(Job, job.id, populate_existing=True).status == 'done'
+    assert 'data-stuck-jobs' not in page and jobs.stuck() == []
+
+
+def test_jobs_page_runs_one_book_per_request_then_requeues(client, db, monkeypatch):
+    """요청 안 대체 경로는 작업 전체가 아니라 도서 한 권만 처리하고, 시도 횟수를 쓰지 않고 대기열로 돌린다"""
+    from app import jobs, tasks
+    from app.models import Job
+    calls = []
+    monkeypatch.setattr(tasks, 'auto_tag_genre', lambda title, author, desc: (calls.append(title), ['고전문학'])[1])
+    books = [make_book(db, title=f'미분류{i}', genre=None) for i in range(3)]
+    job = jobs.enqueue('tag_genres')
+    job.run_at = job.run_at - timedelta(seconds=jobs.STUCK_SECONDS + 1)
+    db.session.commit()
+    login_admin(client)
+
+    client.get('/admin/jobs')
+    job = db.session.get(Job, job.id, populate_existing=True)
+    assert calls == [books[0].title] and job.status == 'queued' and job.attempts == 0
+    assert [j.id for j in jobs.stuck()] == [job.id]  # 다음 페이지 요청이 이어서 한다
+
+    client.get('/admin/jobs')
+    client.get('/admin/jobs')
+    assert calls == [b.title for b in books]
+    assert db.session.get(Job, job.id, populate_existing=True).status == 'done'
+
+
+def test_tag_genres_retries_when_any_book_fails(db, monkeypatch):
+    from app import jobs, tasks
+    from app.models import Book, Job
+    tagged = make_book(db, title='성공', genre=None)
+    failed = make_book(db, title='실패', genre=None)
+    monkeypatch.setattr(tasks, 'auto_tag_genre', lambda title, author, desc: ['문학'] if title == '성공' else [])
+    job = jobs.enqueue('tag_genres')
+    db.session.commit()
+
+    jobs.work(burst=True)
+    job = db.session.get(Job, job.id, populate_existing=True)
+    assert job.status == 'queued' and '2권 중 1권' in job.last_error  # 백오프 뒤 남은 도서만 다시
+    assert db.session.get(Book, tagged.id).genre == '문학' and db.session.get(Book, failed.id).genre is None
+
+
+def test_tag_genres_targets_the_same_books_as_the_untagged_filter(client, db, monkeypatch):
+    from app import jobs, routes, tasks
+    calls = []
+    monkeypatch.setattr(routes, 'GOOGLE_API_KEY', 'test-key')
+    monkeypatch.setattr(tasks, 'auto_tag_genre', lambda title, author, desc: (calls.append(title), ['문학'])[1])
+    make_book(db, title='태깅됨', genre='역사')
+    empty = make_book(db, title='빈 장르', genre='')
+    unknown = make_book(db, title='분류표 밖', genre='만화')  # 문자열은 있지만 분류표 장르가 없다
+    login_admin(client)
+
+    listed = client.get('/admin?genre=untagged').data.decode()
+    assert '빈 장르' in listed and '분류표 밖' in listed and '태깅됨' not in listed
+    client.post('/admin/tag-genres')
+    jobs.work(burst=True)
+    assert sorted(calls) == sorted([empty.title, unknown.title])
@@ -0,0 +1,70 @@
+"""목록 화면 컬럼 프로젝션 회귀 테스트 — description / image_data를 SELECT하지 않아야 한다"""
+import re
+
+import pytest
+from sqlalchemy import event
+
+from conftest import login_admin, login_member, make_book, make_user
+from app.models import CartItem
+
+HEAVY_COLUMN = re.compile(r'\bbook(?:_\d+)?\.(image_data|description)\b')
+
+
+@pytest.fixture()
+def sql_log(app, db):
+    statements = []
+
+    def _capture(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', _capture)
+    yield statements
+    event.remove(db.engine, 'before_cursor_execute', _capture)
+
+
+def _heavy(statements):
+    return [s for s in statements if HEAVY_COLUMN.search(s)]
+
+
+@pytest.fixture()
+def catalog(db):
+    books = [make_book(db, title=f'ZZL{i}ZZ', genre='역사', description='긴 큐레이터 노트 ' * 200,
+                       image_data='aGVsbG8=') for i in range(3)]
+    return books
+
+
+@pytest.mark.parametrize('path', ['/', '/?q=ZZL1ZZ', '/?sort=price_asc&genre=역사', '/catalog/page', '/books'])
+def test_storefront_lists_skip_heavy_columns(client, catalog, sql_log, path):
+    resp = client.get(path)
+    assert resp.status_code == 200
+    assert _heavy(sql_log) == []
+
+
+def test_recommendations_and_cart_skip_heavy_columns(client, db, catalog, sql_log):
+    u = make_user(db)
+    u.preferred_genres = '역사'
+    db.session.add(CartItem(user_id=u.id, book_id=catalog[0].id, quantity=1))
+    db.session.commit()
+    login_member(client, u.id, u.name)
+    sql_log.clear()
+
+    body = client.get('/').data.decode()
+    assert '을 위한 추천' in body
+    assert client.get('/cart').status_code == 200
+    assert client.get(f'/checkout').status_code == 200
+    assert _heavy(sql_log) == []
+
+
+def test_admin_list_skips_heavy_columns(client, catalog, sql_log):
+    login_admin(client)
+    sql_log.clear()
+    assert client.get('/admin').status_code == 200
+    assert _heavy(sql_log) == []
+
+
+def test_detail_loads_description_once_and_similar_books_skip_it(client, catalog, sql_log):
+    body = client.get(f'/book/{catalog[0].id}').data.decode()
+    assert '긴 큐레이터 노트' in body
+    heavy = _heavy(sql_log)
+    # 본문 도서 한 건만 description을 함께 읽고, 추천 도서 목록은 읽지 않는다
+    assert len(heavy) == 1 and 'book.image_data' not in heavy[0]
@@ -0,0 +1,98 @@
+"""메인 페이지 커서(키셋) 페이지네이션 / 무한 스크롤 조각 엔드포인트 테스트"""
+import re
+
+import pytest
+
+from conftest import make_book
+from app import catalog
+
+
+def _titles(body):
+    return re.findall(r'ZZP(\d+)ZZ', body)
+
+
+def _walk_all_pages(client, query=''):
+    """첫 페이지(index) → X-Next-Page 조각을 끝까지 따라가며 노출된 도서 번호를 순서대로 모은다."""
+    resp = client.get(f'/?{query}')
+    seen = _titles(resp.data.decode())
+    match = re.search(r'data-next-url="([^"]+)"', resp.data.decode())
+    next_url = match.group(1).replace('&amp;', '&') if match else None
+    while next_url:
+        page = client.get(next_url)
+        assert page.status_code == 200
+        seen += _titles(page.data.decode())
+        next_url = page.headers.get('X-Next-Page')
+    return seen
+
+
+@pytest.fixture()
+def small_pages(monkeypatch):
+    monkeypatch.setattr(catalog, 'PAGE_SIZE', 3)
+
+
+@pytest.mark.parametrize('sort', ['', 'price_asc', 'price_desc', 'year_desc', 'year_asc', 'rating_desc'])
+def test_every_sort_mode_pages_through_without_gaps_or_duplicates(client, db, small_pages, sort):
+    # 가격/연도에 동률을 일부러 섞어 id 동률 처리까지 검증한다
+    for i in range(8):
+        make_book(db, title=f'ZZP{i}ZZ', price=[10000, 20000, 20000, 30000][i % 4], year=[1900, 1950, 1950, 2000][i % 4])
+
+    seen = _walk_all_pages(client, f'sort={sort}')
+    assert sorted(seen, key=int) == [str(i) for i in range(8)]
+    assert len(seen) == len(set(seen))
+
+    from app.models import Book
+    books = {str(i): Book.query.filter_by(title=f'ZZP{i}ZZ').first() for i in range(8)}
+    if sort.startswith('price'):
+        prices = [books[t].price for t in seen]
+        assert prices == sorted(prices, reverse=sort.endswith('desc'))
+    elif sort.startswith('year'):
+        years = [books[t].year for t in seen]
+        assert years == sorted(years, reverse=sort.endswith('desc'))
+    else:
+        ids = [books[t].id for t in seen]
+        assert ids == sorted(ids, reverse=True)
+
+
+def test_pagination_keeps_filters_on_following_pages(client, db, small_pages):
+    for i in range(5):
+        make_book(db, title=f'ZZP{i}ZZ', condition='Fine')
+    for i in range(5, 9):
+        make_book(db, title=f'ZZP{i}ZZ', condition='Good')
+
+    seen = _walk_all_pages(client, 'condition=Fine')
+    assert sorted(seen, key=int) == ['0', '1', '2', '3', '4']
+
+
+def test_first_page_is_limited_to_page_size(client, db, small_pages):
+    for i in range(5):
+        make_book(db, title=f'ZZP{i}ZZ')
+    body = client.get('/').data.decode()
+    assert len(_titles(body)) == 3
+    assert 'data-next-url' in body
+
+
+def test_last_fragment_has_no_next_page_header(client, db):
+    make_book(db, title='ZZP1ZZ')
+    resp = client.get('/catalog/page')
+    assert resp.status_code == 200
+    assert 'ZZP1ZZ' in resp.data.decode()
+    assert 'X-Next-Page' not in resp.headers
+
+
+def test_fragment_rejects_tampered_cursor(client, db):
+    resp = client.get('/catalog/page?cursor=not-a-real-cursor')
+    assert resp.status_code == 400
+
+
+def test_cursor_from_another_sort_mode_is_rejected(client, db):
+    b = make_book(db, title='ZZP1ZZ')
+    cursor = catalog.encode_cursor('price_asc', b)
+    resp = client.get(f'/catalog/page?sort=year_desc&cursor={cursor}')
+    assert resp.status_code == 400
+
+
+def test_index_with_invalid_cursor_falls_back_to_first_page(client, db):
+    make_book(db, title='ZZP1ZZ')
+    resp = client.get('/?cursor=garbage')
+    assert resp.status_code == 200
+    assert 'ZZP1ZZ' in resp.data.decode()
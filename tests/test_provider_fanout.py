@@ -0,0 +1,76 @@
+"""외부 추천 조회 방식 — hedged(오픈라이브러리 → 지연 후 구글 북스 동시 조회) / sequential 테스트"""
+import threading
+import time
+
+import pytest
+
+from app import utils
+from app.utils import search_books_with_fallback
+
+
+def _works(*titles):
+    return [{'title': t, 'author': '한강', 'thumbnail': None, 'link': '#'} for t in titles]
+
+
+@pytest.fixture()
+def providers(db, monkeypatch):
+    """제공자별 지연(초)과 결과를 테스트에서 정한다. 테스트가 끝나면 잠든 호출을 깨워 None(=캐시 안 함)으로 끝낸다."""
+    stop = threading.Event()
+    calls = []
+    setup = {'openlibrary': (0, _works('채식주의자')), 'googlebooks': (0, _works('흰'))}
+
+    def fake(provider):
+        def fetch(author):
+            calls.append(provider)
+            delay, results = setup[provider]
+            if stop.wait(delay):
+                return None
+            return results
+        return fetch
+
+    monkeypatch.setattr(utils, 'fetch_open_library', fake('openlibrary'))
+    monkeypatch.setattr(utils, 'fetch_google_books', fake('googlebooks'))
+    yield calls, setup
+    stop.set()
+
+
+def test_fast_primary_never_hedges(providers):
+    calls, _ = providers
+    assert search_books_with_fallback('책', '작가1', hedge_delay=0.2) == _works('채식주의자')
+    time.sleep(0.3)
+    assert calls == ['openlibrary']
+
+
+def test_slow_primary_is_hedged_and_faster_secondary_wins(providers):
+    calls, setup = providers
+    setup['openlibrary'] = (2, _works('채식주의자'))
+    started = time.monotonic()
+    assert search_books_with_fallback('책', '작가2', hedge_delay=0.05, deadline=1) == _works('흰')
+    assert time.monotonic() - started < 1
+    assert calls == ['openlibrary', 'googlebooks']
+
+
+def test_empty_primary_falls_through_immediately(providers):
+    calls, setup = providers
+    setup['openlibrary'] = (0, [])
+    started = time.monotonic()
+    assert search_books_with_fallback('책', '작가3', hedge_delay=5) == _works('흰')
+    assert time.monotonic() - started < 1  # hedge 지연을 기다리지 않는다
+
+
+def test_deadline_returns_empty_instead_of_waiting(providers):
+    _, setup = providers
+    setup['openlibrary'] = (3, _works('채식주의자'))
+    setup['googlebooks'] = (3, _works('흰'))
+    started = time.monotonic()
+    assert search_books_with_fallback('책', '작가4', hedge_delay=0, deadline=0.2) == []
+    assert time.monotonic() - started < 1
+
+
+def test_sequential_mode_only_calls_fallback_after_primary(app, providers, monkeypatch):
+    calls, setup = providers
+    monkeypatch.setitem(app.config, 'WEB_RECOMMENDATIONS_MODE', 'sequential')
+    assert search_books_with_fallback('책', '작가5') == _works('채식주의자')
+    setup['openlibrary'] = (0, [])
+    assert search_books_with_fallback('책', '작가6') == _works('흰')
+    assert calls == ['openlibrary', 'openlibrary', 'googlebooks']
@@ -0,0 +1,214 @@
+"""Gemini 호출 한도(모델별 공유 토큰 버킷) — burst·간격, 프로세스 간 공유, 429 피드백, 요청 안 대기 상한, 상태 페이지"""
+import multiprocessing
+import time
+from datetime import timedelta
+
+import pytest
+from google.api_core.exceptions import ResourceExhausted
+
+from conftest import login_admin, make_book
+from app import rate_limit, utils
+from app.models import RateBucket
+from app.rate_limit import RateLimited
+
+MODEL = 'test-model'
+
+
+@pytest.fixture()
+def limit(app):
+    """테스트 모델의 한도를 (분당 호출 수, burst)로 잡는다"""
+    def set_limit(per_minute, burst=1):
+        app.config['GEMINI_RATE_LIMITS'] = {MODEL: (per_minute, burst), utils.GEMINI_MODEL: (per_minute, burst)}
+    yield set_limit
+    app.config.pop('GEMINI_RATE_LIMITS', None)
+
+
+def test_burst_then_spaced_at_the_refill_rate(db, limit):
+    limit(600, burst=2)  # 0.1초마다 한 개, 두 개까지 쌓인다
+    assert rate_limit.acquire(MODEL) == 0 and rate_limit.acquire(MODEL) == 0
+    started = time.monotonic()
+    assert rate_limit.acquire(MODEL) > 0
+    assert time.monotonic() - started >= 0.09
+
+    with pytest.raises(RateLimited):
+        rate_limit.acquire(MODEL, max_wait=0)  # 방금 비웠다 — 기다리지 않겠다면 바로 포기
+
+
+def _acquire_in_child(app, count, out):
+    with app.app_context():
+        rate_limit.db.engine.dispose(close=False)  # 부모에게 물려받은 커넥션은 쓰지 않는다
+        for _ in range(count):
+            rate_limit.acquire(MODEL)
+            out.put(time.time())
+
+
+@pytest.mark.skipif('fork' not in multiprocessing.get_all_start_methods(), reason='fork 필요')
+def test_bucket_is_shared_across_processes(app, db, limit):
+    limit(600)  # 0.1초 간격
+    ctx = multiprocessing.get_context('fork')
+    out = ctx.Queue()
+    workers = [ctx.Process(target=_acquire_in_child, args=(app, 3, out)) for _ in range(3)]
+    for w in workers:
+        w.start()
+    stamps = sorted(out.get(timeout=10) for _ in range(9))
+    for w in workers:
+        w.join(timeout=10)
+        assert w.exitcode == 0
+
+    # 세 프로세스를 합쳐도 한도를 넘지 않는다 (9번 = 첫 호출 + 0.1초 간격 8번, 기록 시점의 흔들림은 허용)
+    assert stamps[-1] - stamps[0] >= 0.75
+    assert min(b - a for a, b in zip(stamps, stamps[1:])) >= 0.05
+    assert stamps[-1] - stamps[0] < 2.0  # 그렇다고 고정 sleep처럼 쉬지도 않는다
+
+
+def test_429_pauses_every_caller_until_retry_time(app, db, limit):
+    limit(6000, burst=5)
+    with pytest.raises(ResourceExhausted):
+        with rate_limit.limited(MODEL):
+            raise ResourceExhausted('Quota exceeded. Please retry in 0.6s.')
+
+    bucket = db.session.get(RateBucket, MODEL)
+    assert bucket.throttled == 1 and bucket.tokens == 0
+    assert timedelta(seconds=0.5) < bucket.paused_until - bucket.last_throttled_at <= timedelta(seconds=0.6)
+    with pytest.raises(RateLimited):
+        rate_limit.acquire(MODEL, max_wait=0)
+    rate_limit.acquire(MODEL)
+    assert rate_limit._now() >= bucket.paused_until  # 재시도 시각까지 기다렸다 (경과 초는 부하에 따라 다르다)
+
+    with pytest.raises(ValueError):  # 429가 아닌 실패는 버킷에 영향 없음
+        with rate_limit.limited(MODEL):
+            raise ValueError('bad json')
+    db.session.expire_all()
+    assert db.session.get(RateBucket, MODEL).throttled == 1
+
+
+def test_lost_races_back_off_and_give_up(db, limit, monkeypatch):
+    limit(600)
+    results = iter([None, None, 0.0])
+    sleeps = []
+    monkeypatch.setattr(rate_limit, '_take', lambda *args: next(results))
+    monkeypatch.setattr(rate_limit.time, 'sleep', sleeps.append)
+    rate_limit.acquire(MODEL)
+    assert len(sleeps) == 2 and all(0 <= s <= rate_limit.CAS_BACKOFF for s in sleeps)
+
+    monkeypatch.setattr(rate_limit, '_take', lambda *args: None)  # 매번 다른 프로세스에 진다
+    with pytest.raises(RateLimited):
+        rate_limit.acquire(MODEL)
+    assert len(sleeps) == 2 + rate_limit.CAS_RETRIES
+
+
+def test_request_does_not_wait_past_max_wait(app, db, limit):
+    limit(6000)
+    app.config['GEMINI_RATE_PAUSE'] = 120
+    try:
+        rate_limit.throttled(MODEL)  # 재시도 시각이 없는 429 → GEMINI_RATE_PAUSE초
+        with app.test_request_context('/admin/add'):
+            started = time.monotonic()
+            with pytest.raises(RateLimited):
+                rate_limit.acquire(MODEL)
+            assert time.monotonic() - started < 1
+    finally:
+        app.config.pop('GEMINI_RATE_PAUSE')
+
+
+def test_gemini_helpers_feed_429_back(app, db, limit, monkeypatch):
+    import google.generativeai as genai
+    calls = []
+
+    class QuotaExceeded:
+        def __init__(self, name):
+            pass
+
+        def generate_content(self, prompt, request_options=None):
+            calls.append(time.monotonic())
+            raise ResourceExhausted('Resource has been exhausted (e.g. check quota).')
+
+    limit(6000, burst=5)
+    app.config['GEMINI_RATE_PAUSE'] = 0.3
+    monkeypatch.setenv('GOOGLE_API_KEY', 'test-key')
+    monkeypatch.setattr(genai, 'GenerativeModel', QuotaExceeded)
+    try:
+        assert utils.auto_tag_genre('제목', '저자', None) == []
+        assert utils.generate_curator_note('제목', '저자') is None
+    finally:
+        app.config.pop('GEMINI_RATE_PAUSE')
+
+    assert calls[1] - calls[0] >= 0.25  # 토큰이 남아 있어도 첫 429 뒤에는 멈췄다가 보낸다
+    assert db.session.get(RateBucket, utils.GEMINI_MODEL).throttled == 2
+
+
+def test_breaker_is_checked_before_a_token_is_spent(app, db, limit, monkeypatch):
+    import google.generativeai as genai
+    from app import circuit_breaker
+    from app.models import ProviderHealth
+    calls = []
+
+    class Model:
+        def __init__(self, name):
+            pass
+
+        def generate_content(self, prompt, request_options=None):
+            calls.append(prompt)
+            raise AssertionError('호출하면 안 된다')
+
+    limit(1)  # 분당 1회 — 한 번 쓰면 60초 동안 비어 있다
+    monkeypatch.setenv('GOOGLE_API_KEY', 'test-key')
+    monkeypatch.setattr(genai, 'GenerativeModel', Model)
+    for _ in range(circuit_breaker.DEFAULT_FAILURE_THRESHOLD):
+        circuit_breaker.record_failure('gemini', RuntimeError('장애'))
+    assert utils.auto_tag_genre('제목', '저자', None) == []
+    assert db.session.get(RateBucket, utils.GEMINI_MODEL) is None  # 열린 브레이커 앞에서 토큰을 쓰지 않았다
+
+    circuit_breaker.reset('gemini')
+    rate_limit.acquire(utils.GEMINI_MODEL)  # 버킷을 비운다
+    with app.test_request_context('/admin/add'):
+        assert utils.auto_tag_genre('제목', '저자', None) == []  # 토큰을 못 받아 포기
+    db.session.expire_all()
+    assert calls == [] and db.session.get(ProviderHealth, 'gemini').consecutive_failures == 0
+
+
+def test_jobs_run_from_a_page_view_wait_for_their_turn(app, client, db, limit, monkeypatch):
+    """워커 없는 배포에서 /admin/jobs가 대신 돌리는 작업도 요청 상한(GEMINI_RATE_MAX_WAIT) 없이 차례를 기다린다"""
+    import google.generativeai as genai
+    from app import jobs
+    from app.models import Book, Job
+    calls = []
+
+    class Model:
+        def __init__(self, name):
+            pass
+
+        def generate_content(self, prompt, request_options=None):
+            calls.append(time.monotonic())
+            return type('Response', (), {'text': '["고전문학"]'})()
+
+    limit(600)  # 0.1초마다 한 번 — 두 번째 책부터는 기다려야 한다
+    app.config['GEMINI_RATE_MAX_WAIT'] = 0
+    app.config['JOB_INLINE_STEPS'] = 3  # 한 요청에서 세 권 모두
+    monkeypatch.setenv('GOOGLE_API_KEY', 'test-key')
+    monkeypatch.setattr(genai, 'GenerativeModel', Model)
+    try:
+        for i in range(3):
+            make_book(db, title=f'미분류{i}', genre='')
+        job = jobs.enqueue('tag_genres')
+        job.run_at -= timedelta(seconds=jobs.STUCK_SECONDS + 1)  # 워커 없이 1분 넘게 대기
+        db.session.commit()
+        login_admin(client)
+        client.get('/admin/jobs')
+    finally:
+        app.config.pop('GEMINI_RATE_MAX_WAIT')
+        app.config.pop('JOB_INLINE_STEPS')
+
+    assert len(calls) == 3 and calls[-1] - calls[0] >= 0.18
+    assert db.session.get(Job, job.id, populate_existing=True).status == 'done'
+    assert {b.genre for b in Book.query.populate_existing()} == {'고전문학'}
+
+
+def test_admin_providers_page_shows_buckets(client, db, limit):
+    limit(5)
+    rate_limit.acquire(MODEL)
+    rate_limit.throttled(utils.GEMINI_MODEL, 60)
+    login_admin(client)
+    page = client.get('/admin/providers').data.decode()
+    assert 'Gemini 호출 한도' in page and MODEL in page and '분당 5회' in page
+    assert '까지 멈춤' in page and '429 1회' in page
@@ -0,0 +1,108 @@
+"""요청 단위 지연 예산 — 외부 호출 타임아웃 축소, 예산 소진 시 생략, 스레드 풀 전파 테스트"""
+import threading
+import time
+
+import pytest
+
+from conftest import login_admin, make_book
+from app import http_client, request_budget, utils
+from app.request_budget import BudgetExhausted
+
+
+def test_timeout_is_clamped_to_remaining_budget():
+    assert request_budget.timeout((3.05, 10)) == (3.05, 10)  # 예산이 없으면 그대로
+    token = request_budget.start(0.5)
+    try:
+        connect, read = request_budget.timeout((3.05, 10))
+        assert 0.4 < connect <= 0.5 and read == connect
+        assert request_budget.timeout(0.1) == 0.1
+    finally:
+        request_budget.clear(token)
+
+    token = request_budget.start(0.01)
+    try:
+        with pytest.raises(BudgetExhausted):
+            request_budget.timeout(20)
+    finally:
+        request_budget.clear(token)
+
+
+def test_budget_depends_on_endpoint(app):
+    with app.test_request_context():
+        assert request_budget.budget_for('main.book_web_recommendations') == request_budget.DEFAULT_STOREFRONT_BUDGET
+        assert request_budget.budget_for('main.admin_search_books') == 10.0
+        assert request_budget.budget_for('main.admin_tag_genres') is None  # 일괄 작업은 예산 없음
+        assert request_budget.budget_for('main.oauth_callback') is None    # 토큰 교환은 제공자 타임아웃 그대로
+
+
+def test_oauth_callback_keeps_provider_timeouts(client, monkeypatch):
+    """소셜 로그인 콜백의 토큰 교환·사용자 정보 호출은 스토어 예산(1.5초)으로 줄이지 않는다"""
+    timeouts = []
+
+    class Resp:
+        status_code = 200
+        ok = True
+        def raise_for_status(self): pass
+        def json(self): return {'access_token': 't', 'id': 42, 'kakao_account': {'profile': {'nickname': '회원'}}}
+
+    monkeypatch.setattr(http_client.session(), 'request',
+                        lambda method, url, **kw: (timeouts.append(kw['timeout']), Resp())[1])
+    with client.session_transaction() as sess:
+        sess['oauth_state'] = 'st'
+        sess['oauth_provider'] = 'kakao'
+    resp = client.get('/auth/kakao/callback?code=c&state=st')
+    assert resp.status_code == 302 and '/member/genres' in resp.headers['Location']
+    assert timeouts == [http_client.TIMEOUTS['oauth']] * 2
+
+
+@pytest.fixture()
+def slow_providers(monkeypatch):
+    """제공자가 3초씩 걸리는 상황. 호출 시점에 보인 남은 예산을 기록한다."""
+    stop = threading.Event()
+    seen = []
+
+    def slow(author):
+        seen.append(request_budget.remaining())
+        stop.wait(3)
+        return None
+
+    monkeypatch.setattr(utils, 'fetch_open_library', slow)
+    monkeypatch.setattr(utils, 'fetch_google_books', slow)
+    yield seen
+    stop.set()
+
+
+def test_web_recommendations_degrade_within_storefront_budget(app, client, db, slow_providers, monkeypatch):
+    monkeypatch.setitem(app.config, 'STOREFRONT_REQUEST_BUDGET', 0.3)
+    b = make_book(db, author='느린작가')
+
+    started = time.monotonic()
+    resp = client.get(f'/book/{b.id}/web-recommendations')
+    assert time.monotonic() - started < 1
+    assert resp.status_code == 200 and resp.data.decode().strip() == ''
+
+    # 스레드 풀에서 돈 제공자 호출도 같은 마감 시각을 봤다
+    assert slow_providers and all(left is not None and left <= 0.3 for left in slow_providers)
+
+
+def test_admin_search_sizes_and_skips_provider_calls(app, client, monkeypatch):
+    monkeypatch.setenv('KAKAO_REST_API_KEY', 'test-key')
+    timeouts = []
+
+    class EmptyResp:
+        status_code = 200
+        def raise_for_status(self): pass
+        def json(self): return {}
+
+    monkeypatch.setattr(http_client.session(), 'request', lambda method, url, **kw: (timeouts.append(kw['timeout']), EmptyResp())[1])
+    login_admin(client)
+
+    monkeypatch.setitem(app.config, 'REQUEST_BUDGETS', {'main.admin_search_books': 0.5})
+    assert client.get('/admin/search-books?q=토지').get_json()['items'] == []
+    assert len(timeouts) == 3  # 카카오 → 구글 북스 → 오픈라이브러리 (네이버는 키 없음)
+    assert all(t[1] <= 0.5 for t in timeouts)
+
+    timeouts.clear()
+    monkeypatch.setitem(app.config, 'REQUEST_BUDGETS', {'main.admin_search_books': 0})
+    assert client.get('/admin/search-books?q=토지').get_json()['items'] == []
+    assert timeouts == []  # 예산이 없으면 외부 호출 자체를 보내지 않는다
@@ -58,12 +58,20 @@ def test_restock_trigger_on_admin_edit_when_email_unconfigured(client, db):
     assert r.notified is False
 
 
-def test_restock_trigger_sends_when_email_configured(client, db, monkeypatch):
-    """이메일이 설정된 것처럼 모킹하면 자동 발송되고 notified=True가 되어야 한다"""
+def _fake_email(monkeypatch, sent_to, ok=True):
+    """이메일이 설정된 것처럼 모킹한다. 발송은 작업 큐의 restock_emails 작업(app/tasks.py)이 한다."""
     import app.routes as routes
+    import app.tasks as tasks
+    for module in (routes, tasks):
+        monkeypatch.setattr(module, 'is_email_configured', lambda: True)
+    monkeypatch.setattr(tasks, 'send_email', lambda to, subject, html: (sent_to.append(to), ok)[1])
+
+
+def test_restock_trigger_sends_when_email_configured(client, db, monkeypatch):
+    """이메일이 설정된 것처럼 모킹하면 발송 작업이 예약되고, 워커가 보내면 notified=True가 되어야 한다"""
+    from app import jobs
     sent_to = []
-    monkeypatch.setattr(routes, 'is_email_configured', lambda: True)
-    monkeypatch.setattr(routes, 'send_email', lambda to, subject, html: (sent_to.append(to), True)[1])
+    _fake_email(monkeypatch, sent_to)
 
     b = make_book(db, stock_quantity=0)
     client.post('/notify', data={'book_id': b.id, 'name': 'A', 'email': 'a@example.com'})
@@ -73,6 +81,8 @@ def test_restock_trigger_sends_when_email_configured(client, db, monkeypatch):
         'title': b.title, 'author': b.author, 'year': str(b.year), 'condition': b.condition,
         'edition': '', 'price': str(b.price), 'stock_quantity': '5',
     }, follow_redirects=True)
+    assert '발송을 예약했습니다' in resp.data.decode() and sent_to == []  # 요청 안에서는 보내지 않는다
+    assert jobs.work(burst=True) == 1
     assert sent_to == ['a@example.com']
 
     from app.models import RestockRequest
@@ -83,10 +93,9 @@ def test_restock_trigger_sends_when_email_configured(client, db, monkeypatch):
 
 def test_restock_not_triggered_when_stock_was_already_positive(client, db, monkeypatch):
     """재고가 0이 아니었다가 다른 양수로 바뀌는 건 '재입고'가 아니므로 발송하면 안 된다"""
-    import app.routes as routes
+    from app import jobs
     sent_to = []
-    monkeypatch.setattr(routes, 'is_email_configured', lambda: True)
-    monkeypatch.setattr(routes, 'send_email', lambda to, subject, html: (sent_to.append(to), True)[1])
+    _fake_email(monkeypatch, sent_to)
 
     b = make_book(db, stock_quantity=3)
     # 재고가 있는 상태에서 신청은 보통 없겠지만, 방어적으로 신청이 있다고 가정해도
@@ -100,9 +109,39 @@ def test_restock_not_triggered_when_stock_was_already_positive(client, db, monke
         'title': b.title, 'author': b.author, 'year': str(b.year), 'condition': b.condition,
         'edition': '', 'price': str(b.price), 'stock_quantity': '5',
     })
+    assert jobs.work(burst=True) == 0
     assert sent_to == []
 
 
+def test_restock_send_failure_is_retried_without_duplicates(client, db, monkeypatch, app):
+    """SMTP 실패분만 백오프 뒤 다시 보낸다 — 이미 보낸 신청자에게는 다시 보내지 않는다"""
+    from app import jobs
+    from app.models import Job
+    sent_to, failing = [], {'b@example.com'}
+    _fake_email(monkeypatch, sent_to)
+    import app.tasks as tasks
+    monkeypatch.setattr(tasks, 'send_email', lambda to, subject, html: (sent_to.append(to), to not in failing)[1])
+
+    b = make_book(db, stock_quantity=0)
+    client.post('/notify', data={'book_id': b.id, 'name': 'A', 'email': 'a@example.com'})
+    client.post('/notify', data={'book_id': b.id, 'name': 'B', 'email': 'b@example.com'})
+    login_admin(client)
+    client.post(f'/admin/edit/{b.id}', data={
+        'title': b.title, 'author': b.author, 'year': str(b.year), 'condition': b.condition,
+        'edition': '', 'price': str(b.price), 'stock_quantity': '1',
+    })
+    jobs.work(burst=True)
+    job = Job.query.one()
+    assert (job.status, job.attempts) == ('queued', 1) and 'SMTP' in job.last_error
+
+    failing.clear()
+    job.run_at = job.created_at  # 백오프 시간을 건너뛴다
+    db.session.commit()
+    jobs.work(burst=True)
+    assert sent_to == ['a@example.com', 'b@example.com', 'b@example.com']
+    assert db.session.get(Job, job.id).status == 'done'
+
+
 def test_admin_restock_send_blocked_when_still_out_of_stock(client, db):
     b = make_book(db, stock_quantity=0)
     client.post('/notify', data={'book_id': b.id, 'name': 'A', 'email': 'a@example.com'})
@@ -86,3 +86,87 @@ def test_review_comment_xss_payload_is_escaped_in_html(client, db):
     body = resp.data.decode()
     assert '<script>alert(1)</script>' not in body
     assert '&lt;script&gt;' in body
+
+
+def test_review_writes_keep_book_rating_summary_exact(client, db):
+    b = make_book(db)
+    users = [make_user(db, provider_id=f'u{i}', name=f'리뷰어{i}') for i in range(3)]
+    for u, rating in zip(users, [5, 4, 0]):
+        login_member(client, u.id, u.name)
+        client.post(f'/book/{b.id}/review', data={'rating': str(rating)})
+
+    db.session.refresh(b)
+    assert b.rating_count == 3
+    assert b.rating_avg == 3.0
+    assert b.rating_histogram == [1, 0, 0, 0, 1, 1]
+
+    # 재제출(수정)은 개수를 늘리지 않고 분포만 옮긴다
+    login_member(client, users[2].id, users[2].name)
+    client.post(f'/book/{b.id}/review', data={'rating': '3'})
+    db.session.refresh(b)
+    assert b.rating_count == 3
+    assert b.rating_histogram == [0, 0, 0, 1, 1, 1]
+
+
+def test_review_delete_updates_rating_summary(client, db):
+    from app.models import Review
+    b = make_book(db)
+    u1, u2 = make_user(db, provider_id='a'), make_user(db, provider_id='b')
+    db.session.add_all([Review(book_id=b.id, user_id=u1.id, rating=5),
+                        Review(book_id=b.id, user_id=u2.id, rating=1)])
+    db.session.commit()
+    assert (b.rating_count, b.rating_avg) == (2, 3.0)
+
+    db.session.delete(Review.query.filter_by(user_id=u1.id).first())
+    db.session.commit()
+    db.session.refresh(b)
+    assert (b.rating_count, b.rating_avg) == (1, 1.0)
+    assert b.rating_histogram == [0, 1, 0, 0, 0, 0]
+
+
+def test_backfill_command_recomputes_stale_summaries(app, db):
+    from app.models import Review
+    b = make_book(db)
+    u = make_user(db)
+    db.session.add(Review(book_id=b.id, user_id=u.id, rating=4))
+    db.session.commit()
+    # 요약이 어긋난 기존 데이터를 흉내낸다
+    db.session.execute(db.text("UPDATE book SET rating_count = 0, rating_avg = 0, rating_hist = '0,0,0,0,0,0'"))
+    db.session.commit()
+
+    result = app.test_cli_runner().invoke(args=['catalog', 'backfill-ratings'])
+    assert result.exit_code == 0
+    db.session.refresh(b)
+    assert (b.rating_count, b.rating_avg) == (1, 4.0)
+
+
+def test_index_does_not_load_reviews_per_book(client, db):
+    """목록 화면은 저장된 요약만 읽어야 한다 — review 테이블 조회가 없어야 함 (N+1 제거)"""
+    from sqlalchemy import event
+    from app.models import Review
+    for i in range(3):
+        b = make_book(db, title=f'책{i}')
+        u = make_user(db, provider_id=f'p{i}')
+        db.session.add(Review(book_id=b.id, user_id=u.id, rating=4))
+    db.session.commit()
+
+    statements = []
+    listener = lambda conn, cursor, stmt, *a: statements.append(stmt)
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        body = client.get('/').data.decode()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+    assert '4.0' in body
+    assert not [s for s in statements if 'FROM review' in s]
+
+
+def test_sort_by_rating_descending(client, db):
+    from app.models import Review
+    low, high = make_book(db, title='ZZLOWZZ'), make_book(db, title='ZZHIGHZZ')
+    u = make_user(db)
+    db.session.add_all([Review(book_id=low.id, user_id=u.id, rating=1),
+                        Review(book_id=high.id, user_id=u.id, rating=5)])
+    db.session.commit()
+    body = client.get('/?sort=rating_desc').data.decode()
+    assert body.index('ZZHIGHZZ') < body.index('ZZLOWZZ')
@@ -0,0 +1,73 @@
+"""전문 검색(FTS) 인덱스 기반 스토어 검색 테스트"""
+import re
+
+from conftest import login_admin, make_book
+
+
+def test_fulltext_engine_is_enabled_on_sqlite(app):
+    assert app.config['FULLTEXT_SEARCH'] == 'sqlite_fts5'
+
+
+def test_search_orders_by_relevance(client, db):
+    make_book(db, title='ZZDESCZZ', description='등대 이야기가 짧게 언급되는 산문집')
+    make_book(db, title='등대로 ZZTITLEZZ', author='버지니아 울프')
+    body = client.get('/?q=등대로').data.decode()
+    assert 'ZZTITLEZZ' in body
+    body = client.get('/?q=등대').data.decode()
+    assert body.index('ZZTITLEZZ') < body.index('ZZDESCZZ')
+
+
+def test_search_matches_word_prefix_and_description(client, db):
+    make_book(db, title='호밀밭의 파수꾼', description='홀든 콜필드의 방황')
+    assert '호밀밭의 파수꾼' in client.get('/?q=호밀밭').data.decode()
+    assert '호밀밭의 파수꾼' in client.get('/?q=콜필드').data.decode()
+
+
+def test_search_index_follows_admin_edit_and_delete(client, db):
+    b = make_book(db, title='옛제목ZZ')
+    login_admin(client)
+    client.post(f'/admin/edit/{b.id}', data={
+        'title': '새제목ZZ', 'author': b.author, 'year': str(b.year), 'condition': b.condition,
+        'edition': '', 'price': str(b.price), 'stock_quantity': '1',
+    })
+    assert '새제목ZZ' in client.get('/?q=새제목ZZ').data.decode()
+    assert '일치하는 도서를 찾을 수 없습니다' in client.get('/?q=옛제목ZZ').data.decode()
+
+    client.post(f'/admin/delete/{b.id}')
+    assert '일치하는 도서를 찾을 수 없습니다' in client.get('/?q=새제목ZZ').data.decode()
+
+
+def test_search_with_fts_syntax_characters_does_not_error(client, db):
+    make_book(db, title='정상도서')
+    for q in ['"', 'a AND (b', 'NEAR(x y)', '*', '-', "'; DROP TABLE book; --"]:
+        resp = client.get('/', query_string={'q': q})
+        assert resp.status_code == 200
+
+
+def test_search_combines_with_filters_and_paginates(client, db, monkeypatch):
+    from app import catalog
+    monkeypatch.setattr(catalog, 'PAGE_SIZE', 2)
+    for i in range(5):
+        make_book(db, title=f'연금술사 ZZS{i}ZZ', condition='Fine')
+    make_book(db, title='연금술사 ZZS9ZZ', condition='Good')
+
+    resp = client.get('/?q=연금술사&condition=Fine')
+    seen = re.findall(r'ZZS(\d)ZZ', resp.data.decode())
+    next_url = re.search(r'data-next-url="([^"]+)"', resp.data.decode()).group(1).replace('&amp;', '&')
+    while next_url:
+        page = client.get(next_url)
+        seen += re.findall(r'ZZS(\d)ZZ', page.data.decode())
+        next_url = page.headers.get('X-Next-Page')
+    assert sorted(seen) == ['0', '1', '2', '3', '4']
+
+
+def test_rebuild_search_command_restores_missing_rows(app, db, client):
+    # 제목/저자는 한국어 인메모리 인덱스로도 찾히므로 설명 본문 단어로 FTS 색인만 확인한다
+    make_book(db, title='재색인대상ZZ', description='복원확인용본문')
+    db.session.execute(db.text("INSERT INTO book_fts(book_fts) VALUES ('delete-all')"))
+    db.session.commit()
+    assert '일치하는 도서를 찾을 수 없습니다' in client.get('/?q=복원확인용본문').data.decode()
+
+    result = app.test_cli_runner().invoke(args=['catalog', 'rebuild-search'])
+    assert result.exit_code == 0
+    assert '재색인대상ZZ' in client.get('/?q=복원확인용본문').data.decode()
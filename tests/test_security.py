@@ -7,16 +7,16 @@ from conftest import login_admin, login_member, make_user, make_book
 
 def test_cover_url_ssrf_blocked_for_internal_hosts(client, db, monkeypatch):
     """admin_add_from_search의 cover_url은 신뢰 호스트만 허용해야 한다 (SSRF 방지)"""
-    import requests
+    from app import http_client
     calls = []
-    monkeypatch.setattr(requests, 'get', lambda *a, **k: calls.append(a) or (_ for _ in ()).throw(AssertionError("내부 URL로 요청을 보내면 안 됨")))
+    monkeypatch.setattr(http_client, 'get', lambda *a, **k: calls.append(a) or (_ for _ in ()).throw(AssertionError("내부 URL로 요청을 보내면 안 됨")))
 
     login_admin(client)
     client.post('/admin/add-from-search', data={
         'title': 'SSRF시도', 'author': 'x', 'price': '1000', 'stock_quantity': '1',
         'cover_url': 'http://169.254.169.254/latest/meta-data/',
     })
-    assert calls == []  # requests.get이 호출되지 않아야 함
+    assert calls == []  # 외부 요청이 나가지 않아야 함
 
     from app.models import Book
     book = Book.query.filter_by(title='SSRF시도').first()
@@ -26,9 +26,9 @@ def test_cover_url_ssrf_blocked_for_internal_hosts(client, db, monkeypatch):
 
 def test_cover_url_ssrf_blocked_via_kakaocdn_fname_smuggling(client, db, monkeypatch):
     """upgrade_cover_url이 풀어내는 fname= 내부에 내부망 주소를 숨겨도 차단되어야 한다"""
-    import requests
+    from app import http_client
     calls = []
-    monkeypatch.setattr(requests, 'get', lambda *a, **k: calls.append(a) or (_ for _ in ()).throw(AssertionError("내부 URL로 요청을 보내면 안 됨")))
+    monkeypatch.setattr(http_client, 'get', lambda *a, **k: calls.append(a) or (_ for _ in ()).throw(AssertionError("내부 URL로 요청을 보내면 안 됨")))
 
     login_admin(client)
     smuggled = 'https://search1.kakaocdn.net/thumb/R120x174.q85/?fname=http%3A%2F%2F169.254.169.254%2Flatest%2Fmeta-data'
@@ -41,14 +41,14 @@ def test_cover_url_ssrf_blocked_via_kakaocdn_fname_smuggling(client, db, monkeyp
 
 def test_cover_url_allows_trusted_cdn_host(client, db, monkeypatch):
     """신뢰하는 CDN 호스트는 정상적으로 다운로드를 시도해야 한다 (화이트리스트가 과잉 차단하지 않는지 확인)"""
-    import requests
+    from app import http_client
     calls = []
 
     class FakeResp:
         content = b'\x00'  # 의도적으로 깨진 이미지 — Image.open이 실패해도 요청 자체는 갔는지가 핵심
         def raise_for_status(self): pass
 
-    monkeypatch.setattr(requests, 'get', lambda *a, **k: (calls.append(a[0] if a else k.get('url')), FakeResp())[1])
+    monkeypatch.setattr(http_client, 'get', lambda *a, **k: (calls.append(a[0] if a else k.get('url')), FakeResp())[1])
 
     login_admin(client)
     client.post('/admin/add-from-search', data={
@@ -0,0 +1,102 @@
+"""비슷한 도서 상위 K권 사전 계산 — 점수 순위, 저장/수정/삭제 시 증분 갱신, 전체 재계산 일치 테스트"""
+import random
+
+import pytest
+
+from sqlalchemy import select
+
+from conftest import login_admin, make_book
+from app import similarity
+from app.models import BookSimilarity
+
+
+def _lists():
+    rows = BookSimilarity.query.order_by(BookSimilarity.book_id, BookSimilarity.rank).all()
+    lists = {}
+    for r in rows:
+        lists.setdefault(r.book_id, []).append((round(r.score, 6), r.similar_id))
+    return lists
+
+
+def test_ranked_by_author_genre_era_and_price(client, db):
+    base = make_book(db, title='토지 1권', author='박경리', year=1973, genre='현대소설', price=50000)
+    same_author = make_book(db, title='김약국의 딸들', author='박경리', year=1962, genre='현대소설', price=40000)
+    same_genre = make_book(db, title='광장', author='최인훈', year=1976, genre='현대소설', price=45000)
+    same_era = make_book(db, title='과학혁명의 구조', author='쿤', year=1970, genre='과학/대중과학', price=500000)
+    price_only = make_book(db, title='현대 경영', author='드러커', year=2015, genre='경제/경영', price=50000)
+
+    ranked = [b.id for b in similarity.similar_books(base.id)]
+    assert ranked == [same_author.id, same_genre.id, same_era.id]
+    assert price_only.id not in ranked  # 가격대만 같으면 MIN_SCORE 미만
+
+    body = client.get(f'/book/{base.id}').data.decode()
+    assert body.index('김약국의 딸들') < body.index('광장') < body.index('과학혁명의 구조')
+
+
+@pytest.mark.parametrize('bulk_refresh', [50, 0])  # 후보 조회 경로 / 전체 특징을 한 번 읽는 경로
+def test_incremental_updates_match_full_rebuild(client, db, monkeypatch, bulk_refresh):
+    monkeypatch.setattr(similarity, 'TOP_K', 3)  # 목록이 금방 차서 빠짐/재계산 경로를 타도록
+    monkeypatch.setattr(similarity, 'BULK_REFRESH', bulk_refresh)
+    rng = random.Random(7)
+    authors = ['박경리', '최인훈', '한강', '김훈']
+    genres = ['현대소설', '역사', '인문/교양', '현대소설,역사', '에세이/철학']
+
+    def attrs():
+        return dict(author=rng.choice(authors), year=rng.randint(1950, 2020),
+                    genre=rng.choice(genres), price=rng.choice([20000, 60000, 150000, 400000]))
+
+    books = [make_book(db, title=f'도서{i}', **attrs()) for i in range(15)]
+    login_admin(client)
+    for b in rng.sample(books, 5):
+        a = attrs()
+        client.post(f'/admin/edit/{b.id}', data={
+            'title': b.title, 'author': a['author'], 'year': str(a['year']), 'condition': 'Good',
+            'edition': '', 'price': str(int(a['price'])), 'stock_quantity': '1',
+        })
+    for b in rng.sample(books, 3):
+        b.genre = rng.choice(genres)  # 장르는 관리자 태깅(ORM)으로 바뀐다
+    db.session.commit()
+    for b in rng.sample(books, 3):
+        client.post(f'/admin/delete/{b.id}')
+    make_book(db, title='새 도서', **attrs())
+
+    db.session.expire_all()
+    incremental = _lists()
+    similarity.rebuild()
+    db.session.commit()
+    assert incremental == _lists()
+
+
+def test_candidates_skip_books_that_cannot_reach_min_score(db):
+    base = make_book(db, author='박경리', year=1973, genre='현대소설', price=50000)
+    same_author = make_book(db, author='박경리', year=2010, genre='역사', price=500000)
+    same_era = make_book(db, author='쿤', year=1990, genre='과학/대중과학', price=500000)
+    same_genre = make_book(db, author='한강', year=2014, genre='현대소설', price=500000)
+    unrelated = make_book(db, author='드러커', year=2015, genre='경제/경영', price=50000)
+
+    with db.engine.connect() as conn:
+        target = similarity._load_features(conn, [base.id])[base.id]
+        found = similarity._candidates(conn, target)
+    assert set(found) == {same_author.id, same_era.id, same_genre.id}
+    assert unrelated.id not in found
+
+
+def test_stock_only_changes_do_not_touch_lists(db, monkeypatch):
+    a = make_book(db, author='한강', year=2014)
+    make_book(db, author='한강', year=2016)
+    calls = []
+    monkeypatch.setattr(similarity, 'refresh', lambda *args: calls.append(args))
+    a.stock_quantity = 0
+    db.session.commit()
+    assert calls == []
+
+
+def test_rebuild_command(app, db):
+    a = make_book(db, author='한강', year=2014)
+    b = make_book(db, author='한강', year=2016)
+    db.session.execute(BookSimilarity.__table__.delete())
+    db.session.commit()
+
+    result = app.test_cli_runner().invoke(args=['catalog', 'rebuild-similarity'])
+    assert result.exit_code == 0 and '2권' in result.output
+    assert db.session.execute(select(BookSimilarity.similar_id).where(BookSimilarity.book_id == a.id)).scalars().all() == [b.id]
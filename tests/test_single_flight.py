@@ -0,0 +1,111 @@
+"""같은 외부 조회 합치기(single-flight) — 프로세스 안 Future 공유, 잠금 파일로 워커 간 대기, 요청 예산 테스트"""
+import fcntl
+import os
+import threading
+import time
+
+import pytest
+
+from app import external_cache, request_budget, single_flight, utils
+from app.request_budget import BudgetExhausted
+
+
+def _run_concurrently(n, target):
+    results, barrier = [None] * n, threading.Barrier(n)
+
+    def worker(i):
+        barrier.wait()
+        try:
+            results[i] = target()
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(5)
+    return results
+
+
+def test_concurrent_identical_calls_share_one_execution():
+    calls = []
+
+    def slow():
+        calls.append(1)
+        time.sleep(0.2)
+        return ['결과']
+
+    assert _run_concurrently(5, lambda: single_flight.do('같은키', slow)) == [['결과']] * 5
+    assert len(calls) == 1
+
+    def broken():
+        time.sleep(0.2)
+        raise RuntimeError('제공자 오류')
+
+    results = _run_concurrently(3, lambda: single_flight.do('오류키', broken))
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+def test_waiter_gives_up_when_request_budget_runs_out():
+    release = threading.Event()
+    leader = threading.Thread(target=lambda: single_flight.do('느린키', lambda: release.wait(2)))
+    leader.start()
+    time.sleep(0.05)
+
+    token = request_budget.start(0.1)
+    started = time.monotonic()
+    try:
+        with pytest.raises(BudgetExhausted):
+            single_flight.do('느린키', lambda: 'unused')
+    finally:
+        request_budget.clear(token)
+        release.set()
+        leader.join()
+    assert time.monotonic() - started < 0.5
+
+
+def test_cache_miss_dogpile_sends_one_provider_call(app, db, monkeypatch):
+    calls = []
+
+    def fetch(author):
+        calls.append(author)
+        time.sleep(0.2)
+        return [{'title': '채식주의자', 'author': author, 'thumbnail': None, 'link': '#'}]
+
+    monkeypatch.setattr(utils, 'fetch_open_library', fetch)
+
+    def lookup():
+        with app.app_context():
+            return utils.search_open_library('소년이 온다', '한강')
+
+    results = _run_concurrently(6, lookup)
+    assert all(r == results[0] and r[0]['title'] == '채식주의자' for r in results)
+    assert calls == ['한강']
+
+
+def test_other_worker_holding_the_lock_fills_the_cache(app, db, tmp_path, monkeypatch):
+    """다른 워커가 잠금 파일을 쥐고 같은 키를 받는 중이면, 끝날 때까지 기다렸다가 그 값을 읽는다."""
+    monkeypatch.setitem(app.config, 'SINGLE_FLIGHT_LOCK_DIR', str(tmp_path))
+    key = external_cache.cache_key('openlibrary', '한강')
+    lock_key = ('external-cache', key)
+    with single_flight.file_lock(lock_key):
+        pass
+    lock_path = os.path.join(str(tmp_path), os.listdir(tmp_path)[0])
+    locked = threading.Event()
+
+    def other_worker():
+        with open(lock_path, 'a') as f, app.app_context():
+            fcntl.flock(f, fcntl.LOCK_EX)
+            locked.set()
+            time.sleep(0.2)
+            external_cache.store(key, [{'title': '흰'}])
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+    worker = threading.Thread(target=other_worker)
+    worker.start()
+    locked.wait(1)
+    loader_calls = []
+    assert external_cache.cached(key, lambda: loader_calls.append(1) or [{'title': '중복 호출'}]) == [{'title': '흰'}]
+    assert loader_calls == []
+    worker.join()
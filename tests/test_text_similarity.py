@@ -0,0 +1,122 @@
+"""소개글 TF-IDF 유사 도서 — 토크나이저, 코사인 순위, 소개글 수정/삭제 시 증분 갱신(작업 큐), 전체 재계산 일치"""
+from conftest import login_admin, make_book
+from app import jobs, text_similarity
+from app.models import Book, BookTextSimilarity, Job
+
+WAR = '한국전쟁 피란민 가족이 부산 피란 시절을 견디는 이야기. 전쟁의 상흔과 피란 생활을 그린다.'
+WAR_2 = '한국전쟁 당시 피란길에 오른 형제의 이야기. 부산 피란민 수용소의 생활과 전쟁의 상처.'
+SPACE = '우주 탐사선이 목성 궤도에 진입하며 벌어지는 과학 소설. 우주 비행사와 인공지능의 대화.'
+SPACE_2 = '우주 비행사가 화성 궤도에서 고립된다. 과학 지식으로 우주 생존을 모색하는 소설.'
+COOKING = '제철 채소와 된장으로 차리는 집밥 요리책. 나물 무침과 국 끓이는 법을 담았다.'
+
+
+def _lists():
+    lists = {}
+    for r in BookTextSimilarity.query.order_by(BookTextSimilarity.book_id, BookTextSimilarity.rank):
+        lists.setdefault(r.book_id, []).append((round(r.score, 6), r.similar_id))
+    return lists
+
+
+def _refresh_queued(db):
+    """저장할 때 쌓인 갱신 작업을 워커처럼 처리한다."""
+    jobs.work(burst=True)
+    db.session.expire_all()
+
+
+def test_tokenize_korean_bigrams_and_words():
+    assert text_similarity.tokenize('호밀밭의 Catcher, the Rye!') == ['호밀', '밀밭', '밭의', 'catcher', 'rye']
+    assert text_similarity.tokenize(None) == []
+
+
+def test_ranked_by_description_cosine(client, db):
+    war = make_book(db, title='피란', author='가', year=1990, description=WAR)
+    war_2 = make_book(db, title='형제', author='나', year=1955, description=WAR_2)
+    space = make_book(db, title='목성', author='다', year=2010, description=SPACE)
+    make_book(db, title='화성', author='라', year=2015, description=SPACE_2)
+    make_book(db, title='집밥', author='마', year=2021, description=COOKING)
+    make_book(db, title='소개글 없음', author='바', year=2000)
+    _refresh_queued(db)
+
+    assert [b.id for b in text_similarity.similar_books(war.id)] == [war_2.id]
+    assert [b.id for b in text_similarity.similar_books(space.id)][0] != war.id
+
+    body = client.get(f'/book/{war.id}').data.decode()
+    section = body[body.index('id="text-similar-books"'):]
+    assert '형제' in section and '집밥' not in section
+
+
+def test_description_edit_and_delete_refresh_lists(client, db):
+    war = make_book(db, title='피란', author='가', year=1990, description=WAR)
+    other = make_book(db, title='요리', author='나', year=2021, description=COOKING)
+    _refresh_queued(db)
+    assert text_similarity.similar_books(war.id) == []
+
+    login_admin(client)
+    client.post(f'/admin/edit/{other.id}', data={
+        'title': '요리', 'author': '나', 'year': '2021', 'condition': 'Good', 'edition': '',
+        'price': '10000', 'stock_quantity': '1', 'description': WAR_2,
+    })
+    assert text_similarity.similar_books(war.id) == []  # 저장 요청 안에서는 계산하지 않는다
+    _refresh_queued(db)
+    assert [b.id for b in text_similarity.similar_books(war.id)] == [other.id]
+
+    client.post(f'/admin/delete/{other.id}')
+    _refresh_queued(db)
+    assert BookTextSimilarity.query.count() == 0
+
+
+def test_incremental_updates_match_full_rebuild(client, db, monkeypatch):
+    monkeypatch.setattr(text_similarity, 'TOP_K', 2)  # 목록이 금방 차서 빠짐/재계산 경로를 타도록
+    texts = [WAR, WAR_2, SPACE, SPACE_2, COOKING, WAR + SPACE, SPACE_2 + COOKING, WAR_2 + COOKING]
+    books = [make_book(db, title=f'도서{i}', description=t) for i, t in enumerate(texts)]
+
+    books[1].description = SPACE          # 다른 군집으로 이동
+    books[4].description = None           # 소개글 삭제
+    db.session.commit()
+    db.session.delete(books[2])
+    db.session.commit()
+    _refresh_queued(db)
+    newest = make_book(db, title='새 도서', description=WAR_2)
+
+    _refresh_queued(db)
+    incremental = _lists()
+    text_similarity.rebuild()
+    db.session.commit()
+    rebuilt = _lists()
+    # 마지막에 바뀐 도서는 지금의 IDF로 계산되었으므로 재계산 결과와 점수까지 같다
+    assert incremental[newest.id] == rebuilt[newest.id]
+    # 바뀌지 않은 도서 쌍은 옛 IDF 점수가 남아 순서는 다를 수 있어도, 이웃 구성은 같다
+    assert {k: {b for _, b in v} for k, v in incremental.items()} == {k: {b for _, b in v} for k, v in rebuilt.items()}
+    assert books[4].id not in rebuilt and Book.query.count() == 8
+
+
+def test_note_job_refreshes_once_at_the_end(db, monkeypatch):
+    from app import jobs, tasks
+    texts = [WAR, SPACE, COOKING, WAR_2[:20], SPACE_2[:20]]
+    books = [make_book(db, title=f'도서{i}', description=t) for i, t in enumerate(texts)]
+    _refresh_queued(db)
+    notes = {books[3].title: WAR_2, books[4].title: SPACE_2}
+    monkeypatch.setattr(tasks, 'generate_curator_note', lambda title, author, desc: notes.get(title))
+    calls = []
+    refresh = text_similarity.refresh
+    monkeypatch.setattr(text_similarity, 'refresh', lambda conn, *ids: (calls.append(ids), refresh(conn, *ids))[1])
+
+    jobs.enqueue('regenerate_notes')
+    db.session.commit()
+    assert jobs.work(burst=True) == 1
+    assert len(calls) == 1 and calls[0][0] == {books[3].id, books[4].id}  # 책마다 커밋해도 갱신은 한 번
+    db.session.expire_all()
+    assert [b.id for b in text_similarity.similar_books(books[0].id)] == [books[3].id]
+    assert [b.id for b in text_similarity.similar_books(books[1].id)] == [books[4].id]
+
+
+def test_queued_refreshes_merge_into_one(db, monkeypatch):
+    books = [make_book(db, title=f'도서{i}', description=t) for i, t in enumerate((WAR, SPACE, COOKING))]
+    assert Job.query.filter_by(kind=text_similarity.REFRESH_JOB).count() == 3  # 커밋마다 작업 하나
+    calls = []
+    refresh = text_similarity.refresh
+    monkeypatch.setattr(text_similarity, 'refresh', lambda conn, *ids: (calls.append(ids), refresh(conn, *ids))[1])
+
+    assert jobs.work(burst=True) == 1  # 첫 작업이 나머지를 흡수한다
+    assert len(calls) == 1 and calls[0][0] == {b.id for b in books}
+    assert Job.query.filter_by(status='done').count() == 3